@@ -22,6 +22,9 @@ class MonitoringConfig:
     PROMETHEUS_ENABLED: bool = os.getenv("PROMETHEUS_ENABLED", "true").lower() == "true"
     PROMETHEUS_PORT: int = int(os.getenv("PROMETHEUS_PORT", "9090"))
     PROMETHEUS_PATH: str = os.getenv("PROMETHEUS_PATH", "/metrics")
+    # Per-user labels: only the top K users get their own series
+    PROMETHEUS_TOP_USERS: int = int(os.getenv("PROMETHEUS_TOP_USERS", "20"))
+    PROMETHEUS_MAX_USER_SERIES: int = int(os.getenv("PROMETHEUS_MAX_USER_SERIES", "5000"))
 
     # Application Monitoring
     APP_NAME: str = "cognie-ai"
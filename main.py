@@ -12,7 +12,7 @@ import os
 import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 
@@ -21,12 +21,13 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from middleware.error_handler import setup_error_handlers
-from middleware.logging import setup_logging
+from middleware.instrumentation import setup_instrumentation
 from middleware.rate_limit import setup_rate_limiting
 
 # Import routes
 from routes import (
     ai,
+    ai_study_coach,
     analytics,
     auth,
     calendar,
@@ -56,10 +57,13 @@ except ImportError as e:
     EXAM_PAPERS_ENABLED = False
     exam_papers_router = None
 from services.background_workers import background_worker, job_scheduler
+from services.performance import performance_monitor as endpoint_monitor
 from services.performance_monitor import get_performance_monitor
 
 # Import enhanced services
+from services.http_pool import get_http_pool
 from services.redis_cache import enhanced_cache
+from services.supabase import get_async_supabase_client
 
 
 @asynccontextmanager
@@ -86,6 +90,7 @@ async def lifespan(app: FastAPI):
         # Initialize Redis cache with health monitoring
         # This provides fast data access and session storage
         await enhanced_cache.start_health_check()
+        await enhanced_cache.start_invalidation_listener()
         logger.info("Enhanced Redis cache started")
 
         # Start background workers for async task processing
@@ -126,6 +131,10 @@ async def lifespan(app: FastAPI):
 
         performance_monitor.add_alert_handler(alert_handler)
 
+        # Share per-endpoint latency sketches across workers through Redis
+        await endpoint_monitor.start_sync()
+        logger.info("Endpoint latency sketch sync started")
+
         logger.info("Cognie AI Personal Assistant started successfully!")
 
     except Exception as e:
@@ -141,6 +150,7 @@ async def lifespan(app: FastAPI):
     try:
         # Stop performance monitoring first to prevent new metrics
         await get_performance_monitor().stop()
+        await endpoint_monitor.stop_sync()
         logger.info("Performance monitoring stopped")
 
         # Stop job scheduler to prevent new scheduled tasks
@@ -155,6 +165,14 @@ async def lifespan(app: FastAPI):
         await enhanced_cache.close()
         logger.info("Enhanced Redis cache stopped")
 
+        # Close pooled Supabase connections used by async routes
+        await get_async_supabase_client().close()
+        logger.info("Async Supabase client stopped")
+
+        # Close keep-alive connections to AI providers and external APIs
+        await get_http_pool().close()
+        logger.info("Outbound HTTP pools stopped")
+
         logger.info("Cognie AI Personal Assistant stopped successfully!")
 
     except Exception as e:
@@ -190,51 +208,10 @@ app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # Setup custom middleware
 setup_error_handlers(app)
-setup_logging(app)
 setup_rate_limiting(app)
 
-
-# Performance monitoring middleware
-@app.middleware("http")
-async def performance_middleware(request: Request, call_next):
-    """
-    Middleware to monitor request performance and add performance headers.
-
-    This middleware tracks request duration, status codes, and adds performance
-    headers to responses for monitoring and debugging purposes.
-
-    Args:
-        request (Request): The incoming HTTP request
-        call_next: The next middleware or route handler in the chain
-
-    Returns:
-        Response: The HTTP response with performance headers added
-    """
-    # Record start time for performance measurement
-    start_time = time.time()
-
-    # Process the request through the middleware chain
-    response = await call_next(request)
-
-    # Calculate request duration in seconds
-    duration = time.time() - start_time
-
-    # Record request metrics for monitoring and analytics
-    # This data is used for performance analysis and alerting
-    await get_performance_monitor().record_request(
-        method=request.method,
-        path=request.url.path,
-        status_code=response.status_code,
-        duration=duration,
-    )
-
-    # Add performance headers for client-side monitoring
-    # X-Response-Time: Request duration for debugging
-    # X-Request-ID: Unique identifier for request tracing
-    response.headers["X-Response-Time"] = str(duration)
-    response.headers["X-Request-ID"] = str(time.time())
-
-    return response
+# Request timing, metrics and access logs in one outermost layer
+setup_instrumentation(app)
 
 
 # Health check endpoint
@@ -414,6 +391,7 @@ app.include_router(
     notifications.router, prefix="/api/notifications", tags=["Notifications"]
 )
 app.include_router(ai.router, prefix="/api/ai", tags=["AI Services"])
+app.include_router(ai_study_coach.router)  # Prefix /api/ai-study-coach set on the router
 app.include_router(generate.router, prefix="/api/generate", tags=["Content Generation"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 app.include_router(mood.router, prefix="/api/mood", tags=["Mood Tracking"])
@@ -1,14 +1,17 @@
+import asyncio
+
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from config import security as security_config
+from services.principal_cache import principal_cache
 from services.supabase import get_supabase_client
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Get current user from JWT token using Supabase Auth"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -27,18 +30,29 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     except jwt.PyJWTError:
         raise credentials_exception
 
-    # Get user from Supabase public.users table
+    # Serve the principal from cache to skip the database round-trip
+    cached_user = await principal_cache.get(email)
+    if cached_user is not None:
+        return cached_user
+
+    # Get user from Supabase public.users table without blocking the event loop
     supabase = get_supabase_client()
-    result = supabase.table("users").select("*").eq("email", email).execute()
+    result = await asyncio.to_thread(
+        supabase.table("users").select("*").eq("email", email).execute
+    )
 
     if not result.data:
         raise credentials_exception
 
     user_data = result.data[0]
+    if not user_data.get("is_active", True):
+        raise credentials_exception
 
     # Return user data as dict for compatibility with routes
-    return {
+    principal = {
         "id": user_data["id"],
         "email": user_data["email"],
         "role": user_data.get("role", "user")
     }
+    await principal_cache.set(email, principal)
+    return principal
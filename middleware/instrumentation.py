@@ -0,0 +1,186 @@
+"""
+Request Instrumentation Middleware
+- One pure-ASGI layer: no BaseHTTPMiddleware task group, no body wrapping
+- Measures each request once and fans the sample out to in-memory hooks
+- Prometheus, the performance monitors and structured logs are hooks
+- Labels by route template (/tasks/{task_id}), never by raw path
+"""
+
+import logging
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.performance import performance_monitor as endpoint_monitor
+from services.performance_monitor import get_performance_monitor
+from services.prometheus_integration import get_prometheus_service
+
+logger = logging.getLogger(__name__)
+
+# Route label for requests no route matched, so 404 scans stay one series
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass(slots=True)
+class RequestSample:
+    """One measured request, shared by every hook"""
+
+    request_id: str
+    method: str
+    route: str
+    path: str
+    status_code: int
+    duration: float
+    client_ip: str | None = None
+    user_id: str | None = None
+    error: BaseException | None = None
+
+
+RequestHook = Callable[[RequestSample], None]
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route that handled the request"""
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    template = getattr(route, "path_format", None) or getattr(route, "path", "")
+    return scope.get("root_path", "") + template
+
+
+class InstrumentationMiddleware:
+    """Times each HTTP request once and hands the result to hooks.
+
+    Hooks run after the response is sent, are synchronous and must be
+    cheap; a failing hook is logged and never affects the response.
+    ``X-Request-ID`` and ``X-Response-Time`` (time to response headers)
+    are added to every response.
+    """
+
+    def __init__(self, app: ASGIApp, hooks: list[RequestHook] | None = None):
+        self.app = app
+        self.hooks = hooks if hooks is not None else default_hooks()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Request-ID", request_id)
+                headers.append("X-Response-Time", f"{time.perf_counter() - start:.6f}")
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_with_headers)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            client = scope.get("client")
+            state = scope.get("state") or {}
+            user = state.get("user")
+            user_id = state.get("user_id") or (
+                user.get("id") if isinstance(user, dict) else None
+            )
+            sample = RequestSample(
+                request_id=request_id,
+                method=scope["method"],
+                route=route_template(scope),
+                path=scope["path"],
+                status_code=status_code,
+                duration=time.perf_counter() - start,
+                client_ip=client[0] if client else None,
+                user_id=user_id,
+                error=error,
+            )
+            for hook in self.hooks:
+                try:
+                    hook(sample)
+                except Exception as e:
+                    logger.warning(f"Request hook {hook!r} failed: {e}")
+
+
+def prometheus_hook(sample: RequestSample) -> None:
+    prometheus = get_prometheus_service()
+    prometheus.record_http_request(
+        method=sample.method,
+        endpoint=sample.route,
+        status=sample.status_code,
+        duration=sample.duration,
+        user_id=sample.user_id,
+    )
+    if sample.error is not None:
+        prometheus.record_error(
+            error_type=sample.error.__class__.__name__,
+            endpoint=sample.route,
+            severity="high",
+        )
+
+
+def endpoint_latency_hook(sample: RequestSample) -> None:
+    endpoint_monitor.record_request(
+        sample.route, sample.method, sample.duration, sample.status_code
+    )
+
+
+def performance_monitor_hook(sample: RequestSample) -> None:
+    get_performance_monitor().observe_request(
+        sample.method, sample.route, sample.status_code, sample.duration
+    )
+
+
+def access_log_hook(sample: RequestSample) -> None:
+    """One structured log record per request"""
+    if sample.status_code >= 500 or sample.error is not None:
+        level = logging.ERROR
+    elif sample.status_code >= 400:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(
+        level,
+        "Request completed",
+        extra={
+            "request_data": {
+                "request_id": sample.request_id,
+                "method": sample.method,
+                "route": sample.route,
+                "path": sample.path,
+                "status_code": sample.status_code,
+                "process_time_ms": round(sample.duration * 1000, 2),
+                "client_ip": sample.client_ip,
+                "error": str(sample.error) if sample.error else None,
+            }
+        },
+    )
+
+
+def default_hooks() -> list[RequestHook]:
+    return [
+        prometheus_hook,
+        endpoint_latency_hook,
+        performance_monitor_hook,
+        access_log_hook,
+    ]
+
+
+def setup_instrumentation(app, hooks: list[RequestHook] | None = None) -> None:
+    """Install the instrumentation middleware as the outermost layer"""
+    app.add_middleware(InstrumentationMiddleware, hooks=hooks)
+    logger.info("Instrumentation middleware configured")
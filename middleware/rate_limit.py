@@ -1,17 +1,20 @@
 """
 Rate Limiting Middleware with Enhanced Redis Cache
 - Global rate limiting
+- Atomic GCRA limits: one Redis round trip per request, none for floods
 - User-specific rate limiting
 - Enhanced Redis integration
-- Performance monitoring
+- Pure ASGI: no per-request task group or metric for allowed requests
 """
 
 import logging
-import time
+import math
 
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from services.gcra import GCRARateLimiter, RateLimit, RateLimitDecision
 from services.performance_monitor import get_performance_monitor
 from services.redis_cache import enhanced_cache
 
@@ -19,7 +22,12 @@ logger = logging.getLogger(__name__)
 
 
 class RateLimiter:
-    """Enhanced rate limiter with Redis backend"""
+    """Enhanced rate limiter with Redis backend.
+
+    Clients get ``requests_per_minute`` sustained, at most ``burst_limit``
+    back to back, and ``requests_per_hour`` overall, all enforced by one
+    GCRA script call per request.
+    """
 
     def __init__(
         self,
@@ -27,88 +35,47 @@ class RateLimiter:
         requests_per_hour: int = 1000,
         burst_limit: int = 10,
         window_size: int = 60,
+        prefilter: bool = True,
     ):
         self.requests_per_minute = requests_per_minute
         self.requests_per_hour = requests_per_hour
         self.burst_limit = burst_limit
         self.window_size = window_size
+        self.limiter = GCRARateLimiter(
+            "rate_limit",
+            [
+                RateLimit("minute", requests_per_minute, window_size, burst_limit),
+                RateLimit("hour", requests_per_hour, 3600),
+            ],
+            prefilter=prefilter,
+        )
 
-    async def check_rate_limit(self, identifier: str) -> bool:
-        """Check if request is within rate limits"""
+    async def acquire(self, identifier: str) -> RateLimitDecision:
+        """Admit a request if it is within rate limits"""
+        client = enhanced_cache.client
+        if client is not None and not enhanced_cache.circuit_breaker.can_execute():
+            client = None
         try:
-            current_time = int(time.time())
-            window_start = current_time - self.window_size
-
-            # Get current request count
-            key = f"rate_limit:{identifier}:{window_start}"
-            current_count = await enhanced_cache.get("rate_limit", key) or 0
-
-            # Check limits
-            if current_count >= self.requests_per_minute:
-                return False
-
-            # Increment counter
-            await enhanced_cache.set(
-                "rate_limit", current_count + 1, self.window_size, key
-            )
-
-            return True
-
+            return await self.limiter.acquire(identifier, client)
         except Exception as e:
             logger.error(f"Rate limit check error: {e}")
             # Allow request if rate limiting fails
-            return True
-
-    async def check_burst_limit(self, identifier: str) -> bool:
-        """Check burst limit for rapid requests"""
-        try:
-            current_time = int(time.time())
-            burst_window = 10  # 10 seconds for burst detection
-
-            # Get burst count
-            key = f"burst_limit:{identifier}:{current_time // burst_window}"
-            burst_count = await enhanced_cache.get("rate_limit", key) or 0
-
-            if burst_count >= self.burst_limit:
-                return False
-
-            # Increment burst counter
-            await enhanced_cache.set("rate_limit", burst_count + 1, burst_window, key)
-
-            return True
-
-        except Exception as e:
-            logger.error(f"Burst limit check error: {e}")
-            return True
+            return RateLimitDecision(True)
 
 
 # Global rate limiter instance
 rate_limiter = RateLimiter()
 
 
-async def rate_limit_middleware(request: Request, call_next) -> None:
-    """Rate limiting middleware"""
+async def _refusal(request: Request) -> JSONResponse | None:
+    """429 response if the client is over its limits, else None"""
     try:
         # Get client identifier
         client_id = _get_client_identifier(request)
 
-        # Check burst limit first
-        burst_allowed = await rate_limiter.check_burst_limit(client_id)
-        if not burst_allowed:
-            await get_performance_monitor().record_metric(
-                "rate_limit_burst_exceeded", 1, "requests", {"client_id": client_id}
-            )
-            return JSONResponse(
-                status_code=429,
-                content={
-                    "detail": "Too many requests in short time. Please slow down.",
-                    "retry_after": 10,
-                },
-            )
-
-        # Check rate limit
-        rate_allowed = await rate_limiter.check_rate_limit(client_id)
-        if not rate_allowed:
+        decision = await rate_limiter.acquire(client_id)
+        if not decision.allowed:
+            retry_after = max(1, math.ceil(decision.retry_after))
             await get_performance_monitor().record_metric(
                 "rate_limit_exceeded", 1, "requests", {"client_id": client_id}
             )
@@ -116,23 +83,38 @@ async def rate_limit_middleware(request: Request, call_next) -> None:
                 status_code=429,
                 content={
                     "detail": "Rate limit exceeded. Please try again later.",
-                    "retry_after": 60,
+                    "retry_after": retry_after,
                 },
+                headers={"Retry-After": str(retry_after)},
             )
+    except Exception as e:
+        logger.error(f"Rate limiting middleware error: {e}")
 
-        # Record successful request
-        await get_performance_monitor().record_metric(
-            "rate_limit_allowed", 1, "requests", {"client_id": client_id}
-        )
+    # Continue with request, also if rate limiting fails
+    return None
 
-        # Continue with request
-        response = await call_next(request)
-        return response
 
-    except Exception as e:
-        logger.error(f"Rate limiting middleware error: {e}")
-        # Continue with request if rate limiting fails
-        return await call_next(request)
+async def rate_limit_middleware(request: Request, call_next) -> None:
+    """Rate limiting middleware"""
+    refusal = await _refusal(request)
+    if refusal is not None:
+        return refusal
+    return await call_next(request)
+
+
+class RateLimitMiddleware:
+    """Pure ASGI rate limiting; allowed requests pass straight through"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            refusal = await _refusal(Request(scope))
+            if refusal is not None:
+                await refusal(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
 
 
 def _get_client_identifier(request: Request) -> str:
@@ -153,5 +135,5 @@ def _get_client_identifier(request: Request) -> str:
 
 def setup_rate_limiting(app) -> None:
     """Setup rate limiting middleware"""
-    app.middleware("http")(rate_limit_middleware)
+    app.add_middleware(RateLimitMiddleware)
     logger.info("Rate limiting middleware configured")
@@ -1,6 +1,7 @@
 # Routes package initialization
 from . import (
     ai,
+    ai_study_coach,
     analytics,
     auth,
     calendar,
@@ -24,6 +25,7 @@ from . import (
 
 __all__ = [
     "ai",
+    "ai_study_coach",
     "analytics",
     "auth",
     "calendar",
@@ -6,16 +6,21 @@ from typing import Any
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from pydantic import BaseModel, confloat
 
+from services.ai.context_assembler import build_user_context
 from services.ai.hybrid_ai_service import TaskType, get_hybrid_ai_service
+from services.ai.openai_service import get_openai_service
 from services.ai_cache import ai_cache_service, ai_cached, invalidate_ai_cache_for_user
 from services.auth import get_current_user
 from services.background_workers import (
+    TaskRejectedError,
     background_task,
     background_worker,
     scheduled_job,
 )
 from services.cost_tracking import cost_tracking_service
 from services.performance_monitor import monitor_performance
+from services.sse import sse_response
+from services.stripe_service import stripe_service
 from services.supabase import get_supabase_client
 
 # Set up logging
@@ -98,41 +103,16 @@ class AISuggestionRequest(BaseModel):
     parameters: dict[str, Any] | None = None
 
 
+class ChatStreamRequest(BaseModel):
+    message: str
+    conversation_history: list[dict[str, Any]] = []
+
+
 async def _get_user_context(user_id: str) -> dict[str, Any]:
     """Get user context data for AI operations"""
     try:
-        supabase = get_supabase_client()
-
-        # Fetch user's recent data in parallel
-        tasks_result = (
-            supabase.table("tasks")
-            .select("*")
-            .eq("user_id", user_id)
-            .limit(20)
-            .execute()
-        )
-        goals_result = (
-            supabase.table("goals")
-            .select("*")
-            .eq("user_id", user_id)
-            .limit(10)
-            .execute()
-        )
-        schedule_result = (
-            supabase.table("schedule_blocks")
-            .select("*")
-            .eq("user_id", user_id)
-            .limit(15)
-            .execute()
-        )
-
-        return {
-            "tasks": tasks_result.data or [],
-            "goals": goals_result.data or [],
-            "schedule_blocks": schedule_result.data or [],
-            "user_id": user_id,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
+        # Fetch user's recent data in parallel, each source under its own deadline
+        return await build_user_context(user_id)
     except Exception as e:
         logger.error(f"Error getting user context: {e}")
         return {"user_id": user_id, "timestamp": datetime.utcnow().isoformat()}
@@ -991,6 +971,31 @@ Generate summary in JSON format:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/chat/stream", summary="Stream a conversational AI reply")
+async def chat_stream(
+    request: ChatStreamRequest, current_user: dict = Depends(get_current_user)
+):
+    """Stream a conversational reply as Server-Sent Events.
+
+    Emits ``token`` events with ``{"text": ...}`` as the reply is generated,
+    then ``done`` (or ``error`` if every provider fails).
+    """
+    budget_check = await cost_tracking_service.check_budget_limits(current_user["id"])
+    if budget_check["daily_exceeded"] or budget_check["monthly_exceeded"]:
+        raise HTTPException(status_code=429, detail="Budget limit exceeded")
+
+    user_context = await _get_user_context(current_user["id"])
+
+    return sse_response(
+        get_openai_service().conversational_ai_chat_stream(
+            user_message=request.message,
+            user_id=current_user["id"],
+            conversation_history=request.conversation_history,
+            user_context=user_context,
+        )
+    )
+
+
 # Cache management endpoints
 @router.post("/cache/invalidate", summary="Invalidate AI cache for user")
 async def invalidate_cache(
@@ -1016,6 +1021,8 @@ async def get_cache_stats(current_user: dict = Depends(get_current_user)):
     """Get AI cache statistics"""
     try:
         stats = ai_cache_service.get_cache_stats()
+        stats["prompt"] = get_hybrid_ai_service().prompt_cache.get_stats()
+        stats["savings"] = cost_tracking_service.get_cache_savings()
         return {"success": True, "stats": stats}
     except Exception as e:
         logger.error(f"Error getting cache stats: {str(e)}")
@@ -1069,8 +1076,14 @@ async def start_ai_batch_processing(
         user_id = current_user["id"]
 
         # Enqueue background task
+        plan = await stripe_service.get_user_plan(user_id)
         task_id = await background_worker.enqueue_task(
-            "ai_batch_processing", user_id, data, priority="normal"
+            "ai_batch_processing",
+            user_id,
+            data,
+            priority="normal",
+            tenant=user_id,
+            plan=plan.value,
         )
 
         return {
@@ -1079,6 +1092,13 @@ async def start_ai_batch_processing(
             "status": "queued",
         }
 
+    except TaskRejectedError as e:
+        logger.warning(f"AI batch processing shed: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Batch processing is busy, try again later",
+            headers={"Retry-After": str(max(1, round(e.admission.retry_after)))},
+        )
     except Exception as e:
         logger.error(f"Error starting AI batch processing: {e}")
         raise HTTPException(status_code=500, detail="Failed to start batch processing")
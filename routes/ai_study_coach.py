@@ -9,10 +9,11 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
-from models.user import User
 from services.ai.context_manager import AdvancedContextManager
+from services.ai.hybrid_ai_service import TaskType, get_hybrid_ai_service
 from services.ai.openai_service import EnhancedOpenAIService
 from services.auth import get_current_user
+from services.sse import sse_response
 
 router = APIRouter(prefix="/api/ai-study-coach", tags=["AI Study Coach"])
 
@@ -97,6 +98,12 @@ class AdaptiveDifficultyRequest(BaseModel):
     user_feedback: str | None = None
 
 
+class CoachChatRequest(BaseModel):
+    message: str
+    subject: str | None = None
+    session_id: str | None = None
+
+
 class StudySessionTemplate(BaseModel):
     name: str
     subject: str
@@ -115,7 +122,7 @@ study_templates = {}
 
 @router.post("/create-study-session", response_model=StudySessionResponse)
 async def create_study_session(
-    request: StudySessionRequest, current_user: User = Depends(get_current_user)
+    request: StudySessionRequest, current_user: dict = Depends(get_current_user)
 ):
     """
     Create a personalized study session based on user preferences and learning style
@@ -123,7 +130,7 @@ async def create_study_session(
     try:
         # Build context from user's learning history
         user_context = await context_manager.build_comprehensive_context(
-            current_user.id
+            current_user["id"]
         )
 
         # Create study session prompt
@@ -188,22 +195,64 @@ async def create_study_session(
         )
 
 
+@router.post("/coach/stream")
+async def stream_coach_reply(
+    request: CoachChatRequest, current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream study coach advice as Server-Sent Events (``token`` events, then ``done``)
+    """
+    try:
+        user_context = await context_manager.build_comprehensive_context(
+            current_user["id"]
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to build study context: {str(e)}"
+        )
+
+    session = study_sessions.get(request.session_id) if request.session_id else None
+    if session and session["user_id"] != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    prompt = f"""
+    You are a supportive AI study coach. Answer the student's message with
+    practical, encouraging study advice.
+
+    Student message: {request.message}
+    Subject: {request.subject or "not specified"}
+    Current study session: {session or "none"}
+
+    User Context: {user_context}
+    """
+
+    return sse_response(
+        get_hybrid_ai_service().generate_stream(
+            task_type=TaskType.CONVERSATION,
+            prompt=prompt,
+            user_id=current_user["id"],
+            temperature=0.7,
+            use_cache=False,
+        )
+    )
+
+
 @router.post("/start-study-session")
 async def start_study_session(
-    request: StudySessionRequest, current_user: User = Depends(get_current_user)
+    request: StudySessionRequest, current_user: dict = Depends(get_current_user)
 ):
     """
     Start a new study session with tracking
     """
     try:
         session_id = (
-            f"session_{current_user.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            f"session_{current_user['id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         )
 
         # Create the study session
         study_session = StudySessionTracking(
             session_id=session_id,
-            user_id=current_user.id,
+            user_id=current_user["id"],
             subject=request.subject,
             topic=request.topic,
             start_time=datetime.now(),
@@ -235,7 +284,7 @@ async def start_study_session(
 async def update_study_session(
     session_id: str,
     update: StudySessionUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user),
 ):
     """
     Update study session progress in real-time
@@ -245,7 +294,7 @@ async def update_study_session(
             raise HTTPException(status_code=404, detail="Study session not found")
 
         session = study_sessions[session_id]
-        if session["user_id"] != current_user.id:
+        if session["user_id"] != current_user["id"]:
             raise HTTPException(
                 status_code=403, detail="Not authorized to update this session"
             )
@@ -274,7 +323,7 @@ async def update_study_session(
 async def adjust_difficulty(
     session_id: str,
     request: AdaptiveDifficultyRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user),
 ):
     """
     Adjust difficulty based on real-time performance
@@ -284,7 +333,7 @@ async def adjust_difficulty(
             raise HTTPException(status_code=404, detail="Study session not found")
 
         session = study_sessions[session_id]
-        if session["user_id"] != current_user.id:
+        if session["user_id"] != current_user["id"]:
             raise HTTPException(status_code=403, detail="Not authorized")
 
         # Calculate performance metrics
@@ -342,13 +391,13 @@ async def adjust_difficulty(
 async def get_study_analytics(
     user_id: str,
     days: int = Query(30, description="Number of days to analyze"),
-    current_user: User = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user),
 ):
     """
     Get comprehensive study analytics for a user
     """
     try:
-        if current_user.id != user_id:
+        if current_user["id"] != user_id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
         # Filter sessions for the user and time period
@@ -452,19 +501,19 @@ async def get_study_analytics(
 
 @router.post("/create-study-template")
 async def create_study_template(
-    template: StudySessionTemplate, current_user: User = Depends(get_current_user)
+    template: StudySessionTemplate, current_user: dict = Depends(get_current_user)
 ):
     """
     Create a reusable study session template
     """
     try:
         template_id = (
-            f"template_{current_user.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            f"template_{current_user['id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         )
 
         template_data = template.dict()
         template_data["template_id"] = template_id
-        template_data["user_id"] = current_user.id
+        template_data["user_id"] = current_user["id"]
         template_data["created_at"] = datetime.now().isoformat()
 
         study_templates[template_id] = template_data
@@ -483,13 +532,13 @@ async def create_study_template(
 
 @router.get("/study-templates/{user_id}")
 async def get_study_templates(
-    user_id: str, current_user: User = Depends(get_current_user)
+    user_id: str, current_user: dict = Depends(get_current_user)
 ):
     """
     Get all study templates for a user
     """
     try:
-        if current_user.id != user_id:
+        if current_user["id"] != user_id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
         user_templates = [
@@ -508,7 +557,7 @@ async def get_study_templates(
 
 @router.post("/generate-study-plan", response_model=StudyPlanResponse)
 async def generate_study_plan(
-    request: StudyPlanRequest, current_user: User = Depends(get_current_user)
+    request: StudyPlanRequest, current_user: dict = Depends(get_current_user)
 ):
     """
     Generate a comprehensive study plan for multiple subjects
@@ -582,7 +631,7 @@ async def generate_study_plan(
 
 @router.post("/generate-flashcards")
 async def generate_flashcards(
-    request: FlashcardRequest, current_user: User = Depends(get_current_user)
+    request: FlashcardRequest, current_user: dict = Depends(get_current_user)
 ):
     """
     Generate flashcards from content using AI
@@ -632,14 +681,14 @@ async def generate_flashcards(
 
 
 @router.post("/analyze-study-progress")
-async def analyze_study_progress(current_user: User = Depends(get_current_user)):
+async def analyze_study_progress(current_user: dict = Depends(get_current_user)):
     """
     Analyze user's study progress and provide insights
     """
     try:
         # Get user's study data (this would come from your database)
         user_context = await context_manager.build_comprehensive_context(
-            current_user.id
+            current_user["id"]
         )
 
         prompt = f"""
@@ -686,7 +735,7 @@ async def create_practice_quiz(
     topic: str = Query(..., description="Specific topic"),
     difficulty: str = Query("medium", description="Quiz difficulty"),
     question_count: int = Query(5, description="Number of questions"),
-    current_user: User = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user),
 ):
     """
     Create a practice quiz for a specific topic
@@ -734,13 +783,13 @@ async def create_practice_quiz(
 
 
 @router.post("/get-study-recommendations")
-async def get_study_recommendations(current_user: User = Depends(get_current_user)):
+async def get_study_recommendations(current_user: dict = Depends(get_current_user)):
     """
     Get personalized study recommendations based on user's learning patterns
     """
     try:
         user_context = await context_manager.build_comprehensive_context(
-            current_user.id
+            current_user["id"]
         )
 
         prompt = f"""
@@ -1,10 +1,11 @@
+import asyncio
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 
 from services.audit import AuditAction, log_audit_from_request
 from services.auth import get_current_user
-from services.supabase import get_supabase_client
+from services.supabase import get_async_supabase_client
 
 router = APIRouter(prefix="/analytics", tags=["Analytics & Trends"])
 
@@ -23,28 +24,20 @@ async def analytics_dashboard(
 ):
     """Get personalized dashboard data from actual user data."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
         user_id = current_user["id"]
 
-        # Get tasks data
-        tasks_result = (
-            supabase.table("tasks").select("*").eq("user_id", user_id).execute()
-        )
-        tasks = tasks_result.data or []
-
-        # Get goals data
-        goals_result = (
-            supabase.table("goals").select("*").eq("user_id", user_id).execute()
-        )
-        goals = goals_result.data or []
-
-        # Get schedule blocks data
-        schedule_result = (
+        # Get tasks, goals and schedule blocks concurrently
+        tasks_result, goals_result, schedule_result = await asyncio.gather(
+            supabase.table("tasks").select("*").eq("user_id", user_id).execute(),
+            supabase.table("goals").select("*").eq("user_id", user_id).execute(),
             supabase.table("schedule_blocks")
             .select("*")
             .eq("user_id", user_id)
-            .execute()
+            .execute(),
         )
+        tasks = tasks_result.data or []
+        goals = goals_result.data or []
         schedule_blocks = schedule_result.data or []
 
         # Calculate focus time for last 7 days
@@ -112,7 +105,7 @@ async def analytics_dashboard(
 async def trends(request: Request, current_user: dict = Depends(get_current_user)):
     """Get trend data for visualizations."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
         user_id = current_user["id"]
 
         # Get last 30 days of data
@@ -120,7 +113,7 @@ async def trends(request: Request, current_user: dict = Depends(get_current_user
         start_date = end_date - timedelta(days=30)
 
         # Get tasks with completion dates
-        tasks_result = (
+        tasks_result = await (
             supabase.table("tasks")
             .select("*")
             .eq("user_id", user_id)
@@ -164,7 +157,7 @@ async def weekly_review(
 ):
     """Get weekly review data."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
         user_id = current_user["id"]
 
         # Get last week's data
@@ -172,7 +165,7 @@ async def weekly_review(
         start_date = end_date - timedelta(days=7)
 
         # Get tasks for the week
-        tasks_result = (
+        tasks_result = await (
             supabase.table("tasks")
             .select("*")
             .eq("user_id", user_id)
@@ -223,11 +216,11 @@ async def productivity_patterns(
 ):
     """Get productivity pattern analysis."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
         user_id = current_user["id"]
 
         # Get schedule blocks for analysis
-        schedule_result = (
+        schedule_result = await (
             supabase.table("schedule_blocks")
             .select("*")
             .eq("user_id", user_id)
@@ -10,7 +10,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 
 from models.flashcard import Flashcard, FlashcardCreate, FlashcardUpdate
 from services.auth import get_current_user
-from services.supabase import get_supabase_client
+from services.supabase import get_async_supabase_client
 
 router = APIRouter(tags=["Flashcards"])
 
@@ -23,7 +23,7 @@ async def create_flashcard(
 ):
     """Create a new flashcard for the current user."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         flashcard_data = {
             "user_id": str(flashcard.user_id),
@@ -40,7 +40,7 @@ async def create_flashcard(
             "updated_at": datetime.utcnow().isoformat(),
         }
 
-        result = supabase.table("flashcards").insert(flashcard_data).execute()
+        result = await supabase.table("flashcards").insert(flashcard_data).execute()
 
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create flashcard")
@@ -67,7 +67,7 @@ async def get_flashcards(
 ):
     """Get flashcards for the current user with optional filtering."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         query = (
             supabase.table("flashcards").select("*").eq("user_id", current_user["id"])
@@ -81,7 +81,7 @@ async def get_flashcards(
             query = query.lte("next_review_date", datetime.now().isoformat())
 
         query = query.range(offset, offset + limit - 1).order("created_at", desc=True)
-        result = query.execute()
+        result = await query.execute()
 
         flashcards = [Flashcard(**card) for card in result.data]
 
@@ -106,9 +106,9 @@ async def get_flashcard(
 ):
     """Get a specific flashcard by ID."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
-        result = (
+        result = await (
             supabase.table("flashcards")
             .select("*")
             .eq("id", str(flashcard_id))
@@ -136,10 +136,10 @@ async def update_flashcard(
 ):
     """Update a specific flashcard."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # First check if flashcard exists and belongs to user
-        existing = (
+        existing = await (
             supabase.table("flashcards")
             .select("*")
             .eq("id", str(flashcard_id))
@@ -176,7 +176,7 @@ async def update_flashcard(
         if flashcard_update.interval is not None:
             update_data["interval"] = flashcard_update.interval
 
-        result = (
+        result = await (
             supabase.table("flashcards")
             .update(update_data)
             .eq("id", str(flashcard_id))
@@ -202,10 +202,10 @@ async def delete_flashcard(
 ):
     """Delete a specific flashcard."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # Check if flashcard exists and belongs to user
-        existing = (
+        existing = await (
             supabase.table("flashcards")
             .select("*")
             .eq("id", str(flashcard_id))
@@ -216,7 +216,7 @@ async def delete_flashcard(
         if not existing.data:
             raise HTTPException(status_code=404, detail="Flashcard not found")
 
-        result = (  # noqa: F841
+        result = await (  # noqa: F841
             supabase.table("flashcards")
             .delete()
             .eq("id", str(flashcard_id))
@@ -245,10 +245,10 @@ async def review_flashcard(
 ):
     """Review a flashcard using spaced repetition algorithm."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # Get current flashcard
-        existing = (
+        existing = await (
             supabase.table("flashcards")
             .select("*")
             .eq("id", str(flashcard_id))
@@ -287,7 +287,7 @@ async def review_flashcard(
             "updated_at": datetime.utcnow().isoformat(),
         }
 
-        result = (
+        result = await (
             supabase.table("flashcards")
             .update(update_data)
             .eq("id", str(flashcard_id))
@@ -315,9 +315,9 @@ async def get_due_flashcards(
 ):
     """Get flashcards that are due for review."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
-        result = (
+        result = await (
             supabase.table("flashcards")
             .select("*")
             .eq("user_id", current_user["id"])
@@ -339,9 +339,9 @@ async def get_due_flashcards(
 async def get_flashcard_decks(current_user: dict = Depends(get_current_user)):
     """Get all flashcard decks for the current user."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
-        result = (
+        result = await (
             supabase.table("flashcards")
             .select("deck_id, deck_name")
             .eq("user_id", current_user["id"])
@@ -374,10 +374,10 @@ async def get_flashcard_decks(current_user: dict = Depends(get_current_user)):
 async def get_flashcard_stats(current_user: dict = Depends(get_current_user)):
     """Get flashcard statistics for the current user."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # Get all flashcards for user
-        result = (
+        result = await (
             supabase.table("flashcards")
             .select("*")
             .eq("user_id", current_user["id"])
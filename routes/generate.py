@@ -10,6 +10,7 @@ from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from models.text import TextGenerationRequest, TextGenerationResponse
+from services.ai.context_assembler import build_user_context
 from services.ai.hybrid_ai_service import TaskType, get_hybrid_ai_service
 from services.ai_cache import ai_cache_service, ai_cached
 from services.auth import get_current_user
@@ -39,38 +40,8 @@ async def api_key_auth(api_key: str = Header(...)):
 async def _get_user_context(user_id: str) -> dict[str, Any]:
     """Get user context data for AI operations"""
     try:
-        supabase = get_supabase_client()
-
-        # Fetch user's recent data in parallel
-        tasks_result = (
-            supabase.table("tasks")
-            .select("*")
-            .eq("user_id", user_id)
-            .limit(20)
-            .execute()
-        )
-        goals_result = (
-            supabase.table("goals")
-            .select("*")
-            .eq("user_id", user_id)
-            .limit(10)
-            .execute()
-        )
-        schedule_result = (
-            supabase.table("schedule_blocks")
-            .select("*")
-            .eq("user_id", user_id)
-            .limit(15)
-            .execute()
-        )
-
-        return {
-            "tasks": tasks_result.data or [],
-            "goals": goals_result.data or [],
-            "schedule_blocks": schedule_result.data or [],
-            "user_id": user_id,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
+        # Fetch user's recent data in parallel, each source under its own deadline
+        return await build_user_context(user_id)
     except Exception as e:
         logger.error(f"Error getting user context: {e}")
         return {"user_id": user_id, "timestamp": datetime.utcnow().isoformat()}
@@ -10,7 +10,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 
 from models.goal import Goal, GoalCreate, GoalUpdate, PriorityLevel
 from services.auth import get_current_user
-from services.supabase import get_supabase_client
+from services.supabase import get_async_supabase_client
 
 router = APIRouter(tags=["Goals"])
 
@@ -21,7 +21,7 @@ logger = logging.getLogger(__name__)
 async def create_goal(goal: GoalCreate, current_user: dict = Depends(get_current_user)):
     """Create a new goal for the current user."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         goal_data = {
             "user_id": str(goal.user_id),
@@ -37,7 +37,7 @@ async def create_goal(goal: GoalCreate, current_user: dict = Depends(get_current
             "updated_at": datetime.utcnow().isoformat(),
         }
 
-        result = supabase.table("goals").insert(goal_data).execute()
+        result = await supabase.table("goals").insert(goal_data).execute()
 
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create goal")
@@ -60,7 +60,7 @@ async def get_goals(
 ):
     """Get all goals for the current user with optional filtering."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         query = supabase.table("goals").select("*").eq("user_id", current_user["id"])
 
@@ -70,7 +70,7 @@ async def get_goals(
             query = query.eq("is_starred", is_starred)
 
         query = query.range(offset, offset + limit - 1).order("created_at", desc=True)
-        result = query.execute()
+        result = await query.execute()
 
         goals = [Goal(**goal) for goal in result.data]
         return goals
@@ -84,9 +84,9 @@ async def get_goals(
 async def get_goal(goal_id: UUID, current_user: dict = Depends(get_current_user)):
     """Get a specific goal by ID."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
-        result = (
+        result = await (
             supabase.table("goals")
             .select("*")
             .eq("id", str(goal_id))
@@ -114,10 +114,10 @@ async def update_goal(
 ):
     """Update a specific goal."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # First check if goal exists and belongs to user
-        existing = (
+        existing = await (
             supabase.table("goals")
             .select("*")
             .eq("id", str(goal_id))
@@ -148,7 +148,7 @@ async def update_goal(
         if goal_update.analytics is not None:
             update_data["analytics"] = goal_update.analytics
 
-        result = (
+        result = await (
             supabase.table("goals")
             .update(update_data)
             .eq("id", str(goal_id))
@@ -172,10 +172,10 @@ async def update_goal(
 async def delete_goal(goal_id: UUID, current_user: dict = Depends(get_current_user)):
     """Delete a specific goal."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # Check if goal exists and belongs to user
-        existing = (
+        existing = await (
             supabase.table("goals")
             .select("*")
             .eq("id", str(goal_id))
@@ -186,7 +186,7 @@ async def delete_goal(goal_id: UUID, current_user: dict = Depends(get_current_us
         if not existing.data:
             raise HTTPException(status_code=404, detail="Goal not found")
 
-        result = (  # noqa: F841
+        result = await (  # noqa: F841
             supabase.table("goals")
             .delete()
             .eq("id", str(goal_id))
@@ -209,10 +209,10 @@ async def toggle_goal_star(
 ):
     """Toggle the starred status of a goal."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # Get current goal
-        existing = (
+        existing = await (
             supabase.table("goals")
             .select("*")
             .eq("id", str(goal_id))
@@ -231,7 +231,7 @@ async def toggle_goal_star(
             "updated_at": datetime.utcnow().isoformat(),
         }
 
-        result = (
+        result = await (
             supabase.table("goals")
             .update(update_data)
             .eq("id", str(goal_id))
@@ -256,7 +256,7 @@ async def update_goal_progress(
 ):
     """Update the progress of a goal."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         update_data = {
             "progress": progress,
@@ -268,7 +268,7 @@ async def update_goal_progress(
             "updated_at": datetime.utcnow().isoformat(),
         }
 
-        result = (
+        result = await (
             supabase.table("goals")
             .update(update_data)
             .eq("id", str(goal_id))
@@ -292,10 +292,10 @@ async def update_goal_progress(
 async def get_goal_stats(current_user: dict = Depends(get_current_user)):
     """Get goal statistics for the current user."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # Get all goals for user
-        result = (
+        result = await (
             supabase.table("goals")
             .select("*")
             .eq("user_id", current_user["id"])
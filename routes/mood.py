@@ -15,9 +15,14 @@ from pydantic import BaseModel
 
 from services.ai.openai_service import get_openai_service
 from services.auth import get_current_user
-from services.background_workers import background_task, background_worker
+from services.background_workers import (
+    TaskRejectedError,
+    background_task,
+    background_worker,
+)
 from services.performance_monitor import monitor_performance
 from services.redis_cache import enhanced_cache, enhanced_cached
+from services.stripe_service import stripe_service
 from services.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
@@ -71,15 +76,21 @@ async def track_mood(
         )
 
         # Invalidate mood cache
-        await enhanced_cache.clear_pattern(f"mood:*:{user_id}:*")
-
-        # Enqueue mood analysis task
-        await background_worker.enqueue_task(
-            "mood_analysis",
-            user_id,
-            {"trigger": "new_entry", "mood_score": mood_entry.mood_score},
-            priority="low",
-        )
+        await _invalidate_mood_cache(user_id)
+
+        # Enqueue mood analysis task; the entry is saved even if it is shed
+        try:
+            plan = await stripe_service.get_user_plan(user_id)
+            await background_worker.enqueue_task(
+                "mood_analysis",
+                user_id,
+                {"trigger": "new_entry", "mood_score": mood_entry.mood_score},
+                priority="low",
+                tenant=user_id,
+                plan=plan.value,
+            )
+        except TaskRejectedError as e:
+            logger.warning(f"Skipped mood analysis for {user_id}: {e}")
 
         return {"success": True, "mood_entry": result.data[0] if result.data else None}
 
@@ -125,7 +136,9 @@ async def get_mood_entries(
         entries = result.data
 
         # Cache the result
-        await enhanced_cache.set("mood", entries, 900, cache_key)
+        await enhanced_cache.set(
+            "mood", entries, 900, cache_key, tags=[_mood_cache_tag(user_id)]
+        )
 
         return entries
 
@@ -234,7 +247,9 @@ async def get_mood_summary(
             }
 
         # Cache the result
-        await enhanced_cache.set("mood", summary, 1800, cache_key)
+        await enhanced_cache.set(
+            "mood", summary, 1800, cache_key, tags=[_mood_cache_tag(user_id)]
+        )
 
         return summary
 
@@ -299,7 +314,9 @@ async def get_mood_analysis(
         analysis = await _generate_mood_analysis(entries, request)
 
         # Cache the result
-        await enhanced_cache.set("mood", analysis, 3600, cache_key)
+        await enhanced_cache.set(
+            "mood", analysis, 3600, cache_key, tags=[_mood_cache_tag(user_id)]
+        )
 
         return analysis
 
@@ -347,7 +364,9 @@ async def get_mood_correlations(
         correlations = await _calculate_mood_correlations(entries)
 
         # Cache the result
-        await enhanced_cache.set("mood", correlations, 7200, cache_key)
+        await enhanced_cache.set(
+            "mood", correlations, 7200, cache_key, tags=[_mood_cache_tag(user_id)]
+        )
 
         return correlations
 
@@ -395,7 +414,9 @@ async def get_mood_trends(
         trends = await _calculate_mood_trends(entries)
 
         # Cache the result
-        await enhanced_cache.set("mood", trends, 1800, cache_key)
+        await enhanced_cache.set(
+            "mood", trends, 1800, cache_key, tags=[_mood_cache_tag(user_id)]
+        )
 
         return trends
 
@@ -450,7 +471,9 @@ async def get_mood_insights(
         insights = await _generate_mood_insights(entries)
 
         # Cache the result
-        await enhanced_cache.set("mood", insights, 3600, cache_key)
+        await enhanced_cache.set(
+            "mood", insights, 3600, cache_key, tags=[_mood_cache_tag(user_id)]
+        )
 
         return insights
 
@@ -466,8 +489,7 @@ async def clear_mood_cache(current_user: dict = Depends(get_current_user)):
         user_id = current_user["id"]
 
         # Clear all mood cache for this user
-        pattern = f"mood:*:{user_id}:*"
-        deleted = await enhanced_cache.clear_pattern(pattern)
+        deleted = await _invalidate_mood_cache(user_id)
 
         return {"message": f"Cleared {deleted} mood cache entries", "user_id": user_id}
 
@@ -477,6 +499,19 @@ async def clear_mood_cache(current_user: dict = Depends(get_current_user)):
 
 
 # Helper functions
+def _mood_cache_tag(user_id: str) -> str:
+    """Tag indexing every cached mood view for a user"""
+    return f"mood:user:{user_id}"
+
+
+async def _invalidate_mood_cache(user_id: str) -> int:
+    """Drop all cached mood views for a user"""
+    return await enhanced_cache.invalidate_tags(
+        _mood_cache_tag(user_id),
+        legacy_patterns=[f"mood:*:{user_id}", f"mood:*:{user_id}:*"],
+    )
+
+
 async def _generate_mood_analysis(
     entries: list[dict], request: MoodAnalysisRequest
 ) -> dict[str, Any]:
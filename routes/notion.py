@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import hashlib
 import hmac
@@ -5,6 +6,7 @@ import json
 import logging
 import os
 from datetime import datetime
+from typing import Any
 from urllib.parse import urlencode
 
 import httpx
@@ -14,7 +16,9 @@ from pydantic import BaseModel, ConfigDict
 from services.ai.openai_service import get_openai_service
 from services.auth import get_current_user
 from services.notion import NotionClient, NotionFlashcardGenerator, NotionSyncManager
-from services.rate_limited_queue import get_notion_queue
+from services.background_workers import background_task, background_worker
+from services.notion.rate_limited_queue import get_notion_queue
+from services.stripe_service import stripe_service
 from services.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
@@ -157,21 +161,23 @@ async def notion_auth_callback(
         "Content-Type": "application/json",
     }
 
+    # Rate limited against the OAuth app; the Basic header replaces the bearer
     queue = get_notion_queue()
-    response = await queue.enqueue_request(
+    future = await queue.enqueue_request(
         method="POST",
         endpoint="/oauth/token",
+        api_key=NOTION_CLIENT_ID,
         data=token_data,
         headers=headers,
     )
-    if response.status_code != 200:
+    try:
+        token_info = await future
+    except httpx.HTTPStatusError as e:
         logger.error(
-            f"OAuth token exchange failed: {response.status_code} - {response.text}"
+            f"OAuth token exchange failed: {e.response.status_code} - {e.response.text}"
         )
         raise HTTPException(status_code=400, detail="Failed to exchange code for token")
 
-    token_info = response.json()
-
     # Store connection info in Supabase
     supabase = get_supabase_client()
     connection_data = {
@@ -217,28 +223,14 @@ async def list_notion_databases(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=401, detail="Notion not connected")
 
     connection = connection_result.data[0]
-    headers = {
-        "Authorization": f"Bearer {connection['access_token']}",
-        "Notion-Version": "2022-06-28",
-    }
 
-    # Use rate-limited queue for Notion API calls
-    notion_client = NotionClient(api_key=connection["access_token"])  # noqa: F841
-    queue = get_notion_queue()  # noqa: F841
+    # NotionClient calls go through the rate-limited queue
+    notion_client = NotionClient(api_key=connection["access_token"])
 
     try:
-        # Enqueue the search request
-        future = await queue.enqueue_request(
-            method="POST",
-            endpoint="/search",
-            data={"filter": {"property": "object", "value": "database"}},
-            headers=headers,
-            priority=1,
+        databases = await notion_client.search(
+            filter_params={"property": "object", "value": "database"}
         )
-
-        response_data = await future
-
-        databases = response_data.get("results", [])
         return {
             "success": True,
             "databases": [
@@ -272,73 +264,66 @@ async def sync_notion_database(
     if not connection_result.data:
         raise HTTPException(status_code=401, detail="Notion not connected")
     connection = connection_result.data[0]
-    headers = {
-        "Authorization": f"Bearer {connection['access_token']}",
-        "Notion-Version": "2022-06-28",
-    }
-    queue = get_notion_queue()  # noqa: F841
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{NOTION_API_BASE}/databases/{request.database_id}/query", headers=headers
-        )
-        if response.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to query database")
-        database_content = response.json()
-        pages = database_content.get("results", [])
-        tasks = []
-        for page in pages:
-            properties = page.get("properties", {})
-            title = "Untitled"
-            for prop_name, prop_value in properties.items():
-                if prop_value.get("type") == "title" and prop_value.get("title"):
-                    title = prop_value["title"][0]["plain_text"]
-                    break
-            due_date = None
-            priority = "medium"
-            tags = []
-            for prop_name, prop_value in properties.items():
-                if prop_value.get("type") == "date" and prop_value.get("date"):
-                    due_date = prop_value["date"]["start"]
-                elif prop_value.get("type") == "select" and prop_value.get("select"):
-                    priority = prop_value["select"]["name"]
-                elif prop_value.get("type") == "multi_select" and prop_value.get(
-                    "multi_select"
-                ):
-                    tags = [tag["name"] for tag in prop_value["multi_select"]]
-            task_data = {
-                "user_id": current_user["id"],
-                "notion_id": page["id"],
-                "title": title,
-                "due_date": due_date,
-                "priority": priority,
-                "tags": tags,
-                "created_time": page["created_time"],
-                "last_edited_time": page["last_edited_time"],
-            }
-            tasks.append(task_data)
-        # Store tasks in Supabase
-        if tasks:
-            for task in tasks:
-                existing = (
-                    supabase.table("notion_tasks")
-                    .select("*")
-                    .eq("notion_id", task["notion_id"])
-                    .eq("user_id", current_user["id"])
-                    .execute()
-                )
-                if existing.data:
-                    supabase.table("notion_tasks").update(task).eq(
-                        "notion_id", task["notion_id"]
-                    ).eq("user_id", current_user["id"]).execute()
-                else:
-                    supabase.table("notion_tasks").insert(task).execute()
-        return {
-            "success": True,
-            "database_id": request.database_id,
-            "sync_type": request.sync_type,
-            "tasks": tasks,
-            "total_count": len(tasks),
+    notion_client = NotionClient(api_key=connection["access_token"])
+    try:
+        pages = await notion_client.query_database(request.database_id)
+    except Exception as e:
+        logger.error(f"Error querying Notion database: {e}")
+        raise HTTPException(status_code=400, detail="Failed to query database")
+    tasks = []
+    for page in pages:
+        properties = page.get("properties", {})
+        title = "Untitled"
+        for prop_name, prop_value in properties.items():
+            if prop_value.get("type") == "title" and prop_value.get("title"):
+                title = prop_value["title"][0]["plain_text"]
+                break
+        due_date = None
+        priority = "medium"
+        tags = []
+        for prop_name, prop_value in properties.items():
+            if prop_value.get("type") == "date" and prop_value.get("date"):
+                due_date = prop_value["date"]["start"]
+            elif prop_value.get("type") == "select" and prop_value.get("select"):
+                priority = prop_value["select"]["name"]
+            elif prop_value.get("type") == "multi_select" and prop_value.get(
+                "multi_select"
+            ):
+                tags = [tag["name"] for tag in prop_value["multi_select"]]
+        task_data = {
+            "user_id": current_user["id"],
+            "notion_id": page["id"],
+            "title": title,
+            "due_date": due_date,
+            "priority": priority,
+            "tags": tags,
+            "created_time": page["created_time"],
+            "last_edited_time": page["last_edited_time"],
         }
+        tasks.append(task_data)
+    # Store tasks in Supabase
+    if tasks:
+        for task in tasks:
+            existing = (
+                supabase.table("notion_tasks")
+                .select("*")
+                .eq("notion_id", task["notion_id"])
+                .eq("user_id", current_user["id"])
+                .execute()
+            )
+            if existing.data:
+                supabase.table("notion_tasks").update(task).eq(
+                    "notion_id", task["notion_id"]
+                ).eq("user_id", current_user["id"]).execute()
+            else:
+                supabase.table("notion_tasks").insert(task).execute()
+    return {
+        "success": True,
+        "database_id": request.database_id,
+        "sync_type": request.sync_type,
+        "tasks": tasks,
+        "total_count": len(tasks),
+    }
 
 
 @router.post("/tasks/create", summary="Create a new task in Notion")
@@ -357,11 +342,6 @@ async def create_notion_task(
     if not connection_result.data:
         raise HTTPException(status_code=401, detail="Notion not connected")
     connection = connection_result.data[0]
-    headers = {
-        "Authorization": f"Bearer {connection['access_token']}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json",
-    }
     properties = {"Name": {"title": [{"text": {"content": request.title}}]}}
     if request.description:
         properties["Description"] = {
@@ -373,17 +353,12 @@ async def create_notion_task(
         properties["Priority"] = {"select": {"name": request.priority}}
     if request.tags:
         properties["Tags"] = {"multi_select": [{"name": tag} for tag in request.tags]}
-    page_data = {"parent": {"database_id": database_id}, "properties": properties}
-    queue = get_notion_queue()
-    response = await queue.enqueue_request(
-        method="POST",
-        endpoint="/pages",
-        data=page_data,
-        headers=headers,
-    )
-    if response.status_code != 200:
+    notion_client = NotionClient(api_key=connection["access_token"])
+    try:
+        created_page = await notion_client.create_page(database_id, properties)
+    except Exception as e:
+        logger.error(f"Error creating Notion task: {e}")
         raise HTTPException(status_code=400, detail="Failed to create task in Notion")
-    created_page = response.json()
     # Store created task in Supabase
     task_data = {
         "user_id": current_user["id"],
@@ -640,25 +615,13 @@ async def get_ai_service():
 async def get_notion_pages(notion_client: NotionClient = Depends(get_notion_client)):
     """Get user's Notion pages and databases."""
     try:
-        notion_queue = get_notion_queue()
-        # Search for pages and databases using the rate-limited queue
-        pages_future = await notion_queue.enqueue_request(
-            method="POST",
-            endpoint="search",
-            api_key=notion_client.api_key,
-            query="",
-            filter_params={"property": "object", "value": "page"},
+        # Both searches share the user's rate limit, so run them together
+        pages, databases = await asyncio.gather(
+            notion_client.search(filter_params={"property": "object", "value": "page"}),
+            notion_client.search(
+                filter_params={"property": "object", "value": "database"}
+            ),
         )
-        pages = await pages_future
-
-        databases_future = await notion_queue.enqueue_request(
-            method="POST",
-            endpoint="search",
-            api_key=notion_client.api_key,
-            query="",
-            filter_params={"property": "object", "value": "database"},
-        )
-        databases = await databases_future
 
         # Format response
         page_list = []
@@ -936,7 +899,7 @@ async def queue_notion_sync(
     database_id: str | None,
     last_edited_time: str | None,
 ):
-    """Queue a Notion sync operation using the rate-limited queue."""
+    """Queue a Notion sync operation as a background task."""
     try:
         # Get user's Notion client
         supabase = get_supabase_client()
@@ -948,21 +911,19 @@ async def queue_notion_sync(
         )
 
         if user_settings.data and user_settings.data[0].get("notion_api_key"):
-            notion_client = NotionClient(  # noqa: F841
-                api_key=user_settings.data[0]["notion_api_key"]
-            )
-            notion_queue = get_notion_queue()
-
-            # Queue the sync operation
-            await notion_queue.enqueue_request(
-                method="POST",
-                endpoint="/internal/sync",
-                data={
-                    "user_id": user_id,
+            # The worker runs internal_sync; its Notion calls are rate limited
+            plan = await stripe_service.get_user_plan(user_id)
+            await background_worker.enqueue_task(
+                "notion_sync",
+                user_id,
+                {
                     "page_id": page_id,
                     "database_id": database_id,
                     "last_edited_time": last_edited_time,
                 },
+                priority="low",
+                tenant=user_id,
+                plan=plan.value,
             )
 
         logger.info(f"Queued sync for user {user_id}, page {page_id or database_id}")
@@ -1049,6 +1010,12 @@ async def internal_sync(
         return {"status": "error", "message": str(e)}
 
 
+@background_task(name="notion_sync", priority="low")
+async def notion_sync_task(user_id: str, config: dict[str, Any]):
+    """Background task for syncs queued by Notion webhooks"""
+    return await internal_sync(user_id, **config)
+
+
 @router.post("/auth", summary="Authenticate with Notion API key")
 async def authenticate_notion(
     request: dict, current_user: dict = Depends(get_current_user)
@@ -1061,14 +1028,7 @@ async def authenticate_notion(
     try:
         # Test the API key by making a simple request
         notion_client = NotionClient(api_key)
-        queue = get_notion_queue()
-        await queue.enqueue_request(
-            method="POST",
-            endpoint="search",
-            api_key=notion_client.api_key,
-            query="",
-            filter_params={"property": "object", "value": "page"},
-        )
+        await notion_client.search(filter_params={"property": "object", "value": "page"})
 
         # Store the API key in user settings
         supabase = get_supabase_client()
@@ -10,7 +10,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 
 from models.task import PriorityLevel, Task, TaskCreate, TaskStatus, TaskUpdate
 from services.auth import get_current_user
-from services.supabase import get_supabase_client
+from services.supabase import get_async_supabase_client
 
 router = APIRouter(tags=["Tasks"])
 
@@ -21,7 +21,7 @@ logger = logging.getLogger(__name__)
 async def create_task(task: TaskCreate, current_user: dict = Depends(get_current_user)):
     """Create a new task for the current user."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         task_data = {
             "user_id": str(task.user_id),
@@ -34,7 +34,7 @@ async def create_task(task: TaskCreate, current_user: dict = Depends(get_current
             "updated_at": datetime.utcnow().isoformat(),
         }
 
-        result = supabase.table("tasks").insert(task_data).execute()
+        result = await supabase.table("tasks").insert(task_data).execute()
 
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create task")
@@ -57,7 +57,7 @@ async def get_tasks(
 ):
     """Get all tasks for the current user with optional filtering."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         query = supabase.table("tasks").select("*").eq("user_id", current_user["id"])
 
@@ -67,7 +67,7 @@ async def get_tasks(
             query = query.eq("priority", priority.value)
 
         query = query.range(offset, offset + limit - 1).order("created_at", desc=True)
-        result = query.execute()
+        result = await query.execute()
 
         tasks = [Task(**task) for task in result.data]
         return tasks
@@ -81,9 +81,9 @@ async def get_tasks(
 async def get_task(task_id: UUID, current_user: dict = Depends(get_current_user)):
     """Get a specific task by ID."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
-        result = (
+        result = await (
             supabase.table("tasks")
             .select("*")
             .eq("id", str(task_id))
@@ -111,10 +111,10 @@ async def update_task(
 ):
     """Update a specific task."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # First check if task exists and belongs to user
-        existing = (
+        existing = await (
             supabase.table("tasks")
             .select("*")
             .eq("id", str(task_id))
@@ -139,7 +139,7 @@ async def update_task(
         if task_update.priority is not None:
             update_data["priority"] = task_update.priority.value
 
-        result = (
+        result = await (
             supabase.table("tasks")
             .update(update_data)
             .eq("id", str(task_id))
@@ -163,10 +163,10 @@ async def update_task(
 async def delete_task(task_id: UUID, current_user: dict = Depends(get_current_user)):
     """Delete a specific task."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # Check if task exists and belongs to user
-        existing = (
+        existing = await (
             supabase.table("tasks")
             .select("*")
             .eq("id", str(task_id))
@@ -177,7 +177,7 @@ async def delete_task(task_id: UUID, current_user: dict = Depends(get_current_us
         if not existing.data:
             raise HTTPException(status_code=404, detail="Task not found")
 
-        result = (  # noqa: F841
+        result = await (  # noqa: F841
             supabase.table("tasks")
             .delete()
             .eq("id", str(task_id))
@@ -200,14 +200,14 @@ async def delete_task(task_id: UUID, current_user: dict = Depends(get_current_us
 async def complete_task(task_id: UUID, current_user: dict = Depends(get_current_user)):
     """Mark a task as completed."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         update_data = {
             "status": TaskStatus.COMPLETED.value,
             "updated_at": datetime.utcnow().isoformat(),
         }
 
-        result = (
+        result = await (
             supabase.table("tasks")
             .update(update_data)
             .eq("id", str(task_id))
@@ -231,10 +231,10 @@ async def complete_task(task_id: UUID, current_user: dict = Depends(get_current_
 async def get_task_stats(current_user: dict = Depends(get_current_user)):
     """Get task statistics for the current user."""
     try:
-        supabase = get_supabase_client()
+        supabase = get_async_supabase_client()
 
         # Get all tasks for user
-        result = (
+        result = await (
             supabase.table("tasks")
             .select("*")
             .eq("user_id", current_user["id"])
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call HTTP clients vs the shared provider connection pool.
+
+Starts a local HTTPS stub shaped like a chat-completions endpoint, then
+issues the same request (a) through a fresh ``httpx.AsyncClient`` per call,
+as the provider clients did before, paying TCP and TLS setup every time, and
+(b) through ``HTTPClientPool``, whose keep-alive connections stay warm.
+Prints p50/p99 latency for each.
+
+Usage:
+    python scripts/benchmark_http_pool.py --requests 300 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import os
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+from aiohttp import web
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.http_pool import HTTPClientPool  # noqa: E402
+
+STUB_HOST = "127.0.0.1"
+STUB_PORT = 54330
+STUB_URL = f"https://{STUB_HOST}:{STUB_PORT}"
+
+COMPLETION = {
+    "choices": [{"message": {"content": "ok"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+}
+
+
+def self_signed_certificate(directory: str) -> tuple[str, str]:
+    """Write a throwaway certificate for 127.0.0.1; return (cert, key) paths"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, STUB_HOST)])
+    now = datetime.datetime.now(datetime.UTC)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address(STUB_HOST))]),
+            critical=False,
+        )
+        .sign(key, hashes.SHA256())
+    )
+
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+    return cert_path, key_path
+
+
+def start_provider_stub(latency: float, cert_path: str, key_path: str) -> None:
+    """Run a chat-completions stub over TLS on a background thread"""
+
+    async def handle(request: web.Request) -> web.Response:
+        await request.read()
+        await asyncio.sleep(latency)
+        return web.json_response(COMPLETION)
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handle)
+
+    server_ssl = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_ssl.load_cert_chain(cert_path, key_path)
+
+    ready = threading.Event()
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(app, access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(
+            web.TCPSite(runner, STUB_HOST, STUB_PORT, ssl_context=server_ssl).start()
+        )
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+
+
+async def measure(call, total: int, concurrency: int) -> list[float]:
+    """Run `total` calls with `concurrency` in flight; return latencies in ms"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+def percentile(values: list[float], pct: float) -> float:
+    return statistics.quantiles(values, n=100)[int(pct) - 1]
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = self_signed_certificate(directory)
+        start_provider_stub(args.latency, cert_path, key_path)
+
+        client_ssl = ssl.create_default_context(cafile=cert_path)
+        url = f"{STUB_URL}/v1/chat/completions"
+        payload = {"model": "stub", "messages": [{"role": "user", "content": "hi"}]}
+
+        async def cold_call():
+            async with httpx.AsyncClient(verify=client_ssl, timeout=30) as client:
+                (await client.post(url, json=payload)).raise_for_status()
+
+        pool = HTTPClientPool(verify=client_ssl)
+
+        async def warm_call():
+            (await pool.get_client(url).post(url, json=payload)).raise_for_status()
+
+        # Open the pooled connections so only steady state is measured
+        await measure(warm_call, args.concurrency, args.concurrency)
+
+        cold = await measure(cold_call, args.requests, args.concurrency)
+        warm = await measure(warm_call, args.requests, args.concurrency)
+        await pool.close()
+
+    print(
+        f"Provider stub latency {args.latency * 1000:.0f} ms over TLS, "
+        f"{args.requests} requests, concurrency {args.concurrency}"
+    )
+    for label, values in (("cold (client per call)", cold), ("warm (pooled)", warm)):
+        print(
+            f"  {label:24s} p50 {percentile(values, 50):7.2f} ms   "
+            f"p99 {percentile(values, 99):7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
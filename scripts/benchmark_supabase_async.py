@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: blocking vs pooled async Supabase access from async routes.
+
+Starts a local PostgREST stub that answers every request after a fixed
+latency, then drives the same "route" coroutine under concurrent load using
+(a) the synchronous PostgREST client, as the routes did before, and (b) the
+pooled ``AsyncSupabaseClient``. Prints requests/sec for each.
+
+Usage:
+    python scripts/benchmark_supabase_async.py --requests 500 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+STUB_HOST = "127.0.0.1"
+STUB_PORT = 54329
+STUB_URL = f"http://{STUB_HOST}:{STUB_PORT}"
+
+# services.supabase builds the sync client at import time
+os.environ.setdefault("SUPABASE_URL", STUB_URL)
+os.environ.setdefault(
+    "SUPABASE_ANON_KEY",
+    "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
+    "eyJyb2xlIjoiYW5vbiJ9.IYNFcUXi15tVzmoZ4f_iaQnk3dfEOVH8ZOY6uEMjvTE",
+)
+
+from postgrest import SyncPostgrestClient  # noqa: E402
+
+from services.supabase import AsyncSupabaseClient  # noqa: E402
+
+
+def start_postgrest_stub(latency: float) -> None:
+    """Run a PostgREST-shaped stub on a background thread"""
+
+    async def handle(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        return web.json_response(
+            [{"id": "task-1", "user_id": "user-1", "status": "pending"}]
+        )
+
+    app = web.Application()
+    app.router.add_route("*", "/rest/v1/{table}", handle)
+
+    ready = threading.Event()
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(app, access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, STUB_HOST, STUB_PORT).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+
+
+async def run_load(route, total: int, concurrency: int) -> float:
+    """Issue `total` route calls with `concurrency` in flight; return req/s"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await route()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> None:
+    start_postgrest_stub(args.latency)
+
+    sync_client = SyncPostgrestClient(f"{STUB_URL}/rest/v1")
+    async_client = AsyncSupabaseClient(
+        STUB_URL,
+        os.environ["SUPABASE_ANON_KEY"],
+        max_concurrency=args.concurrency,
+    )
+
+    async def blocking_route():
+        sync_client.from_("tasks").select("*").eq("user_id", "user-1").execute()
+
+    async def async_route():
+        await async_client.table("tasks").select("*").eq("user_id", "user-1").execute()
+
+    # Warm both clients so connection setup is not measured
+    await blocking_route()
+    await async_route()
+
+    before = await run_load(blocking_route, args.requests, args.concurrency)
+    after = await run_load(async_route, args.requests, args.concurrency)
+
+    print(
+        f"PostgREST stub latency {args.latency * 1000:.0f} ms, "
+        f"{args.requests} requests, concurrency {args.concurrency}"
+    )
+    print(f"  before (sync client in async route): {before:8.1f} req/s")
+    print(f"  after  (pooled async client):        {after:8.1f} req/s")
+    print(f"  speedup: {after / before:.1f}x")
+
+    sync_client.session.close()
+    await async_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
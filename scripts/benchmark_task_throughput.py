@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: background task throughput against a local Redis.
+
+Enqueues no-op tasks and processes them (a) the way workers did before the
+Lua state transitions, reading the task hash and writing it back once when
+marked running and once when completed, and (b) through
+``BackgroundWorker._process_task``, which claims and completes a task in one
+scripted call each. Prints tasks/sec for each.
+
+(a) stands in for the code before the scripted transitions: that code
+cannot run against a real Redis, since its task hashes held None, tuple
+and dict values that redis-py rejects. (a) keeps its round trips and uses
+the current field encoding.
+
+Usage:
+    python scripts/benchmark_task_throughput.py --tasks 5000 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+import redis.asyncio as redis
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.background_workers import (  # noqa: E402
+    BackgroundWorker,
+    Task,
+    TaskStatus,
+)
+
+
+async def noop():
+    return None
+
+
+async def legacy_process(worker: BackgroundWorker, task_id: str) -> None:
+    """Three round trips per task, plus the full hash rewritten twice"""
+    task = Task.from_redis(await worker.redis.hgetall(f"task:{task_id}"))
+    task.status = TaskStatus.RUNNING
+    task.started_at = datetime.utcnow()
+    await worker.redis.hset(f"task:{task_id}", mapping=task.to_redis())
+
+    task.result = await worker.task_registry[task.func_name]()
+    task.status = TaskStatus.COMPLETED
+    task.completed_at = datetime.utcnow()
+    task.processing_time = 0.0
+    await worker.redis.hset(f"task:{task_id}", mapping=task.to_redis())
+
+
+async def scripted_process(worker: BackgroundWorker, task_id: str) -> None:
+    await worker._process_task("bench", task_id)
+
+
+async def measure(worker: BackgroundWorker, process, total: int, concurrency: int) -> float:
+    """Enqueue `total` no-op tasks, process them; return tasks/sec"""
+    task_ids = [await worker.enqueue_task("noop") for _ in range(total)]
+    pending = iter(task_ids)
+
+    async def drain():
+        for task_id in pending:
+            await process(worker, task_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(drain() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    await worker.redis.delete(*(f"task:{task_id}" for task_id in task_ids))
+    return total / elapsed
+
+
+async def main(args: argparse.Namespace) -> None:
+    worker = BackgroundWorker(redis_url=args.redis_url)
+    worker.redis = redis.from_url(args.redis_url, decode_responses=True)
+    await worker.redis.ping()
+    worker.register_task("noop", noop)
+    # Tasks are processed by id directly, so keep them out of the real queues
+    worker.queue.push = lambda *args, **kwargs: asyncio.sleep(0)
+
+    # Warm up connections and script registration
+    await measure(worker, scripted_process, args.concurrency, args.concurrency)
+
+    legacy = await measure(worker, legacy_process, args.tasks, args.concurrency)
+    scripted = await measure(worker, scripted_process, args.tasks, args.concurrency)
+    await worker.redis.aclose()
+
+    print(
+        f"{args.tasks} no-op tasks, concurrency {args.concurrency}, "
+        f"Redis at {args.redis_url}"
+    )
+    for label, rate in (("legacy (hgetall + 2x hset)", legacy), ("scripted", scripted)):
+        print(f"  {label:28s} {rate:9.0f} tasks/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--redis-url", default="redis://localhost:6379")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+"""
+Concurrent Context Assembly for AI Operations
+- Fans out independent context fetches concurrently
+- Per-source deadlines so one slow table cannot stall the request
+- Partial context with explicit flags when a source times out or fails
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from services.supabase import get_async_supabase_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE_TIMEOUT = 2.0
+
+
+@dataclass
+class ContextSource:
+    """A single independent piece of context"""
+
+    name: str
+    fetch: Callable[[], Awaitable[Any]]
+    default: Any = None
+    timeout: float | None = None
+
+
+@dataclass
+class AssembledContext:
+    """Result of a fan-out, including which sources are missing"""
+
+    data: dict[str, Any]
+    timed_out: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    latency_ms: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.timed_out or self.failed)
+
+    @property
+    def missing_sources(self) -> list[str]:
+        return self.timed_out + self.failed
+
+
+class ContextAssembler:
+    """Runs context sources concurrently, each under its own deadline.
+
+    Total latency is bounded by the slowest source (or its deadline) rather
+    than the sum of all sources.
+    """
+
+    def __init__(self, default_timeout: float = DEFAULT_SOURCE_TIMEOUT):
+        self.default_timeout = default_timeout
+
+    async def _run_source(
+        self, source: ContextSource, result: AssembledContext
+    ) -> None:
+        start = time.perf_counter()
+        timeout = source.timeout or self.default_timeout
+        try:
+            result.data[source.name] = await asyncio.wait_for(source.fetch(), timeout)
+        except TimeoutError:
+            logger.warning(f"Context source '{source.name}' timed out after {timeout}s")
+            result.data[source.name] = source.default
+            result.timed_out.append(source.name)
+        except Exception as e:
+            logger.error(f"Context source '{source.name}' failed: {e}")
+            result.data[source.name] = source.default
+            result.failed.append(source.name)
+        finally:
+            result.latency_ms[source.name] = (time.perf_counter() - start) * 1000
+
+    async def assemble(self, sources: list[ContextSource]) -> AssembledContext:
+        """Fetch all sources concurrently and return whatever arrived in time"""
+        result = AssembledContext(data={})
+        await asyncio.gather(*(self._run_source(s, result) for s in sources))
+        return result
+
+
+# Global assembler instance
+context_assembler = ContextAssembler()
+
+
+async def build_user_context(user_id: str) -> dict[str, Any]:
+    """Recent tasks, goals and schedule blocks used by the AI endpoints"""
+    supabase = get_async_supabase_client()
+
+    async def fetch(table: str, limit: int) -> list[dict[str, Any]]:
+        result = await (
+            supabase.table(table).select("*").eq("user_id", user_id).limit(limit).execute()
+        )
+        return result.data or []
+
+    assembled = await context_assembler.assemble(
+        [
+            ContextSource("tasks", lambda: fetch("tasks", 20), default=[]),
+            ContextSource("goals", lambda: fetch("goals", 10), default=[]),
+            ContextSource(
+                "schedule_blocks", lambda: fetch("schedule_blocks", 15), default=[]
+            ),
+        ]
+    )
+
+    return {
+        **assembled.data,
+        "user_id": user_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        "partial": assembled.partial,
+        "missing_sources": assembled.missing_sources,
+    }
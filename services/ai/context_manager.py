@@ -2,8 +2,9 @@
 Advanced AI Context Management with Personalization and Learning
 """
 
+import asyncio
 import logging
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import UTC, datetime, timedelta
 from enum import Enum
 from typing import Any
@@ -22,7 +23,8 @@ class InMemoryAsyncCache:
 
 cache_service = InMemoryAsyncCache()
 
-from services.supabase import get_supabase_client
+from services.ai.context_assembler import ContextAssembler, ContextSource
+from services.supabase import get_async_supabase_client
 
 logger = logging.getLogger(__name__)
 
@@ -54,13 +56,16 @@ class UserContext:
     interaction_history: list[dict[str, Any]]
     personalization_score: float
     last_updated: datetime
+    partial: bool = False
+    missing_sources: list[str] = field(default_factory=list)
 
 
 class AdvancedContextManager:
     """Advanced context manager with personalization and learning"""
 
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(self, source_timeout: float = 2.0):
+        self.supabase = get_async_supabase_client()
+        self.assembler = ContextAssembler(default_timeout=source_timeout)
         self.context_cache = {}
         self.learning_weights = {
             "task_completion": 0.3,
@@ -84,37 +89,41 @@ class AdvancedContextManager:
         if cached_context:
             return UserContext(**cached_context)
 
-        # Build context components
-        context_data = {}
-
-        if ContextType.CURRENT_GOALS in context_types:
-            context_data["current_goals"] = await self._get_current_goals(user_id)
-
-        if ContextType.TASK_HISTORY in context_types:
-            context_data["recent_tasks"] = await self._get_recent_tasks(user_id)
-
-        if ContextType.PRODUCTIVITY_PATTERNS in context_types:
-            context_data["productivity_patterns"] = (
-                await self._analyze_productivity_patterns(user_id)
-            )
-
-        if ContextType.SCHEDULE_PREFERENCES in context_types:
-            context_data["schedule_preferences"] = await self._get_schedule_preferences(
-                user_id
-            )
-
-        if ContextType.LEARNING_PROGRESS in context_types:
-            context_data["learning_progress"] = await self._get_learning_progress(
-                user_id
-            )
-
-        if ContextType.MOOD_TRENDS in context_types:
-            context_data["mood_trends"] = await self._get_mood_trends(user_id)
+        # Build context components concurrently; each has its own deadline.
+        # Builders raise on errors so the assembler marks the source failed
+        builders = {
+            ContextType.GOAL_PROGRESS: ("current_goals", self._get_current_goals, []),
+            ContextType.TASK_HISTORY: ("recent_tasks", self._get_recent_tasks, []),
+            ContextType.PRODUCTIVITY_PATTERNS: (
+                "productivity_patterns",
+                self._analyze_productivity_patterns,
+                {},
+            ),
+            ContextType.SCHEDULE_PREFERENCES: (
+                "schedule_preferences",
+                self._get_schedule_preferences,
+                {},
+            ),
+            ContextType.LEARNING_PROGRESS: (
+                "learning_progress",
+                self._get_learning_progress,
+                {},
+            ),
+            ContextType.MOOD_TRENDS: ("mood_trends", self._get_mood_trends, []),
+            ContextType.INTERACTION_HISTORY: (
+                "interaction_history",
+                self._get_interaction_history,
+                [],
+            ),
+        }
 
-        if ContextType.INTERACTION_HISTORY in context_types:
-            context_data["interaction_history"] = await self._get_interaction_history(
-                user_id
-            )
+        sources = [
+            ContextSource(name, lambda build=build: build(user_id), default=default)
+            for context_type, (name, build, default) in builders.items()
+            if context_type in context_types
+        ]
+        assembled = await self.assembler.assemble(sources)
+        context_data = assembled.data
 
         # Calculate personalization score
         personalization_score = await self._calculate_personalization_score(
@@ -133,170 +142,149 @@ class AdvancedContextManager:
             interaction_history=context_data.get("interaction_history", []),
             personalization_score=personalization_score,
             last_updated=datetime.now(UTC),
+            partial=assembled.partial,
+            missing_sources=assembled.missing_sources,
         )
 
-        # Cache the context
-        await cache_service.set(cache_key, asdict(user_context), ttl=300)  # 5 minutes
+        # Cache the context; partial results are retried on the next request
+        if not assembled.partial:
+            await cache_service.set(
+                cache_key, asdict(user_context), ttl=300
+            )  # 5 minutes
 
         return user_context
 
     async def _get_current_goals(self, user_id: str) -> list[dict[str, Any]]:
         """Get user's current active goals with progress"""
-        try:
-            result = (
-                self.supabase.table("goals")
-                .select("*")
-                .eq("user_id", user_id)
-                .eq("status", "active")
-                .order("created_at", desc=True)
-                .limit(5)
-                .execute()
-            )
+        result = await (
+            self.supabase.table("goals")
+            .select("*")
+            .eq("user_id", user_id)
+            .eq("status", "active")
+            .order("created_at", desc=True)
+            .limit(5)
+            .execute()
+        )
 
-            goals = []
-            for goal in result.data:
-                # Calculate progress
-                progress = await self._calculate_goal_progress(goal["id"])
-                goal["progress"] = progress
-                goals.append(goal)
+        # Calculate progress for all goals concurrently
+        progress = await asyncio.gather(
+            *(self._calculate_goal_progress(goal["id"]) for goal in result.data)
+        )
+        goals = []
+        for goal, goal_progress in zip(result.data, progress, strict=True):
+            goal["progress"] = goal_progress
+            goals.append(goal)
 
-            return goals
-        except Exception as e:
-            logger.error(f"Error getting current goals: {e}")
-            return []
+        return goals
 
     async def _get_recent_tasks(
         self, user_id: str, days: int = 7
     ) -> list[dict[str, Any]]:
         """Get recent tasks with completion patterns"""
-        try:
-            cutoff_date = datetime.now(UTC) - timedelta(days=days)
-
-            result = (
-                self.supabase.table("tasks")
-                .select("*")
-                .eq("user_id", user_id)
-                .gte("created_at", cutoff_date.isoformat())
-                .order("created_at", desc=True)
-                .limit(20)
-                .execute()
-            )
+        cutoff_date = datetime.now(UTC) - timedelta(days=days)
+
+        result = await (
+            self.supabase.table("tasks")
+            .select("*")
+            .eq("user_id", user_id)
+            .gte("created_at", cutoff_date.isoformat())
+            .order("created_at", desc=True)
+            .limit(20)
+            .execute()
+        )
 
-            return result.data
-        except Exception as e:
-            logger.error(f"Error getting recent tasks: {e}")
-            return []
+        return result.data
 
     async def _analyze_productivity_patterns(self, user_id: str) -> dict[str, Any]:
         """Analyze user's productivity patterns"""
-        try:
-            # Get task completion data
-            result = (
-                self.supabase.table("tasks")
-                .select("completed_at, priority, estimated_time, actual_time")
-                .eq("user_id", user_id)
-                .not_.is_("completed_at", "null")
-                .gte(
-                    "completed_at", (datetime.now(UTC) - timedelta(days=30)).isoformat()
-                )
-                .execute()
+        # Get task completion data
+        result = await (
+            self.supabase.table("tasks")
+            .select("completed_at, priority, estimated_time, actual_time")
+            .eq("user_id", user_id)
+            .not_.is_("completed_at", "null")
+            .gte(
+                "completed_at", (datetime.now(UTC) - timedelta(days=30)).isoformat()
             )
+            .execute()
+        )
 
-            patterns = {
-                "peak_hours": self._find_peak_productivity_hours(result.data),
-                "completion_rate": self._calculate_completion_rate(result.data),
-                "priority_preferences": self._analyze_priority_patterns(result.data),
-                "time_accuracy": self._analyze_time_estimates(result.data),
-                "productivity_score": self._calculate_productivity_score(result.data),
-            }
+        patterns = {
+            "peak_hours": self._find_peak_productivity_hours(result.data),
+            "completion_rate": self._calculate_completion_rate(result.data),
+            "priority_preferences": self._analyze_priority_patterns(result.data),
+            "time_accuracy": self._analyze_time_estimates(result.data),
+            "productivity_score": self._calculate_productivity_score(result.data),
+        }
 
-            return patterns
-        except Exception as e:
-            logger.error(f"Error analyzing productivity patterns: {e}")
-            return {}
+        return patterns
 
     async def _get_schedule_preferences(self, user_id: str) -> dict[str, Any]:
         """Get user's schedule preferences and patterns"""
-        try:
-            # Get schedule blocks
-            result = (
-                self.supabase.table("schedule_blocks")
-                .select("*")
-                .eq("user_id", user_id)
-                .gte("start_time", (datetime.now(UTC) - timedelta(days=14)).isoformat())
-                .execute()
-            )
+        # Get schedule blocks
+        result = await (
+            self.supabase.table("schedule_blocks")
+            .select("*")
+            .eq("user_id", user_id)
+            .gte("start_time", (datetime.now(UTC) - timedelta(days=14)).isoformat())
+            .execute()
+        )
 
-            preferences = {
-                "preferred_work_hours": self._analyze_work_hours(result.data),
-                "break_patterns": self._analyze_break_patterns(result.data),
-                "focus_session_length": self._analyze_focus_sessions(result.data),
-                "energy_level_patterns": self._analyze_energy_patterns(result.data),
-            }
+        preferences = {
+            "preferred_work_hours": self._analyze_work_hours(result.data),
+            "break_patterns": self._analyze_break_patterns(result.data),
+            "focus_session_length": self._analyze_focus_sessions(result.data),
+            "energy_level_patterns": self._analyze_energy_patterns(result.data),
+        }
 
-            return preferences
-        except Exception as e:
-            logger.error(f"Error getting schedule preferences: {e}")
-            return {}
+        return preferences
 
     async def _get_learning_progress(self, user_id: str) -> dict[str, Any]:
         """Get user's learning progress and patterns"""
-        try:
-            # Get flashcard data
-            result = (
-                self.supabase.table("flashcards")
-                .select("*")
-                .eq("user_id", user_id)
-                .order("last_reviewed", desc=True)
-                .limit(50)
-                .execute()
-            )
+        # Get flashcard data
+        result = await (
+            self.supabase.table("flashcards")
+            .select("*")
+            .eq("user_id", user_id)
+            .order("last_reviewed", desc=True)
+            .limit(50)
+            .execute()
+        )
 
-            progress = {
-                "total_flashcards": len(result.data),
-                "mastery_level": self._calculate_mastery_level(result.data),
-                "learning_streak": self._calculate_learning_streak(result.data),
-                "difficulty_distribution": self._analyze_difficulty_distribution(
-                    result.data
-                ),
-                "review_patterns": self._analyze_review_patterns(result.data),
-            }
+        progress = {
+            "total_flashcards": len(result.data),
+            "mastery_level": self._calculate_mastery_level(result.data),
+            "learning_streak": self._calculate_learning_streak(result.data),
+            "difficulty_distribution": self._analyze_difficulty_distribution(
+                result.data
+            ),
+            "review_patterns": self._analyze_review_patterns(result.data),
+        }
 
-            return progress
-        except Exception as e:
-            logger.error(f"Error getting learning progress: {e}")
-            return {}
+        return progress
 
     async def _get_mood_trends(
         self, user_id: str, days: int = 30
     ) -> list[dict[str, Any]]:
         """Get user's mood trends and patterns"""
-        try:
-            cutoff_date = datetime.now(UTC) - timedelta(days=days)
-
-            result = (
-                self.supabase.table("mood_entries")
-                .select("*")
-                .eq("user_id", user_id)
-                .gte("created_at", cutoff_date.isoformat())
-                .order("created_at", desc=True)
-                .execute()
-            )
+        cutoff_date = datetime.now(UTC) - timedelta(days=days)
+
+        result = await (
+            self.supabase.table("mood_entries")
+            .select("*")
+            .eq("user_id", user_id)
+            .gte("created_at", cutoff_date.isoformat())
+            .order("created_at", desc=True)
+            .execute()
+        )
 
-            return result.data
-        except Exception as e:
-            logger.error(f"Error getting mood trends: {e}")
-            return []
+        return result.data
 
     async def _get_interaction_history(self, user_id: str) -> list[dict[str, Any]]:
         """Get user's AI interaction history"""
-        try:
-            # This would come from a new table tracking AI interactions
-            # For now, return empty list
-            return []
-        except Exception as e:
-            logger.error(f"Error getting interaction history: {e}")
-            return []
+        # This would come from a new table tracking AI interactions
+        # For now, return empty list
+        return []
 
     async def _calculate_personalization_score(
         self, user_id: str, context_data: dict
@@ -405,7 +393,7 @@ class AdvancedContextManager:
         """Calculate progress for a specific goal"""
         try:
             # Get goal tasks
-            result = (
+            result = await (
                 self.supabase.table("tasks")
                 .select("status")
                 .eq("goal_id", goal_id)
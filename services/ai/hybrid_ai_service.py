@@ -1,16 +1,23 @@
 """
 Hybrid AI Service - Multi-Provider AI Router
-Implements cost-optimized AI routing with quality assurance and fallback logic.
+Implements cost-optimized AI routing with quality assurance and fallback logic,
+latency-aware hedging, and a normalized-prompt response cache in front.
 """
 
 import asyncio
+import json
 import logging
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from dataclasses import asdict, dataclass, replace
 from enum import Enum
 from typing import Any
 import time
 
+from services.ai.latency_tracker import ProviderLatencyTracker
+from services.ai.provider_health import ProviderHealthTracker
+from services.ai.prompt_cache import PromptCache, normalize_prompt, prompt_hash
 from services.cost_tracking import cost_tracking_service
 from services.redis_cache import enhanced_cache
 from services.prometheus_integration import get_prometheus_service
@@ -34,6 +41,16 @@ class TaskType(str, Enum):
     CONVERSATION = "conversation"
 
 
+# Task types whose prompts are built from shared study material rather than
+# user content, so cached responses can be shared between users. Everything
+# else (summaries and questions about a user's own notes included) is cached
+# per user.
+SHARED_CACHE_TASK_TYPES = {
+    TaskType.FLASHCARD,
+    TaskType.EXAM_QUESTION,
+}
+
+
 class ModelProvider(str, Enum):
     """Available AI model providers"""
 
@@ -102,6 +119,17 @@ class HybridAIService:
         self.clients = self._initialize_clients()
         self.quality_thresholds = self._get_quality_thresholds()
         self.cost_tracker = cost_tracking_service
+        self.prompt_cache = PromptCache()
+
+        # Hedging: when the leading attempt runs past its provider's rolling
+        # p95 latency, start the next provider and take whichever answers first
+        self.latency_tracker = ProviderLatencyTracker()
+        self.hedging_enabled = True
+        self.max_parallel_attempts = 2
+        self.hedge_cost_cap_usd = 0.005  # Estimated extra spend allowed per request
+
+        # Circuit breakers and live health ranking per provider
+        self.provider_health = ProviderHealthTracker(self.latency_tracker)
 
     def _initialize_model_configs(self) -> dict[ModelProvider, ModelConfig]:
         """Initialize model configurations with pricing and capabilities"""
@@ -254,7 +282,17 @@ class HybridAIService:
             ],
         }
 
-        return model_sequences.get(task_type, [ModelProvider.OPENAI_API])
+        models = model_sequences.get(task_type, [ModelProvider.OPENAI_API])
+
+        # Reorder by live health and skip providers whose circuit is open
+        ranked = self.provider_health.rank(
+            [model.value for model in models],
+            {
+                model.value: self.model_configs[model].latency_ms / 1000
+                for model in models
+            },
+        )
+        return [ModelProvider(name) for name in ranked]
 
     async def generate_response(
         self,
@@ -264,86 +302,69 @@ class HybridAIService:
         max_tokens: int = 1000,
         temperature: float = 0.7,
         stop: list[str] = None,
+        use_cache: bool = True,
+        hedge: bool | None = None,
         **kwargs,
     ) -> AIResponse:
-        """Generate AI response using optimal provider for task type."""
+        """Generate AI response using optimal provider for task type.
+
+        With hedging (the default, see ``hedging_enabled``) a slow provider is
+        raced against the next one instead of being waited out.
+        """
         start_time = time.time()
         prometheus_service = get_prometheus_service()
-        
+
+        cache_namespace = None
+        if use_cache:
+            cache_namespace = self._cache_namespace(
+                task_type, user_id, max_tokens, stop, temperature, kwargs
+            )
+
+        if cache_namespace is not None:
+            cached = await self._get_cached_response(
+                task_type, cache_namespace, prompt, user_id
+            )
+            if cached is not None:
+                prometheus_service.record_ai_request(
+                    provider="cache",
+                    task_type=task_type.value,
+                    status="cache_hit",
+                    duration=time.time() - start_time,
+                    user_id=user_id
+                )
+                return cached
+
         try:
+            await self.provider_health.sync([model.value for model in self.model_configs])
+
             # Get optimal models for task type
             models = self._get_optimal_models(task_type)
-            
-            # Try each model until one succeeds
-            for model in models:
-                try:
-                    logger.info(f"Attempting AI request with {model.value} for {task_type.value}")
-                    
-                    # Record AI request start
-                    prometheus_service.record_ai_request(
-                        provider=model.value,
-                        task_type=task_type.value,
-                        status="started",
-                        duration=0,
-                        user_id=user_id
-                    )
-                    
-                    # Generate response
-                    response = await self._generate_with_model(
-                        model, prompt, max_tokens, temperature, stop, **kwargs
-                    )
-                    
-                    # Calculate duration
-                    duration = time.time() - start_time
-                    
-                    # Record successful AI request
-                    prometheus_service.record_ai_request(
-                        provider=model.value,
-                        task_type=task_type.value,
-                        status="success",
-                        duration=duration,
-                        user_id=user_id
-                    )
-                    
-                    # Record token usage
-                    if response.tokens_used:
-                        prometheus_service.record_ai_tokens(
-                            provider=model.value,
-                            task_type=task_type.value,
-                            token_type="total",
-                            tokens=response.tokens_used,
-                            user_id=user_id
-                        )
-                    
-                    # Record cost
-                    if response.cost_usd:
-                        prometheus_service.record_ai_cost(
-                            provider=model.value,
-                            task_type=task_type.value,
-                            cost=response.cost_usd,
-                            user_id=user_id
-                        )
-                    
-                    return response
-                    
-                except Exception as e:
-                    duration = time.time() - start_time
-                    
-                    # Record failed AI request
-                    prometheus_service.record_ai_request(
-                        provider=model.value,
-                        task_type=task_type.value,
-                        status="failed",
-                        duration=duration,
-                        user_id=user_id
-                    )
-                    
-                    logger.warning(f"Failed with {model.value}: {e}")
-                    continue
-            
-            # If all models failed
-            raise Exception(f"All AI providers failed for task type {task_type.value}")
-            
+
+            async def attempt(model: ModelProvider) -> AIResponse:
+                return await self._attempt_model(
+                    model,
+                    task_type,
+                    prompt,
+                    user_id,
+                    max_tokens,
+                    temperature,
+                    stop,
+                    start_time,
+                    **kwargs,
+                )
+
+            if self.hedging_enabled if hedge is None else hedge:
+                response = await self._generate_hedged(
+                    task_type, models, prompt, max_tokens, attempt
+                )
+            else:
+                response = await self._generate_sequential(task_type, models, attempt)
+
+            if cache_namespace is not None:
+                await self._cache_response(task_type, cache_namespace, prompt, response)
+
+            return response
+
         except Exception as e:
             duration = time.time() - start_time
             
@@ -358,6 +379,553 @@ class HybridAIService:
             
             raise
 
+    async def _attempt_model(
+        self,
+        model: ModelProvider,
+        task_type: TaskType,
+        prompt: str,
+        user_id: str | None,
+        max_tokens: int,
+        temperature: float,
+        stop: list[str] | None,
+        start_time: float,
+        **kwargs,
+    ) -> AIResponse:
+        """Call one provider, enforce the quality threshold and record metrics"""
+        prometheus_service = get_prometheus_service()
+        logger.info(f"Attempting AI request with {model.value} for {task_type.value}")
+
+        # Record AI request start
+        prometheus_service.record_ai_request(
+            provider=model.value,
+            task_type=task_type.value,
+            status="started",
+            duration=0,
+            user_id=user_id
+        )
+
+        attempt_start = time.monotonic()
+        self.provider_health.begin(model.value)
+        try:
+            # Generate response
+            try:
+                response = await self._generate_with_model(
+                    model, prompt, max_tokens, temperature, stop, **kwargs
+                )
+            except Exception:
+                await self.provider_health.record_failure(model.value)
+                raise
+
+            await self.provider_health.record_success(model.value)
+
+            threshold = self.quality_thresholds.get(task_type, 0.0)
+            if response.quality_score < threshold:
+                raise Exception(
+                    f"Quality {response.quality_score:.2f} below "
+                    f"threshold {threshold:.2f}"
+                )
+
+        except asyncio.CancelledError:
+            # Lost a hedged race
+            self.provider_health.release(model.value)
+            prometheus_service.record_ai_request(
+                provider=model.value,
+                task_type=task_type.value,
+                status="cancelled",
+                duration=time.time() - start_time,
+                user_id=user_id
+            )
+            raise
+
+        except Exception:
+            # Record failed AI request
+            prometheus_service.record_ai_request(
+                provider=model.value,
+                task_type=task_type.value,
+                status="failed",
+                duration=time.time() - start_time,
+                user_id=user_id
+            )
+            raise
+
+        self.latency_tracker.record(model.value, time.monotonic() - attempt_start)
+
+        # Record successful AI request
+        prometheus_service.record_ai_request(
+            provider=model.value,
+            task_type=task_type.value,
+            status="success",
+            duration=time.time() - start_time,
+            user_id=user_id
+        )
+
+        # Record token usage
+        if response.tokens_used:
+            prometheus_service.record_ai_tokens(
+                provider=model.value,
+                task_type=task_type.value,
+                token_type="total",
+                tokens=response.tokens_used,
+                user_id=user_id
+            )
+
+        # Record cost
+        if response.cost_usd:
+            prometheus_service.record_ai_cost(
+                provider=model.value,
+                task_type=task_type.value,
+                cost=response.cost_usd,
+                user_id=user_id
+            )
+
+        return response
+
+    async def _generate_sequential(
+        self, task_type: TaskType, models: list[ModelProvider], attempt
+    ) -> AIResponse:
+        """Try each model in order until one succeeds"""
+        for model in models:
+            try:
+                return await attempt(model)
+            except Exception as e:
+                logger.warning(f"Failed with {model.value}: {e}")
+
+        # If all models failed
+        raise Exception(f"All AI providers failed for task type {task_type.value}")
+
+    def _token_cost(self, model: ModelProvider, tokens: int) -> float:
+        """Cost of a number of tokens at the configured per-token price"""
+        return tokens / 1_000_000 * self.model_configs[model].cost_per_1m_tokens
+
+    def _estimate_cost(self, model: ModelProvider, prompt: str, max_tokens: int) -> float:
+        """Upper-bound cost of one call from the configured per-token price"""
+        # Rough estimation: 1 token ≈ 4 characters for English text
+        return self._token_cost(model, len(prompt) // 4 + max_tokens)
+
+    async def _generate_hedged(
+        self,
+        task_type: TaskType,
+        models: list[ModelProvider],
+        prompt: str,
+        max_tokens: int,
+        attempt,
+    ) -> AIResponse:
+        """Race providers in preference order.
+
+        The next provider is started as soon as the in-flight one fails, or as
+        a hedge once it runs past that provider's rolling p95 latency. The
+        first acceptable answer wins and the other attempts are cancelled.
+        Hedges stop once their estimated cost would exceed
+        ``hedge_cost_cap_usd``.
+        """
+        prometheus_service = get_prometheus_service()
+        remaining = list(models)
+        pending: dict[asyncio.Task, ModelProvider] = {}
+        hedged: set[ModelProvider] = set()
+        hedge_cost = 0.0
+        hedging_allowed = True
+        leader = None
+        leader_started = 0.0
+
+        def launch() -> None:
+            nonlocal leader, leader_started
+            leader = remaining.pop(0)
+            leader_started = time.monotonic()
+            pending[asyncio.create_task(attempt(leader))] = leader
+
+        try:
+            while pending or remaining:
+                if not pending:
+                    launch()
+                    continue
+
+                timeout = None
+                if (
+                    hedging_allowed
+                    and remaining
+                    and len(pending) < self.max_parallel_attempts
+                ):
+                    default = self.model_configs[leader].latency_ms / 1000
+                    p95 = self.latency_tracker.p95(leader.value, default)
+                    timeout = max(0.0, leader_started + p95 - time.monotonic())
+
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    candidate = remaining[0]
+                    extra_cost = self._estimate_cost(candidate, prompt, max_tokens)
+                    if hedge_cost + extra_cost > self.hedge_cost_cap_usd:
+                        prometheus_service.record_ai_hedge(candidate.value, "over_budget")
+                        hedging_allowed = False
+                        continue
+
+                    hedge_cost += extra_cost
+                    logger.info(
+                        f"{leader.value} exceeded its p95 latency for "
+                        f"{task_type.value}; hedging with {candidate.value}"
+                    )
+                    launch()
+                    hedged.add(candidate)
+                    prometheus_service.record_ai_hedge(candidate.value, "launched")
+                    continue
+
+                winner = None
+                for task in done:
+                    model = pending.pop(task)
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        logger.warning(f"Failed with {model.value}: {e}")
+                        continue
+
+                    if winner is None:
+                        winner = (model, response)
+
+                if winner is not None:
+                    model, response = winner
+                    if model in hedged:
+                        prometheus_service.record_ai_hedge(model.value, "won")
+                    return response
+
+            # If all models failed
+            raise Exception(f"All AI providers failed for task type {task_type.value}")
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _generate_with_model(
+        self,
+        model: ModelProvider,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        stop: list[str] = None,
+        **kwargs,
+    ) -> AIResponse:
+        """Generate a response with a single provider"""
+        client = await self._get_available_client(model)
+        return await client.generate(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stop=stop,
+            **kwargs,
+        )
+
+    async def _get_available_client(self, model: ModelProvider) -> BaseAIClient:
+        """Client for a provider, raising if it is missing or unavailable"""
+        client = self.clients.get(model)
+        if client is None:
+            raise Exception(f"No client configured for {model.value}")
+
+        # Skip the extra round trip while the provider is answering normally
+        if self.provider_health.needs_availability_check(
+            model.value
+        ) and not await client.is_available():
+            raise Exception(f"{model.value} is not available")
+
+        return client
+
+    async def generate_stream(
+        self,
+        task_type: TaskType,
+        prompt: str,
+        user_id: str = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        stop: list[str] = None,
+        use_cache: bool = True,
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        """Stream a response as it is generated, failing over between providers.
+
+        Providers are tried in the same order as ``generate_response``. If one
+        fails before producing text the next is used; if it fails mid-stream
+        the next is asked to continue from the text already sent, so the
+        caller sees a single answer. Cache hits are yielded in one chunk.
+        Quality thresholds are not enforced because text is sent before the
+        response is complete.
+        """
+        cache_namespace = (
+            self._cache_namespace(
+                task_type, user_id, max_tokens, stop, temperature, kwargs
+            )
+            if use_cache
+            else None
+        )
+        if cache_namespace is not None:
+            cached = await self._get_cached_response(
+                task_type, cache_namespace, prompt, user_id
+            )
+            if cached is not None:
+                yield cached.content
+                return
+
+        start_time = time.time()
+        await self.provider_health.sync([model.value for model in self.model_configs])
+
+        emitted: list[str] = []
+        for model in self._get_optimal_models(task_type):
+            partial = "".join(emitted)
+            attempt_prompt = (
+                self._continuation_prompt(prompt, partial) if partial else prompt
+            )
+            attempt_max_tokens = max(1, max_tokens - len(partial) // 4)
+
+            try:
+                async with aclosing(
+                    self._stream_with_model(
+                        model,
+                        task_type,
+                        attempt_prompt,
+                        user_id,
+                        attempt_max_tokens,
+                        temperature,
+                        stop,
+                        start_time,
+                        **kwargs,
+                    )
+                ) as stream:
+                    async for text in stream:
+                        emitted.append(text)
+                        yield text
+            except Exception as e:
+                logger.warning(f"Streaming failed with {model.value}: {e}")
+                continue
+
+            if cache_namespace is not None:
+                content = "".join(emitted)
+                tokens = (len(prompt) + len(content)) // 4
+                await self._cache_response(
+                    task_type,
+                    cache_namespace,
+                    prompt,
+                    AIResponse(
+                        content=content,
+                        model_used=self.model_configs[model].model_name,
+                        provider=model,
+                        tokens_used=tokens,
+                        cost_usd=self._token_cost(model, tokens),
+                        quality_score=self.model_configs[model].quality_score,
+                        response_time_ms=int((time.time() - start_time) * 1000),
+                        metadata={"streamed": True},
+                    ),
+                )
+            return
+
+        # If all models failed
+        raise Exception(f"All AI providers failed for task type {task_type.value}")
+
+    async def _stream_with_model(
+        self,
+        model: ModelProvider,
+        task_type: TaskType,
+        prompt: str,
+        user_id: str | None,
+        max_tokens: int,
+        temperature: float,
+        stop: list[str] | None,
+        start_time: float,
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        """Stream from one provider, recording health, latency and cost"""
+        prometheus_service = get_prometheus_service()
+        logger.info(f"Streaming AI request with {model.value} for {task_type.value}")
+
+        prometheus_service.record_ai_request(
+            provider=model.value,
+            task_type=task_type.value,
+            status="started",
+            duration=0,
+            user_id=user_id
+        )
+
+        attempt_start = time.monotonic()
+        self.provider_health.begin(model.value)
+        content = []
+        try:
+            try:
+                client = await self._get_available_client(model)
+                async with aclosing(
+                    client.generate_stream(
+                        prompt,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        stop=stop,
+                        **kwargs,
+                    )
+                ) as stream:
+                    async for text in stream:
+                        if not content:
+                            prometheus_service.record_ai_time_to_first_token(
+                                model.value, time.monotonic() - attempt_start
+                            )
+                        content.append(text)
+                        yield text
+
+                if not content:
+                    raise Exception(f"{model.value} returned an empty stream")
+            except (asyncio.CancelledError, GeneratorExit):
+                raise
+            except Exception:
+                await self.provider_health.record_failure(model.value)
+                raise
+
+        except (asyncio.CancelledError, GeneratorExit):
+            # Caller went away mid-stream
+            self.provider_health.release(model.value)
+            prometheus_service.record_ai_request(
+                provider=model.value,
+                task_type=task_type.value,
+                status="cancelled",
+                duration=time.time() - start_time,
+                user_id=user_id
+            )
+            raise
+
+        except Exception:
+            prometheus_service.record_ai_request(
+                provider=model.value,
+                task_type=task_type.value,
+                status="failed",
+                duration=time.time() - start_time,
+                user_id=user_id
+            )
+            raise
+
+        await self.provider_health.record_success(model.value)
+        self.latency_tracker.record(model.value, time.monotonic() - attempt_start)
+
+        prometheus_service.record_ai_request(
+            provider=model.value,
+            task_type=task_type.value,
+            status="success",
+            duration=time.time() - start_time,
+            user_id=user_id
+        )
+
+        # Streams carry no usage block, so estimate from the text
+        tokens = (len(prompt) + len("".join(content))) // 4
+        prometheus_service.record_ai_tokens(
+            provider=model.value,
+            task_type=task_type.value,
+            token_type="total",
+            tokens=tokens,
+            user_id=user_id
+        )
+        prometheus_service.record_ai_cost(
+            provider=model.value,
+            task_type=task_type.value,
+            cost=self._token_cost(model, tokens),
+            user_id=user_id
+        )
+
+    def _continuation_prompt(self, prompt: str, partial: str) -> str:
+        """Prompt asking a fallback provider to finish a partly streamed answer"""
+        return (
+            f"{prompt}\n\n"
+            "A previous assistant began answering the request above but was cut "
+            "off. Continue the answer exactly where it stops, without repeating "
+            "any of it or commenting on the interruption.\n\n"
+            f"PARTIAL ANSWER:\n{partial}"
+        )
+
+    def _cache_namespace(
+        self,
+        task_type: TaskType,
+        user_id: str | None,
+        max_tokens: int,
+        stop: list[str] | None,
+        temperature: float = 0.7,
+        options: dict[str, Any] | None = None,
+    ) -> str | None:
+        """Cache namespace for a request, or None if it must not be cached.
+
+        Everything that changes the generated text besides the prompt is
+        part of the namespace: max_tokens, temperature, stop sequences and
+        any extra provider options.
+        """
+        if task_type in SHARED_CACHE_TASK_TYPES:
+            scope = "shared"
+        elif user_id:
+            scope = f"user:{user_id}"
+        else:
+            return None
+
+        namespace = f"{task_type.value}:{scope}:{max_tokens}:t{temperature:g}"
+        if stop:
+            namespace += ":" + ",".join(stop)
+        if options:
+            namespace += ":" + prompt_hash(json.dumps(options, sort_keys=True, default=str))
+        return namespace
+
+    async def _get_cached_response(
+        self, task_type: TaskType, namespace: str, prompt: str, user_id: str | None
+    ) -> AIResponse | None:
+        """Look up the local index, then the exact-match cache shared by workers"""
+        entry = self.prompt_cache.lookup(namespace, prompt)
+
+        if entry is not None:
+            response = entry.response
+            source = "local"
+        else:
+            cached = await enhanced_cache.get(
+                "ai_response", namespace, prompt_hash(normalize_prompt(prompt))
+            )
+            if not cached:
+                return None
+
+            response = AIResponse(**cached)
+            source = "shared"
+            # Seed the local index so repeats hit without Redis
+            self.prompt_cache.store(
+                namespace,
+                prompt,
+                response,
+                response.cost_usd or 0.0,
+                user_scoped=task_type not in SHARED_CACHE_TASK_TYPES,
+            )
+
+        saved_usd = response.cost_usd or 0.0
+        self.cost_tracker.track_cache_hit(
+            user_id or "anonymous", f"/ai/{task_type.value}", saved_usd
+        )
+        logger.info(
+            f"AI {source} cache hit for {task_type.value} (saved ${saved_usd:.6f})"
+        )
+
+        return replace(
+            response,
+            cost_usd=0.0,
+            metadata={
+                **(response.metadata or {}),
+                "cache": source,
+                "saved_usd": saved_usd,
+            },
+        )
+
+    async def _cache_response(
+        self, task_type: TaskType, namespace: str, prompt: str, response: AIResponse
+    ) -> None:
+        """Store a provider response in the local and shared caches"""
+        self.prompt_cache.store(
+            namespace,
+            prompt,
+            response,
+            response.cost_usd or 0.0,
+            user_scoped=task_type not in SHARED_CACHE_TASK_TYPES,
+        )
+        await enhanced_cache.set(
+            "ai_response",
+            asdict(response),
+            self.prompt_cache.ttl,
+            namespace,
+            prompt_hash(normalize_prompt(prompt)),
+        )
+
     async def _track_usage(
         self, user_id: str, provider: ModelProvider, response: AIResponse
     ):
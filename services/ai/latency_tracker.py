@@ -0,0 +1,58 @@
+"""
+Rolling Provider Latency Tracking
+- Bounded window of recent successful call latencies per provider
+- Percentiles used to decide when to hedge a slow request
+- Observations exported to Prometheus
+"""
+
+import math
+from collections import deque
+from typing import Any
+
+from services.prometheus_integration import get_prometheus_service
+
+
+class ProviderLatencyTracker:
+    """Per-provider rolling latency window.
+
+    Until a provider has ``min_samples`` observations, callers supply a
+    default (typically the configured latency) instead of a noisy estimate.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, provider: str, seconds: float) -> None:
+        """Record a successful call latency"""
+        samples = self._samples.get(provider)
+        if samples is None:
+            samples = self._samples[provider] = deque(maxlen=self.window)
+        samples.append(seconds)
+        get_prometheus_service().record_ai_provider_latency(provider, seconds)
+
+    def percentile(self, provider: str, pct: float, default: float) -> float:
+        """Latency percentile in seconds, or ``default`` without enough samples"""
+        samples = self._samples.get(provider)
+        if not samples or len(samples) < self.min_samples:
+            return default
+
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def p95(self, provider: str, default: float) -> float:
+        """95th percentile latency in seconds"""
+        return self.percentile(provider, 95, default)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get sample counts and percentiles per provider"""
+        return {
+            provider: {
+                "samples": len(samples),
+                "p50": self.percentile(provider, 50, None),
+                "p95": self.percentile(provider, 95, None),
+            }
+            for provider, samples in self._samples.items()
+        }
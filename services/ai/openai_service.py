@@ -12,6 +12,7 @@ from openai import AsyncOpenAI
 from pydantic import BaseModel
 
 from config.security import security_config
+from services.ai.hybrid_ai_service import TaskType, get_hybrid_ai_service
 from services.cost_tracking import cost_tracking_service
 from services.redis_cache import enhanced_cache
 
@@ -161,8 +162,12 @@ class EnhancedOpenAIService:
         use_functions: bool = False,
         stream: bool = False,
         context: dict | None = None,
-    ) -> AIResponse:
-        """Enhanced chat completion with function calling and streaming"""
+    ) -> AIResponse | AsyncGenerator[str, None]:
+        """Enhanced chat completion with function calling and streaming.
+
+        With ``stream=True`` an async generator of content deltas is returned
+        instead of an AIResponse.
+        """
 
         start_time = time.time()
 
@@ -196,9 +201,7 @@ class EnhancedOpenAIService:
 
             # Make API call
             if stream:
-                return await self._stream_completion(
-                    messages, function_definitions, user_id
-                )
+                return self._stream_completion(messages, function_definitions, user_id)
             else:
                 response = await self._make_request(
                     method="POST",
@@ -271,23 +274,24 @@ class EnhancedOpenAIService:
         """Stream completion for real-time responses"""
 
         try:
-            stream = await self._make_request(
-                method="POST",
-                endpoint="/chat/completions",
-                data={
-                    "model": self.model,
-                    "messages": messages,
-                    "functions": function_definitions,
-                    "function_call": "auto" if function_definitions else None,
-                    "max_tokens": self.max_tokens,
-                    "temperature": self.temperature,
-                    "stream": True,
-                },
-            )
+            # The request queue returns whole JSON bodies, so streams go
+            # straight through the SDK client
+            request = {
+                "model": self.model,
+                "messages": messages,
+                "max_tokens": self.max_tokens,
+                "temperature": self.temperature,
+                "stream": True,
+            }
+            if function_definitions:
+                request["functions"] = function_definitions
+                request["function_call"] = "auto"
+
+            stream = await self.client.chat.completions.create(**request)
 
             full_content = ""
             async for chunk in stream:
-                if chunk.choices[0].delta.content:
+                if chunk.choices and chunk.choices[0].delta.content:
                     content = chunk.choices[0].delta.content
                     full_content += content
                     yield content
@@ -1492,14 +1496,13 @@ Return assessment with:
 
         return insights
 
-    async def conversational_ai_chat(
+    def _conversation_prompts(
         self,
         user_message: str,
-        user_id: str,
-        conversation_history: list[dict] = None,
-        user_context: dict | None = None,
-    ) -> dict:
-        """Advanced conversational AI with context-aware responses and multi-turn conversations"""
+        conversation_history: list[dict] | None,
+        user_context: dict | None,
+    ) -> tuple[str, str]:
+        """System and user prompts for a conversational AI turn"""
 
         # Enhanced system prompt for conversational AI
         system_prompt = """You are Cognie, an advanced AI study assistant designed to help students maximize their productivity and learning potential.
@@ -1536,15 +1539,6 @@ CONTEXT AWARENESS:
 
 Return helpful, context-aware responses that feel natural and supportive."""
 
-        # Build conversation context
-        conversation_context = {
-            "user_id": user_id,
-            "current_message": user_message,
-            "conversation_history": conversation_history or [],
-            "user_context": user_context or {},
-            "conversation_length": len(conversation_history or []),
-        }
-
         # Enhanced user prompt with context
         user_prompt = f"""User Message: "{user_message}"
 
@@ -1562,6 +1556,30 @@ Provide a helpful, context-aware response that:
 4. Maintains conversation flow and context
 5. Feels natural and supportive"""
 
+        return system_prompt, user_prompt
+
+    async def conversational_ai_chat(
+        self,
+        user_message: str,
+        user_id: str,
+        conversation_history: list[dict] = None,
+        user_context: dict | None = None,
+    ) -> dict:
+        """Advanced conversational AI with context-aware responses and multi-turn conversations"""
+
+        system_prompt, user_prompt = self._conversation_prompts(
+            user_message, conversation_history, user_context
+        )
+
+        # Build conversation context
+        conversation_context = {
+            "user_id": user_id,
+            "current_message": user_message,
+            "conversation_history": conversation_history or [],
+            "user_context": user_context or {},
+            "conversation_length": len(conversation_history or []),
+        }
+
         response = await self.chat_completion(
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -1585,6 +1603,31 @@ Provide a helpful, context-aware response that:
                 user_message, conversation_history, user_context
             )
 
+    async def conversational_ai_chat_stream(
+        self,
+        user_message: str,
+        user_id: str,
+        conversation_history: list[dict] = None,
+        user_context: dict | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a conversational reply as plain text.
+
+        Routed through the hybrid AI service so a failing provider is replaced
+        mid-stream. Structured extras (emotion, suggestions) are only produced
+        by the non-streaming ``conversational_ai_chat``.
+        """
+        system_prompt, user_prompt = self._conversation_prompts(
+            user_message, conversation_history, user_context
+        )
+
+        async for text in get_hybrid_ai_service().generate_stream(
+            task_type=TaskType.CONVERSATION,
+            prompt=f"{system_prompt}\n\n{user_prompt}",
+            user_id=user_id,
+            use_cache=False,
+        ):
+            yield text
+
     async def _enhance_conversation_response(
         self,
         response_data: dict,
@@ -0,0 +1,138 @@
+"""
+Prompt Response Cache for AI Generation
+- Prompt normalization (case, whitespace, trailing punctuation)
+- Exact matches on the normalized prompt
+- Per-namespace index (task type, generation parameters, optionally user)
+- Hit-rate and saved-cost statistics
+"""
+
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?]+$")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing sentence punctuation.
+
+    Symbols inside the prompt are kept: "C++" and "C#", or "5-3" and "5+3",
+    ask different questions.
+    """
+    return _TRAILING_PUNCTUATION.sub("", " ".join(prompt.lower().split()))
+
+
+def prompt_hash(normalized: str) -> str:
+    """Stable hash of a normalized prompt (non-security use)"""
+    return hashlib.sha256(normalized.encode()).hexdigest()[:32]
+
+
+@dataclass
+class PromptCacheEntry:
+    """A cached response and what it cost to produce"""
+
+    response: Any
+    cost_usd: float
+    expires_at: float
+
+
+class PromptCache:
+    """In-process cache of AI responses keyed by normalized prompt.
+
+    Namespaces separate task types, generation parameters and (for tasks
+    whose prompts carry user content) users, so a hit can only come from an
+    equivalent request. Each namespace holds a bounded number of entries;
+    the oldest is dropped first.
+    """
+
+    def __init__(
+        self,
+        ttl: int = 3600,
+        max_entries: int = 1000,
+        max_user_entries: int = 32,
+        max_namespaces: int = 500,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_user_entries = max_user_entries
+        self.max_namespaces = max_namespaces
+
+        self._indexes: OrderedDict[str, OrderedDict[str, PromptCacheEntry]] = (
+            OrderedDict()
+        )
+        self._capacities: dict[str, int] = {}
+
+        self.metrics = {
+            "lookups": 0,
+            "hits": 0,
+            "saved_usd": 0.0,
+        }
+
+    def lookup(self, namespace: str, prompt: str) -> PromptCacheEntry | None:
+        """Find a cached response for this prompt"""
+        self.metrics["lookups"] += 1
+        index = self._indexes.get(namespace)
+        if index is None:
+            return None
+
+        entry = index.get(prompt_hash(normalize_prompt(prompt)))
+        if entry is None or entry.expires_at <= time.time():
+            return None
+
+        self._indexes.move_to_end(namespace)
+        self.metrics["hits"] += 1
+        self.metrics["saved_usd"] += entry.cost_usd
+        return entry
+
+    def store(
+        self,
+        namespace: str,
+        prompt: str,
+        response: Any,
+        cost_usd: float = 0.0,
+        ttl: int | None = None,
+        user_scoped: bool = False,
+    ) -> None:
+        """Cache a response under a prompt"""
+        index = self._indexes.get(namespace)
+        if index is None:
+            index = OrderedDict()
+            self._indexes[namespace] = index
+            self._capacities[namespace] = (
+                self.max_user_entries if user_scoped else self.max_entries
+            )
+            while len(self._indexes) > self.max_namespaces:
+                evicted, _ = self._indexes.popitem(last=False)
+                del self._capacities[evicted]
+        self._indexes.move_to_end(namespace)
+
+        key = prompt_hash(normalize_prompt(prompt))
+        index.pop(key, None)
+        index[key] = PromptCacheEntry(
+            response=response,
+            cost_usd=cost_usd,
+            expires_at=time.time() + (ttl or self.ttl),
+        )
+        while len(index) > self._capacities[namespace]:
+            index.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached responses"""
+        self._indexes.clear()
+        self._capacities.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get hit-rate and savings statistics"""
+        lookups = self.metrics["lookups"]
+        return {
+            **self.metrics,
+            "hit_rate": self.metrics["hits"] / lookups if lookups else 0,
+            "namespaces": len(self._indexes),
+            "entries": sum(len(index) for index in self._indexes.values()),
+        }
@@ -0,0 +1,234 @@
+"""
+AI Provider Health Tracking
+- Circuit breaker per provider, modelled on RedisCircuitBreaker
+- Rolling error rate and latency used to rank providers
+- Open circuits shared across workers through Redis
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Any
+
+from services.ai.latency_tracker import ProviderLatencyTracker
+from services.prometheus_integration import get_prometheus_service
+from services.redis_cache import enhanced_cache
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_CACHE_PREFIX = "ai_provider_circuit"
+
+# Exported as a gauge value
+CIRCUIT_STATE_VALUES = {"CLOSED": 0, "HALF_OPEN": 1, "OPEN": 2}
+
+
+class ProviderCircuitBreaker:
+    """Circuit breaker for a single AI provider.
+
+    Unlike the Redis breaker, HALF_OPEN admits a single probe at a time, so a
+    recovering provider is not flooded by every queued request at once.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: int = 30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failure_count = 0
+        self.opened_until = 0.0
+        self.probe_in_flight = False
+        self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
+
+    def open(self, until: float):
+        """Open the circuit until the given wall-clock time"""
+        self.state = "OPEN"
+        self.opened_until = until
+        self.probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Record a failure; return True if this failure opened the circuit"""
+        self.failure_count += 1
+        self.probe_in_flight = False
+
+        if self.state == "HALF_OPEN" or self.failure_count >= self.failure_threshold:
+            was_open = self.state == "OPEN"
+            self.open(time.time() + self.recovery_timeout)
+            return not was_open
+        return False
+
+    def record_success(self) -> bool:
+        """Record a success; return True if this success closed the circuit"""
+        was_closed = self.state == "CLOSED"
+        self.failure_count = 0
+        self.probe_in_flight = False
+        self.state = "CLOSED"
+        return not was_closed
+
+    def can_execute(self) -> bool:
+        """Check if a request may be sent to the provider"""
+        if self.state == "CLOSED":
+            return True
+
+        if self.state == "OPEN":
+            if time.time() < self.opened_until:
+                return False
+            self.state = "HALF_OPEN"
+
+        return not self.probe_in_flight  # HALF_OPEN
+
+
+class ProviderHealthTracker:
+    """Live health of every AI provider, used to order and skip providers.
+
+    Providers keep their configured preference order within a tier:
+    healthy first, then degraded (high error rate or p95 latency well above
+    the configured latency) and half-open probes. Open circuits are skipped.
+    """
+
+    def __init__(
+        self,
+        latency_tracker: ProviderLatencyTracker,
+        failure_threshold: int = 5,
+        recovery_timeout: int = 30,
+        window: int = 50,
+        degraded_error_rate: float = 0.25,
+        degraded_latency_factor: float = 2.0,
+        availability_ttl: float = 30.0,
+        sync_interval: float = 5.0,
+    ):
+        self.latency_tracker = latency_tracker
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.window = window
+        self.degraded_error_rate = degraded_error_rate
+        self.degraded_latency_factor = degraded_latency_factor
+        self.availability_ttl = availability_ttl
+        self.sync_interval = sync_interval
+
+        self._breakers: dict[str, ProviderCircuitBreaker] = {}
+        self._outcomes: dict[str, deque[bool]] = {}
+        self._last_success: dict[str, float] = {}
+        self._last_sync = 0.0
+
+    def breaker(self, provider: str) -> ProviderCircuitBreaker:
+        """Get the circuit breaker for a provider"""
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            breaker = self._breakers[provider] = ProviderCircuitBreaker(
+                self.failure_threshold, self.recovery_timeout
+            )
+        return breaker
+
+    def _record_outcome(self, provider: str, success: bool) -> None:
+        outcomes = self._outcomes.get(provider)
+        if outcomes is None:
+            outcomes = self._outcomes[provider] = deque(maxlen=self.window)
+        outcomes.append(success)
+
+    def error_rate(self, provider: str) -> float:
+        """Share of recent calls to a provider that failed"""
+        outcomes = self._outcomes.get(provider)
+        if not outcomes:
+            return 0.0
+        return 1 - sum(outcomes) / len(outcomes)
+
+    def is_degraded(self, provider: str, expected_latency: float) -> bool:
+        """High error rate, or p95 latency far above what is configured"""
+        if self.error_rate(provider) >= self.degraded_error_rate:
+            return True
+        p95 = self.latency_tracker.p95(provider, expected_latency)
+        return p95 > expected_latency * self.degraded_latency_factor
+
+    def rank(self, providers: list[str], expected_latency: dict[str, float]) -> list[str]:
+        """Order providers by live health, dropping those with open circuits"""
+        healthy, fallback = [], []
+        for provider in providers:
+            breaker = self.breaker(provider)
+            if not breaker.can_execute():
+                continue
+            if breaker.state == "HALF_OPEN" or self.is_degraded(
+                provider, expected_latency.get(provider, float("inf"))
+            ):
+                fallback.append(provider)
+            else:
+                healthy.append(provider)
+        return healthy + fallback
+
+    def begin(self, provider: str) -> None:
+        """Mark a request as started; the first one after recovery is the probe"""
+        breaker = self.breaker(provider)
+        if breaker.state == "HALF_OPEN":
+            breaker.probe_in_flight = True
+
+    def release(self, provider: str) -> None:
+        """Mark a request as abandoned without an outcome (e.g. lost a hedge race)"""
+        self.breaker(provider).probe_in_flight = False
+
+    def needs_availability_check(self, provider: str) -> bool:
+        """Whether to call is_available() before using a provider"""
+        last_success = self._last_success.get(provider)
+        return last_success is None or time.time() - last_success > self.availability_ttl
+
+    async def record_success(self, provider: str) -> None:
+        """Record a successful call"""
+        self._record_outcome(provider, True)
+        self._last_success[provider] = time.time()
+
+        if self.breaker(provider).record_success():
+            logger.info(f"AI provider {provider} recovered; circuit closed")
+            self._export_state(provider)
+            await enhanced_cache.delete(CIRCUIT_CACHE_PREFIX, provider)
+
+    async def record_failure(self, provider: str) -> None:
+        """Record a failed call, opening the circuit past the threshold"""
+        self._record_outcome(provider, False)
+        self._last_success.pop(provider, None)
+
+        breaker = self.breaker(provider)
+        if breaker.record_failure():
+            logger.warning(
+                f"AI provider {provider} circuit opened for {self.recovery_timeout}s"
+            )
+            self._export_state(provider)
+            # Let other workers skip the provider without rediscovering the outage
+            await enhanced_cache.set(
+                CIRCUIT_CACHE_PREFIX,
+                {"state": "OPEN", "until": breaker.opened_until},
+                self.recovery_timeout,
+                provider,
+            )
+
+    async def sync(self, providers: list[str]) -> None:
+        """Adopt circuits opened by other workers (at most every sync_interval)"""
+        now = time.time()
+        if now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+
+        values = await enhanced_cache.mget(
+            [f"{CIRCUIT_CACHE_PREFIX}:{provider}" for provider in providers]
+        )
+        for provider, value in zip(providers, values, strict=False):
+            if not value or value.get("state") != "OPEN" or value["until"] <= now:
+                continue
+
+            breaker = self.breaker(provider)
+            if breaker.state != "OPEN" or breaker.opened_until < value["until"]:
+                breaker.open(value["until"])
+                self._export_state(provider)
+
+    def _export_state(self, provider: str) -> None:
+        get_prometheus_service().set_ai_provider_circuit_state(
+            provider, CIRCUIT_STATE_VALUES[self.breaker(provider).state]
+        )
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get circuit state, error rate and latency per provider"""
+        latency = self.latency_tracker.get_stats()
+        return {
+            provider: {
+                "state": breaker.state,
+                "failure_count": breaker.failure_count,
+                "error_rate": self.error_rate(provider),
+                "p95_latency": latency.get(provider, {}).get("p95"),
+            }
+            for provider, breaker in self._breakers.items()
+        }
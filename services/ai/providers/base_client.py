@@ -3,11 +3,17 @@ Base AI Client - Abstract base class for all AI providers
 """
 
 import asyncio
+import json
 import logging
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 from typing import Any
 
+import httpx
+
+from services.http_pool import get_http_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,6 +47,15 @@ class BaseAIClient(ABC):
         """Generate response from the AI model"""
         pass
 
+    async def generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Stream response text as it is generated.
+
+        Providers with a streaming API override this; the default yields the
+        complete response once.
+        """
+        response = await self.generate(prompt, **kwargs)
+        yield response.content
+
     @abstractmethod
     async def is_available(self) -> bool:
         """Check if the model is available"""
@@ -51,6 +66,55 @@ class BaseAIClient(ABC):
         """Estimate cost for the given prompt"""
         pass
 
+    def _http(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client for this provider's host"""
+        return get_http_pool().get_client(self.base_url)
+
+    async def _iter_sse_data(
+        self,
+        url: str,
+        headers: dict[str, str],
+        payload: dict[str, Any],
+        timeout: float,
+        provider_name: str,
+    ) -> AsyncIterator[str]:
+        """POST a streaming request and yield the data field of each SSE event"""
+        async with self._http().stream(
+            "POST", url, headers=headers, json=payload, timeout=timeout
+        ) as response:
+            if response.status_code != 200:
+                error_text = (await response.aread()).decode(errors="replace")
+                raise Exception(
+                    f"{provider_name} API error: {response.status_code} - {error_text}"
+                )
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                yield data
+
+    async def _stream_chat_completions(
+        self,
+        url: str,
+        headers: dict[str, str],
+        payload: dict[str, Any],
+        timeout: float,
+        provider_name: str,
+    ) -> AsyncIterator[str]:
+        """Yield content deltas from an OpenAI-compatible chat completions stream"""
+        async for data in self._iter_sse_data(
+            url, headers, payload, timeout, provider_name
+        ):
+            choices = json.loads(data).get("choices") or []
+            if not choices:
+                continue
+            text = (choices[0].get("delta") or {}).get("content")
+            if text:
+                yield text
+
     async def health_check(self) -> bool:
         """Perform health check on the provider"""
         try:
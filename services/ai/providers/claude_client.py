@@ -3,11 +3,11 @@ Claude API Client
 Implements Anthropic Claude API integration for high-quality AI responses.
 """
 
+import json
 import logging
 import os
 import time
-
-import aiohttp
+from collections.abc import AsyncIterator
 
 from .base_client import AIResponse, BaseAIClient
 
@@ -51,60 +51,59 @@ class ClaudeClient(BaseAIClient):
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/messages",
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=30),
-                ) as response:
-
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(
-                            f"Claude API error: {response.status} - {error_text}"
-                        )
-
-                    data = await response.json()
-
-                    # Extract response content
-                    content = data["content"][0]["text"]
-
-                    # Calculate usage
-                    usage = data.get("usage", {})
-                    input_tokens = usage.get("input_tokens", 0)
-                    output_tokens = usage.get("output_tokens", 0)
-                    total_tokens = input_tokens + output_tokens
-
-                    # Calculate cost
-                    input_cost = (
-                        input_tokens / 1_000_000
-                    ) * self.input_cost_per_1m_tokens
-                    output_cost = (
-                        output_tokens / 1_000_000
-                    ) * self.output_cost_per_1m_tokens
-                    total_cost = input_cost + output_cost
-
-                    # Calculate response time
-                    response_time_ms = int((time.time() - start_time) * 1000)
-
-                    # Calculate quality score
-                    quality_score = self._calculate_quality_score(content, prompt)
-
-                    return AIResponse(
-                        content=content,
-                        model_used=model,
-                        provider="claude_api",
-                        tokens_used=total_tokens,
-                        cost_usd=total_cost,
-                        quality_score=quality_score,
-                        response_time_ms=response_time_ms,
-                        metadata={
-                            "input_tokens": input_tokens,
-                            "output_tokens": output_tokens,
-                            "stop_reason": data.get("stop_reason"),
-                        },
-                    )
+            response = await self._http().post(
+                f"{self.base_url}/messages",
+                headers=headers,
+                json=payload,
+                timeout=30,
+            )
+
+            if response.status_code != 200:
+                error_text = response.text
+                raise Exception(
+                    f"Claude API error: {response.status_code} - {error_text}"
+                )
+
+            data = response.json()
+
+            # Extract response content
+            content = data["content"][0]["text"]
+
+            # Calculate usage
+            usage = data.get("usage", {})
+            input_tokens = usage.get("input_tokens", 0)
+            output_tokens = usage.get("output_tokens", 0)
+            total_tokens = input_tokens + output_tokens
+
+            # Calculate cost
+            input_cost = (
+                input_tokens / 1_000_000
+            ) * self.input_cost_per_1m_tokens
+            output_cost = (
+                output_tokens / 1_000_000
+            ) * self.output_cost_per_1m_tokens
+            total_cost = input_cost + output_cost
+
+            # Calculate response time
+            response_time_ms = int((time.time() - start_time) * 1000)
+
+            # Calculate quality score
+            quality_score = self._calculate_quality_score(content, prompt)
+
+            return AIResponse(
+                content=content,
+                model_used=model,
+                provider="claude_api",
+                tokens_used=total_tokens,
+                cost_usd=total_cost,
+                quality_score=quality_score,
+                response_time_ms=response_time_ms,
+                metadata={
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "stop_reason": data.get("stop_reason"),
+                },
+            )
 
         except Exception as e:
             logger.error(f"Claude API request failed: {e}")
@@ -112,6 +111,45 @@ class ClaudeClient(BaseAIClient):
             self.last_error = str(e)
             raise
 
+    async def generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Stream response text from Claude API"""
+        payload = {
+            "model": kwargs.get("model", self.default_model),
+            "max_tokens": kwargs.get("max_tokens", 2048),
+            "temperature": kwargs.get("temperature", 0.7),
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True,
+        }
+
+        headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json",
+        }
+
+        try:
+            async for data in self._iter_sse_data(
+                f"{self.base_url}/messages",
+                headers,
+                payload,
+                timeout=30,
+                provider_name="Claude",
+            ):
+                event = json.loads(data)
+                if event.get("type") == "error":
+                    raise Exception(f"Claude API error: {event.get('error')}")
+                if event.get("type") == "message_stop":
+                    return
+                delta = event.get("delta") or {}
+                if event.get("type") == "content_block_delta" and delta.get("text"):
+                    yield delta["text"]
+
+        except Exception as e:
+            logger.error(f"Claude API stream failed: {e}")
+            self.is_healthy = False
+            self.last_error = str(e)
+            raise
+
     async def is_available(self) -> bool:
         """Check if Claude API is available"""
         if not self.api_key:
@@ -121,13 +159,12 @@ class ClaudeClient(BaseAIClient):
             # Simple health check - try to get models list
             headers = {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/models",
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=10),
-                ) as response:
-                    return response.status == 200
+            response = await self._http().get(
+                f"{self.base_url}/models",
+                headers=headers,
+                timeout=10,
+            )
+            return response.status_code == 200
 
         except Exception as e:
             logger.error(f"Claude availability check failed: {e}")
@@ -156,19 +193,18 @@ class ClaudeClient(BaseAIClient):
         try:
             headers = {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/models",
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=10),
-                ) as response:
-
-                    if response.status == 200:
-                        data = await response.json()
-                        return [model["id"] for model in data.get("data", [])]
-                    else:
-                        logger.error(f"Failed to get Claude models: {response.status}")
-                        return []
+            response = await self._http().get(
+                f"{self.base_url}/models",
+                headers=headers,
+                timeout=10,
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                return [model["id"] for model in data.get("data", [])]
+            else:
+                logger.error(f"Failed to get Claude models: {response.status_code}")
+                return []
 
         except Exception as e:
             logger.error(f"Error getting Claude models: {e}")
@@ -6,8 +6,7 @@ Implements OpenAI API integration as the premium fallback option.
 import logging
 import os
 import time
-
-import aiohttp
+from collections.abc import AsyncIterator
 
 from .base_client import AIResponse, BaseAIClient
 
@@ -51,60 +50,59 @@ class OpenAIClient(BaseAIClient):
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=30),
-                ) as response:
-
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(
-                            f"OpenAI API error: {response.status} - {error_text}"
-                        )
-
-                    data = await response.json()
-
-                    # Extract response content
-                    content = data["choices"][0]["message"]["content"]
-
-                    # Calculate usage
-                    usage = data.get("usage", {})
-                    input_tokens = usage.get("prompt_tokens", 0)
-                    output_tokens = usage.get("completion_tokens", 0)
-                    total_tokens = usage.get("total_tokens", 0)
-
-                    # Calculate cost
-                    input_cost = (
-                        input_tokens / 1_000_000
-                    ) * self.input_cost_per_1m_tokens
-                    output_cost = (
-                        output_tokens / 1_000_000
-                    ) * self.output_cost_per_1m_tokens
-                    total_cost = input_cost + output_cost
-
-                    # Calculate response time
-                    response_time_ms = int((time.time() - start_time) * 1000)
-
-                    # Calculate quality score
-                    quality_score = self._calculate_quality_score(content, prompt)
-
-                    return AIResponse(
-                        content=content,
-                        model_used=model,
-                        provider="openai_api",
-                        tokens_used=total_tokens,
-                        cost_usd=total_cost,
-                        quality_score=quality_score,
-                        response_time_ms=response_time_ms,
-                        metadata={
-                            "input_tokens": input_tokens,
-                            "output_tokens": output_tokens,
-                            "finish_reason": data["choices"][0].get("finish_reason"),
-                        },
-                    )
+            response = await self._http().post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=30,
+            )
+
+            if response.status_code != 200:
+                error_text = response.text
+                raise Exception(
+                    f"OpenAI API error: {response.status_code} - {error_text}"
+                )
+
+            data = response.json()
+
+            # Extract response content
+            content = data["choices"][0]["message"]["content"]
+
+            # Calculate usage
+            usage = data.get("usage", {})
+            input_tokens = usage.get("prompt_tokens", 0)
+            output_tokens = usage.get("completion_tokens", 0)
+            total_tokens = usage.get("total_tokens", 0)
+
+            # Calculate cost
+            input_cost = (
+                input_tokens / 1_000_000
+            ) * self.input_cost_per_1m_tokens
+            output_cost = (
+                output_tokens / 1_000_000
+            ) * self.output_cost_per_1m_tokens
+            total_cost = input_cost + output_cost
+
+            # Calculate response time
+            response_time_ms = int((time.time() - start_time) * 1000)
+
+            # Calculate quality score
+            quality_score = self._calculate_quality_score(content, prompt)
+
+            return AIResponse(
+                content=content,
+                model_used=model,
+                provider="openai_api",
+                tokens_used=total_tokens,
+                cost_usd=total_cost,
+                quality_score=quality_score,
+                response_time_ms=response_time_ms,
+                metadata={
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "finish_reason": data["choices"][0].get("finish_reason"),
+                },
+            )
 
         except Exception as e:
             logger.error(f"OpenAI API request failed: {e}")
@@ -112,6 +110,37 @@ class OpenAIClient(BaseAIClient):
             self.last_error = str(e)
             raise
 
+    async def generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Stream response text from OpenAI API"""
+        payload = {
+            "model": kwargs.get("model", self.default_model),
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": kwargs.get("max_tokens", 2048),
+            "temperature": kwargs.get("temperature", 0.7),
+            "stream": True,
+        }
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+        try:
+            async for text in self._stream_chat_completions(
+                f"{self.base_url}/chat/completions",
+                headers,
+                payload,
+                timeout=30,
+                provider_name="OpenAI",
+            ):
+                yield text
+
+        except Exception as e:
+            logger.error(f"OpenAI API stream failed: {e}")
+            self.is_healthy = False
+            self.last_error = str(e)
+            raise
+
     async def is_available(self) -> bool:
         """Check if OpenAI API is available"""
         if not self.api_key:
@@ -121,13 +150,12 @@ class OpenAIClient(BaseAIClient):
             # Simple health check - try to get models list
             headers = {"Authorization": f"Bearer {self.api_key}"}
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/models",
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=10),
-                ) as response:
-                    return response.status == 200
+            response = await self._http().get(
+                f"{self.base_url}/models",
+                headers=headers,
+                timeout=10,
+            )
+            return response.status_code == 200
 
         except Exception as e:
             logger.error(f"OpenAI availability check failed: {e}")
@@ -156,19 +184,18 @@ class OpenAIClient(BaseAIClient):
         try:
             headers = {"Authorization": f"Bearer {self.api_key}"}
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/models",
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=10),
-                ) as response:
-
-                    if response.status == 200:
-                        data = await response.json()
-                        return [model["id"] for model in data.get("data", [])]
-                    else:
-                        logger.error(f"Failed to get OpenAI models: {response.status}")
-                        return []
+            response = await self._http().get(
+                f"{self.base_url}/models",
+                headers=headers,
+                timeout=10,
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                return [model["id"] for model in data.get("data", [])]
+            else:
+                logger.error(f"Failed to get OpenAI models: {response.status_code}")
+                return []
 
         except Exception as e:
             logger.error(f"Error getting OpenAI models: {e}")
@@ -61,6 +61,20 @@ class AICacheService:
 
         return ":".join(key_parts)
 
+    def _user_tag(self, user_id: str) -> str:
+        return f"ai_cache:user:{user_id}"
+
+    def _operation_tag(self, operation: str) -> str:
+        return f"ai_cache:op:{operation}"
+
+    def _user_operation_tag(self, user_id: str, operation: str) -> str:
+        return f"ai_cache:user:{user_id}:op:{operation}"
+
+    def _legacy_key_patterns(self, user_id: str, operation: str = "*") -> list[str]:
+        """SCAN patterns for entries cached before tag indexes were written"""
+        base = f"ai_cache:ai_cache:ai:{operation}:user:{user_id}"
+        return [base, f"{base}:*"]
+
     def _hash_user_data(self, user_data: dict) -> str:
         """Create a hash of user data for cache invalidation"""
         if not user_data:
@@ -128,8 +142,18 @@ class AICacheService:
                 "ttl": ttl,
             }
 
-            # Set in enhanced cache
-            success = await enhanced_cache.set("ai_cache", cached_data, ttl, cache_key)
+            # Set in enhanced cache, indexed by user and operation for invalidation
+            success = await enhanced_cache.set(
+                "ai_cache",
+                cached_data,
+                ttl,
+                cache_key,
+                tags=[
+                    self._user_tag(user_id),
+                    self._operation_tag(operation),
+                    self._user_operation_tag(user_id, operation),
+                ],
+            )
 
             if success:
                 logger.info(f"Cached AI response for {operation} - user {user_id}")
@@ -146,14 +170,19 @@ class AICacheService:
         """Invalidate AI cache for specific user and operations"""
         try:
             if operations:
-                patterns = [f"ai_cache:ai:{op}:user:{user_id}:*" for op in operations]
+                tags = [self._user_operation_tag(user_id, op) for op in operations]
+                legacy_patterns = [
+                    pattern
+                    for op in operations
+                    for pattern in self._legacy_key_patterns(user_id, op)
+                ]
             else:
-                patterns = [f"ai_cache:ai:*:user:{user_id}:*"]
+                tags = [self._user_tag(user_id)]
+                legacy_patterns = self._legacy_key_patterns(user_id)
 
-            total_deleted = 0
-            for pattern in patterns:
-                deleted = await enhanced_cache.clear_pattern(pattern)
-                total_deleted += deleted
+            total_deleted = await enhanced_cache.invalidate_tags(
+                *tags, legacy_patterns=legacy_patterns
+            )
 
             logger.info(
                 f"Invalidated {total_deleted} AI cache entries for user {user_id}"
@@ -164,6 +193,19 @@ class AICacheService:
             logger.error(f"Error invalidating AI cache: {e}")
             return 0
 
+    async def invalidate_operation_cache(self, operation: str) -> int:
+        """Invalidate AI cache for an operation across all users"""
+        try:
+            total_deleted = await enhanced_cache.invalidate_tags(
+                self._operation_tag(operation)
+            )
+            logger.info(f"Invalidated {total_deleted} AI cache entries for {operation}")
+            return total_deleted
+
+        except Exception as e:
+            logger.error(f"Error invalidating AI operation cache: {e}")
+            return 0
+
     async def should_use_cache(
         self, operation: str, user_id: str, user_data: dict = None
     ) -> bool:
@@ -230,13 +272,7 @@ class AICacheService:
     async def _get_user_cache_usage(self, user_id: str) -> int:
         """Get number of cache entries for a user"""
         try:
-            pattern = f"ai_cache:ai:*:user:{user_id}:*"
-            keys = (
-                await enhanced_cache.client.keys(pattern)
-                if enhanced_cache.client
-                else []
-            )
-            return len(keys)
+            return await enhanced_cache.count_tag(self._user_tag(user_id))
         except Exception as e:
             logger.error(f"Error getting cache usage: {e}")
             return 0
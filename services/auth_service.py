@@ -27,6 +27,7 @@ from models.auth import (
     has_permission,
 )
 from services.email_service import email_service
+from services.principal_cache import principal_cache
 from services.supabase import get_supabase_client
 
 logger = logging.getLogger(__name__)
@@ -473,6 +474,9 @@ class AuthService:
                 .execute()
             )
 
+            # Drop the cached principal so the next request sees the change
+            await principal_cache.invalidate_user(user_id)
+
             return result.data[0] if result.data else None
 
         except Exception as e:
@@ -526,6 +530,9 @@ class AuthService:
                 {"role": new_role, "updated_at": datetime.utcnow().isoformat()}
             ).eq("id", user_id).execute()
 
+            # Drop the cached principal so the new role applies immediately
+            await principal_cache.invalidate_user(user_id)
+
             # Log role assignment
             audit_entry = AuditLogEntry(
                 user_id=assigned_by,
@@ -578,6 +585,9 @@ class AuthService:
                 {"is_active": False, "updated_at": datetime.utcnow().isoformat()}
             ).eq("id", user_id).execute()
 
+            # Drop the cached principal so the deactivated user is rejected
+            await principal_cache.invalidate_user(user_id)
+
             # Log deactivation
             audit_entry = AuditLogEntry(
                 user_id=deactivated_by,
@@ -6,25 +6,128 @@ Async Background Worker System
 - Task monitoring and metrics
 - Error handling and retries
 - Distributed task processing
+- Pluggable queue backends (sorted set or Redis Streams)
+- Delayed execution for deferred tasks and retry backoff
+- Lua-scripted task state transitions (one round trip each)
+- Execution lanes: event loop, thread pool or process pool for CPU-bound work
+- Fair scheduling across tenants, weighted by subscription plan
+- Leader-elected job scheduler: one replica runs cron jobs, fenced by token
+- AIMD worker autoscaling from queue wait and task latency, with admission
+  control (accept, defer or shed) and a desired-replicas scale signal
 """
 
 import asyncio
+import heapq
+import importlib
+import inspect
+import json
 import logging
+import math
+import multiprocessing
+import os
+import pickle
+import socket
 import time
 import traceback
 import uuid
 from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import asdict, dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from functools import wraps
+from functools import partial, wraps
 from typing import Any
 
 import redis.asyncio as redis
 from croniter import croniter
 
+from services.prometheus_integration import get_prometheus_service
+from services.task_queue import FairQueue, create_task_queue
+
 logger = logging.getLogger(__name__)
 
+# Claim a task: return its fields and mark it running, unless its status is one
+# of the skip statuses (cancelled, or already completed by an earlier delivery)
+# KEYS[1]: task hash
+# ARGV: running status, started_at, skip statuses...
+CLAIM_TASK_LUA = """
+local fields = redis.call('HGETALL', KEYS[1])
+if #fields == 0 then
+    return fields
+end
+local status = redis.call('HGET', KEYS[1], 'status')
+for i = 3, #ARGV do
+    if status == ARGV[i] then
+        return fields
+    end
+end
+redis.call('HSET', KEYS[1], 'status', ARGV[1], 'started_at', ARGV[2])
+return fields
+"""
+
+# Record a finished task; large results go to their own key with a TTL
+# KEYS[1]: task hash, KEYS[2]: result key
+# ARGV: status, completed_at, processing_time, inline result, result ref,
+#       stored result ('' when inline), result TTL, task TTL (0 keeps forever)
+COMPLETE_TASK_LUA = """
+redis.call('HSET', KEYS[1], 'status', ARGV[1], 'completed_at', ARGV[2],
+    'processing_time', ARGV[3], 'result', ARGV[4], 'result_ref', ARGV[5])
+if ARGV[6] ~= '' then
+    redis.call('SET', KEYS[2], ARGV[6], 'EX', ARGV[7])
+end
+if tonumber(ARGV[8]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[8])
+end
+return 1
+"""
+
+# Take or renew the scheduler leader lease. Each new lease gets the next
+# fencing token; the lease value is "<instance>:<token>".
+# KEYS[1]: lease, KEYS[2]: fencing counter, KEYS[3]: job set version
+# ARGV: instance id, lease TTL in ms
+# Returns {token, job set version}, or false if another instance leads
+ACQUIRE_LEADER_LUA = """
+local holder = redis.call('GET', KEYS[1])
+local token
+if not holder then
+    token = redis.call('INCR', KEYS[2])
+    redis.call('SET', KEYS[1], ARGV[1] .. ':' .. token, 'PX', ARGV[2])
+else
+    local instance, held = string.match(holder, '^(.*):(%d+)$')
+    if instance ~= ARGV[1] then
+        return false
+    end
+    token = tonumber(held)
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return {token, tonumber(redis.call('GET', KEYS[3]) or 0)}
+"""
+
+# Release the lease if this instance still holds it
+# KEYS[1]: lease; ARGV[1]: "<instance>:<token>"
+RELEASE_LEADER_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Claim one scheduled run of a job: only the current lease holder may, and
+# only for the next_run it scheduled, so a deposed leader or a second claim
+# of the same slot is refused. Records last_run and the following next_run.
+# KEYS[1]: lease, KEYS[2]: job hash
+# ARGV: "<instance>:<token>", expected next_run, last_run, new next_run
+CLAIM_JOB_RUN_LUA = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if redis.call('HGET', KEYS[2], 'next_run') ~= ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[2], 'last_run', ARGV[3], 'next_run', ARGV[4])
+return 1
+"""
+
 
 class TaskStatus(Enum):
     PENDING = "pending"
@@ -42,6 +145,41 @@ class TaskPriority(Enum):
     URGENT = 4
 
 
+class TaskLane(Enum):
+    """Where a task function runs"""
+
+    ASYNC = "async"  # On the event loop (coroutine functions)
+    THREAD = "thread"  # Default thread pool; for blocking I/O
+    PROCESS = "process"  # Process pool; for CPU-bound work, free of the GIL
+
+
+class AdmissionDecision(Enum):
+    """Admission control's answer to an enqueue"""
+
+    ACCEPT = "accept"
+    DEFER = "defer"  # Queued, but held back until the backlog has drained
+    SHED = "shed"  # Refused; the caller should retry later or drop the work
+
+
+@dataclass
+class Admission:
+    decision: AdmissionDecision
+    retry_after: float = 0.0  # Seconds until the backlog is expected to drain
+    queue_depth: int = 0
+
+
+class TaskRejectedError(Exception):
+    """Raised by enqueue_task when admission control sheds a task"""
+
+    def __init__(self, name: str, admission: Admission):
+        self.name = name
+        self.admission = admission
+        super().__init__(
+            f"Task '{name}' rejected: {admission.queue_depth} tasks queued, "
+            f"retry in {admission.retry_after:.0f}s"
+        )
+
+
 class TaskErrorType(Enum):
     """Categorization of task errors for better handling."""
 
@@ -179,6 +317,10 @@ class Task:
     tags: list[str] = None
     metadata: dict[str, Any] = None
     processing_time: float | None = None
+    run_at: datetime | None = None
+    result_ref: str | None = None
+    tenant: str | None = None  # Usually the user id; fair queue scheduling unit
+    plan: str | None = None  # Tenant's subscription plan, sets its fair share
 
     def __post_init__(self):
         if self.tags is None:
@@ -193,6 +335,8 @@ class Task:
         data["status"] = self.status.value
         data["error_type"] = self.error_type.value if self.error_type else None
         data["created_at"] = self.created_at.isoformat()
+        if self.run_at:
+            data["run_at"] = self.run_at.isoformat()
         if self.started_at:
             data["started_at"] = self.started_at.isoformat()
         if self.completed_at:
@@ -207,12 +351,60 @@ class Task:
         if data.get("error_type"):
             data["error_type"] = TaskErrorType(data["error_type"])
         data["created_at"] = datetime.fromisoformat(data["created_at"])
+        if data.get("run_at"):
+            data["run_at"] = datetime.fromisoformat(data["run_at"])
         if data.get("started_at"):
             data["started_at"] = datetime.fromisoformat(data["started_at"])
         if data.get("completed_at"):
             data["completed_at"] = datetime.fromisoformat(data["completed_at"])
         return cls(**data)
 
+    def to_redis(self) -> dict[str, str]:
+        """Hash fields for Redis, each JSON-encoded so None, tuples and dicts survive"""
+        return {
+            key: json.dumps(value, default=str) for key, value in self.to_dict().items()
+        }
+
+    @classmethod
+    def from_redis(cls, data: dict[str, str]) -> "Task":
+        """Create task from hash fields written by ``to_redis``"""
+        decoded = {key: json.loads(value) for key, value in data.items()}
+        decoded["args"] = tuple(decoded.get("args") or ())
+        return cls.from_dict(decoded)
+
+
+def _process_target(func: Callable) -> tuple[str, str]:
+    """Module and qualified name a pool process imports ``func`` by"""
+    qualname = getattr(func, "__qualname__", "")
+    if "<" in qualname or not getattr(func, "__module__", None):
+        raise ValueError(
+            f"Process-lane task '{qualname}' must be a module-level function"
+        )
+    return func.__module__, qualname
+
+
+def _run_in_process(module: str, qualname: str, args: tuple, kwargs: dict) -> Any:
+    """Import a task function in the pool process and call it"""
+    func = importlib.import_module(module)
+    for attr in qualname.split("."):
+        func = getattr(func, attr)
+    # The module attribute may be the @background_task enqueue wrapper
+    return inspect.unwrap(func)(*args, **kwargs)
+
+
+def _warm_process(modules: list[str]) -> int:
+    """Start a pool process and import the task modules ahead of the first task"""
+    for module in modules:
+        importlib.import_module(module)
+    return os.getpid()
+
+
+def _epoch_seconds(moment: datetime) -> float:
+    """Epoch seconds for a datetime; naive values are UTC, as from utcnow()"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
 
 @dataclass
 class ScheduledJob:
@@ -269,6 +461,101 @@ class ScheduledJob:
             data["next_run"] = datetime.fromisoformat(data["next_run"])
         return cls(**data)
 
+    def to_redis(self) -> dict[str, str]:
+        """Hash fields for Redis, each JSON-encoded like Task.to_redis"""
+        return {
+            key: json.dumps(value, default=str) for key, value in self.to_dict().items()
+        }
+
+    @classmethod
+    def from_redis(cls, data: dict[str, str]) -> "ScheduledJob":
+        """Create job from hash fields written by ``to_redis``"""
+        decoded = {key: json.loads(value) for key, value in data.items()}
+        decoded["args"] = tuple(decoded.get("args") or ())
+        return cls.from_dict(decoded)
+
+
+class WorkerAutoscaler:
+    """AIMD controller for the number of worker coroutines.
+
+    Adds a worker per adjustment while tasks wait longer than
+    ``target_queue_wait`` in the queue, cuts the count by
+    ``decrease_factor`` when task latency climbs past ``latency_tolerance``
+    times its long-run average (the work is contending for something more
+    workers would only make slower), and sheds a worker at a time when half
+    of them sit idle with nothing queued.
+    """
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        target_queue_wait: float = 5.0,
+        latency_tolerance: float = 2.0,
+        decrease_factor: float = 0.75,
+    ):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.target_queue_wait = target_queue_wait
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.limit = min_workers
+
+        # Latency averages per task name: tasks differ too much to pool them
+        self._latency: dict[str, tuple[float, float]] = {}  # (long run, recent)
+        self._recent: set[str] = set()  # Task names completed since the last update
+        self._max_wait = 0.0
+        self.mean_latency = 0.0
+
+    def observe_wait(self, wait: float) -> None:
+        self._max_wait = max(self._max_wait, wait)
+
+    def observe_latency(self, name: str, latency: float) -> None:
+        baseline, recent = self._latency.get(name, (latency, latency))
+        self._latency[name] = (0.95 * baseline + 0.05 * latency, 0.7 * recent + 0.3 * latency)
+        self._recent.add(name)
+        self.mean_latency = (
+            0.9 * self.mean_latency + 0.1 * latency if self.mean_latency else latency
+        )
+
+    def latency_ratio(self) -> float:
+        """Recent over long-run latency of the tasks completed lately"""
+        ratios = [
+            recent / baseline
+            for name in self._recent
+            for baseline, recent in [self._latency[name]]
+            if baseline > 0
+        ]
+        return sum(ratios) / len(ratios) if ratios else 1.0
+
+    def update(self, queue_depth: int, busy: int) -> int:
+        """Adjust the worker limit from what was seen since the last call"""
+        waited = self._max_wait > self.target_queue_wait
+        saturated = queue_depth > 0 and busy >= self.limit
+        if self.latency_ratio() > self.latency_tolerance:
+            self.limit = math.floor(self.limit * self.decrease_factor)
+        elif waited or saturated:
+            self.limit += 1
+        elif queue_depth == 0 and busy < self.limit / 2:
+            self.limit -= 1
+        self.limit = max(self.min_workers, min(self.max_workers, self.limit))
+
+        self._max_wait = 0.0
+        self._recent.clear()
+        return self.limit
+
+    def drain_time(self, queue_depth: int) -> float:
+        """Seconds for the current workers to work through queue_depth tasks"""
+        return queue_depth * (self.mean_latency or 1.0) / max(1, self.limit)
+
+    def desired_replicas(self, queue_depth: int, busy: int) -> int:
+        """Replicas needed to drain the shared backlog within the target wait.
+
+        Every replica sees the whole queue, so aggregate with max, not sum.
+        """
+        backlog_workers = queue_depth * self.mean_latency / self.target_queue_wait
+        return max(1, math.ceil((busy + backlog_workers) / self.max_workers))
+
 
 class BackgroundWorker:
     """Background worker for processing async tasks"""
@@ -280,22 +567,85 @@ class BackgroundWorker:
         task_timeout: int = 300,
         max_retries: int = 3,
         retry_delay: int = 60,
+        queue_backend: str | None = None,
+        visibility_timeout: int | None = None,
+        poll_timeout: float = 1.0,
+        promote_interval: float = 1.0,
+        inline_result_limit: int = 4096,
+        result_ttl: int = 86400,
+        finished_task_ttl: int = 7 * 86400,
+        process_pool_size: int | None = None,
+        min_workers: int | None = None,
+        autoscale_interval: float = 2.0,
+        target_queue_wait: float = 5.0,
+        defer_queue_depth: int | None = None,
+        max_queue_depth: int | None = None,
     ):
         self.redis_url = redis_url
         self.max_workers = max_workers
         self.task_timeout = task_timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.poll_timeout = poll_timeout  # How long a worker blocks in Redis per pop
+        self.promote_interval = promote_interval  # Max lateness of delayed tasks
+
+        # Results longer than this (JSON bytes) are stored under their own key
+        self.inline_result_limit = inline_result_limit
+        self.result_ttl = result_ttl
+        self.finished_task_ttl = finished_task_ttl  # Expiry of finished task records
 
-        # Redis connection
+        # Redis connection and the Lua scripts registered on it
         self.redis = None
+        self._scripts: dict[str, Any] = {}
+        self._scripts_client = None
+
+        # Task queue: "sorted_set" (default) or "stream" for acknowledged delivery
+        self.queue = create_task_queue(
+            queue_backend or os.getenv("TASK_QUEUE_BACKEND", "sorted_set"),
+            visibility_timeout=visibility_timeout or task_timeout + 60,
+        )
+        self.consumer_prefix = f"{socket.gethostname()}-{os.getpid()}"
 
         # Task registry
         self.task_registry: dict[str, Callable] = {}
+        self.task_lanes: dict[str, TaskLane] = {}
+
+        # Process pool for PROCESS-lane tasks, started with the worker if any
+        # are registered. Spawned rather than forked: the parent has a running
+        # event loop and threads that a forked child would inherit mid-state.
+        self.process_pool_size = process_pool_size or int(
+            os.getenv("TASK_PROCESS_POOL_SIZE", os.cpu_count() or 1)
+        )
+        self.process_pool: ProcessPoolExecutor | None = None
 
-        # Worker state
+        # Worker state; the autoscaler keeps between min_workers and
+        # max_workers worker coroutines running
         self.workers: list[asyncio.Task] = []
+        self.worker_ids: list[str] = []
+        self.promoter_task: asyncio.Task | None = None
+        self.autoscaler_task: asyncio.Task | None = None
         self.running = False
+        self.autoscale_interval = autoscale_interval
+        self.autoscaler = WorkerAutoscaler(
+            min_workers=min(max_workers, min_workers or max(1, max_workers // 5)),
+            max_workers=max_workers,
+            target_queue_wait=target_queue_wait,
+        )
+        self._busy = 0
+        self._retiring = 0
+
+        # Admission control: past defer_queue_depth queued tasks, LOW and
+        # NORMAL tasks are held back; past max_queue_depth, all but URGENT
+        # tasks are refused. Depth counts ready and delayed tasks.
+        self.defer_queue_depth = defer_queue_depth or int(
+            os.getenv("TASK_DEFER_QUEUE_DEPTH", 2000)
+        )
+        self.max_queue_depth = max_queue_depth or int(
+            os.getenv("TASK_MAX_QUEUE_DEPTH", 10000)
+        )
+        self.admission_refresh = 1.0  # Max age of the queue depth used to admit
+        self._queue_depth = 0
+        self._queue_depth_at = -math.inf
 
         # Enhanced metrics
         self.metrics = {
@@ -309,7 +659,9 @@ class BackgroundWorker:
             "task_type_counts": {},
             "worker_health": {},
             "queue_size": 0,
+            "delayed_queue_size": 0,
             "last_activity": None,
+            "admissions": {decision.value: 0 for decision in AdmissionDecision},
         }
 
     async def start(self):
@@ -318,16 +670,23 @@ class BackgroundWorker:
             # Connect to Redis
             self.redis = redis.from_url(self.redis_url, decode_responses=True)
             await self.redis.ping()
+            await self.queue.setup(self.redis)
 
             # Start workers
             self.running = True
             self._start_time = time.time()  # Track uptime
 
-            for i in range(self.max_workers):
-                worker = asyncio.create_task(self._worker(f"worker-{i}"))
-                self.workers.append(worker)
+            self._scale_workers(self.autoscaler.limit)
+            self.promoter_task = asyncio.create_task(self._promote_delayed_tasks())
+            self.autoscaler_task = asyncio.create_task(self._autoscale())
+
+            if TaskLane.PROCESS in self.task_lanes.values():
+                await self._start_process_pool()
 
-            logger.info(f"Background worker started with {self.max_workers} workers")
+            logger.info(
+                f"Background worker started with {self.autoscaler.limit} workers "
+                f"(up to {self.max_workers})"
+            )
 
         except Exception as e:
             logger.error(f"Failed to start background worker: {e}")
@@ -338,23 +697,83 @@ class BackgroundWorker:
         self.running = False
 
         # Cancel all workers
-        for worker in self.workers:
-            worker.cancel()
+        background = [
+            task for task in (self.promoter_task, self.autoscaler_task) if task
+        ]
+        for task in [*self.workers, *background]:
+            task.cancel()
 
         # Wait for workers to finish
-        if self.workers:
-            await asyncio.gather(*self.workers, return_exceptions=True)
+        if self.workers or background:
+            await asyncio.gather(*self.workers, *background, return_exceptions=True)
+
+        if self.process_pool:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+            self.process_pool = None
 
         # Close Redis connection
         if self.redis:
+            try:
+                consumers = [
+                    self._consumer_name(worker_id) for worker_id in self.worker_ids
+                ]
+                await self.queue.close(self.redis, consumers)
+            except Exception as e:
+                logger.warning(f"Failed to release task queue consumers: {e}")
             await self.redis.close()
 
         logger.info("Background worker stopped")
 
-    def register_task(self, name: str, func: Callable):
-        """Register a task function"""
+    def register_task(
+        self, name: str, func: Callable, lane: TaskLane | str | None = None
+    ):
+        """Register a task function.
+
+        Coroutine functions run on the event loop and sync functions in the
+        thread pool, unless ``lane`` is PROCESS: then the function runs in a
+        pool process, so it must be a module-level function.
+        """
+        is_async = asyncio.iscoroutinefunction(func)
+        lane = TaskLane(lane) if lane else (TaskLane.ASYNC if is_async else TaskLane.THREAD)
+        if is_async != (lane == TaskLane.ASYNC):
+            raise ValueError(
+                f"Task '{name}' cannot run in the {lane.value} lane: "
+                "coroutine functions run on the event loop, sync functions off it"
+            )
+        if lane == TaskLane.PROCESS:
+            _process_target(func)
+
         self.task_registry[name] = func
-        logger.info(f"Registered task: {name}")
+        self.task_lanes[name] = lane
+        logger.info(f"Registered task: {name} ({lane.value} lane)")
+
+    async def _start_process_pool(self):
+        """Start the process pool and wait until every process is up"""
+        if self.process_pool:
+            return
+
+        self.process_pool = ProcessPoolExecutor(
+            max_workers=self.process_pool_size,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        modules = sorted(
+            {
+                self.task_registry[name].__module__
+                for name, lane in self.task_lanes.items()
+                if lane == TaskLane.PROCESS
+            }
+        )
+
+        # Processes are spawned on demand; one warm-up call per process,
+        # submitted together, starts them all
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(
+            *(
+                loop.run_in_executor(self.process_pool, _warm_process, modules)
+                for _ in range(self.process_pool_size)
+            )
+        )
+        logger.info(f"Process pool warmed with {len(set(pids))} processes")
 
     async def enqueue_task(
         self,
@@ -366,11 +785,44 @@ class BackgroundWorker:
         retry_delay: int = None,
         tags: list[str] = None,
         metadata: dict[str, Any] = None,
+        run_at: datetime | None = None,
+        delay: float | None = None,
+        tenant: str | None = None,
+        plan: str | None = None,
         **kwargs,
     ) -> str:
-        """Enqueue a task for processing"""
+        """Enqueue a task for processing.
+
+        Pass ``run_at`` (naive datetimes are UTC) or ``delay`` in seconds to
+        hold the task back until then. With the fair queue backend, ``tenant``
+        (usually the user id) and its subscription ``plan`` decide the task's
+        share of workers.
+        """
+        if isinstance(priority, str):
+            priority = TaskPriority[priority.upper()]
         if name not in self.task_registry:
             raise ValueError(f"Task '{name}' not registered")
+        if run_at is not None and delay is not None:
+            raise ValueError("Pass either run_at or delay, not both")
+        if self.task_lanes.get(name) == TaskLane.PROCESS:
+            try:
+                pickle.dumps((args, kwargs))
+            except Exception as e:
+                raise ValueError(
+                    f"Arguments to process-lane task '{name}' must be picklable: {e}"
+                ) from e
+
+        if delay is not None:
+            run_at = datetime.utcnow() + timedelta(seconds=delay)
+
+        admission = await self.admit(priority)
+        if admission.decision == AdmissionDecision.SHED:
+            raise TaskRejectedError(name, admission)
+        if admission.decision == AdmissionDecision.DEFER:
+            deferred_until = datetime.utcnow() + timedelta(
+                seconds=admission.retry_after
+            )
+            run_at = max(run_at, deferred_until) if run_at else deferred_until
 
         task_id = str(uuid.uuid4())
         task = Task(
@@ -387,33 +839,271 @@ class BackgroundWorker:
             retry_delay=retry_delay or self.retry_delay,
             tags=tags or [],
             metadata=metadata or {},
+            run_at=run_at,
+            tenant=tenant,
+            plan=plan,
         )
 
         # Store task in Redis
-        await self.redis.hset(f"task:{task_id}", mapping=task.to_dict())
-
-        # Add to priority queue
-        score = time.time() + (priority.value * 1000)  # Higher priority = higher score
-        await self.redis.zadd("task_queue", {task_id: score})
+        await self.redis.hset(f"task:{task_id}", mapping=task.to_redis())
+
+        # Add to priority queue, or the delayed index until run_at
+        await self.queue.push(
+            self.redis,
+            task_id,
+            priority.value,
+            run_at=_epoch_seconds(run_at) if run_at else None,
+            tenant=tenant,
+            plan=plan,
+        )
 
-        logger.info(f"Enqueued task {task_id} ({name}) with priority {priority.name}")
+        logger.info(
+            f"Enqueued task {task_id} ({name}) with priority {priority.name}"
+            + (f" to run at {run_at.isoformat()}" if run_at else "")
+        )
         return task_id
 
+    async def admit(self, priority: TaskPriority = TaskPriority.NORMAL) -> Admission:
+        """Decide whether a task of this priority may be queued now.
+
+        Uses a queue depth at most ``admission_refresh`` seconds old, so a
+        burst of enqueues costs Redis one depth check per interval. Admits
+        everything if the depth cannot be read.
+        """
+        if time.monotonic() - self._queue_depth_at > self.admission_refresh:
+            try:
+                await self._refresh_queue_depth()
+            except Exception as e:
+                logger.warning(f"Failed to read queue depth for admission: {e}")
+                return Admission(AdmissionDecision.ACCEPT)
+
+        depth = self._queue_depth
+        decision = AdmissionDecision.ACCEPT
+        if depth >= self.max_queue_depth and priority != TaskPriority.URGENT:
+            decision = AdmissionDecision.SHED
+        elif depth >= self.defer_queue_depth and priority.value <= TaskPriority.NORMAL.value:
+            decision = AdmissionDecision.DEFER
+
+        self.metrics["admissions"][decision.value] += 1
+        get_prometheus_service().record_task_admission(decision.value)
+        retry_after = (
+            self.autoscaler.drain_time(depth)
+            if decision != AdmissionDecision.ACCEPT
+            else 0.0
+        )
+        return Admission(decision, retry_after=retry_after, queue_depth=depth)
+
+    async def _refresh_queue_depth(self) -> int:
+        """Read ready and delayed queue sizes; return the ready size.
+
+        The admission depth counts delayed tasks only if they fall due before
+        the ready backlog is expected to drain; the rest do not compete with
+        a task queued now.
+        """
+        ready = await self.queue.size(self.redis)
+        delayed = await self.queue.delayed_size(self.redis)
+        due_soon = (
+            await self.queue.delayed_size(
+                self.redis, due_within=self.autoscaler.drain_time(ready)
+            )
+            if delayed
+            else 0
+        )
+        self._record_queue_sizes(ready, delayed)
+        self._queue_depth = int(ready + due_soon)
+        self._queue_depth_at = time.monotonic()
+        return ready
+
+    def _record_queue_sizes(self, ready: int, delayed: int) -> None:
+        self.metrics["queue_size"] = ready
+        self.metrics["delayed_queue_size"] = delayed
+        prometheus = get_prometheus_service()
+        prometheus.set_queue_size("ready", ready)
+        prometheus.set_queue_size("delayed", delayed)
+
+    def _scale_workers(self, limit: int) -> None:
+        """Start or retire worker coroutines until ``limit`` are running.
+
+        Retiring workers finish their current task, hand back any tasks
+        delivered to them in advance and exit before their next pop, so
+        scaling down never abandons work.
+        """
+        self.workers = [worker for worker in self.workers if not worker.done()]
+        current = len(self.workers) - self._retiring
+        if limit < current:
+            self._retiring += current - limit
+            return
+
+        # Call off pending retirements before starting new workers
+        kept = min(self._retiring, limit - current)
+        self._retiring -= kept
+        current += kept
+
+        # Reuse the lowest free ids so stream consumers stay bounded
+        in_use = {worker.get_name() for worker in self.workers}
+        slot = 0
+        while current < limit:
+            worker_id = f"worker-{slot}"
+            slot += 1
+            if worker_id in in_use:
+                continue
+            worker = asyncio.create_task(self._worker(worker_id), name=worker_id)
+            self.workers.append(worker)
+            if worker_id not in self.worker_ids:
+                self.worker_ids.append(worker_id)
+            current += 1
+
+    async def _autoscale(self):
+        """Resize the worker pool and publish the desired replica count"""
+        prometheus = get_prometheus_service()
+        while self.running:
+            try:
+                await asyncio.sleep(self.autoscale_interval)
+                ready = await self._refresh_queue_depth()
+                previous = self.autoscaler.limit
+                limit = self.autoscaler.update(ready, self._busy)
+                if limit != previous:
+                    logger.info(
+                        f"Scaling from {previous} to {limit} workers "
+                        f"({ready} queued, {self._busy} busy)"
+                    )
+                self._scale_workers(limit)
+
+                desired = self.autoscaler.desired_replicas(ready, self._busy)
+                self.metrics["worker_limit"] = limit
+                self.metrics["desired_replicas"] = desired
+                prometheus.set_task_scaling(limit, desired)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Worker autoscaler error: {e}")
+
+    async def _promote_delayed_tasks(self):
+        """Move delayed tasks into the ready queues as they fall due"""
+        batch = 100
+        while self.running:
+            try:
+                moved, next_due = await self.queue.promote_due(self.redis, batch)
+                if moved:
+                    logger.debug(f"Promoted {moved} delayed task(s)")
+                if moved == batch:
+                    continue  # More may already be due
+
+                # Sleep until the next task is due, checking at least every
+                # promote_interval for newly delayed tasks
+                wait = self.promote_interval
+                if next_due is not None:
+                    wait = min(wait, max(0.0, next_due - time.time()))
+                await asyncio.sleep(wait)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Delayed task promoter error: {e}")
+                await asyncio.sleep(self.promote_interval)
+
+    def _script(self, source: str):
+        """Lua script registered on the current Redis client"""
+        if self._scripts_client is not self.redis:
+            self._scripts = {}
+            self._scripts_client = self.redis
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = self.redis.register_script(source)
+        return script
+
+    async def _claim_task(self, task_id: str) -> Task | None:
+        """Load a task and mark it running in one round trip.
+
+        Returns None if the task is missing, cancelled or already completed.
+        """
+        started_at = datetime.utcnow()
+        fields = await self._script(CLAIM_TASK_LUA)(
+            keys=[f"task:{task_id}"],
+            args=[
+                json.dumps(TaskStatus.RUNNING.value),
+                json.dumps(started_at.isoformat()),
+                json.dumps(TaskStatus.CANCELLED.value),
+                json.dumps(TaskStatus.COMPLETED.value),
+            ],
+        )
+        if not fields:
+            logger.warning(f"Task {task_id} not found")
+            return None
+
+        task = Task.from_redis(dict(zip(fields[::2], fields[1::2], strict=True)))
+        if task.status in (TaskStatus.CANCELLED, TaskStatus.COMPLETED):
+            logger.info(f"Skipping {task.status.value} task {task_id}")
+            return None
+
+        task.status = TaskStatus.RUNNING
+        task.started_at = started_at
+        return task
+
+    async def _complete_task(self, task: Task) -> None:
+        """Record a successful result in one round trip"""
+        encoded = json.dumps(task.result, default=str)
+        result_key = f"task_result:{task.id}"
+        by_reference = len(encoded) > self.inline_result_limit
+        if by_reference:
+            task.result_ref = result_key
+
+        await self._script(COMPLETE_TASK_LUA)(
+            keys=[f"task:{task.id}", result_key],
+            args=[
+                json.dumps(task.status.value),
+                json.dumps(task.completed_at.isoformat()),
+                json.dumps(task.processing_time),
+                "null" if by_reference else encoded,
+                json.dumps(task.result_ref),
+                encoded if by_reference else "",
+                self.result_ttl,
+                self.finished_task_ttl,
+            ],
+        )
+
+    def _consumer_name(self, worker_id: str) -> str:
+        """Queue consumer name, unique across processes and hosts"""
+        return f"{self.consumer_prefix}-{worker_id}"
+
     async def _worker(self, worker_id: str):
         """Worker coroutine for processing tasks"""
         logger.info(f"Worker {worker_id} started")
+        consumer = self._consumer_name(worker_id)
 
         while self.running:
-            try:
-                # Get next task from queue
-                task_data = await self.redis.zpopmin("task_queue", count=1)
+            if self._retiring > 0:
+                self._retiring -= 1
+                try:
+                    # Tasks delivered ahead of time go back for the other workers
+                    await self.queue.release(self.redis, consumer)
+                except Exception as e:
+                    logger.error(f"Worker {worker_id} failed to release tasks: {e}")
+                logger.info(f"Worker {worker_id} retired")
+                break
 
-                if not task_data:
-                    await asyncio.sleep(1)
+            try:
+                # Block in Redis until a task arrives (or poll_timeout passes)
+                entry = await self.queue.pop(self.redis, consumer, self.poll_timeout)
+                if entry is None:
                     continue
 
-                task_id = task_data[0][0]
-                await self._process_task(worker_id, task_id)
+                if entry.enqueued_at is not None:
+                    wait = time.time() - entry.enqueued_at
+                    self.autoscaler.observe_wait(wait)
+                    get_prometheus_service().record_task_queue_wait(
+                        entry.plan or "system", wait
+                    )
+
+                self._busy += 1
+                try:
+                    await self._process_task(worker_id, entry.task_id)
+                finally:
+                    self._busy -= 1
+
+                # Failures have been recorded or re-queued by now
+                await self.queue.ack(self.redis, entry)
 
             except asyncio.CancelledError:
                 break
@@ -429,19 +1119,11 @@ class BackgroundWorker:
         task = None
 
         try:
-            # Get task data
-            task_data = await self.redis.hgetall(f"task:{task_id}")
-            if not task_data:
-                logger.warning(f"Task {task_id} not found")
+            # Load the task and mark it running
+            task = await self._claim_task(task_id)
+            if task is None:
                 return
 
-            task = Task.from_dict(task_data)
-
-            # Update task status
-            task.status = TaskStatus.RUNNING
-            task.started_at = datetime.utcnow()
-            await self.redis.hset(f"task:{task_id}", mapping=task.to_dict())
-
             logger.info(f"Worker {worker_id} processing task {task_id} ({task.name})")
 
             # Get task function
@@ -449,17 +1131,28 @@ class BackgroundWorker:
             if not func:
                 raise ValueError(f"Task function '{task.func_name}' not found")
 
-            # Execute task with timeout
-            if asyncio.iscoroutinefunction(func):
+            # Execute task with timeout in its lane
+            lane = self.task_lanes.get(task.func_name) or (
+                TaskLane.ASYNC if asyncio.iscoroutinefunction(func) else TaskLane.THREAD
+            )
+            if lane == TaskLane.ASYNC:
                 result = await asyncio.wait_for(
                     func(*task.args, **task.kwargs), timeout=task.timeout
                 )
             else:
-                # Run sync function in thread pool
-                loop = asyncio.get_event_loop()
+                loop = asyncio.get_running_loop()
+                if lane == TaskLane.PROCESS:
+                    await self._start_process_pool()
+                    # A timed-out call keeps its process busy until it returns
+                    executor = self.process_pool
+                    call = partial(
+                        _run_in_process, *_process_target(func), task.args, task.kwargs
+                    )
+                else:
+                    executor = None
+                    call = partial(func, *task.args, **task.kwargs)
                 result = await asyncio.wait_for(
-                    loop.run_in_executor(None, func, *task.args, **task.kwargs),
-                    timeout=task.timeout,
+                    loop.run_in_executor(executor, call), timeout=task.timeout
                 )
 
             processing_time = time.time() - start_time
@@ -469,7 +1162,7 @@ class BackgroundWorker:
             task.completed_at = datetime.utcnow()
             task.result = result
             task.processing_time = processing_time
-            await self.redis.hset(f"task:{task_id}", mapping=task.to_dict())
+            await self._complete_task(task)
 
             # Update metrics
             await self._update_metrics(task, processing_time, success=True)
@@ -486,11 +1179,12 @@ class BackgroundWorker:
                 worker_id,
                 e,
                 processing_time,
+                task,
             )
         except Exception as e:
             processing_time = time.time() - start_time
             await self._handle_task_failure(
-                task_id, str(e), worker_id, e, processing_time
+                task_id, str(e), worker_id, e, processing_time, task
             )
 
     async def _handle_task_failure(
@@ -500,14 +1194,15 @@ class BackgroundWorker:
         worker_id: str,
         original_error: Exception,
         processing_time: float,
+        task: Task | None = None,
     ):
         """Handle task failure with enhanced retry logic and error categorization"""
         try:
-            task_data = await self.redis.hgetall(f"task:{task_id}")
-            if not task_data:
-                return
-
-            task = Task.from_dict(task_data)
+            if task is None:
+                task_data = await self.redis.hgetall(f"task:{task_id}")
+                if not task_data:
+                    return
+                task = Task.from_redis(task_data)
 
             # Categorize the error
             task_error = categorize_task_error(original_error)
@@ -544,11 +1239,18 @@ class BackgroundWorker:
 
                 task.retry_count += 1
                 task.status = TaskStatus.RETRY
-                await self.redis.hset(f"task:{task_id}", mapping=task.to_dict())
-
-                # Re-queue with calculated delay
-                score = time.time() + retry_delay + (task.priority.value * 1000)
-                await self.redis.zadd("task_queue", {task_id: score})
+                task.run_at = datetime.utcnow() + timedelta(seconds=retry_delay)
+                await self.redis.hset(f"task:{task_id}", mapping=task.to_redis())
+
+                # Hold the retry in the delayed index until its backoff expires
+                await self.queue.push(
+                    self.redis,
+                    task_id,
+                    task.priority.value,
+                    run_at=_epoch_seconds(task.run_at),
+                    tenant=task.tenant,
+                    plan=task.plan,
+                )
 
                 self.metrics["tasks_retried"] += 1
                 logger.warning(
@@ -559,7 +1261,11 @@ class BackgroundWorker:
                 # Mark as failed
                 task.status = TaskStatus.FAILED
                 task.completed_at = datetime.utcnow()
-                await self.redis.hset(f"task:{task_id}", mapping=task.to_dict())
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.hset(f"task:{task_id}", mapping=task.to_redis())
+                if self.finished_task_ttl:
+                    pipe.expire(f"task:{task_id}", self.finished_task_ttl)
+                await pipe.execute()
 
                 # Update metrics for failed task
                 await self._update_metrics(task, processing_time, success=False)
@@ -574,11 +1280,11 @@ class BackgroundWorker:
             try:
                 task_data = await self.redis.hgetall(f"task:{task_id}")
                 if task_data:
-                    task = Task.from_dict(task_data)
+                    task = Task.from_redis(task_data)
                     task.status = TaskStatus.FAILED
                     task.error = f"Error handling failure: {str(e)}"
                     task.completed_at = datetime.utcnow()
-                    await self.redis.hset(f"task:{task_id}", mapping=task.to_dict())
+                    await self.redis.hset(f"task:{task_id}", mapping=task.to_redis())
             except Exception:
                 pass
 
@@ -586,9 +1292,15 @@ class BackgroundWorker:
         """Get task status by ID"""
         try:
             task_data = await self.redis.hgetall(f"task:{task_id}")
-            if task_data:
-                return Task.from_dict(task_data)
-            return None
+            if not task_data:
+                return None
+
+            task = Task.from_redis(task_data)
+            if task.result_ref:
+                # Stored by reference; None once the result TTL has passed
+                stored = await self.redis.get(task.result_ref)
+                task.result = json.loads(stored) if stored is not None else None
+            return task
         except Exception as e:
             logger.error(f"Error getting task status: {e}")
             return None
@@ -600,14 +1312,16 @@ class BackgroundWorker:
             if not task_data:
                 return False
 
-            task = Task.from_dict(task_data)
+            task = Task.from_redis(task_data)
             if task.status == TaskStatus.PENDING:
                 task.status = TaskStatus.CANCELLED
                 task.completed_at = datetime.utcnow()
-                await self.redis.hset(f"task:{task_id}", mapping=task.to_dict())
+                await self.redis.hset(f"task:{task_id}", mapping=task.to_redis())
 
                 # Remove from queue
-                await self.redis.zrem("task_queue", task_id)
+                await self.queue.remove(
+                    self.redis, task_id, task.priority.value, task.tenant
+                )
 
                 # Update metrics
                 self.metrics["tasks_cancelled"] += 1
@@ -626,6 +1340,7 @@ class BackgroundWorker:
     ):
         """Update metrics with task execution results"""
         self.metrics["total_processing_time"] += processing_time
+        self.autoscaler.observe_latency(task.name, processing_time)
 
         if success:
             self.metrics["tasks_processed"] += 1
@@ -653,16 +1368,38 @@ class BackgroundWorker:
         """Update queue-related metrics"""
         try:
             if self.redis:
-                queue_size = await self.redis.zcard("task_queue")
-                self.metrics["queue_size"] = queue_size
+                self._record_queue_sizes(
+                    await self.queue.size(self.redis),
+                    await self.queue.delayed_size(self.redis),
+                )
+                if isinstance(self.queue, FairQueue):
+                    await self._update_tenant_metrics()
         except Exception as e:
             logger.warning(f"Failed to update queue metrics: {e}")
 
+    async def _update_tenant_metrics(self):
+        """Per-tenant queue depth, wait and age, and the worst wait per plan"""
+        tenants = await self.queue.tenant_stats(self.redis)
+        self.metrics["tenants"] = tenants
+
+        head_wait_by_plan: dict[str, float] = {}
+        for stats in tenants.values():
+            plan = stats["plan"] or "system"
+            head_wait_by_plan[plan] = max(
+                head_wait_by_plan.get(plan, 0.0), stats["head_wait"]
+            )
+        prometheus = get_prometheus_service()
+        for plan, head_wait in head_wait_by_plan.items():
+            prometheus.set_task_queue_head_wait(plan, head_wait)
+        prometheus.set_task_queue_tenant_ages(
+            {tenant: stats["age"] for tenant, stats in tenants.items()}
+        )
+
     async def _update_worker_health(self):
         """Update worker health metrics"""
         try:
-            for i, worker in enumerate(self.workers):
-                worker_id = f"worker-{i}"
+            for worker in self.workers:
+                worker_id = worker.get_name()
                 self.metrics["worker_health"][worker_id] = {
                     "status": "running" if not worker.done() else "stopped",
                     "exception": (
@@ -722,7 +1459,7 @@ class BackgroundWorker:
         active_workers = len([w for w in self.workers if not w.done()])
         if active_workers == 0:
             return "unhealthy"
-        elif active_workers < self.max_workers:
+        elif active_workers < self.autoscaler.limit:
             return "degraded"
         else:
             return "healthy"
@@ -747,7 +1484,7 @@ class BackgroundWorker:
             queue_healthy = True
             if self.redis:
                 try:
-                    queue_size = await self.redis.zcard("task_queue")
+                    queue_size = await self.queue.size(self.redis)
                     # Consider queue unhealthy if it's too large
                     queue_healthy = queue_size < 1000
                 except Exception:
@@ -791,20 +1528,83 @@ class BackgroundWorker:
 
 
 class JobScheduler:
-    """Job scheduler for recurring tasks"""
+    """Job scheduler for recurring tasks.
+
+    Every replica runs a scheduler, but only the holder of a Redis lease
+    (the leader) runs jobs. Each lease carries a fencing token, and a run is
+    only recorded while the token is current, so a leader that stalls past
+    its lease cannot run a job the new leader has taken over. The leader
+    keeps jobs in a min-heap by next run and sleeps until the earliest one
+    is due, waking at least every ``renew_interval`` to keep its lease.
+    """
+
+    LEASE_KEY = "job_scheduler:leader"
+    FENCE_KEY = "job_scheduler:fence"
+    JOBS_KEY = "job_scheduler:jobs"
+    VERSION_KEY = "job_scheduler:version"  # Bumped when jobs are added or removed
 
-    def __init__(self, worker: BackgroundWorker):
+    def __init__(
+        self,
+        worker: BackgroundWorker,
+        lease_ttl: float = 30.0,
+        renew_interval: float = 10.0,
+    ):
         self.worker = worker
         self.redis = worker.redis
         self.jobs: dict[str, ScheduledJob] = {}
         self.scheduler_task = None
         self.running = False
 
+        self.lease_ttl = lease_ttl
+        self.renew_interval = renew_interval
+        self.instance_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.fencing_token: int | None = None  # Set while this instance leads
+
+        # Jobs declared with @scheduled_job, created in Redis on start
+        self._declared: dict[str, tuple[str, str]] = {}
+
+        self._heap: list[tuple[datetime, str]] = []
+        self._jobs_version: int | None = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    def is_leader(self) -> bool:
+        return self.fencing_token is not None
+
+    @property
+    def _lease_value(self) -> str:
+        return f"{self.instance_id}:{self.fencing_token}"
+
+    def _script(self, source: str):
+        return self.worker._script(source)
+
+    def register_job(self, name: str, cron_expression: str, func_name: str | None = None):
+        """Declare a job that exists for as long as the code does.
+
+        Its id is its name, so every replica declares the same job and its
+        run history survives restarts.
+        """
+        self._declared[name] = (func_name or name, cron_expression)
+
     async def start(self):
         """Start the job scheduler"""
+        self.redis = self.worker.redis
+        for name, (func_name, cron_expression) in self._declared.items():
+            await self._create_job(
+                ScheduledJob(
+                    id=name,
+                    name=name,
+                    func_name=func_name,
+                    cron_expression=cron_expression,
+                    args=(),
+                    kwargs={},
+                ),
+                replace=False,
+            )
+
         self.running = True
         self.scheduler_task = asyncio.create_task(self._scheduler_loop())
-        logger.info("Job scheduler started")
+        logger.info(f"Job scheduler started ({self.instance_id})")
 
     async def stop(self):
         """Stop the job scheduler"""
@@ -815,6 +1615,16 @@ class JobScheduler:
                 await self.scheduler_task
             except asyncio.CancelledError:
                 pass
+
+        if self.is_leader:
+            try:
+                # Hand over now rather than when the lease expires
+                await self._script(RELEASE_LEADER_LUA)(
+                    keys=[self.LEASE_KEY], args=[self._lease_value]
+                )
+            except Exception as e:
+                logger.warning(f"Failed to release scheduler leadership: {e}")
+            self.fencing_token = None
         logger.info("Job scheduler stopped")
 
     async def add_job(
@@ -839,53 +1649,163 @@ class JobScheduler:
             tags=tags or [],
             metadata=metadata or {},
         )
-
-        # Store job in Redis
-        await self.redis.hset(f"job:{job_id}", mapping=job.to_dict())
-        self.jobs[job_id] = job
+        await self._create_job(job)
 
         logger.info(
             f"Added scheduled job {job_id} ({name}) with cron: {cron_expression}"
         )
         return job_id
 
+    async def _create_job(self, job: ScheduledJob, replace: bool = True):
+        """Store a job, keeping an existing one's history unless replacing.
+
+        Without ``replace``, a stored job whose function or schedule differs
+        from ``job`` is brought in line with it, and its next run recomputed.
+        """
+        if not replace:
+            stored = await self.redis.hmget(
+                f"job:{job.id}", ["func_name", "cron_expression"]
+            )
+            if stored[0] is not None:
+                declared = job.to_redis()
+                if stored == [declared["func_name"], declared["cron_expression"]]:
+                    return
+
+                await self.redis.hset(
+                    f"job:{job.id}",
+                    mapping={
+                        field: declared[field]
+                        for field in ("func_name", "cron_expression", "next_run")
+                    },
+                )
+                await self.redis.incr(self.VERSION_KEY)
+                logger.info(
+                    f"Updated scheduled job {job.id} to {job.func_name} "
+                    f"at '{job.cron_expression}'"
+                )
+                return
+
+        await self.redis.hset(f"job:{job.id}", mapping=job.to_redis())
+        await self.redis.sadd(self.JOBS_KEY, job.id)
+        await self.redis.incr(self.VERSION_KEY)
+        self.jobs[job.id] = job
+        self._schedule(job)
+
     async def remove_job(self, job_id: str) -> bool:
         """Remove a scheduled job"""
         if job_id in self.jobs:
             del self.jobs[job_id]
             await self.redis.delete(f"job:{job_id}")
+            await self.redis.srem(self.JOBS_KEY, job_id)
+            await self.redis.incr(self.VERSION_KEY)
+            self._wakeup.set()
             logger.info(f"Removed scheduled job {job_id}")
             return True
         return False
 
+    def _schedule(self, job: ScheduledJob):
+        """Put a job on the heap; stale entries are skipped when popped"""
+        if job.enabled and job.next_run:
+            heapq.heappush(self._heap, (job.next_run, job.id))
+            self._wakeup.set()
+
+    async def _acquire_leadership(self) -> bool:
+        """Take or renew the lease; reload jobs on gaining it or when they change"""
+        result = await self._script(ACQUIRE_LEADER_LUA)(
+            keys=[self.LEASE_KEY, self.FENCE_KEY, self.VERSION_KEY],
+            args=[self.instance_id, int(self.lease_ttl * 1000)],
+        )
+        if not result:
+            if self.is_leader:
+                logger.warning("Lost job scheduler leadership")
+            self.fencing_token = None
+            return False
+
+        token, version = (int(value) for value in result)
+        if token != self.fencing_token:
+            logger.info(f"Became job scheduler leader (fencing token {token})")
+            self.fencing_token = token
+            self._jobs_version = None
+        if version != self._jobs_version:
+            await self._load_jobs()
+            self._jobs_version = version
+        return True
+
+    async def _load_jobs(self):
+        """Replace the local jobs and heap with the jobs stored in Redis"""
+        job_ids = sorted(await self.redis.smembers(self.JOBS_KEY))
+        pipe = self.redis.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hgetall(f"job:{job_id}")
+
+        self.jobs = {}
+        self._heap = []
+        for job_id, data in zip(job_ids, await pipe.execute(), strict=True):
+            if not data:
+                continue
+            try:
+                job = ScheduledJob.from_redis(data)
+            except Exception as e:
+                logger.error(f"Skipping unreadable scheduled job {job_id}: {e}")
+                continue
+            self.jobs[job_id] = job
+            self._schedule(job)
+
     async def _scheduler_loop(self):
         """Main scheduler loop"""
         while self.running:
             try:
-                now = datetime.utcnow()
-
-                # Check all jobs
-                for job_id, job in self.jobs.items():
-                    if not job.enabled:
-                        continue
-
-                    if job.next_run and now >= job.next_run:
-                        # Execute job
-                        await self._execute_job(job)
-
-                        # Update next run time
-                        job.last_run = now
-                        job._calculate_next_run()
-                        await self.redis.hset(f"job:{job_id}", mapping=job.to_dict())
-
-                # Sleep for 1 minute
-                await asyncio.sleep(60)
+                timeout = self.renew_interval
+                if await self._acquire_leadership():
+                    await self._run_due_jobs()
+                    if self._heap:
+                        due_in = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+                        timeout = max(0.0, min(timeout, due_in))
+
+                # Sleep until the next job is due, a job is added or removed,
+                # or the lease needs renewing
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except TimeoutError:
+                    pass
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Scheduler error: {e}")
-                await asyncio.sleep(60)
+                await asyncio.sleep(self.renew_interval)
+
+    async def _run_due_jobs(self):
+        """Run every job whose next run has passed, once per scheduled slot"""
+        now = datetime.utcnow()
+        while self._heap and self._heap[0][0] <= now:
+            next_run, job_id = heapq.heappop(self._heap)
+            job = self.jobs.get(job_id)
+            if job is None or not job.enabled or job.next_run != next_run:
+                continue  # Removed, disabled or rescheduled since pushed
+
+            scheduled_for = job.next_run
+            job.last_run = now
+            job._calculate_next_run()
+
+            claimed = await self._script(CLAIM_JOB_RUN_LUA)(
+                keys=[self.LEASE_KEY, f"job:{job_id}"],
+                args=[
+                    self._lease_value,
+                    json.dumps(scheduled_for.isoformat()),
+                    json.dumps(job.last_run.isoformat()),
+                    json.dumps(job.next_run.isoformat() if job.next_run else None),
+                ],
+            )
+            if not claimed:
+                # Deposed, or the slot was already run; start over from Redis
+                logger.warning(f"Scheduled job {job_id} run refused; reloading jobs")
+                self._jobs_version = None
+                return
+
+            await self._execute_job(job)
+            self._schedule(job)
 
     async def _execute_job(self, job: ScheduledJob):
         """Execute a scheduled job"""
@@ -917,12 +1837,16 @@ def background_task(
     timeout: int = 300,
     max_retries: int = 3,
     retry_delay: int = 60,
+    lane: TaskLane | str | None = None,
 ):
-    """Decorator to register a background task"""
+    """Decorator to register a background task.
+
+    Use ``lane=TaskLane.PROCESS`` for CPU-bound sync functions.
+    """
 
     def decorator(func):
         task_name = name or func.__name__
-        background_worker.register_task(task_name, func)
+        background_worker.register_task(task_name, func, lane)
 
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -947,6 +1871,7 @@ def scheduled_job(cron_expression: str, name: str = None):
     def decorator(func):
         job_name = name or func.__name__
         background_worker.register_task(job_name, func)
+        job_scheduler.register_job(job_name, cron_expression)
 
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -0,0 +1,149 @@
+"""
+Cardinality control for Prometheus labels
+- Space-Saving heavy-hitter tracking in fixed memory
+- Per-user labels only for the top K users; everyone else is "other"
+- A global budget on guarded series, with overflow counted, not created
+"""
+
+import logging
+import threading
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+OTHER_LABEL = "other"
+ANONYMOUS_LABEL = "anonymous"
+
+
+class SpaceSaving:
+    """Approximate heaviest keys of a weighted stream (Metwally et al.).
+
+    Monitors at most ``capacity`` keys. A new key evicts the lightest one
+    and inherits its weight as possible overestimate, so any key heavier
+    than total/capacity is guaranteed to be monitored.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counters: dict[str, list[float]] = {}  # key -> [weight, error]
+        self.total = 0.0
+
+    def add(self, key: str, weight: float = 1.0) -> None:
+        self.total += weight
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [weight, 0.0]
+            return
+        # O(capacity) scan; capacity is small and this only runs for new keys
+        lightest = min(self.counters, key=lambda k: self.counters[k][0])
+        floor = self.counters.pop(lightest)[0]
+        self.counters[key] = [floor + weight, floor]
+
+    def top(self, k: int) -> list[tuple[str, float, float]]:
+        """(key, estimated weight, max overestimate), heaviest first"""
+        ranked = sorted(self.counters.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, weight, error) for key, (weight, error) in ranked[:k]]
+
+
+class SeriesBudget:
+    """Caps the number of label sets created across guarded metrics"""
+
+    def __init__(self, max_series: int):
+        self.max_series = max_series
+        self.series = 0
+        self.overflows: dict[str, int] = {}
+
+    def reserve(self, metric: str) -> bool:
+        if self.series >= self.max_series:
+            self.overflows[metric] = self.overflows.get(metric, 0) + 1
+            return False
+        self.series += 1
+        return True
+
+    def release(self, count: int = 1) -> None:
+        self.series = max(0, self.series - count)
+
+
+class UserLabelGuard:
+    """Bounds the ``user_id`` label of one metric to its top K users.
+
+    Users are ranked by the weight they add to the metric (requests,
+    tokens or dollars). Only the top ``k`` get their own label value;
+    the rest share "other". Every ``refresh_every`` updates the exported
+    set is recomputed: the current top k are promoted, incumbents stay
+    until they drop out of the top 2k (so users near the edge do not flap),
+    and the series of demoted users are removed.
+    """
+
+    def __init__(
+        self,
+        metric: Any,
+        labelnames: list[str],
+        budget: SeriesBudget,
+        k: int = 20,
+        capacity: int | None = None,
+        refresh_every: int = 500,
+        on_overflow: Any = None,
+    ):
+        self.metric = metric
+        self.name = metric._name
+        self.labelnames = labelnames
+        self.budget = budget
+        self.k = k
+        self.tracker = SpaceSaving(capacity or k * 10)
+        self.refresh_every = refresh_every
+        self.on_overflow = on_overflow
+        self.exported: set[str] = set()
+        self._series: dict[str, set[tuple]] = {}  # user label -> label tuples
+        self._updates = 0
+        self._lock = threading.Lock()
+
+    def labels(self, user_id: str | None, weight: float = 1.0, **labels):
+        """Metric child for these labels, or None if over the series budget"""
+        with self._lock:
+            user = self._user_label(user_id, weight)
+            labels["user_id"] = user
+            values = tuple(str(labels[name]) for name in self.labelnames)
+            series = self._series.setdefault(user, set())
+            if values not in series:
+                if not self.budget.reserve(self.name):
+                    if self.on_overflow:
+                        self.on_overflow(self.name)
+                    return None
+                series.add(values)
+        return self.metric.labels(*values)
+
+    def _user_label(self, user_id: str | None, weight: float) -> str:
+        if not user_id:
+            return ANONYMOUS_LABEL
+        self.tracker.add(user_id, weight)
+        self._updates += 1
+        if self._updates % self.refresh_every == 0:
+            self._refresh()
+        elif user_id not in self.exported and len(self.exported) < self.k:
+            self.exported.add(user_id)
+        return user_id if user_id in self.exported else OTHER_LABEL
+
+    def _refresh(self) -> None:
+        # Promote into the top k, demote only below the top 2k
+        ranked = [key for key, _, _ in self.tracker.top(2 * self.k)]
+        exported = set(ranked[: self.k])
+        exported.update(user for user in ranked if user in self.exported)
+
+        for user in self.exported - exported:
+            for values in self._series.pop(user, ()):
+                try:
+                    self.metric.remove(*values)
+                except KeyError:
+                    pass
+                self.budget.release()
+        self.exported = exported
+
+    def top_users(self, k: int | None = None) -> list[dict[str, Any]]:
+        return [
+            {"user_id": user, "value": weight, "max_overestimate": error}
+            for user, weight, error in self.tracker.top(k or self.k)
+        ]
@@ -27,6 +27,13 @@ class CostTracker:
             },  # $0.001/$0.002 per 1K tokens
         }
 
+        # Provider spend avoided by serving cached AI responses
+        self.cache_savings = {
+            "hits": 0,
+            "saved_usd": 0.0,
+            "by_endpoint": {},
+        }
+
     def track_openai_usage(
         self,
         user_id: str,
@@ -121,6 +128,35 @@ class CostTracker:
         except Exception as e:
             logger.error(f"Error tracking API call: {str(e)}")
 
+    def track_cache_hit(self, user_id: str, endpoint: str, saved_usd: float):
+        """Record provider cost avoided by a cached AI response"""
+        self.cache_savings["hits"] += 1
+        self.cache_savings["saved_usd"] += saved_usd
+
+        endpoint_savings = self.cache_savings["by_endpoint"].setdefault(
+            endpoint, {"hits": 0, "saved_usd": 0.0}
+        )
+        endpoint_savings["hits"] += 1
+        endpoint_savings["saved_usd"] += saved_usd
+
+        logger.debug(
+            f"Cache hit for user {user_id}: {endpoint}, saved ${saved_usd:.6f}"
+        )
+
+    def get_cache_savings(self) -> dict:
+        """Get provider cost avoided by cached AI responses"""
+        return {
+            "hits": self.cache_savings["hits"],
+            "saved_usd": round(self.cache_savings["saved_usd"], 6),
+            "by_endpoint": {
+                endpoint: {
+                    "hits": savings["hits"],
+                    "saved_usd": round(savings["saved_usd"], 6),
+                }
+                for endpoint, savings in self.cache_savings["by_endpoint"].items()
+            },
+        }
+
     async def check_budget_limits(self, user_id: str) -> dict:
         """Check if user has exceeded budget limits"""
         try:
@@ -0,0 +1,168 @@
+"""
+GCRA rate limiting
+- Generic cell rate algorithm: one timestamp per limit, no counters or logs
+- Several limits checked and drawn from atomically in one Lua round trip
+- Allow/deny plus retry-after from the same call
+- In-process pre-filter rejects floods without touching Redis
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Admit a request against every limit or none of them.
+# KEYS: theoretical arrival time (TAT) of each limit
+# ARGV[1]: cost, then (emission interval, tolerance) per limit, in seconds
+# Returns {1, "0"} if admitted, else {0, seconds to wait as a string}.
+# Uses the server clock so replicas with skewed clocks share one timeline.
+GCRA_LUA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local tats = {}
+local retry_after = 0
+for i = 1, #KEYS do
+    local interval = tonumber(ARGV[i * 2])
+    local tolerance = tonumber(ARGV[i * 2 + 1])
+    local tat = math.max(tonumber(redis.call('GET', KEYS[i]) or now), now)
+    tats[i] = tat + interval * cost
+    retry_after = math.max(retry_after, tats[i] - tolerance - now)
+end
+if retry_after > 0 then
+    return {0, tostring(retry_after)}
+end
+for i = 1, #KEYS do
+    redis.call('SET', KEYS[i], tostring(tats[i]), 'PX', math.ceil((tats[i] - now) * 1000))
+end
+return {1, '0'}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """`limit` requests per `period` seconds, at most `burst` back to back"""
+
+    name: str
+    limit: int
+    period: float
+    burst: int | None = None
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.limit
+
+    @property
+    def tolerance(self) -> float:
+        return self.interval * (self.burst or self.limit)
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    retry_after: float = 0.0
+
+
+class LocalGCRA:
+    """GCRA over the requests this process has seen, kept for the most recent keys.
+
+    A client refused here would be refused by the shared limiter too, since
+    it only ever sees more of the client's traffic.
+    """
+
+    def __init__(self, limits: list[RateLimit], max_keys: int = 10_000):
+        self.limits = limits
+        self.max_keys = max_keys
+        self._tats: OrderedDict[str, list[float]] = OrderedDict()
+
+    def check(self, key: str, now: float) -> float:
+        """Seconds until `key` may make a request; 0 if it may now"""
+        tats = self._tats.get(key)
+        if tats is None:
+            return 0.0
+        return max(
+            0.0,
+            *(
+                max(tat, now) + limit.interval - limit.tolerance - now
+                for limit, tat in zip(self.limits, tats, strict=True)
+            ),
+        )
+
+    def record(self, key: str, now: float) -> None:
+        """Count an admitted request"""
+        tats = self._tats.pop(key, None) or [now] * len(self.limits)
+        self._tats[key] = [
+            max(tat, now) + limit.interval
+            for limit, tat in zip(self.limits, tats, strict=True)
+        ]
+        while len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
+
+
+class GCRARateLimiter:
+    """Shared GCRA limiter keyed by client identifier.
+
+    With ``prefilter`` on, requests the in-process limiter already refuses
+    are answered without a round trip; the rest cost one EVALSHA. Requests
+    are allowed while Redis is unavailable, unless ``local_fallback`` is on:
+    then the in-process limiter enforces the limits for this process alone.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        limits: list[RateLimit],
+        prefilter: bool = True,
+        local_fallback: bool = False,
+    ):
+        self.prefix = prefix
+        self.limits = limits
+        self.prefilter = prefilter
+        self.local_fallback = local_fallback
+        self.local = LocalGCRA(limits)
+        self._script = None
+        self._script_client = None
+        self._args = [
+            value for limit in limits for value in (limit.interval, limit.tolerance)
+        ]
+
+    def keys(self, identifier: str) -> list[str]:
+        return [f"{self.prefix}:{identifier}:{limit.name}" for limit in self.limits]
+
+    async def acquire(self, identifier: str, client=None) -> RateLimitDecision:
+        """Admit one request from `identifier`"""
+        now = time.monotonic()
+        if client is None:
+            return self._acquire_unavailable(identifier, now)
+
+        if self.prefilter:
+            retry_after = self.local.check(identifier, now)
+            if retry_after > 0:
+                return RateLimitDecision(False, retry_after)
+
+        try:
+            if self._script_client is not client:
+                self._script = client.register_script(GCRA_LUA)
+                self._script_client = client
+            allowed, retry_after = await self._script(
+                keys=self.keys(identifier), args=[1, *self._args]
+            )
+            if int(allowed):
+                self.local.record(identifier, now)
+                return RateLimitDecision(True)
+            return RateLimitDecision(False, float(retry_after))
+        except Exception as e:
+            logger.warning(f"Rate limit unavailable: {e}")
+        return self._acquire_unavailable(identifier, now)
+
+    def _acquire_unavailable(self, identifier: str, now: float) -> RateLimitDecision:
+        """Decision while Redis is unavailable: allow, or limit this process"""
+        if not self.local_fallback:
+            return RateLimitDecision(True)
+        retry_after = self.local.check(identifier, now)
+        if retry_after > 0:
+            return RateLimitDecision(False, retry_after)
+        self.local.record(identifier, now)
+        return RateLimitDecision(True)
@@ -0,0 +1,99 @@
+"""
+Shared HTTP Connection Pools for Outbound API Calls
+- One keep-alive httpx client per upstream origin (scheme, host, port)
+- HTTP/2 where the h2 package is installed and the server negotiates it
+- Per-host connection limits
+- Closed once from the application lifespan
+"""
+
+import logging
+import ssl
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClientPool:
+    """Long-lived httpx clients keyed by origin.
+
+    Reusing a client keeps TCP and TLS sessions warm between calls instead of
+    paying the handshake on every request.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 30.0,
+        http2: bool = HTTP2_AVAILABLE,
+        verify: bool | str | ssl.SSLContext = True,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.http2 = http2
+        self.verify = verify
+
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def _origin(self, url: str) -> str:
+        """scheme://host:port of a URL"""
+        parsed = httpx.URL(url)
+        return f"{parsed.scheme}://{parsed.netloc.decode()}"
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """Get the pooled client for the origin of ``url``"""
+        origin = self._origin(url)
+        client = self._clients.get(origin)
+
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+                verify=self.verify,
+            )
+            self._clients[origin] = client
+            logger.debug(f"Opened HTTP connection pool for {origin}")
+
+        return client
+
+    async def close(self):
+        """Close every pooled client"""
+        clients, self._clients = self._clients, {}
+        for origin, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP pool for {origin}: {e}")
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get pool configuration and open origins"""
+        return {
+            "origins": list(self._clients),
+            "http2": self.http2,
+            "max_connections_per_host": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+        }
+
+
+# Global HTTP pool instance
+http_pool = HTTPClientPool()
+
+
+def get_http_pool() -> HTTPClientPool:
+    """Get the global HTTP pool instance."""
+    return http_pool
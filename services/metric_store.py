@@ -0,0 +1,225 @@
+"""
+Time-series storage for performance metrics
+- Per-metric, per-bucket Redis keys, so a range query reads only its buckets
+- Raw points in a sorted set per metric per hour, scored by timestamp
+- 1m and 1h rollups (count, sum, min, max) written with the raw points
+- Every bucket expires on its own; nothing ever scans the keyspace
+- One pipeline per flush, whatever the batch size
+"""
+
+import json
+import math
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any
+
+KEY_PREFIX = "ts"
+METRICS_INDEX_KEY = f"{KEY_PREFIX}:metrics"  # metric name -> unit
+
+
+@dataclass(frozen=True)
+class Resolution:
+    """One storage tier.
+
+    Points are grouped into ``step``-second slots (0 keeps every point),
+    slots into ``bucket``-second keys, and each key expires ``retention``
+    seconds after its bucket ends.
+    """
+
+    name: str
+    step: int
+    bucket: int
+    retention: int
+
+
+RAW = Resolution("raw", 0, 3600, 6 * 3600)
+MINUTE = Resolution("1m", 60, 3600, 7 * 86400)
+HOUR = Resolution("1h", 3600, 86400, 30 * 86400)
+
+
+@dataclass(slots=True)
+class Rollup:
+    """count/sum/min/max of the points in one slot"""
+
+    timestamp: float
+    count: int
+    sum: float
+    min: float
+    max: float
+
+    @property
+    def avg(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+
+def to_epoch(timestamp: datetime) -> float:
+    """Seconds since the epoch; naive datetimes are UTC, as utcnow() returns"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def from_epoch(seconds: float) -> datetime:
+    """Naive UTC datetime, matching the rest of the monitor"""
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+
+
+def bucket_key(metric: str, resolution: Resolution, bucket_start: int) -> str:
+    return f"{KEY_PREFIX}:{metric}:{resolution.name}:{bucket_start}"
+
+
+def bucket_starts(resolution: Resolution, start: float, end: float) -> range:
+    """Start of every bucket overlapping [start, end]"""
+    first = int(start // resolution.bucket) * resolution.bucket
+    return range(first, int(end) + 1, resolution.bucket)
+
+
+class MetricStore:
+    """Writes metric batches into bucketed keys and reads ranges back.
+
+    Callers pass the Redis client, as the monitor owns the connection.
+    Metrics are any objects with ``metric_type``, ``timestamp`` (datetime),
+    ``value``, ``unit`` and ``tags``.
+    """
+
+    def __init__(self, rollup_retention_days: int = 30):
+        self.rollups = (
+            MINUTE,
+            Resolution(HOUR.name, HOUR.step, HOUR.bucket, rollup_retention_days * 86400),
+        )
+        self.resolutions = (RAW, *self.rollups)
+        # Raw members must be unique or equal points would collapse
+        self._member_prefix = f"{os.getpid()}-{id(self):x}"
+        self._sequence = count()
+
+    async def write(self, redis_client, metrics: Iterable[Any]) -> int:
+        """Store a batch in one pipeline; returns the number of points written"""
+        raw: dict[tuple[str, int], dict[str, float]] = {}
+        rollups: dict[tuple[str, Resolution], dict[int, Rollup]] = {}
+        units: dict[str, str] = {}
+
+        for metric in metrics:
+            name = metric.metric_type
+            ts = to_epoch(metric.timestamp)
+            value = float(metric.value)
+            if not math.isfinite(value):
+                continue
+            units[name] = metric.unit
+            member = json.dumps(
+                [ts, value, metric.tags, f"{self._member_prefix}-{next(self._sequence)}"],
+                separators=(",", ":"),
+            )
+            raw.setdefault((name, int(ts // RAW.bucket) * RAW.bucket), {})[member] = ts
+            for resolution in self.rollups:
+                slot = int(ts // resolution.step) * resolution.step
+                slots = rollups.setdefault((name, resolution), {})
+                if slot in slots:
+                    slots[slot].add(value)
+                else:
+                    slots[slot] = Rollup(slot, 1, value, value, value)
+
+        if not units:
+            return 0
+
+        pipe = redis_client.pipeline(transaction=False)
+        written = 0
+        for (name, start), members in raw.items():
+            key = bucket_key(name, RAW, start)
+            pipe.zadd(key, members)
+            pipe.expireat(key, start + RAW.bucket + RAW.retention)
+            written += len(members)
+
+        for (name, resolution), slots in rollups.items():
+            by_bucket: dict[int, list[Rollup]] = {}
+            for rollup in slots.values():
+                start = int(rollup.timestamp // resolution.bucket) * resolution.bucket
+                by_bucket.setdefault(start, []).append(rollup)
+            for start, bucket in by_bucket.items():
+                key = bucket_key(name, resolution, start)
+                expire_at = start + resolution.bucket + resolution.retention
+                for rollup in bucket:
+                    slot = int(rollup.timestamp)
+                    pipe.hincrby(key, f"{slot}:count", rollup.count)
+                    pipe.hincrbyfloat(key, f"{slot}:sum", rollup.sum)
+                # Only lower a stored minimum and only raise a stored maximum
+                pipe.zadd(f"{key}:min", {str(int(r.timestamp)): r.min for r in bucket}, lt=True)
+                pipe.zadd(f"{key}:max", {str(int(r.timestamp)): r.max for r in bucket}, gt=True)
+                for suffix in ("", ":min", ":max"):
+                    pipe.expireat(f"{key}{suffix}", expire_at)
+
+        pipe.hset(METRICS_INDEX_KEY, mapping=units)
+        await pipe.execute()
+        return written
+
+    async def metric_names(self, redis_client) -> dict[str, str]:
+        """Stored metric names and their units"""
+        return await redis_client.hgetall(METRICS_INDEX_KEY)
+
+    def resolution_for(self, start: float, now: float | None = None) -> Resolution:
+        """Finest resolution still holding data from ``start``"""
+        now = time.time() if now is None else now
+        for resolution in self.resolutions:
+            if now - start <= resolution.retention:
+                return resolution
+        return self.resolutions[-1]
+
+    async def query_raw(
+        self, redis_client, metric: str, start: float, end: float
+    ) -> list[tuple[float, float, dict[str, str]]]:
+        """(timestamp, value, tags) points in [start, end], oldest first"""
+        pipe = redis_client.pipeline(transaction=False)
+        for bucket in bucket_starts(RAW, start, end):
+            pipe.zrangebyscore(bucket_key(metric, RAW, bucket), start, end)
+        points = []
+        for members in await pipe.execute():
+            for member in members:
+                ts, value, tags, _ = json.loads(member)
+                points.append((ts, value, tags))
+        return points
+
+    async def query_rollups(
+        self,
+        redis_client,
+        metric: str,
+        start: float,
+        end: float,
+        resolution: Resolution = MINUTE,
+    ) -> list[Rollup]:
+        """Rollups of the slots starting in [start, end], oldest first"""
+        pipe = redis_client.pipeline(transaction=False)
+        for bucket in bucket_starts(resolution, start, end):
+            key = bucket_key(metric, resolution, bucket)
+            pipe.hgetall(key)
+            pipe.zrange(f"{key}:min", 0, -1, withscores=True)
+            pipe.zrange(f"{key}:max", 0, -1, withscores=True)
+        results = await pipe.execute()
+
+        rollups = []
+        for index in range(0, len(results), 3):
+            fields, minimums, maximums = results[index : index + 3]
+            minimums, maximums = dict(minimums), dict(maximums)
+            slots = {field.split(":", 1)[0] for field in fields}
+            for slot in slots:
+                ts = float(slot)
+                if not start <= ts <= end:
+                    continue
+                rollups.append(
+                    Rollup(
+                        timestamp=ts,
+                        count=int(fields.get(f"{slot}:count", 0)),
+                        sum=float(fields.get(f"{slot}:sum", 0.0)),
+                        min=float(minimums.get(slot, 0.0)),
+                        max=float(maximums.get(slot, 0.0)),
+                    )
+                )
+        return sorted(rollups, key=lambda rollup: rollup.timestamp)
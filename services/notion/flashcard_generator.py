@@ -13,7 +13,6 @@ from pydantic import BaseModel, ConfigDict
 
 from services.ai.openai_service import get_openai_service
 from services.cost_tracking import cost_tracking_service
-from services.rate_limited_queue import get_notion_queue
 
 from .notion_client import NotionClient
 
@@ -57,14 +56,8 @@ class NotionFlashcardGenerator:
     ) -> list[FlashcardData]:
         """Generate flashcards from a Notion page."""
         try:
-            notion_queue = get_notion_queue()
-            # Get the page content using the rate-limited queue
-            result_future = await notion_queue.enqueue_request(
-                method="GET",
-                endpoint=f"pages/{page_id}",
-                api_key=self.notion_client.api_key,
-            )
-            page = await result_future
+            # Get the page content; the client rate limits per integration
+            page = await self.notion_client.get_page(page_id)
 
             # Generate flashcards using AI
             flashcards = await self._generate_flashcards_with_ai(
@@ -90,20 +83,9 @@ class NotionFlashcardGenerator:
     ) -> list[FlashcardData]:
         """Generate flashcards from a Notion database."""
         try:
-            notion_queue = get_notion_queue()
-            # Get database and its pages using the rate-limited queue
-            db_future = await notion_queue.enqueue_request(
-                method="GET",
-                endpoint=f"databases/{database_id}",
-                api_key=self.notion_client.api_key,
-            )
-            database = await db_future
-            pages_future = await notion_queue.enqueue_request(
-                method="POST",
-                endpoint=f"databases/{database_id}/query",
-                api_key=self.notion_client.api_key,
-            )
-            pages = await pages_future
+            # Get database and all its pages; the client rate limits per integration
+            database = await self.notion_client.get_database(database_id)
+            pages = await self.notion_client.query_database(database_id)
 
             all_content = []
             for page in pages:
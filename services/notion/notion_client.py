@@ -66,17 +66,21 @@ class NotionClient:
             "Notion-Version": "2022-06-28",
             "Content-Type": "application/json",
         }
-        # Initialize rate-limited queue
-        self.queue = get_notion_queue(self)
+        # Shared queue; requests are rate limited per integration token
+        self.queue = get_notion_queue()
 
     async def _make_request(
-        self, method: str, endpoint: str, **kwargs
+        self, method: str, endpoint: str, data: dict | None = None, priority: int = 1
     ) -> dict[str, Any]:
         """Make a rate-limited request to the Notion API."""
         try:
             # Use rate-limited queue for all API calls
             future = await self.queue.enqueue_request(
-                method=method, endpoint=endpoint, headers=self.headers, **kwargs
+                method=method,
+                endpoint=endpoint,
+                api_key=self.api_key,
+                data=data,
+                priority=priority,
             )
             return await future
         except Exception as e:
@@ -110,10 +114,16 @@ class NotionClient:
         if filter_params:
             data["filter"] = filter_params
 
-        response = await self._make_request(
-            "POST", f"/databases/{database_id}/query", data=data
-        )
-        return response.get("results", [])
+        # Follow the cursor; each page of results is one rate-limited request
+        results = []
+        while True:
+            response = await self._make_request(
+                "POST", f"/databases/{database_id}/query", data=data
+            )
+            results.extend(response.get("results", []))
+            if not response.get("has_more") or not response.get("next_cursor"):
+                return results
+            data = {**data, "start_cursor": response["next_cursor"]}
 
     async def create_page(
         self, parent_id: str, properties: dict[str, Any]
@@ -1,18 +1,32 @@
 """
 Rate-limited queue for Notion API calls.
-Handles 3 requests/second limit with batching and exponential backoff.
+Notion allows about 3 requests/second per integration, so every integration
+token gets its own token bucket, priority heap and dispatcher:
+- Requests go out as soon as their bucket has a token, without batching
+- 429 Retry-After pauses only the workspace that received it
+- Workspaces are served in parallel; one user's sync never slows another's
 """
 
 import asyncio
+import hashlib
 import heapq
+import itertools
 import logging
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from typing import Any
 
+import httpx
+
+from services.http_pool import get_http_pool
+from services.rate_limited_queue import LocalTokenBucket, parse_retry_after
+
 logger = logging.getLogger(__name__)
 
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
 
 @dataclass
 class NotionAPIRequest:
@@ -20,188 +34,208 @@ class NotionAPIRequest:
 
     method: str
     endpoint: str
+    api_key: str = ""
     data: dict | None = None
     headers: dict | None = None
     priority: int = 1  # 1 = high, 2 = medium, 3 = low
     created_at: datetime = None
+    attempts: int = 0
 
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = datetime.now(UTC)
 
 
+@dataclass
+class _Workspace:
+    """Requests and token bucket of one Notion integration"""
+
+    bucket_id: str
+    queue: list[tuple[int, int, NotionAPIRequest, asyncio.Future]] = field(
+        default_factory=list
+    )
+    bucket: LocalTokenBucket = field(default_factory=LocalTokenBucket)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    dispatcher: asyncio.Task | None = None
+    sent: int = 0
+    throttled: int = 0
+
+
 class NotionRateLimitedQueue:
-    """Rate-limited queue for Notion API calls."""
+    """Rate-limited queue for Notion API calls, one token bucket per integration."""
 
-    def __init__(self, notion_client, max_requests_per_second: int = 3):
-        self.notion_client = notion_client
+    def __init__(
+        self,
+        max_requests_per_second: float = 3,
+        burst: int | None = None,
+        max_retries: int = 3,
+        idle_timeout: float = 60.0,
+    ):
         self.max_requests_per_second = max_requests_per_second
-        self.priority_queue: list[
-            tuple[int, float, NotionAPIRequest, asyncio.Future]
-        ] = []
-        self.queue_lock = asyncio.Lock()
-        self.worker_task = None
-        self.is_running = False
-        self.last_request_time = 0
+        self.burst = burst or max(1, int(max_requests_per_second))
+        self.max_retries = max_retries
+        self.idle_timeout = idle_timeout
+        self.workspaces: dict[str, _Workspace] = {}
         self.consecutive_errors = 0
-        self.max_retries = 3
+        self._sequence = itertools.count()
+        self._in_flight: set[asyncio.Task] = set()
 
-    async def start(self):
-        """Start the rate-limited queue worker."""
-        if not self.is_running:
-            self.is_running = True
-            self.worker_task = asyncio.create_task(self._worker())
-            logger.info("Notion rate-limited queue started")
+    @staticmethod
+    def bucket_id(api_key: str) -> str:
+        """Stable id for an integration token that does not reveal it"""
+        return hashlib.sha256(api_key.encode()).hexdigest()[:16]
 
     async def stop(self):
-        """Stop the rate-limited queue worker."""
-        if self.is_running:
-            self.is_running = False
-            if self.worker_task:
-                self.worker_task.cancel()
-                try:
-                    await self.worker_task
-                except asyncio.CancelledError:
-                    pass
-            logger.info("Notion rate-limited queue stopped")
+        """Cancel dispatchers and requests in flight."""
+        tasks = [
+            workspace.dispatcher
+            for workspace in self.workspaces.values()
+            if workspace.dispatcher
+        ]
+        tasks.extend(self._in_flight)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workspaces.clear()
+        logger.info("Notion rate-limited queue stopped")
 
     async def enqueue_request(
         self,
         method: str,
         endpoint: str,
+        api_key: str,
         data: dict | None = None,
         headers: dict | None = None,
         priority: int = 1,
     ) -> asyncio.Future:
-        """Enqueue a Notion API request with priority."""
+        """Enqueue a Notion API request; lower `priority` values go first."""
         request = NotionAPIRequest(
             method=method,
             endpoint=endpoint,
+            api_key=api_key,
             data=data,
             headers=headers,
             priority=priority,
         )
-
-        # Create a future to return the result
-        future = asyncio.Future()
-
-        async with self.queue_lock:
-            # Use timestamp as tiebreaker for requests with same priority
-            timestamp = time.time()
-            # heapq uses min-heap, so we negate priority to get highest priority first
-            heapq.heappush(self.priority_queue, (-priority, timestamp, request, future))
-
+        future = asyncio.get_running_loop().create_future()
+        self._push(request, future, next(self._sequence))
         return future
 
-    async def _worker(self):
-        """Worker that processes requests at the rate limit."""
-        while self.is_running:
-            try:
-                # Process up to max_requests_per_second
-                for _ in range(self.max_requests_per_second):
-                    if not self.priority_queue:
-                        break
-
-                    # Get the highest priority request
-                    request, future = await self._get_highest_priority_request()
-                    if request is None:
-                        break
-
-                    # Rate limiting
-                    await self._rate_limit()
-
-                    # Process the request
-                    try:
-                        result = await self._process_request(request)
-                        if not future.done():
-                            future.set_result(result)
-                        self.consecutive_errors = 0  # Reset error count on success
-
-                    except Exception as e:
-                        logger.error(f"Error processing Notion API request: {e}")
-                        if not future.done():
-                            future.set_exception(e)
-                        self.consecutive_errors += 1
-
-                # Wait 1 second before next batch
-                await asyncio.sleep(1)
-
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in Notion queue worker: {e}")
-                await asyncio.sleep(1)
-
-    async def _get_highest_priority_request(
-        self,
-    ) -> tuple[NotionAPIRequest | None, asyncio.Future | None]:
-        """Get the highest priority request from the queue."""
-        async with self.queue_lock:
-            if not self.priority_queue:
-                return None, None
-
-            # Get the highest priority request (lowest negative priority = highest actual priority)
-            _, timestamp, request, future = heapq.heappop(self.priority_queue)
+    def _push(
+        self, request: NotionAPIRequest, future: asyncio.Future, sequence: int
+    ) -> _Workspace:
+        bucket_id = self.bucket_id(request.api_key)
+        workspace = self.workspaces.get(bucket_id)
+        if workspace is None:
+            workspace = self.workspaces[bucket_id] = _Workspace(bucket_id)
+        # Sequence breaks ties, so a retried request keeps its place in line
+        heapq.heappush(workspace.queue, (request.priority, sequence, request, future))
+        workspace.wakeup.set()
+        if workspace.dispatcher is None or workspace.dispatcher.done():
+            workspace.dispatcher = asyncio.create_task(self._dispatch(workspace))
+        return workspace
+
+    async def _dispatch(self, workspace: _Workspace):
+        """Send a workspace's requests as fast as its bucket allows."""
+        buckets = [(self.burst, self.max_requests_per_second, 1)]
+        while True:
+            if not workspace.queue:
+                workspace.wakeup.clear()
+                try:
+                    await asyncio.wait_for(workspace.wakeup.wait(), self.idle_timeout)
+                except TimeoutError:
+                    if not workspace.queue:
+                        # The bucket is full again by now, so nothing is lost
+                        if self.workspaces.get(workspace.bucket_id) is workspace:
+                            del self.workspaces[workspace.bucket_id]
+                        return
+                continue
+
+            wait = workspace.bucket.acquire(time.monotonic(), buckets)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            _, sequence, request, future = heapq.heappop(workspace.queue)
+            if future.done():  # Caller gave up
+                continue
             logger.debug(
-                f"Processing request: {request.method} {request.endpoint} (priority: {request.priority})"
+                f"Processing request: {request.method} {request.endpoint} "
+                f"(priority: {request.priority})"
             )
-            return request, future
-
-    async def _rate_limit(self):
-        """Implement rate limiting."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        min_interval = 1.0 / self.max_requests_per_second
-
-        if time_since_last < min_interval:
-            await asyncio.sleep(min_interval - time_since_last)
-
-        self.last_request_time = time.time()
-
-    async def _process_request(self, request: NotionAPIRequest) -> Any:
-        """Process a single Notion API request with retries and backoff."""
-        for attempt in range(self.max_retries):
-            try:
-                # Make the request using the notion client
-                if request.method == "GET":
-                    result = await self.notion_client._make_request(
-                        "GET", request.endpoint, headers=request.headers
-                    )
-                elif request.method == "POST":
-                    result = await self.notion_client._make_request(
-                        "POST",
-                        request.endpoint,
-                        json=request.data,
-                        headers=request.headers,
-                    )
-                elif request.method == "PUT":
-                    result = await self.notion_client._make_request(
-                        "PUT",
-                        request.endpoint,
-                        json=request.data,
-                        headers=request.headers,
-                    )
-                elif request.method == "DELETE":
-                    result = await self.notion_client._make_request(
-                        "DELETE", request.endpoint, headers=request.headers
+            workspace.sent += 1
+            task = asyncio.create_task(
+                self._process_request(workspace, request, future, sequence)
+            )
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _process_request(
+        self,
+        workspace: _Workspace,
+        request: NotionAPIRequest,
+        future: asyncio.Future,
+        sequence: int,
+    ):
+        """Send a request, requeueing it on 429, 5xx and transport errors."""
+        try:
+            result = await self._send(request)
+        except (httpx.HTTPStatusError, httpx.RequestError) as e:
+            status = None
+            if isinstance(e, httpx.HTTPStatusError):
+                status = e.response.status_code
+            retryable = status is None or status == 429 or status >= 500
+            if retryable and request.attempts < self.max_retries:
+                request.attempts += 1
+                workspace = self._push(request, future, sequence)
+                if status == 429:
+                    retry_after = parse_retry_after(
+                        e.response.headers.get("retry-after")
                     )
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {request.method}")
-
-                return result
-
-            except Exception as e:
-                if "429" in str(e):  # Rate limit exceeded
-                    # Exponential backoff
-                    backoff_time = (2**attempt) * (1 + self.consecutive_errors)
-                    logger.warning(f"Rate limit hit, backing off for {backoff_time}s")
-                    await asyncio.sleep(backoff_time)
-                    continue
-                elif attempt == self.max_retries - 1:
-                    raise
-                else:
-                    # For other errors, wait a bit and retry
-                    await asyncio.sleep(1)
+                    if retry_after is None:
+                        retry_after = 2.0**request.attempts
+                    self._pause(workspace, retry_after)
+                return
+            self._fail(future, e)
+        except Exception as e:
+            self._fail(future, e)
+        else:
+            self.consecutive_errors = 0
+            if not future.done():
+                future.set_result(result)
+
+    def _pause(self, workspace: _Workspace, seconds: float):
+        logger.warning(
+            f"Notion rate limit hit for workspace {workspace.bucket_id}, "
+            f"pausing for {seconds}s"
+        )
+        workspace.throttled += 1
+        bucket = workspace.bucket
+        bucket.paused_until = max(bucket.paused_until, time.monotonic() + seconds)
+
+    def _fail(self, future: asyncio.Future, error: Exception):
+        logger.error(f"Error processing Notion API request: {error}")
+        self.consecutive_errors += 1
+        if not future.done():
+            future.set_exception(error)
+
+    async def _send(self, request: NotionAPIRequest) -> Any:
+        """Make the HTTP request and return the decoded JSON body."""
+        url = f"{NOTION_API_URL}/{request.endpoint.lstrip('/')}"
+        headers = {
+            "Authorization": f"Bearer {request.api_key}",
+            "Notion-Version": NOTION_VERSION,
+            "Content-Type": "application/json",
+            **(request.headers or {}),
+        }
+        response = await get_http_pool().get_client(url).request(
+            request.method.upper(),
+            url,
+            headers=headers,
+            json=request.data if request.method.upper() != "GET" else None,
+        )
+        response.raise_for_status()
+        return response.json()
 
     async def batch_requests(self, requests: list[NotionAPIRequest]) -> list[Any]:
         """Process multiple requests in a batch."""
@@ -210,6 +244,7 @@ class NotionRateLimitedQueue:
             future = await self.enqueue_request(
                 method=request.method,
                 endpoint=request.endpoint,
+                api_key=request.api_key,
                 data=request.data,
                 headers=request.headers,
                 priority=request.priority,
@@ -221,31 +256,41 @@ class NotionRateLimitedQueue:
         return results
 
     async def get_queue_size(self) -> int:
-        """Get the current size of the priority queue."""
-        async with self.queue_lock:
-            return len(self.priority_queue)
+        """Get the number of requests waiting across all workspaces."""
+        return sum(len(workspace.queue) for workspace in self.workspaces.values())
 
     async def get_queue_stats(self) -> dict[str, Any]:
         """Get statistics about the queue."""
-        async with self.queue_lock:
-            priorities = [item[0] for item in self.priority_queue]
-            return {
-                "queue_size": len(self.priority_queue),
-                "high_priority_count": sum(1 for p in priorities if p == -1),
-                "medium_priority_count": sum(1 for p in priorities if p == -2),
-                "low_priority_count": sum(1 for p in priorities if p == -3),
-                "consecutive_errors": self.consecutive_errors,
-                "is_running": self.is_running,
-            }
+        priorities = [
+            priority
+            for workspace in self.workspaces.values()
+            for priority, *_ in workspace.queue
+        ]
+        return {
+            "queue_size": len(priorities),
+            "high_priority_count": priorities.count(1),
+            "medium_priority_count": priorities.count(2),
+            "low_priority_count": priorities.count(3),
+            "consecutive_errors": self.consecutive_errors,
+            "in_flight": len(self._in_flight),
+            "workspaces": {
+                bucket_id: {
+                    "queued": len(workspace.queue),
+                    "sent": workspace.sent,
+                    "throttled": workspace.throttled,
+                }
+                for bucket_id, workspace in self.workspaces.items()
+            },
+        }
 
 
 # Global instance
 _notion_queue = None
 
 
-def get_notion_queue(notion_client) -> NotionRateLimitedQueue:
+def get_notion_queue() -> NotionRateLimitedQueue:
     """Get the global Notion rate-limited queue instance."""
     global _notion_queue
     if _notion_queue is None:
-        _notion_queue = NotionRateLimitedQueue(notion_client)
+        _notion_queue = NotionRateLimitedQueue()
     return _notion_queue
@@ -11,7 +11,6 @@ from typing import Any
 
 from pydantic import BaseModel, ConfigDict
 
-from services.rate_limited_queue import get_notion_queue
 from services.supabase import get_supabase_client
 
 from .flashcard_generator import FlashcardData, NotionFlashcardGenerator
@@ -155,13 +154,7 @@ class NotionSyncManager:
         """Get Notion page with retry logic for network errors."""
         for attempt in range(max_retries):
             try:
-                notion_queue = get_notion_queue()
-                result_future = await notion_queue.enqueue_request(
-                    method="GET",
-                    endpoint=f"pages/{page_id}",
-                    api_key=self.notion_client.api_key,
-                )
-                return await result_future
+                return await self.notion_client.get_page(page_id)
             except Exception as e:
                 if attempt == max_retries - 1:
                     raise
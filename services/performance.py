@@ -1,39 +1,82 @@
 import asyncio
+import json
 import logging
-import statistics
+import os
+import socket
 import time
-from collections import defaultdict, deque
+from collections import defaultdict
 from collections.abc import Callable
 from datetime import datetime
 from functools import wraps
 from typing import Any
 
+import redis.asyncio as redis
+
+from services.latency_sketch import WINDOWS, LatencySketch, WindowedSketch
+
 logger = logging.getLogger(__name__)
 
+SKETCH_KEY_PREFIX = "perf:sketches:"
+SKETCH_INSTANCES_KEY = "perf:sketch_instances"
+
+
+def _sketch_stats(
+    key: str, sketch: LatencySketch, error_count: int, window: str | None = None
+) -> dict:
+    stats = {
+        "endpoint": key,
+        "request_count": sketch.count,
+        "error_count": error_count,
+        "avg_response_time": sketch.mean,
+        "min_response_time": sketch.min if sketch.count else 0,
+        "max_response_time": sketch.max if sketch.count else 0,
+        "p50_response_time": sketch.quantile(0.5),
+        "p95_response_time": sketch.quantile(0.95),
+        "p99_response_time": sketch.quantile(0.99),
+    }
+    if window:
+        stats["window"] = window
+    return stats
+
 
 class PerformanceMonitor:
-    """Performance monitoring and optimization service"""
-
-    def __init__(self, max_history: int = 1000):
-        self.max_history = max_history
-        self.response_times: dict[str, deque] = defaultdict(
-            lambda: deque(maxlen=max_history)
-        )
-        self.error_counts: dict[str, int] = defaultdict(int)
-        self.request_counts: dict[str, int] = defaultdict(int)
+    """Performance monitoring and optimization service.
+
+    Latencies go into fixed-size quantile sketches per ``METHOD endpoint``,
+    so stats cost the same however many requests were seen. With
+    ``start_sync`` running, each worker publishes its 1m/5m/1h sketches to
+    Redis and merges everyone's, for cluster-wide percentiles.
+    """
+
+    def __init__(self, instance_id: str | None = None):
+        self.latencies: dict[str, WindowedSketch] = defaultdict(WindowedSketch)
+        self.overall = WindowedSketch()
         self.slow_queries: list[dict] = []
         self.start_time = datetime.utcnow()
 
+        self.instance_id = instance_id or f"{socket.gethostname()}-{os.getpid()}"
+        # window -> endpoint -> (sketch, errors), from the last Redis sync
+        self.cluster: dict[str, dict[str, tuple[LatencySketch, int]]] = {}
+        self.sync_task: asyncio.Task | None = None
+        self.redis = None
+
+    @property
+    def request_counts(self) -> dict[str, int]:
+        return {key: sketch.total.count for key, sketch in self.latencies.items()}
+
+    @property
+    def error_counts(self) -> dict[str, int]:
+        return {key: sketch.total_errors for key, sketch in self.latencies.items()}
+
     def record_request(
         self, endpoint: str, method: str, response_time: float, status_code: int = 200
     ):
         """Record a request for performance tracking"""
         key = f"{method} {endpoint}"
-        self.response_times[key].append(response_time)
-        self.request_counts[key] += 1
-
-        if status_code >= 400:
-            self.error_counts[key] += 1
+        now = time.time()
+        error = status_code >= 400
+        self.latencies[key].add(response_time, error, now)
+        self.overall.add(response_time, error, now)
 
         # Track slow requests (> 1 second)
         if response_time > 1.0:
@@ -50,49 +93,45 @@ class PerformanceMonitor:
             if len(self.slow_queries) > 100:
                 self.slow_queries = self.slow_queries[-100:]
 
-    def get_endpoint_stats(self, endpoint: str, method: str = "GET") -> dict:
-        """Get performance statistics for an endpoint"""
+    def _endpoint_sketch(
+        self, key: str, window: str | None, cluster: bool
+    ) -> tuple[LatencySketch, int]:
+        if cluster:
+            if window is None:
+                raise ValueError("Cluster stats need a window: 1m, 5m or 1h")
+            return self.cluster.get(window, {}).get(key, (LatencySketch(), 0))
+        latencies = self.latencies.get(key)
+        if latencies is None:
+            return LatencySketch(), 0
+        if window is None:
+            return latencies.total, latencies.total_errors
+        return latencies.window(window)
+
+    def get_endpoint_stats(
+        self,
+        endpoint: str,
+        method: str = "GET",
+        window: str | None = None,
+        cluster: bool = False,
+    ) -> dict:
+        """Get performance statistics for an endpoint.
+
+        ``window`` is one of 1m, 5m or 1h (default: since start). With
+        ``cluster``, stats come from every worker's sketches as of the last
+        Redis sync.
+        """
         key = f"{method} {endpoint}"
-        times = list(self.response_times[key])
-
-        if not times:
-            return {
-                "endpoint": key,
-                "request_count": 0,
-                "error_count": 0,
-                "avg_response_time": 0,
-                "min_response_time": 0,
-                "max_response_time": 0,
-                "p95_response_time": 0,
-                "p99_response_time": 0,
-            }
-
-        return {
-            "endpoint": key,
-            "request_count": self.request_counts[key],
-            "error_count": self.error_counts[key],
-            "avg_response_time": statistics.mean(times),
-            "min_response_time": min(times),
-            "max_response_time": max(times),
-            "p95_response_time": (
-                statistics.quantiles(times, n=20)[18]
-                if len(times) >= 20
-                else max(times)
-            ),
-            "p99_response_time": (
-                statistics.quantiles(times, n=100)[98]
-                if len(times) >= 100
-                else max(times)
-            ),
-        }
+        sketch, errors = self._endpoint_sketch(key, window, cluster)
+        return _sketch_stats(key, sketch, errors, window)
 
-    def get_overall_stats(self) -> dict:
+    def get_overall_stats(self, window: str | None = None) -> dict:
         """Get overall performance statistics"""
-        all_times = []
-        for times in self.response_times.values():
-            all_times.extend(times)
+        if window is None:
+            sketch, total_errors = self.overall.total, self.overall.total_errors
+        else:
+            sketch, total_errors = self.overall.window(window)
 
-        if not all_times:
+        if not sketch.count:
             return {
                 "total_requests": 0,
                 "total_errors": 0,
@@ -101,14 +140,17 @@ class PerformanceMonitor:
                 "requests_per_second": 0,
             }
 
-        total_requests = sum(self.request_counts.values())
-        total_errors = sum(self.error_counts.values())
+        total_requests = sketch.count
         uptime = (datetime.utcnow() - self.start_time).total_seconds()
+        if window is not None:
+            uptime = min(uptime, WINDOWS[window][0] * WINDOWS[window][1])
 
         return {
             "total_requests": total_requests,
             "total_errors": total_errors,
-            "avg_response_time": statistics.mean(all_times),
+            "avg_response_time": sketch.mean,
+            "p95_response_time": sketch.quantile(0.95),
+            "p99_response_time": sketch.quantile(0.99),
             "uptime_seconds": uptime,
             "requests_per_second": total_requests / uptime if uptime > 0 else 0,
             "error_rate": (
@@ -116,17 +158,23 @@ class PerformanceMonitor:
             ),
         }
 
-    def get_slowest_endpoints(self, limit: int = 10) -> list[dict]:
-        """Get the slowest endpoints"""
-        endpoint_stats = []
-        for key in self.response_times.keys():
-            stats = self.get_endpoint_stats(key.split(" ", 1)[1], key.split(" ", 1)[0])
-            if stats["request_count"] > 0:
-                endpoint_stats.append(stats)
-
-        return sorted(
-            endpoint_stats, key=lambda x: x["avg_response_time"], reverse=True
+    def get_slowest_endpoints(
+        self, limit: int = 10, window: str | None = None, cluster: bool = False
+    ) -> list[dict]:
+        """Get the slowest endpoints by average response time"""
+        keys = self.cluster.get(window, {}) if cluster else self.latencies
+        sketches = [
+            (key, *self._endpoint_sketch(key, window, cluster)) for key in keys
+        ]
+        slowest = sorted(
+            (entry for entry in sketches if entry[1].count),
+            key=lambda entry: entry[1].mean,
+            reverse=True,
         )[:limit]
+        return [
+            _sketch_stats(key, sketch, errors, window)
+            for key, sketch, errors in slowest
+        ]
 
     def get_recent_slow_queries(self, limit: int = 20) -> list[dict]:
         """Get recent slow queries"""
@@ -134,12 +182,85 @@ class PerformanceMonitor:
 
     def clear_history(self):
         """Clear performance history"""
-        self.response_times.clear()
-        self.error_counts.clear()
-        self.request_counts.clear()
+        self.latencies.clear()
+        self.overall = WindowedSketch()
         self.slow_queries.clear()
         self.start_time = datetime.utcnow()
 
+    async def sync(self, redis_client: redis.Redis, ttl: float = 45.0) -> None:
+        """Publish this worker's window sketches and merge every worker's.
+
+        Each worker owns one hash, so publishing needs no coordination;
+        workers that stop syncing drop out once their hash expires.
+        """
+        now = time.time()
+        fields = {}
+        for key, latencies in self.latencies.items():
+            for window in WINDOWS:
+                sketch, errors = latencies.window(window, now)
+                if sketch.count:
+                    fields[f"{window}|{key}"] = json.dumps(
+                        {"sketch": sketch.to_dict(), "errors": errors}
+                    )
+
+        own_key = f"{SKETCH_KEY_PREFIX}{self.instance_id}"
+        pipe = redis_client.pipeline()
+        pipe.delete(own_key)
+        if fields:
+            pipe.hset(own_key, mapping=fields)
+            pipe.expire(own_key, int(ttl))
+        pipe.zadd(SKETCH_INSTANCES_KEY, {self.instance_id: now})
+        pipe.zremrangebyscore(SKETCH_INSTANCES_KEY, 0, now - ttl)
+        pipe.zrange(SKETCH_INSTANCES_KEY, 0, -1)
+        instances = (await pipe.execute())[-1]
+
+        pipe = redis_client.pipeline()
+        for instance in instances:
+            pipe.hgetall(f"{SKETCH_KEY_PREFIX}{instance}")
+        published = await pipe.execute()
+
+        cluster: dict[str, dict[str, tuple[LatencySketch, int]]] = {
+            window: {} for window in WINDOWS
+        }
+        for fields in published:
+            for field, encoded in fields.items():
+                window, key = field.split("|", 1)
+                data = json.loads(encoded)
+                sketch = LatencySketch.from_dict(data["sketch"])
+                merged, errors = cluster[window].get(key, (LatencySketch(), 0))
+                merged.merge(sketch)
+                cluster[window][key] = (merged, errors + data["errors"])
+        self.cluster = cluster
+
+    async def start_sync(
+        self, redis_url: str = "redis://localhost:6379", interval: float = 15.0
+    ):
+        """Sync sketches through Redis every ``interval`` seconds"""
+        if self.sync_task:
+            return
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.sync_task = asyncio.create_task(self._sync_loop(interval))
+
+    async def stop_sync(self):
+        if self.sync_task:
+            self.sync_task.cancel()
+            await asyncio.gather(self.sync_task, return_exceptions=True)
+            self.sync_task = None
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+
+    async def _sync_loop(self, interval: float):
+        while True:
+            try:
+                await self.sync(self.redis, ttl=interval * 3)
+                await asyncio.sleep(interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning(f"Performance sketch sync failed: {e}")
+                await asyncio.sleep(interval)
+
 
 # Global performance monitor instance
 performance_monitor = PerformanceMonitor()
@@ -258,31 +379,3 @@ class ResponseTimeOptimizer:
             return True
 
         return False
-
-
-# Performance middleware for FastAPI
-class PerformanceMiddleware:
-    def __init__(self, app):
-        self.app = app
-
-    async def __call__(self, scope, receive, send):
-        if scope["type"] == "http":
-            start_time = time.time()
-
-            # Create a custom send function to capture response time
-            async def custom_send(message):
-                if message["type"] == "http.response.start":
-                    response_time = time.time() - start_time
-                    method = scope.get("method", "GET")
-                    path = scope.get("path", "/")
-                    status = message.get("status", 200)
-
-                    performance_monitor.record_request(
-                        path, method, response_time, status
-                    )
-
-                await send(message)
-
-            await self.app(scope, receive, custom_send)
-        else:
-            await self.app(scope, receive, send)
@@ -2,15 +2,17 @@
 Performance Monitoring System
 - Real-time metrics collection
 - Performance profiling
-- Resource monitoring
+- Resource monitoring, sampled off the event loop
 - Alerting system
 - Optimization recommendations
 - Performance dashboards
+- Bucketed, downsampled metric storage with expiry-based retention
 """
 
 import asyncio
-import json
 import logging
+import os
+import threading
 import time
 from collections import deque
 from collections.abc import Callable
@@ -22,6 +24,8 @@ from typing import Any
 import psutil
 import redis.asyncio as redis
 
+from services.metric_store import RAW, MetricStore, from_epoch, to_epoch
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,6 +39,110 @@ class PerformanceMetric:
     metadata: dict[str, Any]
 
 
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """System and process metrics from one sampler pass"""
+
+    timestamp: float
+    cpu_percent: float
+    memory_percent: float
+    memory_available: int
+    disk_percent: float
+    disk_available: int
+    network_bytes_sent: int
+    network_bytes_recv: int
+    network_send_rate: float  # Bytes per second since the previous sample
+    network_recv_rate: float
+    process_cpu_percent: float
+    process_rss: int
+    process_open_fds: int
+    process_threads: int
+
+
+class SystemSampler:
+    """Samples system and process metrics on a daemon thread.
+
+    psutil calls can block (cpu_percent with an interval sleeps, disk and
+    /proc reads hit the filesystem), so none of them run on the event loop.
+    CPU figures are non-blocking deltas since the previous pass. Each pass
+    publishes a new immutable SystemSnapshot by swapping one attribute, so
+    readers on the loop take no lock.
+    """
+
+    def __init__(self, interval: float = 5.0, disk_path: str = "/"):
+        self.interval = interval
+        self.disk_path = disk_path
+        self.snapshot: SystemSnapshot | None = None
+        self._process = psutil.Process(os.getpid())
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_network: tuple[float, int, int] | None = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        # Prime the CPU counters; the first real delta comes one interval later
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="system-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.snapshot = self.sample()
+            except Exception as e:
+                logger.warning(f"System metric sampling failed: {e}")
+
+    def sample(self) -> SystemSnapshot:
+        """Take one sample; never blocks waiting on a CPU interval"""
+        now = time.monotonic()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        network = psutil.net_io_counters()
+
+        send_rate = recv_rate = 0.0
+        if self._last_network:
+            then, sent, recv = self._last_network
+            elapsed = max(now - then, 1e-6)
+            send_rate = (network.bytes_sent - sent) / elapsed
+            recv_rate = (network.bytes_recv - recv) / elapsed
+        self._last_network = (now, network.bytes_sent, network.bytes_recv)
+
+        process = self._process
+        with process.oneshot():
+            process_cpu = process.cpu_percent(interval=None)
+            rss = process.memory_info().rss
+            threads = process.num_threads()
+            open_fds = process.num_fds() if hasattr(process, "num_fds") else 0
+
+        return SystemSnapshot(
+            timestamp=time.time(),
+            cpu_percent=psutil.cpu_percent(interval=None),
+            memory_percent=memory.percent,
+            memory_available=memory.available,
+            disk_percent=(disk.used / disk.total) * 100,
+            disk_available=disk.free,
+            network_bytes_sent=network.bytes_sent,
+            network_bytes_recv=network.bytes_recv,
+            network_send_rate=send_rate,
+            network_recv_rate=recv_rate,
+            process_cpu_percent=process_cpu,
+            process_rss=rss,
+            process_open_fds=open_fds,
+            process_threads=threads,
+        )
+
+
 @dataclass
 class Alert:
     id: str
@@ -70,7 +178,6 @@ class PerformanceMonitor:
         # Monitoring state
         self.running = False
         self.collection_task = None
-        self.cleanup_task = None
 
         # Metrics storage
         self.metrics_buffer = deque(maxlen=1000)
@@ -86,6 +193,10 @@ class PerformanceMonitor:
         self.memory_usage = deque(maxlen=100)
         self.disk_usage = deque(maxlen=100)
         self.network_io = deque(maxlen=100)
+        self.store = MetricStore(rollup_retention_days=retention_days)
+        self.sampler = SystemSampler(interval=min(5.0, collection_interval))
+        self._flush_task: asyncio.Task | None = None
+        self._last_snapshot: SystemSnapshot | None = None
 
     async def start(self):
         """Start performance monitoring"""
@@ -96,8 +207,8 @@ class PerformanceMonitor:
 
             # Start monitoring tasks
             self.running = True
+            self.sampler.start()
             self.collection_task = asyncio.create_task(self._collect_metrics())
-            self.cleanup_task = asyncio.create_task(self._cleanup_old_metrics())
 
             logger.info("Performance monitor started")
 
@@ -108,16 +219,11 @@ class PerformanceMonitor:
     async def stop(self):
         """Stop performance monitoring"""
         self.running = False
+        self.sampler.stop()
 
         if self.collection_task:
             self.collection_task.cancel()
-        if self.cleanup_task:
-            self.cleanup_task.cancel()
-
-        if self.collection_task or self.cleanup_task:
-            await asyncio.gather(
-                self.collection_task, self.cleanup_task, return_exceptions=True
-            )
+            await asyncio.gather(self.collection_task, return_exceptions=True)
 
         if self.redis:
             await self.redis.close()
@@ -137,20 +243,27 @@ class PerformanceMonitor:
         metadata: dict[str, Any] = None,
     ):
         """Record a performance metric"""
-        metric = PerformanceMetric(
-            timestamp=datetime.utcnow(),
-            metric_type=metric_type,
-            value=value,
-            unit=unit,
-            tags=tags or {},
-            metadata=metadata or {},
+        await self.record_metrics(
+            [
+                PerformanceMetric(
+                    timestamp=datetime.utcnow(),
+                    metric_type=metric_type,
+                    value=value,
+                    unit=unit,
+                    tags=tags or {},
+                    metadata=metadata or {},
+                )
+            ]
         )
 
-        # Add to buffer
-        self.metrics_buffer.append(metric)
+    async def record_metrics(self, metrics: list[PerformanceMetric]):
+        """Record several metrics, checking alerts and flushing once"""
+        self.metrics_buffer.extend(metrics)
 
-        # Check for alerts
-        await self._check_alerts(metric)
+        # Only metrics with thresholds can alert
+        for metric in metrics:
+            if metric.metric_type in self.alert_thresholds:
+                await self._check_alerts(metric)
 
         # Store in Redis if buffer is full
         if len(self.metrics_buffer) >= 100:
@@ -160,33 +273,57 @@ class PerformanceMonitor:
         self, method: str, path: str, status_code: int, duration: float
     ):
         """Record HTTP request metrics"""
+        self.observe_request(method, path, status_code, duration)
+
+    def observe_request(
+        self, method: str, path: str, status_code: int, duration: float
+    ) -> None:
+        """Record HTTP request metrics without awaiting.
+
+        Called for every request by the instrumentation middleware, so it
+        only updates counters and buffers the duration; a full buffer is
+        flushed by a background task.
+        """
         self.request_count += 1
         self.response_times.append(duration)
 
         if status_code >= 400:
             self.error_count += 1
 
-        await self.record_metric(
-            "http_request_duration",
-            duration,
-            "seconds",
-            {
+        metric = PerformanceMetric(
+            timestamp=datetime.utcnow(),
+            metric_type="http_request_duration",
+            value=duration,
+            unit="seconds",
+            tags={
                 "method": method,
                 "path": path,
                 "status_code": str(status_code),
             },
+            metadata={},
         )
+        self.metrics_buffer.append(metric)
+        if "http_request_duration" in self.alert_thresholds:
+            self._spawn(self._check_alerts(metric))
+        if (
+            self.running
+            and len(self.metrics_buffer) >= 100
+            and self._flush_task is None
+        ):
+            self._flush_task = self._spawn(self._flush_metrics())
+            if self._flush_task is not None:
+                self._flush_task.add_done_callback(self._flush_done)
+
+    def _spawn(self, coroutine) -> asyncio.Task | None:
+        """Run a coroutine in the background if a loop is running"""
+        try:
+            return asyncio.get_running_loop().create_task(coroutine)
+        except RuntimeError:
+            coroutine.close()
+            return None
 
-        await self.record_metric(
-            "http_requests_total",
-            1,
-            "requests",
-            {
-                "method": method,
-                "path": path,
-                "status_code": str(status_code),
-            },
-        )
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self._flush_task = None
 
     async def record_database_query(self, query_type: str, table: str, duration: float):
         """Record database query metrics"""
@@ -235,109 +372,89 @@ class PerformanceMonitor:
         )
 
     async def _collect_metrics(self):
-        """Collect system metrics periodically"""
+        """Record the sampler's latest snapshot periodically"""
         while self.running:
             try:
-                # CPU usage
-                cpu_percent = psutil.cpu_percent(interval=1)
-                self.cpu_usage.append(cpu_percent)
-                await self.record_metric("cpu_usage", cpu_percent, "percent")
-
-                # Memory usage
-                memory = psutil.virtual_memory()
-                memory_percent = memory.percent
-                self.memory_usage.append(memory_percent)
-                await self.record_metric("memory_usage", memory_percent, "percent")
-                await self.record_metric("memory_available", memory.available, "bytes")
-
-                # Disk usage
-                disk = psutil.disk_usage("/")
-                disk_percent = (disk.used / disk.total) * 100
-                self.disk_usage.append(disk_percent)
-                await self.record_metric("disk_usage", disk_percent, "percent")
-                await self.record_metric("disk_available", disk.free, "bytes")
-
-                # Network I/O
-                network = psutil.net_io_counters()
-                await self.record_metric(
-                    "network_bytes_sent", network.bytes_sent, "bytes"
-                )
-                await self.record_metric(
-                    "network_bytes_recv", network.bytes_recv, "bytes"
-                )
-
-                # Application metrics
-                if self.response_times:
-                    avg_response_time = sum(self.response_times) / len(
-                        self.response_times
-                    )
-                    await self.record_metric(
-                        "avg_response_time", avg_response_time, "seconds"
-                    )
-
-                await self.record_metric(
-                    "request_count", self.request_count, "requests"
-                )
-                await self.record_metric("error_count", self.error_count, "errors")
-
-                if self.request_count > 0:
-                    error_rate = (self.error_count / self.request_count) * 100
-                    await self.record_metric("error_rate", error_rate, "percent")
-
                 await asyncio.sleep(self.collection_interval)
+                await self.record_metrics(self._snapshot_metrics())
 
+            except asyncio.CancelledError:
+                break
             except Exception as e:
                 logger.error(f"Error collecting metrics: {e}")
-                await asyncio.sleep(self.collection_interval)
+
+    def _snapshot_metrics(self) -> list[PerformanceMetric]:
+        """Metrics from the latest system snapshot plus application counters"""
+        now = datetime.utcnow()
+        values: list[tuple[str, float, str]] = []
+
+        snapshot = self.sampler.snapshot
+        if snapshot is not None and snapshot is not self._last_snapshot:
+            self._last_snapshot = snapshot
+            self.cpu_usage.append(snapshot.cpu_percent)
+            self.memory_usage.append(snapshot.memory_percent)
+            self.disk_usage.append(snapshot.disk_percent)
+            self.network_io.append(
+                (snapshot.network_send_rate, snapshot.network_recv_rate)
+            )
+            values += [
+                ("cpu_usage", snapshot.cpu_percent, "percent"),
+                ("memory_usage", snapshot.memory_percent, "percent"),
+                ("memory_available", snapshot.memory_available, "bytes"),
+                ("disk_usage", snapshot.disk_percent, "percent"),
+                ("disk_available", snapshot.disk_available, "bytes"),
+                ("network_bytes_sent", snapshot.network_bytes_sent, "bytes"),
+                ("network_bytes_recv", snapshot.network_bytes_recv, "bytes"),
+                ("network_send_rate", snapshot.network_send_rate, "bytes/s"),
+                ("network_recv_rate", snapshot.network_recv_rate, "bytes/s"),
+                ("process_cpu_usage", snapshot.process_cpu_percent, "percent"),
+                ("process_rss", snapshot.process_rss, "bytes"),
+                ("process_open_fds", snapshot.process_open_fds, "fds"),
+                ("process_threads", snapshot.process_threads, "threads"),
+            ]
+
+        # Application metrics
+        if self.response_times:
+            values.append(
+                (
+                    "avg_response_time",
+                    sum(self.response_times) / len(self.response_times),
+                    "seconds",
+                )
+            )
+        values.append(("request_count", self.request_count, "requests"))
+        values.append(("error_count", self.error_count, "errors"))
+        if self.request_count > 0:
+            values.append(
+                ("error_rate", (self.error_count / self.request_count) * 100, "percent")
+            )
+
+        return [
+            PerformanceMetric(
+                timestamp=now,
+                metric_type=metric_type,
+                value=value,
+                unit=unit,
+                tags={},
+                metadata={},
+            )
+            for metric_type, value, unit in values
+        ]
 
     async def _flush_metrics(self):
-        """Flush metrics buffer to Redis"""
+        """Flush metrics buffer to the bucketed metric store"""
         if not self.metrics_buffer:
             return
 
-        try:
-            metrics_data = []
-            for metric in self.metrics_buffer:
-                metrics_data.append(metric.to_dict())
-
-            # Store in Redis with timestamp-based key
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            key = f"metrics:{timestamp}"
-
-            await self.redis.setex(
-                key,
-                self.retention_days * 24 * 3600,  # TTL in seconds
-                json.dumps(metrics_data),
-            )
-
-            # Clear buffer
-            self.metrics_buffer.clear()
+        # Take the buffer first, so a failing write cannot keep it full
+        metrics = list(self.metrics_buffer)
+        self.metrics_buffer.clear()
 
+        try:
+            await self.store.write(self.redis, metrics)
         except Exception as e:
             logger.error(f"Error flushing metrics: {e}")
 
-    async def _cleanup_old_metrics(self):
-        """Clean up old metrics data"""
-        while self.running:
-            try:
-                # Get all metric keys
-                keys = await self.redis.keys("metrics:*")
-
-                cutoff_time = datetime.utcnow() - timedelta(days=self.retention_days)
-                cutoff_timestamp = cutoff_time.strftime("%Y%m%d_%H%M%S")
-
-                # Delete old metrics
-                for key in keys:
-                    timestamp_str = key.split(":")[1]
-                    if timestamp_str < cutoff_timestamp:
-                        await self.redis.delete(key)
-
-                await asyncio.sleep(3600)  # Run cleanup every hour
-
-            except Exception as e:
-                logger.error(f"Error cleaning up metrics: {e}")
-                await asyncio.sleep(3600)
-
     async def _check_alerts(self, metric: PerformanceMetric):
         """Check if metric triggers any alerts"""
         thresholds = self.alert_thresholds.get(metric.metric_type, {})
@@ -380,36 +497,67 @@ class PerformanceMonitor:
         start_time: datetime = None,
         end_time: datetime = None,
         limit: int = 100,
+        resolution: str = None,
     ) -> list[PerformanceMetric]:
-        """Get metrics from storage"""
+        """Get the latest ``limit`` metrics in a time range, oldest first.
+
+        ``resolution`` is "raw", "1m" or "1h"; by default the finest one
+        still retained at ``start_time``. Rollup points carry the average as
+        their value and count/min/max in their metadata.
+        """
         try:
             if not start_time:
                 start_time = datetime.utcnow() - timedelta(hours=1)
             if not end_time:
                 end_time = datetime.utcnow()
+            start, end = to_epoch(start_time), to_epoch(end_time)
 
-            # Get metric keys in time range
-            start_timestamp = start_time.strftime("%Y%m%d_%H%M%S")
-            end_timestamp = end_time.strftime("%Y%m%d_%H%M%S")
+            if resolution is None:
+                tier = self.store.resolution_for(start)
+            else:
+                tier = next(r for r in self.store.resolutions if r.name == resolution)
 
-            keys = await self.redis.keys("metrics:*")
-            filtered_keys = [
-                key
-                for key in keys
-                if start_timestamp <= key.split(":")[1] <= end_timestamp
-            ]
+            units = await self.store.metric_names(self.redis)
+            names = [metric_type] if metric_type else sorted(units)
 
             metrics = []
-            for key in filtered_keys[:limit]:
-                data = await self.redis.get(key)
-                if data:
-                    metrics_data = json.loads(data)
-                    for metric_data in metrics_data:
-                        if not metric_type or metric_data["metric_type"] == metric_type:
-                            metric = PerformanceMetric(**metric_data)
-                            metrics.append(metric)
+            for name in names:
+                unit = units.get(name, "")
+                if tier is RAW:
+                    for ts, value, tags in await self.store.query_raw(
+                        self.redis, name, start, end
+                    ):
+                        metrics.append(
+                            PerformanceMetric(
+                                timestamp=from_epoch(ts),
+                                metric_type=name,
+                                value=value,
+                                unit=unit,
+                                tags=tags,
+                                metadata={},
+                            )
+                        )
+                    continue
+                for rollup in await self.store.query_rollups(
+                    self.redis, name, start, end, tier
+                ):
+                    metrics.append(
+                        PerformanceMetric(
+                            timestamp=from_epoch(rollup.timestamp),
+                            metric_type=name,
+                            value=rollup.avg,
+                            unit=unit,
+                            tags={"resolution": tier.name},
+                            metadata={
+                                "count": rollup.count,
+                                "min": rollup.min,
+                                "max": rollup.max,
+                            },
+                        )
+                    )
 
-            return sorted(metrics, key=lambda x: x.timestamp)
+            metrics.sort(key=lambda x: x.timestamp)
+            return metrics[-limit:] if limit else metrics
 
         except Exception as e:
             logger.error(f"Error getting metrics: {e}")
@@ -486,6 +634,15 @@ class PerformanceMonitor:
         if self.disk_usage:
             summary["disk_usage"] = self.disk_usage[-1]
 
+        snapshot = self.sampler.snapshot
+        if snapshot is not None:
+            summary["process"] = {
+                "cpu_usage": snapshot.process_cpu_percent,
+                "rss_bytes": snapshot.process_rss,
+                "open_fds": snapshot.process_open_fds,
+                "threads": snapshot.process_threads,
+            }
+
         return summary
 
     async def get_optimization_recommendations(self) -> list[dict[str, Any]]:
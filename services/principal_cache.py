@@ -0,0 +1,155 @@
+"""
+Principal Cache for Authenticated Requests
+- In-process TTL + LRU tier for hot principals
+- Redis-backed second tier shared across workers
+- Explicit invalidation on user changes, broadcast to every worker
+- Hit/miss counters exported to Prometheus
+"""
+
+import logging
+from typing import Any
+
+from services.prometheus_integration import get_prometheus_service
+from services.redis_cache import EnhancedRedisCache, LocalCache, enhanced_cache
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """Two-tier cache of authenticated principals keyed by token subject.
+
+    The local tier is registered with the Redis cache, so deleting a
+    principal there evicts it from every worker's local tier through the
+    cache invalidation channel. The short local TTL bounds staleness if an
+    invalidation message is missed.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        local_ttl: int = 30,
+        redis_ttl: int = 300,
+        cache: EnhancedRedisCache | None = None,
+    ):
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.cache = cache or enhanced_cache
+
+        # Keyed like the Redis tier: principal:{subject} -> principal
+        self._entries = LocalCache(max_size, local_ttl)
+        # principal_subject:{user_id} -> subject, so invalidation by id can
+        # find the cached entry
+        self._subjects = LocalCache(max_size, local_ttl)
+        self.cache.add_local_tier(self._entries)
+        self.cache.add_local_tier(self._subjects)
+
+        self.metrics = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+        }
+
+    def _record(self, tier: str, result: str) -> None:
+        """Export a lookup outcome to Prometheus"""
+        get_prometheus_service().record_principal_cache_lookup(tier, result)
+
+    def _get_local(self, subject: str) -> dict[str, Any] | None:
+        """Get principal from the in-process tier"""
+        return self._entries.get(self.cache.key("principal", subject))
+
+    def _set_local(self, subject: str, principal: dict[str, Any]) -> None:
+        """Store principal in the in-process tier"""
+        self._entries.set(self.cache.key("principal", subject), principal)
+        self._subjects.set(
+            self.cache.key("principal_subject", str(principal["id"])), subject
+        )
+
+    def _evict(self, subject: str) -> None:
+        """Remove a subject from the in-process tier"""
+        self._entries.delete(self.cache.key("principal", subject))
+
+    async def get(self, subject: str) -> dict[str, Any] | None:
+        """Get a cached principal, checking the local tier before Redis"""
+        principal = self._get_local(subject)
+        if principal is not None:
+            self.metrics["local_hits"] += 1
+            self._record("local", "hit")
+            return principal
+
+        principal = await self.cache.get("principal", subject)
+        if principal is not None:
+            self.metrics["redis_hits"] += 1
+            self._record("redis", "hit")
+            self._set_local(subject, principal)
+            return principal
+
+        self.metrics["misses"] += 1
+        self._record("redis", "miss")
+        return None
+
+    async def set(self, subject: str, principal: dict[str, Any]) -> None:
+        """Cache a principal in both tiers"""
+        # Written to Redis first: the write evicts stale local copies everywhere
+        await self.cache.set("principal", principal, self.redis_ttl, subject)
+        await self.cache.set(
+            "principal_subject", subject, self.redis_ttl, str(principal["id"])
+        )
+        self._set_local(subject, principal)
+
+    async def invalidate_subject(self, subject: str) -> None:
+        """Invalidate a principal by token subject"""
+        self._evict(subject)
+        await self.cache.delete("principal", subject)
+        self.metrics["invalidations"] += 1
+
+    async def invalidate_user(self, user_id: str) -> None:
+        """Invalidate a principal by user id (used when a user record changes).
+
+        Other workers drop their local copies when the Redis deletes are
+        broadcast on the cache invalidation channel.
+        """
+        user_id = str(user_id)
+        subject_key = self.cache.key("principal_subject", user_id)
+        subject = self._subjects.get(subject_key)
+        if subject is None:
+            subject = await self.cache.get("principal_subject", user_id)
+
+        if subject is not None:
+            self._evict(subject)
+            await self.cache.delete("principal", subject)
+
+        self._subjects.delete(subject_key)
+        await self.cache.delete("principal_subject", user_id)
+        self.metrics["invalidations"] += 1
+        logger.debug(f"Invalidated cached principal for user {user_id}")
+
+    def clear(self) -> None:
+        """Clear the in-process tier"""
+        self._entries.clear()
+        self._subjects.clear()
+
+    def get_metrics(self) -> dict[str, Any]:
+        """Get principal cache metrics"""
+        lookups = (
+            self.metrics["local_hits"]
+            + self.metrics["redis_hits"]
+            + self.metrics["misses"]
+        )
+        hits = self.metrics["local_hits"] + self.metrics["redis_hits"]
+
+        return {
+            **self.metrics,
+            "local_size": len(self._entries),
+            "hit_rate": hits / lookups if lookups else 0,
+        }
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache()
+
+
+def get_principal_cache() -> PrincipalCache:
+    """Get the global principal cache instance."""
+    return principal_cache
@@ -3,9 +3,8 @@ Prometheus integration for metrics collection and monitoring.
 """
 
 import logging
-import time
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from prometheus_client import (
     Counter,
     Gauge,
@@ -16,6 +15,7 @@ from prometheus_client import (
 from prometheus_fastapi_instrumentator import Instrumentator, metrics
 
 from config.monitoring import monitoring_config
+from services.cardinality import OTHER_LABEL, SeriesBudget, UserLabelGuard
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +33,12 @@ class PrometheusService:
             ["method", "endpoint", "status", "user_id"]
         )
 
+        self.series_overflow_total = Counter(
+            "prometheus_series_overflow_total",
+            "Observations dropped because the per-user series budget was spent",
+            ["metric"]
+        )
+
         self.http_request_duration_seconds = Histogram(
             "http_request_duration_seconds",
             "HTTP request duration in seconds",
@@ -66,6 +72,32 @@ class PrometheusService:
             ["provider", "task_type", "user_id"]
         )
 
+        self.ai_provider_latency_seconds = Histogram(
+            "ai_provider_latency_seconds",
+            "Latency of successful calls to a single AI provider in seconds",
+            ["provider"],
+            buckets=[0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+        )
+
+        self.ai_hedged_requests_total = Counter(
+            "ai_hedged_requests_total",
+            "Total hedged AI provider requests",
+            ["provider", "outcome"]
+        )
+
+        self.ai_time_to_first_token = Histogram(
+            "ai_time_to_first_token_seconds",
+            "Time from sending a streaming AI request to its first token",
+            ["provider"],
+            buckets=[0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0]
+        )
+
+        self.ai_provider_circuit_state = Gauge(
+            "ai_provider_circuit_state",
+            "AI provider circuit breaker state (0=closed, 1=half-open, 2=open)",
+            ["provider"]
+        )
+
         # Database Metrics
         self.db_operations_total = Counter(
             "db_operations_total",
@@ -87,6 +119,12 @@ class PrometheusService:
             ["operation", "status"]
         )
 
+        self.principal_cache_lookups_total = Counter(
+            "principal_cache_lookups_total",
+            "Total authenticated principal cache lookups",
+            ["tier", "result"]
+        )
+
         self.cache_hit_ratio = Gauge(
             "cache_hit_ratio",
             "Cache hit ratio",
@@ -168,6 +206,78 @@ class PrometheusService:
             ["queue_name", "status"]
         )
 
+        # Labelled by plan rather than tenant to keep cardinality bounded
+        self.task_queue_wait_seconds = Histogram(
+            "background_task_queue_wait_seconds",
+            "Time background tasks waited in the fair queue",
+            ["plan"],
+            buckets=[0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0]
+        )
+
+        self.task_queue_head_wait_seconds = Gauge(
+            "background_task_queue_head_wait_seconds",
+            "Longest wait of any tenant's next task, per plan",
+            ["plan"]
+        )
+
+        # Per tenant for the tenants with the oldest queues only; the rest
+        # share "other", which holds the oldest among them
+        self.task_queue_tenant_age_seconds = Gauge(
+            "background_task_queue_tenant_age_seconds",
+            "Age of each tenant's oldest queued task",
+            ["tenant"]
+        )
+        self._tenant_age_labels: set[str] = set()
+
+        # Worker autoscaling: the local worker limit, and the replica count
+        # the shared backlog calls for (aggregate with max across replicas)
+        self.task_workers = Gauge(
+            "background_task_workers",
+            "Worker coroutines the autoscaler allows on this replica"
+        )
+
+        self.task_desired_replicas = Gauge(
+            "background_task_desired_replicas",
+            "Worker replicas needed to drain the task backlog within the target wait"
+        )
+
+        self.task_admissions_total = Counter(
+            "background_task_admissions_total",
+            "Enqueue admission decisions",
+            ["decision"]
+        )
+
+        # user_id labels: top K users by volume, the rest as "other", and
+        # one series budget across all of them
+        self.series_budget = SeriesBudget(monitoring_config.PROMETHEUS_MAX_USER_SERIES)
+        top_users = monitoring_config.PROMETHEUS_TOP_USERS
+        self.user_labels = {
+            name: UserLabelGuard(
+                metric,
+                labelnames,
+                self.series_budget,
+                k=top_users,
+                on_overflow=self._record_overflow,
+            )
+            for name, metric, labelnames in [
+                ("http_requests", self.http_requests_total,
+                 ["method", "endpoint", "status", "user_id"]),
+                ("ai_requests", self.ai_requests_total,
+                 ["provider", "task_type", "status", "user_id"]),
+                ("ai_tokens", self.ai_tokens_used_total,
+                 ["provider", "task_type", "token_type", "user_id"]),
+                ("ai_cost", self.ai_cost_total,
+                 ["provider", "task_type", "user_id"]),
+            ]
+        }
+
+    def _record_overflow(self, metric: str) -> None:
+        self.series_overflow_total.labels(metric=metric).inc()
+
+    def get_top_users(self, dimension: str = "ai_cost", limit: int = 20) -> list[dict]:
+        """Heaviest users by requests, tokens or cost, from bounded trackers."""
+        return self.user_labels[dimension].top_users(limit)
+
     def initialize(self, app: FastAPI) -> None:
         """Initialize Prometheus monitoring for FastAPI application."""
         try:
@@ -229,12 +339,11 @@ class PrometheusService:
             return
 
         try:
-            self.http_requests_total.labels(
-                method=method,
-                endpoint=endpoint,
-                status=status,
-                user_id=user_id or "anonymous"
-            ).inc()
+            requests = self.user_labels["http_requests"].labels(
+                user_id, method=method, endpoint=endpoint, status=status
+            )
+            if requests is not None:
+                requests.inc()
 
             self.http_request_duration_seconds.labels(
                 method=method,
@@ -251,12 +360,11 @@ class PrometheusService:
             return
 
         try:
-            self.ai_requests_total.labels(
-                provider=provider,
-                task_type=task_type,
-                status=status,
-                user_id=user_id or "anonymous"
-            ).inc()
+            requests = self.user_labels["ai_requests"].labels(
+                user_id, provider=provider, task_type=task_type, status=status
+            )
+            if requests is not None:
+                requests.inc()
 
             self.ai_request_duration_seconds.labels(
                 provider=provider,
@@ -272,12 +380,15 @@ class PrometheusService:
             return
 
         try:
-            self.ai_tokens_used_total.labels(
+            used = self.user_labels["ai_tokens"].labels(
+                user_id,
+                tokens,
                 provider=provider,
                 task_type=task_type,
                 token_type=token_type,
-                user_id=user_id or "anonymous"
-            ).inc(tokens)
+            )
+            if used is not None:
+                used.inc(tokens)
 
         except Exception as e:
             logger.error(f"Failed to record AI token metrics: {e}")
@@ -288,15 +399,62 @@ class PrometheusService:
             return
 
         try:
-            self.ai_cost_total.labels(
-                provider=provider,
-                task_type=task_type,
-                user_id=user_id or "anonymous"
-            ).inc(cost)
+            spent = self.user_labels["ai_cost"].labels(
+                user_id, cost, provider=provider, task_type=task_type
+            )
+            if spent is not None:
+                spent.inc(cost)
 
         except Exception as e:
             logger.error(f"Failed to record AI cost metrics: {e}")
 
+    def record_ai_provider_latency(self, provider: str, duration: float) -> None:
+        """Record latency of a single AI provider call."""
+        if not self.initialized:
+            return
+
+        try:
+            self.ai_provider_latency_seconds.labels(provider=provider).observe(duration)
+
+        except Exception as e:
+            logger.error(f"Failed to record AI provider latency metric: {e}")
+
+    def record_ai_hedge(self, provider: str, outcome: str) -> None:
+        """Record a hedged AI provider request."""
+        if not self.initialized:
+            return
+
+        try:
+            self.ai_hedged_requests_total.labels(
+                provider=provider,
+                outcome=outcome
+            ).inc()
+
+        except Exception as e:
+            logger.error(f"Failed to record AI hedge metric: {e}")
+
+    def record_ai_time_to_first_token(self, provider: str, duration: float) -> None:
+        """Record time to first token of a streamed AI response."""
+        if not self.initialized:
+            return
+
+        try:
+            self.ai_time_to_first_token.labels(provider=provider).observe(duration)
+
+        except Exception as e:
+            logger.error(f"Failed to record AI time to first token metric: {e}")
+
+    def set_ai_provider_circuit_state(self, provider: str, state: int) -> None:
+        """Set AI provider circuit breaker state metric."""
+        if not self.initialized:
+            return
+
+        try:
+            self.ai_provider_circuit_state.labels(provider=provider).set(state)
+
+        except Exception as e:
+            logger.error(f"Failed to set AI provider circuit state metric: {e}")
+
     def record_db_operation(self, operation: str, table: str, status: str, duration: float) -> None:
         """Record database operation metrics."""
         if not self.initialized:
@@ -331,6 +489,20 @@ class PrometheusService:
         except Exception as e:
             logger.error(f"Failed to record cache operation metrics: {e}")
 
+    def record_principal_cache_lookup(self, tier: str, result: str) -> None:
+        """Record principal cache lookup metric."""
+        if not self.initialized:
+            return
+
+        try:
+            self.principal_cache_lookups_total.labels(
+                tier=tier,
+                result=result
+            ).inc()
+
+        except Exception as e:
+            logger.error(f"Failed to record principal cache metric: {e}")
+
     def set_cache_hit_ratio(self, cache_type: str, ratio: float) -> None:
         """Set cache hit ratio metric."""
         if not self.initialized:
@@ -448,6 +620,73 @@ class PrometheusService:
         except Exception as e:
             logger.error(f"Failed to record queue processing metric: {e}")
 
+    def record_task_queue_wait(self, plan: str, wait: float) -> None:
+        """Record how long a task waited in the fair queue."""
+        if not self.initialized:
+            return
+
+        try:
+            self.task_queue_wait_seconds.labels(plan=plan).observe(wait)
+
+        except Exception as e:
+            logger.error(f"Failed to record task queue wait metric: {e}")
+
+    def set_task_queue_head_wait(self, plan: str, wait: float) -> None:
+        """Set the longest head-of-queue wait among a plan's tenants."""
+        if not self.initialized:
+            return
+
+        try:
+            self.task_queue_head_wait_seconds.labels(plan=plan).set(wait)
+
+        except Exception as e:
+            logger.error(f"Failed to set task queue head wait metric: {e}")
+
+    def set_task_queue_tenant_ages(self, ages: dict[str, float]) -> None:
+        """Export queue age for the top K tenants by age, the rest as "other"."""
+        if not self.initialized:
+            return
+
+        try:
+            ranked = sorted(ages.items(), key=lambda item: item[1], reverse=True)
+            top = ranked[:monitoring_config.PROMETHEUS_TOP_USERS]
+            labels = dict(top)
+            rest = ranked[len(top):]
+            if rest:
+                labels[OTHER_LABEL] = rest[0][1]
+
+            for tenant in self._tenant_age_labels - labels.keys():
+                self.task_queue_tenant_age_seconds.remove(tenant)
+            for tenant, age in labels.items():
+                self.task_queue_tenant_age_seconds.labels(tenant=tenant).set(age)
+            self._tenant_age_labels = set(labels)
+
+        except Exception as e:
+            logger.error(f"Failed to set task queue tenant age metric: {e}")
+
+    def set_task_scaling(self, workers: int, desired_replicas: int) -> None:
+        """Set the worker limit and desired replica count."""
+        if not self.initialized:
+            return
+
+        try:
+            self.task_workers.set(workers)
+            self.task_desired_replicas.set(desired_replicas)
+
+        except Exception as e:
+            logger.error(f"Failed to set task scaling metrics: {e}")
+
+    def record_task_admission(self, decision: str) -> None:
+        """Record an enqueue admission decision."""
+        if not self.initialized:
+            return
+
+        try:
+            self.task_admissions_total.labels(decision=decision).inc()
+
+        except Exception as e:
+            logger.error(f"Failed to record task admission metric: {e}")
+
     def get_metrics(self) -> str:
         """Get Prometheus metrics as string."""
         try:
@@ -464,46 +703,3 @@ prometheus_service = PrometheusService()
 def get_prometheus_service() -> PrometheusService:
     """Get the global Prometheus service instance."""
     return prometheus_service
-
-
-def setup_prometheus_middleware(app: FastAPI) -> None:
-    """Setup Prometheus middleware for FastAPI application."""
-    @app.middleware("http")
-    async def prometheus_middleware(request: Request, call_next):
-        """Prometheus middleware for request tracking."""
-        start_time = time.time()
-
-        try:
-            response = await call_next(request)
-            duration = time.time() - start_time
-
-            # Record metrics
-            prometheus_service.record_http_request(
-                method=request.method,
-                endpoint=request.url.path,
-                status=response.status_code,
-                duration=duration,
-                user_id=getattr(request.state, "user_id", None)
-            )
-
-            return response
-
-        except Exception as exc:
-            duration = time.time() - start_time
-
-            # Record error metrics
-            prometheus_service.record_http_request(
-                method=request.method,
-                endpoint=request.url.path,
-                status=500,
-                duration=duration,
-                user_id=getattr(request.state, "user_id", None)
-            )
-
-            prometheus_service.record_error(
-                error_type=exc.__class__.__name__,
-                endpoint=request.url.path,
-                severity="high"
-            )
-
-            raise
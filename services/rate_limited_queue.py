@@ -1,38 +1,177 @@
 """
 Rate-limited queue service for API calls.
+- Keeps up to max_in_flight requests running at once
+- Requests/sec and tokens/minute enforced by a token bucket shared through Redis
+- Retry-After on 429/503 pauses the service for every replica
+- Interactive requests are dispatched ahead of background ones
 """
 
 import asyncio
 import logging
+import time
+from collections import deque
 from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from enum import Enum
 from typing import Any
 
 import httpx
 
-from .redis_client import get_redis_client
+from .http_pool import get_http_pool
+from .redis_cache import enhanced_cache
 
 logger = logging.getLogger(__name__)
 
+# Refill and draw from several token buckets kept in one hash, all or nothing.
+# Time comes from the Redis server clock, so replicas whose clocks disagree
+# still refill the same buckets at the same rate.
+# KEYS[1]: bucket hash, KEYS[2]: "retry after" key, present while paused
+# ARGV: (capacity, refill per second, cost) per bucket
+# Returns seconds to wait before retrying, as a string; "0" if granted
+TOKEN_BUCKET_LUA = """
+local paused_ms = redis.call('PTTL', KEYS[2])
+if paused_ms > 0 then
+    return tostring(paused_ms / 1000)
+end
+
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local buckets = #ARGV / 3
+local levels = {}
+local wait = 0
+local ttl = 1
+for i = 1, buckets do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local cost = tonumber(ARGV[i * 3])
+    local level = tonumber(redis.call('HGET', KEYS[1], 'level' .. i) or capacity)
+    local updated = tonumber(redis.call('HGET', KEYS[1], 'updated' .. i) or now)
+    level = math.min(capacity, level + math.max(0, now - updated) * rate)
+    levels[i] = level
+    if level < cost then
+        wait = math.max(wait, (cost - level) / rate)
+    end
+    ttl = math.max(ttl, math.ceil(capacity / rate))
+end
+
+if wait == 0 then
+    for i = 1, buckets do
+        levels[i] = levels[i] - tonumber(ARGV[i * 3])
+    end
+end
+for i = 1, buckets do
+    redis.call('HSET', KEYS[1], 'level' .. i, levels[i], 'updated' .. i, now)
+end
+redis.call('EXPIRE', KEYS[1], ttl + 1)
+return tostring(wait)
+"""
+
+
+class QueueStoppedError(RuntimeError):
+    """Set on requests still queued when their queue is stopped"""
+
+
+class RequestLane(str, Enum):
+    """Dispatch lane; interactive requests always go first"""
+
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+
+
+class LocalTokenBucket:
+    """In-process fallback for TOKEN_BUCKET_LUA while Redis is unavailable"""
+
+    def __init__(self):
+        self.levels: dict[int, tuple[float, float]] = {}
+        self.paused_until = 0.0
+
+    def acquire(self, now: float, buckets: list[tuple[float, float, float]]) -> float:
+        if self.paused_until > now:
+            return self.paused_until - now
+
+        levels = []
+        wait = 0.0
+        for i, (capacity, rate, cost) in enumerate(buckets):
+            level, updated = self.levels.get(i, (capacity, now))
+            level = min(capacity, level + max(0.0, now - updated) * rate)
+            levels.append(level)
+            if level < cost:
+                wait = max(wait, (cost - level) / rate)
+
+        for i, (_, _, cost) in enumerate(buckets):
+            self.levels[i] = (levels[i] - (cost if wait == 0 else 0), now)
+        return wait
 
-class RateLimitedQueue:
-    """Rate-limited queue for API calls with exponential back-off."""
 
-    def __init__(self, service_name: str, rate_limit: int = 3):
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delay or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitedQueue:
+    """Rate-limited queue for API calls.
+
+    A dispatcher admits requests as long as fewer than ``max_in_flight`` are
+    running and the service's token buckets allow it, so throughput is set
+    by the provider quota rather than by response latency. The buckets live
+    in Redis, so the limits hold across replicas.
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        rate_limit: int = 3,
+        tokens_per_minute: int | None = None,
+        max_in_flight: int = 8,
+        max_retries: int = 5,
+    ):
         """
         Initialize rate-limited queue.
 
         Args:
             service_name: Name of the service (e.g., 'openai', 'notion')
-            rate_limit: Requests per second
+            rate_limit: Requests per second (also the burst size)
+            tokens_per_minute: Model tokens per minute, if the provider meters them
+            max_in_flight: Requests allowed to run concurrently
+            max_retries: Retries of a request answered with 429 or 503
         """
         self.service_name = service_name
         self.rate_limit = rate_limit
-        self.redis_client = get_redis_client()
-        self.queue = asyncio.Queue()
+        self.tokens_per_minute = tokens_per_minute
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+
+        self.lanes: dict[RequestLane, deque[dict[str, Any]]] = {
+            lane: deque() for lane in RequestLane
+        }
+        self._pending = asyncio.Semaphore(0)  # One permit per queued request
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._in_flight: set[asyncio.Task] = set()
+        self._dispatcher: asyncio.Task | None = None
         self._running = False
 
+        self.bucket_key = f"rate_limit:{service_name}:bucket"
+        self.retry_after_key = f"rate_limit:{service_name}:retry_after"
+        self._bucket_script = None
+        self._local_bucket = LocalTokenBucket()
+
     async def enqueue_request(
-        self, method: str, endpoint: str, api_key: str, **kwargs
+        self,
+        method: str,
+        endpoint: str,
+        api_key: str,
+        lane: RequestLane | str = RequestLane.INTERACTIVE,
+        tokens: int | None = None,
+        **kwargs,
     ) -> asyncio.Future:
         """
         Enqueue a request for processing.
@@ -41,13 +180,18 @@ class RateLimitedQueue:
             method: HTTP method
             endpoint: API endpoint
             api_key: API key for authentication
+            lane: "interactive" for user-facing calls, "background" otherwise
+            tokens: Model tokens the request will use; estimated if omitted
             **kwargs: Additional request parameters
 
         Returns:
             Future that will resolve with the response
         """
-        future = asyncio.Future()
-        await self.queue.put(
+        if not self._running:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self._put(
             {
                 "method": method,
                 "endpoint": endpoint,
@@ -55,43 +199,169 @@ class RateLimitedQueue:
                 "kwargs": kwargs,
                 "future": future,
                 "timestamp": datetime.now(UTC),
+                "lane": RequestLane(lane),
+                "tokens": tokens if tokens is not None else self._estimate_tokens(kwargs),
+                "attempt": 0,
             }
         )
         return future
 
-    async def _process_queue(self):
-        """Process the request queue with rate limiting."""
-        while self._running:
+    def _put(self, request_data: dict[str, Any], retry: bool = False) -> None:
+        lane = self.lanes[request_data["lane"]]
+        # Retries go to the front: they have already waited their turn
+        if retry:
+            lane.appendleft(request_data)
+        else:
+            lane.append(request_data)
+        self._pending.release()
+
+    def _next_request(self) -> dict[str, Any]:
+        for lane in RequestLane:
+            if self.lanes[lane]:
+                return self.lanes[lane].popleft()
+        raise RuntimeError("Dispatch permit without a queued request")
+
+    def _estimate_tokens(self, kwargs: dict[str, Any]) -> int:
+        """Rough token count of a completion request: ~4 characters per token"""
+        if not self.tokens_per_minute:
+            return 0
+        payload = kwargs.get("json") or {}
+        prompt = payload.get("messages") or payload.get("prompt") or ""
+        return len(str(prompt)) // 4 + int(payload.get("max_tokens") or 0)
+
+    def _buckets(self, tokens: int) -> list[tuple[float, float, float]]:
+        """(capacity, refill per second, cost) of each bucket a request draws on"""
+        buckets = [(self.rate_limit, self.rate_limit, 1)]
+        if self.tokens_per_minute:
+            # A request larger than the bucket could never run; let it drain the bucket
+            cost = min(tokens, self.tokens_per_minute)
+            buckets.append((self.tokens_per_minute, self.tokens_per_minute / 60, cost))
+        return buckets
+
+    async def _acquire_capacity(self, tokens: int) -> None:
+        """Wait until the token buckets admit one request of ``tokens`` tokens"""
+        buckets = self._buckets(tokens)
+        while True:
+            wait = await self._try_acquire(buckets)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def _try_acquire(self, buckets: list[tuple[float, float, float]]) -> float:
+        client = enhanced_cache.client
+        if client is not None and enhanced_cache.circuit_breaker.can_execute():
+            try:
+                if self._bucket_script is None:
+                    self._bucket_script = client.register_script(TOKEN_BUCKET_LUA)
+                wait = await self._bucket_script(
+                    keys=[self.bucket_key, self.retry_after_key],
+                    args=[value for bucket in buckets for value in bucket],
+                )
+                return float(wait)
+            except Exception as e:
+                logger.warning(
+                    f"Shared rate limit unavailable for {self.service_name}, "
+                    f"limiting locally: {e}"
+                )
+        return self._local_bucket.acquire(time.time(), buckets)
+
+    async def _pause(self, seconds: float) -> None:
+        """Hold back every replica's requests to this service"""
+        until = time.time() + seconds
+        self._local_bucket.paused_until = max(self._local_bucket.paused_until, until)
+        client = enhanced_cache.client
+        if client is not None and enhanced_cache.circuit_breaker.can_execute():
             try:
-                # Get next request from queue
-                request_data = await asyncio.wait_for(self.queue.get(), timeout=1.0)
-
-                # Use safe_call for rate limiting and back-off
-                result = await self.redis_client.safe_call(
-                    self.service_name,
-                    self._make_api_request,
-                    request_data["method"],
-                    request_data["endpoint"],
-                    request_data["api_key"],
-                    **request_data["kwargs"],
+                # The key's TTL is the pause, so no replica's clock is involved
+                await client.set(
+                    self.retry_after_key, 1, px=max(1, int(seconds * 1000))
                 )
+            except Exception as e:
+                logger.warning(f"Failed to share Retry-After for {self.service_name}: {e}")
 
-                # Set result on future
-                if not request_data["future"].done():
-                    request_data["future"].set_result(result)
+    async def _process_queue(self):
+        """Dispatch queued requests while capacity allows.
 
-            except TimeoutError:
-                continue
-            except Exception as e:
-                logger.error(f"Error processing request: {e}")
-                if not request_data["future"].done():
-                    request_data["future"].set_exception(e)
+        A failure dispatching one request fails that request only; if the
+        dispatcher exits anyway, ``_running`` is reset so the next enqueue
+        starts a new one.
+        """
+        try:
+            while self._running:
+                await self._pending.acquire()
+                request_data = self._next_request()
+                slot = False
+                try:
+                    await self._slots.acquire()
+                    slot = True
+                    await self._acquire_capacity(request_data["tokens"])
+                except asyncio.CancelledError:
+                    # Stopped while waiting; stop() fails what is still queued
+                    if slot:
+                        self._slots.release()
+                    self._put(request_data, retry=True)
+                    raise
+                except Exception as e:
+                    logger.error(f"Error dispatching {self.service_name} request: {e}")
+                    if slot:
+                        self._slots.release()
+                    if not request_data["future"].done():
+                        request_data["future"].set_exception(e)
+                    continue
+
+                task = asyncio.create_task(self._send(request_data))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+        finally:
+            self._running = False
+
+    async def _send(self, request_data: dict[str, Any]) -> None:
+        """Run one request, re-queueing it if the provider asks us to back off"""
+        future = request_data["future"]
+        try:
+            result = await self._make_api_request(
+                request_data["method"],
+                request_data["endpoint"],
+                request_data["api_key"],
+                **request_data["kwargs"],
+            )
+            status_code, headers = result["status_code"], result["headers"]
+        except httpx.HTTPStatusError as e:
+            result = e
+            status_code, headers = e.response.status_code, e.response.headers
+        except Exception as e:
+            logger.error(f"Error processing request: {e}")
+            if not future.done():
+                future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        if status_code in (429, 503) and request_data["attempt"] < self.max_retries:
+            request_data["attempt"] += 1
+            backoff = parse_retry_after(headers.get("retry-after"))
+            if backoff is None:
+                backoff = min(2 ** request_data["attempt"], 30)
+            logger.warning(
+                f"{status_code} from {self.service_name}, pausing {backoff:.1f}s "
+                f"(retry {request_data['attempt']}/{self.max_retries})"
+            )
+            await self._pause(backoff)
+            self._put(request_data, retry=True)
+            return
+
+        if future.done():
+            return
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
 
     async def _make_api_request(
         self, method: str, endpoint: str, api_key: str, **kwargs
     ) -> dict[str, Any]:
         """
-        Make the actual API request using httpx.
+        Make the actual API request over the shared httpx connection pool.
 
         Args:
             method: HTTP method (GET, POST, PUT, DELETE, etc.)
@@ -136,41 +406,42 @@ class RateLimitedQueue:
         full_url = f"{base_url}/{endpoint.lstrip('/')}"
 
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                logger.debug(f"Making {method} request to {full_url}")
-
-                response = await client.request(
-                    method=method.upper(),
-                    url=full_url,
-                    headers=headers,
-                    json=json_data,
-                    data=data,
-                    params=params,
-                )
+            client = get_http_pool().get_client(full_url)
+            logger.debug(f"Making {method} request to {full_url}")
+
+            response = await client.request(
+                method=method.upper(),
+                url=full_url,
+                headers=headers,
+                json=json_data,
+                data=data,
+                params=params,
+                timeout=timeout,
+            )
 
-                # Handle different response types
-                if response.headers.get("content-type", "").startswith(
-                    "application/json"
-                ):
-                    response_data = response.json()
-                else:
-                    response_data = {"content": response.text}
-
-                # Add metadata
-                result = {
-                    "data": response_data,
-                    "status_code": response.status_code,
-                    "headers": dict(response.headers),
-                    "url": str(response.url),
-                    "method": method.upper(),
-                }
-
-                # Log success
-                logger.info(
-                    f"API request successful: {method} {endpoint} -> {response.status_code}"
-                )
+            # Handle different response types
+            if response.headers.get("content-type", "").startswith(
+                "application/json"
+            ):
+                response_data = response.json()
+            else:
+                response_data = {"content": response.text}
+
+            # Add metadata
+            result = {
+                "data": response_data,
+                "status_code": response.status_code,
+                "headers": dict(response.headers),
+                "url": str(response.url),
+                "method": method.upper(),
+            }
 
-                return result
+            # Log success
+            logger.info(
+                f"API request successful: {method} {endpoint} -> {response.status_code}"
+            )
+
+            return result
 
         except httpx.HTTPStatusError as e:
             logger.error(
@@ -186,19 +457,53 @@ class RateLimitedQueue:
 
     async def start(self):
         """Start the queue processor."""
+        if self._running:
+            return
         self._running = True
-        asyncio.create_task(self._process_queue())
+        self._dispatcher = asyncio.create_task(self._process_queue())
         logger.info(f"Started rate-limited queue for {self.service_name}")
 
     async def stop(self):
-        """Stop the queue processor."""
+        """Stop the queue processor.
+
+        In-flight requests finish; requests still queued fail with
+        QueueStoppedError so no caller waits forever.
+        """
         self._running = False
-        logger.info(f"Stopped rate-limited queue for {self.service_name}")
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        if self._in_flight:
+            # May re-queue requests that were told to back off
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        stopped = 0
+        for lane in self.lanes.values():
+            while lane:
+                future = lane.popleft()["future"]
+                if not future.done():
+                    future.set_exception(
+                        QueueStoppedError(f"{self.service_name} queue stopped")
+                    )
+                    stopped += 1
+        self._pending = asyncio.Semaphore(0)
+        logger.info(
+            f"Stopped rate-limited queue for {self.service_name}"
+            + (f", failed {stopped} queued request(s)" if stopped else "")
+        )
+
+    def get_stats(self) -> dict[str, Any]:
+        """Queue depth per lane and requests in flight."""
+        return {
+            "queued": {lane.value: len(requests) for lane, requests in self.lanes.items()},
+            "in_flight": len(self._in_flight),
+            "max_in_flight": self.max_in_flight,
+        }
 
 
 # Global queue instances
 _openai_queue: RateLimitedQueue | None = None
-_notion_queue: RateLimitedQueue | None = None
 _stripe_queue: RateLimitedQueue | None = None
 
 
@@ -206,18 +511,10 @@ def get_openai_queue() -> RateLimitedQueue:
     """Get the OpenAI rate-limited queue."""
     global _openai_queue
     if _openai_queue is None:
-        _openai_queue = RateLimitedQueue("openai", rate_limit=3)
+        _openai_queue = RateLimitedQueue("openai", rate_limit=3, tokens_per_minute=90_000)
     return _openai_queue
 
 
-def get_notion_queue() -> RateLimitedQueue:
-    """Get the Notion rate-limited queue."""
-    global _notion_queue
-    if _notion_queue is None:
-        _notion_queue = RateLimitedQueue("notion", rate_limit=3)
-    return _notion_queue
-
-
 def get_stripe_queue() -> RateLimitedQueue:
     """Get the Stripe rate-limited queue."""
     global _stripe_queue
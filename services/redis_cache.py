@@ -6,13 +6,20 @@ Enhanced Redis Caching Service with Advanced Features
 - Automatic failover
 - Cache warming
 - Distributed locking
+- Tag-based invalidation (per-user / per-operation secondary indexes)
+- Optional in-process L1 tier with pub/sub invalidation across workers
+- Single-flight get_or_set to prevent cache stampedes
 """
 
 import asyncio
+import fnmatch
 import hashlib
+import inspect
 import json
 import logging
 import time
+import uuid
+from collections import OrderedDict
 from collections.abc import Callable
 from datetime import timedelta
 from functools import wraps
@@ -62,6 +69,55 @@ class RedisCircuitBreaker:
         return True  # HALF_OPEN
 
 
+class LocalCache:
+    """Bounded in-process LRU of decoded values with a short per-entry TTL"""
+
+    def __init__(self, max_size: int = 1000, ttl: float = 5.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        # key -> (expires_at, value)
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        """Get value if present and not expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Store value, evicting the least recently used entries when full"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Remove a key"""
+        self._entries.pop(key, None)
+
+    def delete_pattern(self, pattern: str) -> None:
+        """Remove keys matching a Redis-style glob pattern"""
+        for key in [k for k in self._entries if fnmatch.fnmatchcase(k, pattern)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class EnhancedRedisCache:
     """Enhanced Redis caching service with advanced features"""
 
@@ -74,6 +130,11 @@ class EnhancedRedisCache:
         socket_connect_timeout: int = 5,
         retry_on_timeout: bool = True,
         health_check_interval: int = 30,
+        legacy_scan_window: int = 7200,
+        delete_batch_size: int = 500,
+        l1_max_size: int = 0,
+        l1_ttl: float = 5.0,
+        invalidation_channel: str = "cache:invalidate",
     ):
         self.redis_url = redis_url or "redis://localhost:6379"
         self.max_connections = max_connections
@@ -82,6 +143,23 @@ class EnhancedRedisCache:
         self.socket_connect_timeout = socket_connect_timeout
         self.retry_on_timeout = retry_on_timeout
         self.health_check_interval = health_check_interval
+        self.delete_batch_size = delete_batch_size
+
+        # Entries written before tag indexes existed can only be found by SCAN.
+        # They expire within the longest TTL, so the fallback is time-bounded.
+        self.legacy_scan_until = time.time() + legacy_scan_window
+
+        # Optional L1 tier of decoded values; disabled when l1_max_size is 0.
+        # Entries are shared objects, so callers must not mutate cached values.
+        self.l1 = LocalCache(l1_max_size, l1_ttl) if l1_max_size > 0 else None
+        # Other in-process tiers keyed like this cache, e.g. the principal cache
+        self.local_tiers: list[LocalCache] = []
+        self.invalidation_channel = invalidation_channel
+        self.instance_id = uuid.uuid4().hex
+        self.invalidation_task = None
+
+        # In-flight get_or_set producers, keyed by cache key
+        self._inflight: dict[str, asyncio.Task] = {}
 
         # Connection pool
         self.pool = None
@@ -96,6 +174,8 @@ class EnhancedRedisCache:
             "misses": 0,
             "errors": 0,
             "total_operations": 0,
+            "l1_hits": 0,
+            "coalesced": 0,
         }
 
         # Health check task
@@ -150,6 +230,86 @@ class EnhancedRedisCache:
                 pass
             self.health_check_task = None
 
+    def add_local_tier(self, tier: LocalCache) -> None:
+        """Evict from ``tier`` on every invalidation, local or from other workers.
+
+        Its keys must come from :meth:`key`, so they match the Redis keys.
+        """
+        self.local_tiers.append(tier)
+
+    def _tiers(self) -> list[LocalCache]:
+        """In-process tiers kept in step through the invalidation channel"""
+        return ([self.l1] if self.l1 is not None else []) + self.local_tiers
+
+    def _evict_local(self, keys: list[str], patterns: list[str]) -> None:
+        for tier in self._tiers():
+            for key in keys:
+                tier.delete(key)
+            for pattern in patterns:
+                tier.delete_pattern(pattern)
+
+    def _apply_invalidation(self, data: str) -> None:
+        """Evict local entries named in an invalidation message"""
+        message = json.loads(data)
+        if message.get("origin") == self.instance_id:
+            return
+
+        self._evict_local(message.get("keys", []), message.get("patterns", []))
+
+    async def _invalidation_listener(self):
+        """Evict L1 entries changed by other workers"""
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.invalidation_channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._apply_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Messages may have been missed while disconnected
+                logger.warning(f"Cache invalidation listener error: {e}")
+                for tier in self._tiers():
+                    tier.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def start_invalidation_listener(self):
+        """Start listening for L1 invalidations from other workers"""
+        if self._tiers() and self.client and not self.invalidation_task:
+            self.invalidation_task = asyncio.create_task(self._invalidation_listener())
+
+    async def stop_invalidation_listener(self):
+        """Stop the L1 invalidation listener"""
+        if self.invalidation_task:
+            self.invalidation_task.cancel()
+            try:
+                await self.invalidation_task
+            except asyncio.CancelledError:
+                pass
+            self.invalidation_task = None
+
+    async def _publish_invalidation(
+        self, keys: list[str] | None = None, patterns: list[str] | None = None
+    ) -> None:
+        """Evict keys from the local tiers and tell other workers to do the same"""
+        if not self._tiers():
+            return
+
+        self._evict_local(keys or [], patterns or [])
+
+        try:
+            message = {"origin": self.instance_id}
+            if keys:
+                message["keys"] = keys
+            if patterns:
+                message["patterns"] = patterns
+            await self.client.publish(self.invalidation_channel, json.dumps(message))
+        except Exception as e:
+            logger.warning(f"Cache invalidation publish error: {e}")
+
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate cache key with hash for long keys"""
         key_parts = [prefix]
@@ -163,7 +323,7 @@ class EnhancedRedisCache:
             if isinstance(value, (dict, list)):
                 # Hash complex objects (non-security use)
                 value_hash = hashlib.sha256(
-                    json.dumps(value, sort_keys=True).encode()
+                    json.dumps(value, sort_keys=True, default=str).encode()
                 ).hexdigest()[:8]
                 key_parts.append(f"{key}:{value_hash}")
             else:
@@ -176,19 +336,35 @@ class EnhancedRedisCache:
 
         return key_string
 
+    def key(self, prefix: str, *args, **kwargs) -> str:
+        """Redis key that get, set and delete use for these arguments"""
+        return self._generate_key(prefix, *args, **kwargs)
+
     async def get(self, prefix: str, *args, **kwargs) -> Any | None:
         """Get value from cache with circuit breaker"""
+        key = self._generate_key(prefix, *args, **kwargs)
+
+        if self.l1 is not None:
+            value = self.l1.get(key)
+            if value is not None:
+                self.metrics["l1_hits"] += 1
+                self.metrics["hits"] += 1
+                self.metrics["total_operations"] += 1
+                return value
+
         if not self.client or not self.circuit_breaker.can_execute():
             return None
 
         try:
-            key = self._generate_key(prefix, *args, **kwargs)
             value = await self.client.get(key)
 
             if value:
                 self.metrics["hits"] += 1
                 logger.debug(f"Cache hit for key: {key}")
-                return json.loads(value)
+                value = json.loads(value)
+                if self.l1 is not None:
+                    self.l1.set(key, value)
+                return value
 
             self.metrics["misses"] += 1
             logger.debug(f"Cache miss for key: {key}")
@@ -202,15 +378,31 @@ class EnhancedRedisCache:
         finally:
             self.metrics["total_operations"] += 1
 
+    def _tag_key(self, tag: str) -> str:
+        """Sorted set of the keys registered under a tag, scored by expiry.
+
+        (Plain sets under "tag:" were used before; those expire on their own.)
+        """
+        return f"tags:{tag}"
+
+    def _key_tags_key(self, key: str) -> str:
+        """Set of the tag indexes a key is registered in"""
+        return f"keytags:{key}"
+
     async def set(
         self,
         prefix: str,
         value: Any,
         ttl: int | timedelta = 3600,
         *args,
+        tags: list[str] | None = None,
         **kwargs,
     ) -> bool:
-        """Set value in cache with circuit breaker"""
+        """Set value in cache with circuit breaker.
+
+        When ``tags`` are given the key is also registered in one Redis set per
+        tag, so it can later be removed with :meth:`invalidate_tags`.
+        """
         if not self.client or not self.circuit_breaker.can_execute():
             return False
 
@@ -224,9 +416,32 @@ class EnhancedRedisCache:
             # Serialize value
             serialized_value = json.dumps(value, default=str)
 
-            # Set in Redis
-            await self.client.setex(key, ttl, serialized_value)
+            if tags:
+                # Write the entry and its tag index entries atomically
+                now = time.time()
+                tag_keys = [self._tag_key(tag) for tag in tags]
+                key_tags = self._key_tags_key(key)
+                async with self.client.pipeline(transaction=True) as pipe:
+                    pipe.setex(key, ttl, serialized_value)
+                    pipe.sadd(key_tags, *tag_keys)
+                    pipe.expire(key_tags, ttl)
+                    for tag_key in tag_keys:
+                        pipe.zadd(tag_key, {key: now + ttl})
+                        # Expired members are dropped as the index is written
+                        pipe.zremrangebyscore(tag_key, "-inf", now)
+                        # Keep the index alive as long as its longest-lived member
+                        pipe.expire(tag_key, ttl, nx=True)
+                        pipe.expire(tag_key, ttl, gt=True)
+                    await pipe.execute()
+            else:
+                # Set in Redis
+                await self.client.setex(key, ttl, serialized_value)
             logger.debug(f"Cache set for key: {key} with TTL: {ttl}s")
+
+            await self._publish_invalidation(keys=[key])
+            if self.l1 is not None:
+                # Store the decoded form so L1 hits match what Redis would return
+                self.l1.set(key, json.loads(serialized_value), ttl)
             return True
 
         except Exception as e:
@@ -246,6 +461,7 @@ class EnhancedRedisCache:
             key = self._generate_key(prefix, *args, **kwargs)
             result = await self.client.delete(key)
             logger.debug(f"Cache delete for key: {key}, result: {result}")
+            await self._publish_invalidation(keys=[key])
             return result > 0
 
         except Exception as e:
@@ -256,18 +472,120 @@ class EnhancedRedisCache:
         finally:
             self.metrics["total_operations"] += 1
 
+    async def _delete_keys(self, keys: list[str]) -> int:
+        """Delete keys in pipelined UNLINK batches"""
+        deleted = 0
+        for i in range(0, len(keys), self.delete_batch_size):
+            batch = keys[i : i + self.delete_batch_size]
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.unlink(*batch)
+                results = await pipe.execute()
+            deleted += sum(results)
+        return deleted
+
+    async def _untag(self, keys: list[str], invalidated: frozenset[str]) -> None:
+        """Remove keys from every other tag index they are registered in"""
+        for i in range(0, len(keys), self.delete_batch_size):
+            batch = keys[i : i + self.delete_batch_size]
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key in batch:
+                    pipe.smembers(self._key_tags_key(key))
+                registered = await pipe.execute()
+
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, tag_keys in zip(batch, registered, strict=True):
+                    for tag_key in set(tag_keys) - invalidated:
+                        pipe.zrem(tag_key, key)
+                pipe.unlink(*[self._key_tags_key(key) for key in batch])
+                await pipe.execute()
+
+    async def invalidate_tags(
+        self, *tags: str, legacy_patterns: list[str] | None = None
+    ) -> int:
+        """Delete every key registered under the given tags.
+
+        Cost scales with the number of tagged entries, not the keyspace size.
+        Deleted keys are also removed from every other tag they carried.
+        ``legacy_patterns`` are additionally cleared with SCAN while entries
+        written before tagging may still be alive.
+        """
+        if not self.client or not self.circuit_breaker.can_execute():
+            return 0
+
+        try:
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            deleted = 0
+
+            if tag_keys:
+                # Snapshot and reset the indexes in one transaction
+                async with self.client.pipeline(transaction=True) as pipe:
+                    for tag_key in tag_keys:
+                        pipe.zrange(tag_key, 0, -1)
+                    pipe.delete(*tag_keys)
+                    results = await pipe.execute()
+
+                members = list(set().union(*results[:-1]))
+                if members:
+                    await self._untag(members, frozenset(tag_keys))
+                deleted = await self._delete_keys(members)
+                if members:
+                    await self._publish_invalidation(keys=members)
+
+            if legacy_patterns and time.time() < self.legacy_scan_until:
+                for pattern in legacy_patterns:
+                    deleted += await self.clear_pattern(pattern)
+
+            logger.info(f"Invalidated {deleted} cache keys for tags: {list(tags)}")
+            return deleted
+
+        except Exception as e:
+            self.metrics["errors"] += 1
+            self.circuit_breaker.record_failure()
+            logger.error(f"Cache tag invalidation error: {e}")
+            return 0
+        finally:
+            self.metrics["total_operations"] += 1
+
+    async def count_tag(self, tag: str) -> int:
+        """Number of live (unexpired) keys registered under a tag"""
+        if not self.client or not self.circuit_breaker.can_execute():
+            return 0
+
+        try:
+            return await self.client.zcount(self._tag_key(tag), time.time(), "+inf")
+        except Exception as e:
+            self.metrics["errors"] += 1
+            self.circuit_breaker.record_failure()
+            logger.error(f"Cache tag count error: {e}")
+            return 0
+
     async def clear_pattern(self, pattern: str) -> int:
-        """Clear all keys matching pattern"""
+        """Clear all keys matching pattern.
+
+        Uses incremental SCAN rather than KEYS so Redis is never blocked for a
+        full keyspace walk. Prefer :meth:`invalidate_tags` for hot paths.
+        """
         if not self.client or not self.circuit_breaker.can_execute():
             return 0
 
         try:
-            keys = await self.client.keys(pattern)
-            if keys:
-                deleted = await self.client.delete(*keys)
+            deleted = 0
+            batch = []
+            async for key in self.client.scan_iter(
+                match=pattern, count=self.delete_batch_size
+            ):
+                batch.append(key)
+                if len(batch) >= self.delete_batch_size:
+                    deleted += await self._delete_keys(batch)
+                    batch = []
+            if batch:
+                deleted += await self._delete_keys(batch)
+
+            await self._publish_invalidation(patterns=[pattern])
+
+            if deleted:
                 logger.info(f"Cleared {deleted} cache keys matching pattern: {pattern}")
-                return deleted
-            return 0
+            return deleted
 
         except Exception as e:
             self.metrics["errors"] += 1
@@ -277,6 +595,26 @@ class EnhancedRedisCache:
         finally:
             self.metrics["total_operations"] += 1
 
+    async def _call_value_func(self, value_func: Callable) -> Any:
+        """Call a sync or async producer, awaiting the result if needed"""
+        value = value_func()
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    async def _fill(
+        self, prefix: str, value_func: Callable, ttl: int | timedelta, args, kwargs
+    ) -> Any:
+        """Produce a value and store it in the cache"""
+        try:
+            value = await self._call_value_func(value_func)
+            await self.set(prefix, value, ttl, *args, **kwargs)
+            return value
+
+        except Exception as e:
+            logger.error(f"Cache get_or_set error: {e}")
+            return await self._call_value_func(value_func)
+
     async def get_or_set(
         self,
         prefix: str,
@@ -285,28 +623,29 @@ class EnhancedRedisCache:
         *args,
         **kwargs,
     ) -> Any:
-        """Get from cache or set if not exists"""
+        """Get from cache or set if not exists.
+
+        Concurrent misses for the same key in this process share a single
+        call to ``value_func``. The producer runs in its own task, so a
+        cancelled caller does not cancel it for the others.
+        """
         # Try to get from cache first
         cached_value = await self.get(prefix, *args, **kwargs)
         if cached_value is not None:
             return cached_value
 
-        # If not in cache, call function to get value
-        try:
-            if asyncio.iscoroutinefunction(value_func):
-                value = await value_func()
-            else:
-                value = value_func()
-
-            await self.set(prefix, value, ttl, *args, **kwargs)
-            return value
+        key = self._generate_key(prefix, *args, **kwargs)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._fill(prefix, value_func, ttl, args, kwargs)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.metrics["coalesced"] += 1
 
-        except Exception as e:
-            logger.error(f"Cache get_or_set error: {e}")
-            if asyncio.iscoroutinefunction(value_func):
-                return await value_func()
-            else:
-                return value_func()
+        return await asyncio.shield(task)
 
     async def mget(self, keys: list[str]) -> list[Any | None]:
         """Get multiple values from cache"""
@@ -356,6 +695,8 @@ class EnhancedRedisCache:
                     pipe.setex(key, ttl, value)
                 await pipe.execute()
 
+            await self._publish_invalidation(keys=list(data))
+
             logger.debug(f"Cache mset for {len(data)} keys with TTL: {ttl}s")
             return True
 
@@ -431,11 +772,15 @@ class EnhancedRedisCache:
             "hit_rate": hit_rate,
             "circuit_breaker_state": self.circuit_breaker.state,
             "connection_healthy": self.client is not None,
+            "l1_hits": self.metrics["l1_hits"],
+            "l1_size": len(self.l1) if self.l1 is not None else 0,
+            "coalesced": self.metrics["coalesced"],
         }
 
     async def close(self):
         """Close Redis connection"""
         await self.stop_health_check()
+        await self.stop_invalidation_listener()
         if self.client:
             await self.client.close()
         if self.pool:
@@ -443,7 +788,7 @@ class EnhancedRedisCache:
 
 
 # Global enhanced cache instance
-enhanced_cache = EnhancedRedisCache()
+enhanced_cache = EnhancedRedisCache(l1_max_size=1000)
 
 
 # Enhanced cache decorators
@@ -5,10 +5,14 @@ Redis client service for caching, rate limiting, and token tracking.
 import asyncio
 import json
 import logging
+import time
 from datetime import datetime
 from typing import Any
 
 import redis
+import redis.asyncio as aioredis
+
+from .gcra import GCRARateLimiter, RateLimit
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +48,8 @@ class RedisClient:
         """Initialize Redis client."""
         self.redis_url = redis_url or "redis://localhost:6379"
         self.client = None
+        self.async_client = None
+        self._rate_limiters: dict[tuple[int, float], GCRARateLimiter] = {}
         self._connect()
 
     def _connect(self):
@@ -52,10 +58,12 @@ class RedisClient:
             self.client = redis.from_url(self.redis_url, decode_responses=True)
             # Test connection
             self.client.ping()
+            self.async_client = aioredis.from_url(self.redis_url, decode_responses=True)
             logger.info("Successfully connected to Redis")
         except Exception as e:
             logger.warning(f"Failed to connect to Redis: {e}")
             self.client = None
+            self.async_client = None
 
     def is_connected(self) -> bool:
         """Check if Redis is connected."""
@@ -89,7 +97,7 @@ class RedisClient:
 
         while retry <= max_retries:
             # Global rate limit using Redis
-            allowed = self.check_rate_limit(f"safe_call:{key}", rate, 1)
+            allowed = await self.check_rate_limit(f"safe_call:{key}", rate, 1)
             if not allowed:
                 logger.warning(f"Rate limit exceeded for {key}, waiting {delay}s")
                 await asyncio.sleep(delay)
@@ -133,57 +141,51 @@ class RedisClient:
         )
 
     # Rate Limiting Methods
-    def check_rate_limit(
-        self, key: str, max_requests: int, window_seconds: int
+    async def check_rate_limit(
+        self, key: str, max_requests: int, window_seconds: float
     ) -> bool:
-        """Check if rate limit is exceeded."""
-        if not self.is_connected():
-            return True  # Allow if Redis is not available
-
-        current_time = datetime.utcnow().timestamp()
-        window_start = current_time - window_seconds
-
-        # Remove old entries
-        self.client.zremrangebyscore(key, 0, window_start)
-
-        # Count current requests
-        current_requests = self.client.zcard(key)
-
-        if current_requests >= max_requests:
-            return False  # Rate limit exceeded
+        """Check a request against the rate limit, in one round trip.
 
-        # Add current request
-        self.client.zadd(key, {str(current_time): current_time})
-        self.client.expire(key, window_seconds)
-
-        return True
-
-    def get_rate_limit_info(self, key: str) -> dict[str, Any]:
+        Returns True if it is allowed: `max_requests` per `window_seconds`
+        (GCRA, see services.gcra). Without Redis, or while Redis errors, the
+        limit is enforced for this process only.
+        """
+        limiter = self._rate_limiter(max_requests, window_seconds)
+        decision = await limiter.acquire(key, self.async_client)
+        return decision.allowed
+
+    def _rate_limiter(self, max_requests: int, window_seconds: float) -> GCRARateLimiter:
+        limiter = self._rate_limiters.get((max_requests, window_seconds))
+        if limiter is None:
+            limiter = self._rate_limiters[(max_requests, window_seconds)] = (
+                GCRARateLimiter(
+                    "rate_limit",
+                    [RateLimit("gcra", max_requests, window_seconds)],
+                    local_fallback=True,
+                )
+            )
+        return limiter
+
+    def get_rate_limit_info(
+        self, key: str, max_requests: int = 60, window_seconds: float = 60
+    ) -> dict[str, Any]:
         """Get rate limit information."""
         if not self.is_connected():
             return {"remaining": 999, "reset_time": None}
 
-        current_time = datetime.utcnow().timestamp()
-        window_seconds = 60  # Default 1 minute window
-
-        # Remove old entries
-        self.client.zremrangebyscore(key, 0, current_time - window_seconds)
-
-        # Count current requests
-        current_requests = self.client.zcard(key)
-        remaining = max(0, 60 - current_requests)  # Assuming 60 requests per minute
+        limiter = self._rate_limiter(max_requests, window_seconds)
+        limit = limiter.limits[0]
+        current_time = time.time()
 
-        # Get oldest request to calculate reset time
-        oldest = self.client.zrange(key, 0, 0, withscores=True)
-        reset_time = None
-        if oldest:
-            reset_time = datetime.fromtimestamp(
-                oldest[0][1] + window_seconds
-            ).isoformat()
+        # The theoretical arrival time runs ahead of now by one interval per
+        # request still counted against the window
+        tat = float(self.client.get(limiter.keys(key)[0]) or current_time)
+        backlog = max(0.0, tat - current_time)
+        current_requests = min(max_requests, round(backlog / limit.interval))
 
         return {
-            "remaining": remaining,
-            "reset_time": reset_time,
+            "remaining": max_requests - current_requests,
+            "reset_time": datetime.fromtimestamp(tat).isoformat() if backlog else None,
             "current_requests": current_requests,
         }
 
@@ -0,0 +1,51 @@
+"""
+Server-Sent Events Streaming
+- Formats text chunks as SSE ``token`` events
+- Ends every stream with a ``done`` or ``error`` event
+- Disables proxy buffering so tokens reach the client as they arrive
+"""
+
+import json
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # nginx
+}
+
+
+def format_sse(data: Any, event: str | None = None) -> str:
+    """Encode one SSE event with a JSON payload"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+async def sse_events(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Wrap streamed text as SSE events.
+
+    Errors after the response has started cannot change the status code, so
+    they are reported to the client as an ``error`` event instead.
+    """
+    try:
+        async for text in chunks:
+            yield format_sse({"text": text}, "token")
+    except Exception as e:
+        logger.error(f"Streaming response failed: {e}")
+        yield format_sse({"detail": "Streaming failed"}, "error")
+        return
+
+    yield format_sse({}, "done")
+
+
+def sse_response(chunks: AsyncIterator[str]) -> StreamingResponse:
+    """StreamingResponse sending text chunks as Server-Sent Events"""
+    return StreamingResponse(
+        sse_events(chunks), media_type="text/event-stream", headers=SSE_HEADERS
+    )
@@ -1,5 +1,6 @@
 """Stripe service for payment processing and subscription management."""
 
+import asyncio
 import logging
 import os
 from datetime import datetime
@@ -7,6 +8,7 @@ from typing import Any
 
 import stripe
 
+from models.subscription import PlanType, SubscriptionStatus
 from services.redis_client import get_redis_client
 from services.supabase import get_supabase_client
 
@@ -18,6 +20,9 @@ webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Subscription statuses that keep a user on the paid plan
+PAID_STATUSES = {SubscriptionStatus.ACTIVE.value, SubscriptionStatus.TRIALING.value}
+
 
 class StripeService:
     """Service class for Stripe operations."""
@@ -147,6 +152,22 @@ class StripeService:
             logger.error(f"Failed to get subscription status: {str(e)}")
             raise
 
+    async def get_user_plan(self, user_id: str) -> PlanType:
+        """Get the plan a user is on; checkout only sells Pro, so paid means Pro."""
+        try:
+            user_result = await asyncio.to_thread(
+                self.supabase.table("users")
+                .select("subscription_status")
+                .eq("id", user_id)
+                .execute
+            )
+        except Exception as e:
+            logger.warning(f"Failed to look up plan for user {user_id}: {str(e)}")
+            return PlanType.BASIC
+
+        status = user_result.data[0].get("subscription_status") if user_result.data else None
+        return PlanType.PRO if status in PAID_STATUSES else PlanType.BASIC
+
     def verify_webhook(self, payload: bytes, sig_header: str) -> stripe.Event:
         """Verify Stripe webhook signature."""
         try:
@@ -1,11 +1,40 @@
 """
 Supabase client configuration for the application.
+
+Two clients are exposed:
+- ``get_supabase_client()``: the synchronous supabase-py client
+- ``get_async_supabase_client()``: a pooled async PostgREST client for use
+  inside ``async def`` routes, so slow queries do not stall the worker
 """
 
+import asyncio
+import inspect
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 from supabase import Client, create_client
 
 from config.security import security_config
 
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# postgrest >= 1.0 takes a ready-made session (http_client) and no longer
+# calls create_session; older releases (as pinned in requirements.txt) do
+POSTGREST_ACCEPTS_HTTP_CLIENT = (
+    "http_client" in inspect.signature(AsyncPostgrestClient.__init__).parameters
+)
+
 # Get Supabase credentials from security config
 SUPABASE_URL = security_config.SUPABASE_URL
 SUPABASE_ANON_KEY = security_config.SUPABASE_ANON_KEY
@@ -34,6 +63,157 @@ def get_supabase_service_client() -> Client:
     return create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
 
+# Per-call timeout override for the async client (see ``call_timeout``)
+_call_timeout: ContextVar[float | None] = ContextVar("supabase_call_timeout", default=None)
+
+
+@contextmanager
+def call_timeout(seconds: float):
+    """Override the async client's per-call timeout within a block.
+
+    Example:
+        with call_timeout(2.0):
+            result = await db.table("tasks").select("*").execute()
+    """
+    token = _call_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _call_timeout.reset(token)
+
+
+class PooledAsyncClient(httpx.AsyncClient):
+    """httpx client that bounds in-flight requests and enforces a per-call deadline"""
+
+    def __init__(self, *, max_concurrency: int, default_timeout: float, **kwargs):
+        super().__init__(**kwargs)
+        self.default_timeout = default_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def request(self, *args, **kwargs) -> httpx.Response:
+        timeout = _call_timeout.get() or self.default_timeout
+        # The deadline covers waiting for a concurrency slot as well as the call
+        async with asyncio.timeout(timeout):
+            async with self._semaphore:
+                return await super().request(*args, **kwargs)
+
+
+class PooledAsyncPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client backed by a shared, bounded connection pool"""
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        headers: dict[str, str],
+        max_connections: int,
+        max_keepalive_connections: int,
+        max_concurrency: int,
+        timeout: float,
+    ):
+        self._pool_options = {
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "max_concurrency": max_concurrency,
+        }
+        if POSTGREST_ACCEPTS_HTTP_CLIENT:
+            super().__init__(
+                base_url,
+                headers=headers,
+                http_client=self.create_session(base_url, headers, timeout),
+            )
+        else:
+            super().__init__(base_url, headers=headers, timeout=timeout)
+
+    def create_session(self, base_url, headers, timeout) -> PooledAsyncClient:
+        return PooledAsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=self._pool_options["max_connections"],
+                max_keepalive_connections=self._pool_options[
+                    "max_keepalive_connections"
+                ],
+            ),
+            max_concurrency=self._pool_options["max_concurrency"],
+            default_timeout=timeout,
+        )
+
+
+class AsyncSupabaseClient:
+    """Async data-access layer over PostgREST with the supabase-py query-builder style.
+
+    Queries are built exactly as with the sync client and awaited at the end:
+
+        result = await db.table("tasks").select("*").eq("user_id", uid).execute()
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_connections: int = 50,
+        max_keepalive_connections: int = 20,
+        max_concurrency: int = 50,
+        timeout: float = 10.0,
+    ):
+        self.rest_url = f"{url.rstrip('/')}/rest/v1"
+        self.headers = {
+            **DEFAULT_POSTGREST_CLIENT_HEADERS,
+            "apiKey": key,
+            "Authorization": f"Bearer {key}",
+        }
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._postgrest: PooledAsyncPostgrestClient | None = None
+
+    @property
+    def postgrest(self) -> PooledAsyncPostgrestClient:
+        """Lazily create the pooled client on first use"""
+        if self._postgrest is None:
+            self._postgrest = PooledAsyncPostgrestClient(
+                self.rest_url,
+                headers=self.headers,
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                max_concurrency=self.max_concurrency,
+                timeout=self.timeout,
+            )
+        return self._postgrest
+
+    def table(self, table_name: str):
+        """Start a query on a table (awaitable ``.execute()``)."""
+        return self.postgrest.from_(table_name)
+
+    def from_(self, table_name: str):
+        """Alias of :meth:`table`."""
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: dict):
+        """Call a stored procedure (awaitable ``.execute()``)."""
+        return self.postgrest.rpc(fn, params)
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._postgrest is not None:
+            await self._postgrest.aclose()
+            self._postgrest = None
+            logger.info("Async Supabase client closed")
+
+
+# Shared async client; connections are opened lazily and reused across requests
+async_supabase_client = AsyncSupabaseClient(SUPABASE_URL, SUPABASE_ANON_KEY)
+
+
+def get_async_supabase_client() -> AsyncSupabaseClient:
+    """Get the pooled async Supabase client instance."""
+    return async_supabase_client
+
+
 def test_connection():
     """Test the Supabase connection."""
     try:
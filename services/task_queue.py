@@ -0,0 +1,800 @@
+"""
+Task Queue Backends for BackgroundWorker
+- Per-priority ready queues: sorted sets (FIFO by enqueue time) or Redis Streams
+- Redis Streams queue with a consumer group per worker pool
+- Acknowledgement once a task has been handled
+- Entries left pending by a crashed worker are reclaimed after a visibility timeout
+- Delayed tasks wait in a due-time index until a Lua promoter makes them ready
+- Fair backend: per-tenant queues served by deficit round robin, weighted by
+  subscription plan, with per-tenant concurrency caps
+- All backends block in Redis instead of polling it
+"""
+
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import redis.asyncio as redis
+
+from models.subscription import PlanType
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "task_queue"  # Single queue used before per-priority queues; drained last
+DELAYED_KEY = "task_queue:delayed"
+STREAM_KEY_PREFIX = "task_stream"
+CONSUMER_GROUP = "background_workers"
+
+# TaskPriority values, highest first
+PRIORITIES = (4, 3, 2, 1)
+
+# Move due members ("<priority>:<task_id>") of the delayed set into their ready
+# queue in one atomic step, so concurrent promoters never double-queue a task.
+# KEYS[1]: delayed set; KEYS[2..5]: ready queues for priorities 1 to 4
+# ARGV: now, max tasks to move, "zset" or "stream"
+# Returns {moved, next due time or nil}
+PROMOTE_DUE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(due) do
+    local sep = string.find(member, ':', 1, true)
+    local ready = KEYS[tonumber(string.sub(member, 1, sep - 1)) + 1]
+    local task_id = string.sub(member, sep + 1)
+    if ARGV[3] == 'stream' then
+        redis.call('XADD', ready, '*', 'task_id', task_id)
+    else
+        redis.call('ZADD', ready, ARGV[1], task_id)
+    end
+    redis.call('ZREM', KEYS[1], member)
+end
+local next_due = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {#due, next_due[2] or false}
+"""
+
+# Reset the idle time of a stream entry if this consumer still owns it, so an
+# entry held in a local buffer is not reclaimed and run by another worker.
+# KEYS[1]: stream
+# ARGV: consumer group, consumer, entry id
+# Returns 1 if the entry is still ours, 0 if it was claimed or acknowledged
+RENEW_IF_OWNED_LUA = """
+local pending = redis.call('XPENDING', KEYS[1], ARGV[1], ARGV[3], ARGV[3], 1)
+if #pending == 0 or pending[1][2] ~= ARGV[2] then
+    return 0
+end
+redis.call('XCLAIM', KEYS[1], ARGV[1], ARGV[2], 0, ARGV[3], 'JUSTID')
+return 1
+"""
+
+# KEYS[1]: stream
+# ARGV: consumer group, consumer, entry id, task id
+# Returns 1 if the entry was ours and has been re-added for any consumer to
+# read, 0 if it was claimed or acknowledged
+RELEASE_IF_OWNED_LUA = """
+local pending = redis.call('XPENDING', KEYS[1], ARGV[1], ARGV[3], ARGV[3], 1)
+if #pending == 0 or pending[1][2] ~= ARGV[2] then
+    return 0
+end
+redis.call('XACK', KEYS[1], ARGV[1], ARGV[3])
+redis.call('XDEL', KEYS[1], ARGV[3])
+redis.call('XADD', KEYS[1], '*', 'task_id', ARGV[4])
+return 1
+"""
+
+
+FAIR_KEY_PREFIX = "task_queue:fair:"
+SYSTEM_TENANT = "system"  # Tasks enqueued without a tenant, e.g. scheduled jobs
+
+# Fair queue scores put priority ahead of enqueue time: lower scores pop first
+PRIORITY_SCORE_SPAN = 1e10
+
+# Added to the fair queue scripts: queue a task id for a tenant, putting the
+# tenant on the round-robin ring if it has no other work, and wake one waiter.
+# Every key is passed in: queue is the tenant's sorted set, shared holds the
+# active set, ring and signal keys.
+FAIR_ENQUEUE_LUA = """
+local function enqueue(queue, shared, tenant, task_id, score)
+    redis.call('ZADD', queue, score, task_id)
+    if redis.call('SADD', shared.active, tenant) == 1 then
+        redis.call('RPUSH', shared.ring, tenant)
+    end
+    redis.call('RPUSH', shared.signal, 1)
+    redis.call('LTRIM', shared.signal, -1000, -1)
+end
+"""
+
+# KEYS: tenant queue, active set, ring, signal, tenant weights, caps and plans
+# ARGV: tenant, task id, score, weight, cap, plan
+FAIR_PUSH_LUA = FAIR_ENQUEUE_LUA + """
+local shared = {active = KEYS[2], ring = KEYS[3], signal = KEYS[4]}
+redis.call('HSET', KEYS[5], ARGV[1], ARGV[4])
+redis.call('HSET', KEYS[6], ARGV[1], ARGV[5])
+redis.call('HSET', KEYS[7], ARGV[1], ARGV[6])
+enqueue(KEYS[1], shared, ARGV[1], ARGV[2], tonumber(ARGV[3]))
+return 1
+"""
+
+# Like PROMOTE_DUE_LUA, for delayed members "<priority>:<tenant>:<task_id>".
+# The caller reads the due members first, so each tenant queue can be passed
+# in KEYS; a member another promoter already moved is skipped.
+# KEYS: delayed set, active set, ring, signal, then the queue of each member
+# ARGV: member, tenant, task id, score for each member
+# Returns {moved, next due time or nil}
+FAIR_PROMOTE_DUE_LUA = FAIR_ENQUEUE_LUA + """
+local shared = {active = KEYS[2], ring = KEYS[3], signal = KEYS[4]}
+local moved = 0
+for i = 1, #ARGV / 4 do
+    local member = ARGV[i * 4 - 3]
+    if redis.call('ZREM', KEYS[1], member) == 1 then
+        enqueue(KEYS[4 + i], shared, ARGV[i * 4 - 2], ARGV[i * 4 - 1], tonumber(ARGV[i * 4]))
+        moved = moved + 1
+    end
+end
+local next_due = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {moved, next_due[2] or false}
+"""
+
+# Deficit round robin, one task per call. The tenant at the head of the ring
+# earns its weight in credit once per turn, spends one credit per task and
+# moves to the tail when out of credit. Tenants at their concurrency cap are
+# passed over without earning credit; tenants with no work leave the ring.
+# Running tasks are leased in a per-tenant sorted set, so a crashed worker's
+# slot frees itself when the lease expires.
+# The caller passes the tenants at the head of the ring and their keys. The
+# script stops when the head is a tenant it was not given: the ring moved on
+# since it was read, or every tenant given was passed over.
+# KEYS: ring, active set, deficit, weights, caps, cap overrides, plans, then
+#       the queue and running set of each tenant given
+# ARGV: now, lease expiry, then the tenants given
+# Returns {task id, tenant, score, plan}, 1 to call again with the tenants
+# now at the head of the ring, or 0 if nothing may run
+FAIR_POP_LUA = """
+local now = tonumber(ARGV[1])
+local given = {}
+for i = 3, #ARGV do
+    given[ARGV[i]] = i - 2
+end
+local turns = (#ARGV - 2) * 2 + 1
+for _ = 1, turns do
+    local tenant = redis.call('LINDEX', KEYS[1], 0)
+    if not tenant then
+        return 0
+    end
+    local index = given[tenant]
+    if not index then
+        return 1
+    end
+    local queue = KEYS[6 + index * 2]
+    local running = KEYS[7 + index * 2]
+    if redis.call('ZCARD', queue) == 0 then
+        redis.call('LPOP', KEYS[1])
+        redis.call('SREM', KEYS[2], tenant)
+        redis.call('HDEL', KEYS[3], tenant)
+    else
+        redis.call('ZREMRANGEBYSCORE', running, '-inf', now)
+        local cap = tonumber(redis.call('HGET', KEYS[6], tenant)
+            or redis.call('HGET', KEYS[5], tenant) or 0)
+        if cap > 0 and redis.call('ZCARD', running) >= cap then
+            redis.call('LMOVE', KEYS[1], KEYS[1], 'LEFT', 'RIGHT')
+        else
+            local deficit = tonumber(redis.call('HGET', KEYS[3], tenant) or 0)
+            if deficit < 1 then
+                deficit = deficit + tonumber(redis.call('HGET', KEYS[4], tenant) or 1)
+            end
+            if deficit >= 1 then
+                local popped = redis.call('ZPOPMIN', queue)
+                deficit = deficit - 1
+                redis.call('ZADD', running, ARGV[2], popped[1])
+                redis.call('HSET', KEYS[3], tenant, deficit)
+                if deficit < 1 then
+                    redis.call('LMOVE', KEYS[1], KEYS[1], 'LEFT', 'RIGHT')
+                end
+                return {popped[1], tenant, popped[2], redis.call('HGET', KEYS[7], tenant) or ''}
+            end
+            redis.call('HSET', KEYS[3], tenant, deficit)
+            redis.call('LMOVE', KEYS[1], KEYS[1], 'LEFT', 'RIGHT')
+        end
+    end
+end
+return 0
+"""
+
+# Share of worker turns per plan, relative to basic
+PLAN_WEIGHTS = {PlanType.BASIC: 1, PlanType.PRO: 2, PlanType.ENTERPRISE: 4}
+
+# Tasks one tenant may have running at once, per plan
+PLAN_CONCURRENCY = {PlanType.BASIC: 2, PlanType.PRO: 4, PlanType.ENTERPRISE: 8}
+
+
+@dataclass
+class QueueEntry:
+    """A task handed to a worker, plus what the backend needs to acknowledge it"""
+
+    task_id: str
+    stream: str | None = None
+    entry_id: str | None = None
+    tenant: str | None = None
+    plan: str | None = None
+    enqueued_at: float | None = None  # Set by backends that know the wait time
+
+
+class TaskQueueBackend(ABC):
+    """Where BackgroundWorker keeps the ids of tasks waiting to run.
+
+    Tasks due now go straight to the ready queue for their priority. Tasks
+    with a future ``run_at`` wait in a sorted set scored by due time until
+    ``promote_due`` moves them across.
+    """
+
+    name: str
+    ready_prefix: str
+
+    def __init__(self):
+        self._promote_script = None
+
+    def _ready_key(self, priority: int) -> str:
+        return f"{self.ready_prefix}{priority}"
+
+    def _delayed_member(self, task_id: str, priority: int, tenant: str | None) -> str:
+        return f"{priority}:{task_id}"
+
+    async def setup(self, redis_client: redis.Redis) -> None:
+        """Create any server-side structures the backend needs"""
+        self._promote_script = redis_client.register_script(PROMOTE_DUE_LUA)
+
+    async def push(
+        self,
+        redis_client: redis.Redis,
+        task_id: str,
+        priority: int,
+        run_at: float | None = None,
+        tenant: str | None = None,
+        plan: str | None = None,
+    ) -> None:
+        """Queue a task id, holding it back until ``run_at`` (epoch seconds).
+
+        ``tenant`` and ``plan`` are only used by the fair backend.
+        """
+        if run_at is not None and run_at > time.time():
+            member = self._delayed_member(task_id, priority, tenant)
+            await redis_client.zadd(DELAYED_KEY, {member: run_at})
+        else:
+            await self._push_ready(redis_client, task_id, priority)
+
+    @abstractmethod
+    async def _push_ready(
+        self, redis_client: redis.Redis, task_id: str, priority: int
+    ) -> None:
+        """Add a task id to the ready queue for its priority"""
+
+    async def promote_due(
+        self, redis_client: redis.Redis, limit: int = 100
+    ) -> tuple[int, float | None]:
+        """Move due delayed tasks to their ready queues.
+
+        Returns how many were moved and when the next delayed task is due.
+        """
+        moved, next_due = await self._promote_script(
+            keys=[DELAYED_KEY, *(self._ready_key(p) for p in reversed(PRIORITIES))],
+            args=[time.time(), limit, self.name],
+        )
+        return int(moved), float(next_due) if next_due is not None else None
+
+    async def delayed_size(
+        self, redis_client: redis.Redis, due_within: float | None = None
+    ) -> int:
+        """Number of tasks waiting for their due time.
+
+        With ``due_within``, only those due in the next that many seconds.
+        """
+        if due_within is None:
+            return await redis_client.zcard(DELAYED_KEY)
+        return await redis_client.zcount(DELAYED_KEY, "-inf", time.time() + due_within)
+
+    @abstractmethod
+    async def pop(
+        self, redis_client: redis.Redis, consumer: str, timeout: float
+    ) -> QueueEntry | None:
+        """Wait up to ``timeout`` seconds for the next task"""
+
+    async def ack(self, redis_client: redis.Redis, entry: QueueEntry) -> None:
+        """Mark a popped task as handled"""
+
+    async def release(self, redis_client: redis.Redis, consumer: str) -> None:
+        """Hand back tasks delivered to a consumer that will not run them"""
+
+    async def remove(
+        self,
+        redis_client: redis.Redis,
+        task_id: str,
+        priority: int,
+        tenant: str | None = None,
+    ) -> None:
+        """Drop a queued task if the backend can locate it"""
+        await redis_client.zrem(
+            DELAYED_KEY, self._delayed_member(task_id, priority, tenant)
+        )
+
+    @abstractmethod
+    async def size(self, redis_client: redis.Redis) -> int:
+        """Number of queued tasks"""
+
+    async def close(self, redis_client: redis.Redis, consumers: list[str]) -> None:
+        """Release per-consumer state on shutdown"""
+
+
+class SortedSetQueue(TaskQueueBackend):
+    """One sorted set per priority, scored by enqueue time.
+
+    BZPOPMIN checks the keys in the order given, so the highest priority with
+    work always wins and each priority is served first in, first out.
+    Popping removes the entry, so a task taken by a worker that then crashes
+    is lost; use the stream backend where that matters.
+    """
+
+    name = "sorted_set"
+    ready_prefix = f"{QUEUE_KEY}:"
+
+    def __init__(self):
+        super().__init__()
+        self.ready_keys = [self._ready_key(priority) for priority in PRIORITIES]
+
+    async def _push_ready(
+        self, redis_client: redis.Redis, task_id: str, priority: int
+    ) -> None:
+        await redis_client.zadd(self._ready_key(priority), {task_id: time.time()})
+
+    async def pop(
+        self, redis_client: redis.Redis, consumer: str, timeout: float
+    ) -> QueueEntry | None:
+        result = await redis_client.bzpopmin(
+            [*self.ready_keys, QUEUE_KEY], timeout=timeout
+        )
+        if not result:
+            return None
+        return QueueEntry(task_id=result[1])
+
+    async def remove(
+        self,
+        redis_client: redis.Redis,
+        task_id: str,
+        priority: int,
+        tenant: str | None = None,
+    ) -> None:
+        await super().remove(redis_client, task_id, priority, tenant)
+        await redis_client.zrem(self._ready_key(priority), task_id)
+
+    async def size(self, redis_client: redis.Redis) -> int:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in [*self.ready_keys, QUEUE_KEY]:
+            pipe.zcard(key)
+        return sum(await pipe.execute())
+
+
+class StreamQueue(TaskQueueBackend):
+    """One Redis stream per priority, read through a shared consumer group.
+
+    A task stays in its consumer's pending entries list until acknowledged.
+    If a worker dies mid-task, another worker claims the entry once it has
+    been idle for ``visibility_timeout`` seconds, so the timeout must exceed
+    the longest task timeout. Delivery is therefore at least once.
+    """
+
+    name = "stream"
+    ready_prefix = f"{STREAM_KEY_PREFIX}:"
+
+    def __init__(
+        self,
+        visibility_timeout: float = 360.0,
+        reclaim_interval: float = 30.0,
+    ):
+        super().__init__()
+        self.visibility_timeout = visibility_timeout
+        self.reclaim_interval = reclaim_interval
+        self.streams = [self._ready_key(priority) for priority in PRIORITIES]
+
+        # Entries delivered together with the one returned, per consumer
+        self._buffer: dict[str, list[QueueEntry]] = {}
+        self._next_reclaim = 0.0
+        self._renew_script = None
+        self._release_script = None
+
+    async def setup(self, redis_client: redis.Redis) -> None:
+        await super().setup(redis_client)
+        self._renew_script = redis_client.register_script(RENEW_IF_OWNED_LUA)
+        self._release_script = redis_client.register_script(RELEASE_IF_OWNED_LUA)
+        for stream in self.streams:
+            try:
+                await redis_client.xgroup_create(
+                    stream, CONSUMER_GROUP, id="0", mkstream=True
+                )
+            except redis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    async def _push_ready(
+        self, redis_client: redis.Redis, task_id: str, priority: int
+    ) -> None:
+        await redis_client.xadd(self._ready_key(priority), {"task_id": task_id})
+
+    def _entries(self, stream: str, messages) -> list[QueueEntry]:
+        return [
+            QueueEntry(task_id=fields["task_id"], stream=stream, entry_id=entry_id)
+            for entry_id, fields in messages
+            if fields and "task_id" in fields
+        ]
+
+    async def _reclaim(self, redis_client: redis.Redis, consumer: str) -> QueueEntry | None:
+        """Claim one entry left pending past the visibility timeout, highest priority first.
+
+        One at a time, so a claimed entry is run straight away rather than
+        waiting in the buffer where it could go stale again.
+        """
+        for stream in self.streams:
+            _, messages, *_ = await redis_client.xautoclaim(
+                stream,
+                CONSUMER_GROUP,
+                consumer,
+                min_idle_time=int(self.visibility_timeout * 1000),
+                start_id="0-0",
+                count=1,
+            )
+            entries = self._entries(stream, messages)
+            if entries:
+                logger.warning(
+                    f"Reclaimed stalled task {entries[0].task_id} for consumer {consumer}"
+                )
+                return entries[0]
+        return None
+
+    async def _renew(self, redis_client: redis.Redis, consumer: str, entry: QueueEntry) -> bool:
+        """Whether a buffered entry is still ours; if so its idle time is reset"""
+        owned = await self._renew_script(
+            keys=[entry.stream], args=[CONSUMER_GROUP, consumer, entry.entry_id]
+        )
+        if not owned:
+            logger.info(f"Dropping buffered task {entry.task_id}: claimed by another consumer")
+        return bool(owned)
+
+    async def pop(
+        self, redis_client: redis.Redis, consumer: str, timeout: float
+    ) -> QueueEntry | None:
+        if time.monotonic() >= self._next_reclaim:
+            entry = await self._reclaim(redis_client, consumer)
+            if entry is not None:
+                # Keep reclaiming on the next pop until nothing is stalled
+                return entry
+            self._next_reclaim = time.monotonic() + self.reclaim_interval
+
+        # Buffered entries sat in our pending list while earlier tasks ran
+        buffered = self._buffer.get(consumer)
+        while buffered:
+            entry = buffered.pop(0)
+            if await self._renew(redis_client, consumer, entry):
+                return entry
+
+        response = await redis_client.xreadgroup(
+            CONSUMER_GROUP,
+            consumer,
+            {stream: ">" for stream in self.streams},
+            count=1,
+            block=max(1, int(timeout * 1000)),
+        )
+        entries = []
+        for stream, messages in response or []:
+            entries.extend(self._entries(stream, messages))
+        if not entries:
+            return None
+
+        # One entry may arrive per non-empty stream; highest priority first
+        entries.sort(key=lambda entry: self.streams.index(entry.stream))
+        self._buffer[consumer] = entries[1:]
+        return entries[0]
+
+    async def ack(self, redis_client: redis.Redis, entry: QueueEntry) -> None:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.xack(entry.stream, CONSUMER_GROUP, entry.entry_id)
+        pipe.xdel(entry.stream, entry.entry_id)
+        await pipe.execute()
+
+    async def release(self, redis_client: redis.Redis, consumer: str) -> None:
+        """Re-add this consumer's buffered entries to their streams.
+
+        They sit in the consumer's pending list, so without this they would
+        wait out the visibility timeout before another worker reclaimed them.
+        """
+        for entry in self._buffer.pop(consumer, []):
+            released = await self._release_script(
+                keys=[entry.stream],
+                args=[CONSUMER_GROUP, consumer, entry.entry_id, entry.task_id],
+            )
+            if released:
+                logger.info(f"Released buffered task {entry.task_id} from {consumer}")
+
+    # remove() only reaches delayed tasks: stream entries are not indexed by
+    # task id, so workers skip cancelled tasks instead
+
+    async def size(self, redis_client: redis.Redis) -> int:
+        # Acknowledged entries are deleted, so this counts waiting and in-flight tasks
+        pipe = redis_client.pipeline(transaction=False)
+        for stream in self.streams:
+            pipe.xlen(stream)
+        return sum(await pipe.execute())
+
+    async def close(self, redis_client: redis.Redis, consumers: list[str]) -> None:
+        """Delete this process's consumers that hold no pending entries"""
+        for stream in self.streams:
+            for info in await redis_client.xinfo_consumers(stream, CONSUMER_GROUP):
+                if info["name"] in consumers and info["pending"] == 0:
+                    await redis_client.xgroup_delconsumer(
+                        stream, CONSUMER_GROUP, info["name"]
+                    )
+
+
+class FairQueue(TaskQueueBackend):
+    """Per-tenant sorted sets served by weighted deficit round robin.
+
+    Each tenant (normally a user id) gets worker turns in proportion to its
+    plan weight, so one tenant's burst only delays that tenant's own tasks.
+    Within a tenant, tasks run by priority, then first in, first out.
+    Concurrency caps bound how many of a tenant's tasks run at once; slots
+    are leased for ``lease_timeout`` seconds and released on ack. As with
+    the sorted set backend, popping removes the task.
+    """
+
+    name = "fair"
+    ready_prefix = FAIR_KEY_PREFIX
+
+    def __init__(
+        self,
+        lease_timeout: float = 360.0,
+        plan_weights: dict[str, float] | None = None,
+        plan_concurrency: dict[str, int] | None = None,
+        system_weight: float = 4,
+        pop_window: int = 32,
+    ):
+        super().__init__()
+        self.lease_timeout = lease_timeout
+        self.pop_window = pop_window  # Tenants handed to each pop script call
+        self.plan_weights = {
+            PlanType(plan): weight
+            for plan, weight in (plan_weights or PLAN_WEIGHTS).items()
+        }
+        self.plan_concurrency = {
+            PlanType(plan): cap
+            for plan, cap in (plan_concurrency or PLAN_CONCURRENCY).items()
+        }
+        self.system_weight = system_weight
+
+        self.ring_key = f"{FAIR_KEY_PREFIX}ring"
+        self.active_key = f"{FAIR_KEY_PREFIX}active"
+        self.signal_key = f"{FAIR_KEY_PREFIX}signal"
+        self.deficit_key = f"{FAIR_KEY_PREFIX}deficit"
+        self.weights_key = f"{FAIR_KEY_PREFIX}weights"
+        self.caps_key = f"{FAIR_KEY_PREFIX}caps"
+        self.cap_overrides_key = f"{FAIR_KEY_PREFIX}cap_overrides"
+        self.plans_key = f"{FAIR_KEY_PREFIX}plans"
+
+        self._push_script = None
+        self._pop_script = None
+
+    async def setup(self, redis_client: redis.Redis) -> None:
+        self._promote_script = redis_client.register_script(FAIR_PROMOTE_DUE_LUA)
+        self._push_script = redis_client.register_script(FAIR_PUSH_LUA)
+        self._pop_script = redis_client.register_script(FAIR_POP_LUA)
+
+    def _tenant_key(self, tenant: str) -> str:
+        return f"{FAIR_KEY_PREFIX}tenant:{tenant}"
+
+    def _running_key(self, tenant: str) -> str:
+        return f"{FAIR_KEY_PREFIX}running:{tenant}"
+
+    def _delayed_member(self, task_id: str, priority: int, tenant: str | None) -> str:
+        return f"{priority}:{tenant or SYSTEM_TENANT}:{task_id}"
+
+    @staticmethod
+    def _parse_delayed_member(member: str) -> tuple[int, str, str]:
+        """Priority, tenant and task id; members from before tenants were system"""
+        priority, _, rest = member.partition(":")
+        tenant, sep, task_id = rest.rpartition(":")
+        return int(priority), tenant if sep else SYSTEM_TENANT, task_id
+
+    @staticmethod
+    def _score(priority: int, enqueued_at: float) -> float:
+        return (5 - priority) * PRIORITY_SCORE_SPAN + enqueued_at
+
+    def _tenant_limits(self, tenant: str, plan: str | None) -> tuple[float, int, str]:
+        """Weight, concurrency cap (0 for none) and plan label for a tenant"""
+        if tenant == SYSTEM_TENANT:
+            return self.system_weight, 0, SYSTEM_TENANT
+        plan = PlanType(plan) if plan else PlanType.BASIC
+        return self.plan_weights[plan], self.plan_concurrency[plan], plan.value
+
+    async def push(
+        self,
+        redis_client: redis.Redis,
+        task_id: str,
+        priority: int,
+        run_at: float | None = None,
+        tenant: str | None = None,
+        plan: str | None = None,
+    ) -> None:
+        tenant = tenant or SYSTEM_TENANT
+        weight, cap, plan_label = self._tenant_limits(tenant, plan)
+        now = time.time()
+
+        if run_at is not None and run_at > now:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hset(self.weights_key, tenant, weight)
+            pipe.hset(self.caps_key, tenant, cap)
+            pipe.hset(self.plans_key, tenant, plan_label)
+            pipe.zadd(DELAYED_KEY, {self._delayed_member(task_id, priority, tenant): run_at})
+            await pipe.execute()
+            return
+
+        await self._push_script(
+            keys=[
+                self._tenant_key(tenant),
+                self.active_key,
+                self.ring_key,
+                self.signal_key,
+                self.weights_key,
+                self.caps_key,
+                self.plans_key,
+            ],
+            args=[tenant, task_id, self._score(priority, now), weight, cap, plan_label],
+        )
+
+    async def _push_ready(
+        self, redis_client: redis.Redis, task_id: str, priority: int
+    ) -> None:
+        await self.push(redis_client, task_id, priority)
+
+    async def promote_due(
+        self, redis_client: redis.Redis, limit: int = 100
+    ) -> tuple[int, float | None]:
+        now = time.time()
+        due = await redis_client.zrangebyscore(DELAYED_KEY, "-inf", now, start=0, num=limit)
+        keys = [DELAYED_KEY, self.active_key, self.ring_key, self.signal_key]
+        args = []
+        for member in due:
+            priority, tenant, task_id = self._parse_delayed_member(member)
+            keys.append(self._tenant_key(tenant))
+            args.extend([member, tenant, task_id, self._score(priority, now)])
+
+        moved, next_due = await self._promote_script(keys=keys, args=args)
+        return int(moved), float(next_due) if next_due is not None else None
+
+    async def _pop_ready(self, redis_client: redis.Redis) -> QueueEntry | None:
+        """Run one round-robin turn; None if no tenant may run a task now"""
+        result, rounds = 1, 0
+        while result == 1:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.lrange(self.ring_key, 0, self.pop_window - 1)
+            pipe.llen(self.ring_key)
+            tenants, ring_size = await pipe.execute()
+            # Each round passes over up to pop_window tenants; stop once every
+            # tenant on the ring has had a look, plus a round in case it moved
+            passes = (ring_size + self.pop_window - 1) // self.pop_window
+            if not tenants or rounds > passes:
+                return None
+            rounds += 1
+
+            now = time.time()
+            keys = [
+                self.ring_key,
+                self.active_key,
+                self.deficit_key,
+                self.weights_key,
+                self.caps_key,
+                self.cap_overrides_key,
+                self.plans_key,
+            ]
+            for tenant in tenants:
+                keys.extend([self._tenant_key(tenant), self._running_key(tenant)])
+            result = await self._pop_script(
+                keys=keys, args=[now, now + self.lease_timeout, *tenants]
+            )
+        if not result:
+            return None
+
+        task_id, tenant, score, plan = result
+        return QueueEntry(
+            task_id=task_id,
+            tenant=tenant,
+            plan=plan or None,
+            enqueued_at=float(score) % PRIORITY_SCORE_SPAN,
+        )
+
+    async def pop(
+        self, redis_client: redis.Redis, consumer: str, timeout: float
+    ) -> QueueEntry | None:
+        entry = await self._pop_ready(redis_client)
+        if entry is None:
+            # Nothing may run; wait for a push or a freed slot, then retry once
+            if await redis_client.blpop([self.signal_key], timeout=timeout):
+                entry = await self._pop_ready(redis_client)
+        return entry
+
+    async def ack(self, redis_client: redis.Redis, entry: QueueEntry) -> None:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zrem(self._running_key(entry.tenant), entry.task_id)
+        # A slot is free: wake a worker in case this tenant was held at its cap
+        pipe.rpush(self.signal_key, 1)
+        pipe.ltrim(self.signal_key, -1000, -1)
+        await pipe.execute()
+
+    async def remove(
+        self,
+        redis_client: redis.Redis,
+        task_id: str,
+        priority: int,
+        tenant: str | None = None,
+    ) -> None:
+        await super().remove(redis_client, task_id, priority, tenant)
+        await redis_client.zrem(self._tenant_key(tenant or SYSTEM_TENANT), task_id)
+
+    async def set_tenant_concurrency(
+        self, redis_client: redis.Redis, tenant: str, limit: int | None
+    ) -> None:
+        """Override one tenant's concurrency cap (0 for none); None restores the plan cap"""
+        if limit is None:
+            await redis_client.hdel(self.cap_overrides_key, tenant)
+        else:
+            await redis_client.hset(self.cap_overrides_key, tenant, limit)
+
+    async def size(self, redis_client: redis.Redis) -> int:
+        pipe = redis_client.pipeline(transaction=False)
+        for tenant in await redis_client.smembers(self.active_key):
+            pipe.zcard(self._tenant_key(tenant))
+        return sum(await pipe.execute())
+
+    async def tenant_stats(self, redis_client: redis.Redis) -> dict[str, dict]:
+        """Queued, running, head-of-queue wait and queue age per tenant with work.
+
+        ``head_wait`` is how long the task that runs next has waited;
+        ``age`` is how long the oldest queued task has, whatever its priority.
+        """
+        tenants = sorted(await redis_client.smembers(self.active_key))
+        now = time.time()
+        pipe = redis_client.pipeline(transaction=False)
+        for tenant in tenants:
+            queue = self._tenant_key(tenant)
+            pipe.zcard(queue)
+            # Oldest task of each priority, highest priority first
+            for priority in PRIORITIES:
+                pipe.zrangebyscore(
+                    queue,
+                    self._score(priority, 0),
+                    f"({self._score(priority - 1, 0)!r}",
+                    start=0,
+                    num=1,
+                    withscores=True,
+                )
+            pipe.zcount(self._running_key(tenant), now, "+inf")
+            pipe.hget(self.plans_key, tenant)
+        results = await pipe.execute()
+
+        stats = {}
+        width = len(PRIORITIES) + 3
+        for i, tenant in enumerate(tenants):
+            queued, *heads, running, plan = results[i * width : (i + 1) * width]
+            enqueued = [head[0][1] % PRIORITY_SCORE_SPAN for head in heads if head]
+            stats[tenant] = {
+                "plan": plan,
+                "queued": queued,
+                "running": running,
+                "head_wait": now - enqueued[0] if enqueued else 0.0,
+                "age": now - min(enqueued) if enqueued else 0.0,
+            }
+        return stats
+
+
+def create_task_queue(backend: str, visibility_timeout: float = 360.0) -> TaskQueueBackend:
+    """Build a queue backend by name ("sorted_set", "stream" or "fair")"""
+    if backend == SortedSetQueue.name:
+        return SortedSetQueue()
+    if backend == StreamQueue.name:
+        return StreamQueue(visibility_timeout=visibility_timeout)
+    if backend == FairQueue.name:
+        return FairQueue(lease_timeout=visibility_timeout)
+    raise ValueError(f"Unknown task queue backend '{backend}'")
@@ -2,6 +2,8 @@
 Simple test to check coverage without full app dependencies.
 """
 
+import asyncio
+
 import pytest
 
 from services.redis_client import RedisClient
@@ -19,7 +21,7 @@ def test_rate_limit_check():
     """Test rate limit checking logic."""
     client = RedisClient()
     # Should return True when Redis is not connected (fallback behavior)
-    assert client.check_rate_limit("test_key", 10, 60) is True
+    assert asyncio.run(client.check_rate_limit("test_key", 10, 60)) is True
 
 
 def test_token_tracking():
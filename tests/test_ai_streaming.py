@@ -0,0 +1,226 @@
+"""
+Tests for provider token streaming and Server-Sent Events formatting
+"""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from services.ai.providers.claude_client import ClaudeClient
+from services.ai.providers.llama_client import LlamaClient
+from services.http_pool import HTTPClientPool
+from services.sse import format_sse, sse_events
+
+
+def _sse_body(*events: dict, done: bool = True) -> bytes:
+    lines = [f"data: {json.dumps(event)}\n\n" for event in events]
+    if done:
+        lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode()
+
+
+def _pool(origin: str, handler) -> HTTPClientPool:
+    pool = HTTPClientPool()
+    pool._clients[origin] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return pool
+
+
+class TestProviderStreaming:
+    @pytest.mark.asyncio
+    async def test_openai_compatible_stream_yields_deltas(self):
+        payloads = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            payloads.append(json.loads(request.content))
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=_sse_body(
+                    {"choices": [{"delta": {"role": "assistant"}}]},
+                    {"choices": [{"delta": {"content": "Hel"}}]},
+                    {"choices": [{"delta": {"content": "lo"}}]},
+                    {"choices": []},
+                ),
+            )
+
+        pool = _pool("http://localhost:8000", handler)
+        with patch(
+            "services.ai.providers.base_client.get_http_pool", return_value=pool
+        ), patch.dict("os.environ", {"LLAMA_API_URL": "http://localhost:8000"}):
+            chunks = [text async for text in LlamaClient().generate_stream("Hi")]
+
+        assert chunks == ["Hel", "lo"]
+        assert payloads[0]["stream"] is True
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_claude_stream_yields_text_deltas(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(
+                200,
+                content=_sse_body(
+                    {"type": "message_start", "message": {}},
+                    {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hi"}},
+                    {"type": "ping"},
+                    {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "!"}},
+                    {"type": "message_stop"},
+                    done=False,
+                ),
+            )
+
+        pool = _pool("https://api.anthropic.com", handler)
+        with patch(
+            "services.ai.providers.base_client.get_http_pool", return_value=pool
+        ), patch.dict("os.environ", {"ANTHROPIC_API_KEY": "test"}):
+            chunks = [text async for text in ClaudeClient().generate_stream("Hi")]
+
+        assert chunks == ["Hi", "!"]
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_stream_error_status_raises(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(503, text="overloaded")
+
+        pool = _pool("http://localhost:8000", handler)
+        with patch(
+            "services.ai.providers.base_client.get_http_pool", return_value=pool
+        ), patch.dict("os.environ", {"LLAMA_API_URL": "http://localhost:8000"}):
+            client = LlamaClient()
+            with pytest.raises(Exception, match="503 - overloaded"):
+                [text async for text in client.generate_stream("Hi")]
+
+        assert client.is_healthy is False
+        await pool.close()
+
+
+class TestSSE:
+    def test_format_sse(self):
+        assert format_sse({"text": "hi"}, "token") == 'event: token\ndata: {"text": "hi"}\n\n'
+
+    @pytest.mark.asyncio
+    async def test_events_end_with_done(self):
+        async def chunks():
+            yield "a"
+            yield "b"
+
+        events = [event async for event in sse_events(chunks())]
+
+        assert events == [
+            format_sse({"text": "a"}, "token"),
+            format_sse({"text": "b"}, "token"),
+            format_sse({}, "done"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failure_becomes_error_event(self):
+        async def chunks():
+            yield "a"
+            raise Exception("All AI providers failed")
+
+        events = [event async for event in sse_events(chunks())]
+
+        assert events[-1] == format_sse({"detail": "Streaming failed"}, "error")
+
+
+def _stream(*chunks: str):
+    async def generate(*args, **kwargs):
+        for chunk in chunks:
+            yield chunk
+
+    return generate
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestStreamingEndpoints:
+    @pytest.fixture
+    def user(self):
+        return {"id": "user-1", "email": "student@example.com"}
+
+    @pytest.fixture
+    def client(self, user):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from routes import ai, ai_study_coach
+        from services.auth import get_current_user
+
+        app = FastAPI()
+        app.include_router(ai.router, prefix="/api/ai")
+        app.include_router(ai_study_coach.router)
+        app.dependency_overrides[get_current_user] = lambda: user
+        return TestClient(app)
+
+    def test_coach_stream(self, client):
+        hybrid = MagicMock(generate_stream=MagicMock(side_effect=_stream("Study ", "daily")))
+        with patch(
+            "routes.ai_study_coach.context_manager.build_comprehensive_context",
+            AsyncMock(return_value={}),
+        ), patch("routes.ai_study_coach.get_hybrid_ai_service", return_value=hybrid):
+            response = client.post(
+                "/api/ai-study-coach/coach/stream", json={"message": "How do I focus?"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert _events(response.text) == [
+            ("token", {"text": "Study "}),
+            ("token", {"text": "daily"}),
+            ("done", {}),
+        ]
+        assert hybrid.generate_stream.call_args.kwargs["user_id"] == "user-1"
+
+    def test_coach_stream_rejects_another_users_session(self, client):
+        with patch.dict(
+            "routes.ai_study_coach.study_sessions",
+            {"session-2": {"user_id": "user-2", "topic": "private"}},
+        ), patch(
+            "routes.ai_study_coach.context_manager.build_comprehensive_context",
+            AsyncMock(return_value={}),
+        ), patch("routes.ai_study_coach.get_hybrid_ai_service") as hybrid:
+            response = client.post(
+                "/api/ai-study-coach/coach/stream",
+                json={"message": "Continue", "session_id": "session-2"},
+            )
+
+        assert response.status_code == 403
+        hybrid.assert_not_called()
+
+    def test_chat_stream(self, client):
+        openai = MagicMock(conversational_ai_chat_stream=MagicMock(side_effect=_stream("Hi")))
+        with patch(
+            "routes.ai.cost_tracking_service.check_budget_limits",
+            AsyncMock(return_value={"daily_exceeded": False, "monthly_exceeded": False}),
+        ), patch("routes.ai._get_user_context", AsyncMock(return_value={})), patch(
+            "routes.ai.get_openai_service", return_value=openai
+        ):
+            response = client.post("/api/ai/chat/stream", json={"message": "Hello"})
+
+        assert response.status_code == 200
+        assert _events(response.text) == [("token", {"text": "Hi"}), ("done", {})]
+        assert openai.conversational_ai_chat_stream.call_args.kwargs["user_id"] == "user-1"
+
+    def test_chat_stream_over_budget(self, client):
+        with patch(
+            "routes.ai.cost_tracking_service.check_budget_limits",
+            AsyncMock(return_value={"daily_exceeded": True, "monthly_exceeded": False}),
+        ):
+            response = client.post("/api/ai/chat/stream", json={"message": "Hello"})
+
+        assert response.status_code == 429
+
+    def test_coach_router_is_mounted(self):
+        from main import app
+
+        paths = app.openapi()["paths"]
+        assert "/api/ai-study-coach/coach/stream" in paths
+        assert "/api/ai/chat/stream" in paths
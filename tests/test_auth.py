@@ -1,5 +1,5 @@
 from datetime import UTC, datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import jwt
 import pytest
@@ -11,6 +11,7 @@ from services.auth import (
     hash_password,
     verify_password,
 )
+from services.principal_cache import principal_cache
 
 
 class TestHashPassword:
@@ -80,9 +81,21 @@ class TestCreateAccessToken:
 class TestGetCurrentUser:
     """Test current user retrieval from JWT token"""
 
+    @pytest.fixture(autouse=True)
+    def isolated_principal_cache(self):
+        """Start each test with an empty principal cache and no Redis tier"""
+        principal_cache.clear()
+        with patch("services.principal_cache.enhanced_cache") as mock_cache:
+            mock_cache.get = AsyncMock(return_value=None)
+            mock_cache.set = AsyncMock(return_value=True)
+            mock_cache.delete = AsyncMock(return_value=True)
+            yield mock_cache
+        principal_cache.clear()
+
+    @pytest.mark.asyncio
     @patch("services.auth.get_supabase_client")
     @patch("services.auth.security_config")
-    def test_get_current_user_valid_token(
+    async def test_get_current_user_valid_token(
         self, mock_security_config, mock_get_supabase
     ):
         """Test getting current user with valid token"""
@@ -104,14 +117,15 @@ class TestGetCurrentUser:
             algorithm=mock_security_config.JWT_ALGORITHM,
         )
 
-        result = get_current_user(token)
+        result = await get_current_user(token)
 
         assert result["id"] == "user123"
         assert result["email"] == "test@example.com"
         assert result["role"] == "user"
 
+    @pytest.mark.asyncio
     @patch("services.auth.security_config")
-    def test_get_current_user_invalid_token(self, mock_security_config):
+    async def test_get_current_user_invalid_token(self, mock_security_config):
         """Test getting current user with invalid token"""
         mock_security_config.SECRET_KEY = "test_secret_key"
         mock_security_config.JWT_ALGORITHM = "HS256"
@@ -119,14 +133,15 @@ class TestGetCurrentUser:
         invalid_token = "invalid_token"
 
         with pytest.raises(HTTPException) as exc_info:
-            get_current_user(invalid_token)
+            await get_current_user(invalid_token)
 
         assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
         assert exc_info.value.detail == "Could not validate credentials"
 
+    @pytest.mark.asyncio
     @patch("services.auth.get_supabase_client")
     @patch("services.auth.security_config")
-    def test_get_current_user_user_not_found(
+    async def test_get_current_user_user_not_found(
         self, mock_security_config, mock_get_supabase
     ):
         """Test getting current user when user not found in database"""
@@ -148,13 +163,14 @@ class TestGetCurrentUser:
         )
 
         with pytest.raises(HTTPException) as exc_info:
-            get_current_user(token)
+            await get_current_user(token)
 
         assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
         assert exc_info.value.detail == "Could not validate credentials"
 
+    @pytest.mark.asyncio
     @patch("services.auth.security_config")
-    def test_get_current_user_token_without_sub(self, mock_security_config):
+    async def test_get_current_user_token_without_sub(self, mock_security_config):
         """Test getting current user with token missing sub claim"""
         mock_security_config.SECRET_KEY = "test_secret_key"
         mock_security_config.JWT_ALGORITHM = "HS256"
@@ -168,7 +184,67 @@ class TestGetCurrentUser:
         )
 
         with pytest.raises(HTTPException) as exc_info:
-            get_current_user(token)
+            await get_current_user(token)
 
         assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
         assert exc_info.value.detail == "Could not validate credentials"
+
+    @pytest.mark.asyncio
+    @patch("services.auth.get_supabase_client")
+    @patch("services.auth.security_config")
+    async def test_get_current_user_uses_principal_cache(
+        self, mock_security_config, mock_get_supabase
+    ):
+        """Test repeated lookups are served from the principal cache"""
+        mock_security_config.SECRET_KEY = "test_secret_key"
+        mock_security_config.JWT_ALGORITHM = "HS256"
+
+        mock_supabase = MagicMock()
+        mock_get_supabase.return_value = mock_supabase
+        mock_supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+            {"id": "user123", "email": "test@example.com", "role": "user"}
+        ]
+
+        token = jwt.encode(
+            {"sub": "test@example.com"},
+            mock_security_config.SECRET_KEY,
+            algorithm=mock_security_config.JWT_ALGORITHM,
+        )
+
+        first = await get_current_user(token)
+        second = await get_current_user(token)
+
+        assert first == second
+        assert mock_supabase.table.call_count == 1
+
+        await principal_cache.invalidate_user("user123")
+        await get_current_user(token)
+
+        assert mock_supabase.table.call_count == 2
+
+    @pytest.mark.asyncio
+    @patch("services.auth.get_supabase_client")
+    @patch("services.auth.security_config")
+    async def test_get_current_user_inactive_user(
+        self, mock_security_config, mock_get_supabase
+    ):
+        """Test deactivated users are rejected"""
+        mock_security_config.SECRET_KEY = "test_secret_key"
+        mock_security_config.JWT_ALGORITHM = "HS256"
+
+        mock_supabase = MagicMock()
+        mock_get_supabase.return_value = mock_supabase
+        mock_supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+            {"id": "user123", "email": "test@example.com", "is_active": False}
+        ]
+
+        token = jwt.encode(
+            {"sub": "test@example.com"},
+            mock_security_config.SECRET_KEY,
+            algorithm=mock_security_config.JWT_ALGORITHM,
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await get_current_user(token)
+
+        assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
@@ -1,22 +1,33 @@
 import asyncio
+import json
+import time
 from datetime import datetime
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from middleware.error_handler import RateLimitError
 from services.background_workers import (
+    ACQUIRE_LEADER_LUA,
+    CLAIM_JOB_RUN_LUA,
+    CLAIM_TASK_LUA,
+    COMPLETE_TASK_LUA,
+    AdmissionDecision,
     BackgroundWorker,
     JobScheduler,
     ScheduledJob,
     Task,
     TaskErrorType,
+    TaskLane,
     TaskPriority,
+    TaskRejectedError,
     TaskStatus,
+    WorkerAutoscaler,
     background_task,
     categorize_task_error,
     scheduled_job,
 )
+from services.task_queue import CONSUMER_GROUP, StreamQueue
 
 
 class TestBackgroundWorkerModels:
@@ -39,6 +50,26 @@ class TestBackgroundWorkerModels:
         assert t2.status == TaskStatus.PENDING
         assert t2.created_at == now
 
+    def test_task_redis_round_trip(self):
+        task = Task(
+            id="1",
+            name="test",
+            func_name="f",
+            args=(1, "a"),
+            kwargs={"n": 2},
+            priority=TaskPriority.LOW,
+            status=TaskStatus.PENDING,
+            created_at=datetime.utcnow(),
+        )
+        fields = task.to_redis()
+        assert all(isinstance(value, str) for value in fields.values())
+
+        t2 = Task.from_redis(fields)
+        assert t2.args == (1, "a")
+        assert t2.kwargs == {"n": 2}
+        assert t2.error is None
+        assert t2 == task
+
     def test_scheduled_job_to_dict_and_from_dict(self):
         now = datetime.utcnow()
         job = ScheduledJob(
@@ -218,6 +249,134 @@ class TestJobScheduler:
             await scheduler._execute_job(job)
 
 
+class TestLeaderElectedScheduler:
+    @pytest.fixture
+    def scheduler(self):
+        worker = BackgroundWorker()
+        worker.redis = MagicMock()
+        scripts = {}
+
+        def register_script(source):
+            return scripts.setdefault(source, AsyncMock())
+
+        worker.redis.register_script.side_effect = register_script
+        scheduler = JobScheduler(worker)
+        scheduler.redis = worker.redis
+        scheduler.scripts = scripts
+        return scheduler
+
+    def _job(self, job_id, next_run):
+        return ScheduledJob(
+            id=job_id,
+            name=job_id,
+            func_name="func",
+            cron_expression="* * * * *",
+            args=(),
+            kwargs={},
+            next_run=next_run,
+        )
+
+    @pytest.mark.asyncio
+    async def test_follower_does_not_lead(self, scheduler):
+        scheduler.redis.register_script(ACQUIRE_LEADER_LUA).return_value = None
+
+        assert not await scheduler._acquire_leadership()
+        assert not scheduler.is_leader
+
+    @pytest.mark.asyncio
+    async def test_new_leader_loads_jobs_from_redis(self, scheduler):
+        scheduler.redis.register_script(ACQUIRE_LEADER_LUA).return_value = [7, 3]
+        job = self._job("daily", datetime(2030, 1, 1))
+        scheduler.redis.smembers = AsyncMock(return_value={"daily"})
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[job.to_redis()])
+        scheduler.redis.pipeline.return_value = pipe
+
+        assert await scheduler._acquire_leadership()
+        assert await scheduler._acquire_leadership()
+
+        assert scheduler.fencing_token == 7
+        assert scheduler.jobs["daily"].next_run == datetime(2030, 1, 1)
+        assert scheduler._heap == [(datetime(2030, 1, 1), "daily")]
+        pipe.execute.assert_awaited_once()  # Job set version unchanged on renewal
+
+    @pytest.mark.asyncio
+    async def test_due_jobs_run_once_in_order(self, scheduler):
+        scheduler.fencing_token = 7
+        claim = scheduler.redis.register_script(CLAIM_JOB_RUN_LUA)
+        claim.return_value = 1
+        scheduler._execute_job = AsyncMock()
+        due = self._job("due", datetime(2020, 1, 1, 0, 1))
+        earlier = self._job("earlier", datetime(2020, 1, 1))
+        later = self._job("later", datetime(2099, 1, 1))
+        for job in (due, earlier, later):
+            scheduler.jobs[job.id] = job
+            scheduler._schedule(job)
+
+        await scheduler._run_due_jobs()
+
+        ran = [call.args[0].id for call in scheduler._execute_job.call_args_list]
+        assert ran == ["earlier", "due"]
+        args = claim.call_args.kwargs["args"]
+        assert args[0] == f"{scheduler.instance_id}:7"
+        assert json.loads(args[1]) == "2020-01-01T00:01:00"
+        # Rescheduled from now, and the far-future job is next
+        assert scheduler._heap[0][1] in ("due", "earlier")
+        assert scheduler._heap[0][0] > datetime.utcnow()
+        assert len(scheduler._heap) == 3
+
+    @pytest.mark.asyncio
+    async def test_refused_claim_skips_run(self, scheduler):
+        scheduler.fencing_token = 7
+        scheduler.redis.register_script(CLAIM_JOB_RUN_LUA).return_value = 0
+        scheduler._execute_job = AsyncMock()
+        scheduler._jobs_version = 3
+        job = self._job("due", datetime(2020, 1, 1))
+        scheduler.jobs[job.id] = job
+        scheduler._schedule(job)
+
+        await scheduler._run_due_jobs()
+
+        scheduler._execute_job.assert_not_awaited()
+        assert scheduler._jobs_version is None
+
+    @pytest.mark.asyncio
+    async def test_declared_job_keeps_existing_history(self, scheduler):
+        scheduler.redis.hmget = AsyncMock(
+            return_value=[json.dumps("ai_cache_maintenance"), json.dumps("0 2 * * *")]
+        )
+        scheduler.redis.hset = AsyncMock()
+        scheduler.register_job("ai_cache_maintenance", "0 2 * * *")
+
+        await scheduler.start()
+        await scheduler.stop()
+
+        scheduler.redis.hmget.assert_awaited_once_with(
+            "job:ai_cache_maintenance", ["func_name", "cron_expression"]
+        )
+        scheduler.redis.hset.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_declared_job_picks_up_new_schedule(self, scheduler):
+        scheduler.redis.hmget = AsyncMock(
+            return_value=[json.dumps("ai_cache_maintenance"), json.dumps("0 2 * * *")]
+        )
+        scheduler.redis.hset = AsyncMock()
+        scheduler.redis.incr = AsyncMock()
+        scheduler.register_job("ai_cache_maintenance", "30 4 * * *")
+
+        await scheduler.start()
+        await scheduler.stop()
+
+        mapping = scheduler.redis.hset.await_args.kwargs["mapping"]
+        # last_run and created_at are left as stored
+        assert set(mapping) == {"func_name", "cron_expression", "next_run"}
+        assert json.loads(mapping["cron_expression"]) == "30 4 * * *"
+        next_run = datetime.fromisoformat(json.loads(mapping["next_run"]))
+        assert (next_run.hour, next_run.minute) == (4, 30)
+        scheduler.redis.incr.assert_awaited_once_with(scheduler.VERSION_KEY)
+
+
 class TestDecorators:
     @patch("services.background_workers.background_worker")
     def test_background_task_decorator(self, mock_worker):
@@ -250,3 +409,344 @@ class TestDecorators:
 
         result = asyncio.run(f(5))
         assert result == "job_id_456"  # The job ID, not the function result
+
+
+def _stored_task(status=TaskStatus.PENDING, func_name="noop", args=()):
+    fields = Task(
+        id="tid",
+        name=func_name,
+        func_name=func_name,
+        args=args,
+        kwargs={},
+        priority=TaskPriority.NORMAL,
+        status=status,
+        created_at=datetime.utcnow(),
+    ).to_redis()
+    return [item for pair in fields.items() for item in pair]
+
+
+class TestTaskStateScripts:
+    @pytest.fixture
+    def worker(self):
+        worker = BackgroundWorker(inline_result_limit=16)
+        worker.redis = MagicMock()
+        worker.claim = AsyncMock(return_value=_stored_task())
+        worker.complete = AsyncMock(return_value=1)
+        worker.redis.register_script.side_effect = lambda source: (
+            worker.claim if source == CLAIM_TASK_LUA else worker.complete
+        )
+        return worker
+
+    @pytest.mark.asyncio
+    async def test_success_takes_two_scripted_calls(self, worker):
+        worker.register_task("noop", AsyncMock(return_value="ok"))
+
+        await worker._process_task("worker-0", "tid")
+        await worker._process_task("worker-0", "tid")
+
+        assert worker.claim.call_args.kwargs["keys"] == ["task:tid"]
+        args = worker.complete.call_args.kwargs["args"]
+        assert json.loads(args[0]) == TaskStatus.COMPLETED.value
+        assert args[3:6] == ['"ok"', "null", ""]
+        assert worker.metrics["tasks_processed"] == 2
+        # Scripts are registered once per client
+        assert worker.redis.register_script.call_count == 2
+        assert worker.redis.register_script.call_args.args[0] == COMPLETE_TASK_LUA
+
+    @pytest.mark.asyncio
+    async def test_large_result_stored_by_reference(self, worker):
+        worker.register_task("noop", AsyncMock(return_value="x" * 100))
+
+        await worker._process_task("worker-0", "tid")
+
+        kwargs = worker.complete.call_args.kwargs
+        assert kwargs["keys"] == ["task:tid", "task_result:tid"]
+        args = kwargs["args"]
+        assert args[3] == "null"
+        assert json.loads(args[4]) == "task_result:tid"
+        assert json.loads(args[5]) == "x" * 100
+        assert args[6:] == [worker.result_ttl, worker.finished_task_ttl]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_task_is_not_run(self, worker):
+        func = AsyncMock()
+        worker.register_task("noop", func)
+        worker.claim.return_value = _stored_task(TaskStatus.CANCELLED)
+
+        await worker._process_task("worker-0", "tid")
+
+        func.assert_not_awaited()
+        worker.complete.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_status_resolves_result_reference(self):
+        worker = BackgroundWorker()
+        worker.redis = AsyncMock()
+        stored = _stored_task(TaskStatus.COMPLETED)
+        fields = dict(zip(stored[::2], stored[1::2], strict=True))
+        fields["result_ref"] = json.dumps("task_result:tid")
+        worker.redis.hgetall.return_value = fields
+        worker.redis.get.return_value = json.dumps({"rows": 3})
+
+        task = await worker.get_task_status("tid")
+
+        worker.redis.get.assert_awaited_once_with("task_result:tid")
+        assert task.result == {"rows": 3}
+
+
+def cpu_square(n):
+    return n * n
+
+
+class TestExecutionLanes:
+    def test_default_lanes(self):
+        worker = BackgroundWorker()
+        worker.register_task("async_task", AsyncMock())
+        worker.register_task("sync_task", cpu_square)
+
+        assert worker.task_lanes == {
+            "async_task": TaskLane.ASYNC,
+            "sync_task": TaskLane.THREAD,
+        }
+
+    def test_invalid_lanes_rejected(self):
+        worker = BackgroundWorker()
+
+        async def coroutine_task():
+            pass
+
+        with pytest.raises(ValueError):
+            worker.register_task("cpu", coroutine_task, lane="process")
+        with pytest.raises(ValueError):
+            worker.register_task("local", lambda n: n, lane=TaskLane.PROCESS)
+
+    @pytest.mark.asyncio
+    async def test_process_lane_rejects_unpicklable_arguments(self):
+        worker = BackgroundWorker()
+        worker.redis = AsyncMock()
+        worker.queue = AsyncMock()
+        worker.register_task("square", cpu_square, lane="process")
+
+        with pytest.raises(ValueError, match="picklable"):
+            await worker.enqueue_task("square", lambda: None)
+
+        await worker.enqueue_task("square", 3)
+        worker.queue.push.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_thread_lane_passes_kwargs(self):
+        worker = BackgroundWorker()
+        worker.redis = MagicMock()
+        claim = AsyncMock(return_value=_stored_task(func_name="sync"))
+        complete = AsyncMock()
+        worker.redis.register_script.side_effect = lambda source: (
+            claim if source == CLAIM_TASK_LUA else complete
+        )
+        calls = []
+        worker.register_task("sync", lambda **kwargs: calls.append(kwargs))
+
+        await worker._process_task("worker-0", "tid")
+
+        assert calls == [{}]
+        assert worker.metrics["tasks_processed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_process_lane_runs_in_warm_pool(self):
+        worker = BackgroundWorker(process_pool_size=2)
+        worker.redis = MagicMock()
+        claim = AsyncMock(return_value=_stored_task(func_name="square", args=(7,)))
+        complete = AsyncMock()
+        worker.redis.register_script.side_effect = lambda source: (
+            claim if source == CLAIM_TASK_LUA else complete
+        )
+        worker.register_task("square", cpu_square, lane=TaskLane.PROCESS)
+
+        try:
+            await worker._process_task("worker-0", "tid")
+            assert worker.metrics["tasks_processed"] == 1
+            assert len(worker.process_pool._processes) == 2
+        finally:
+            worker.process_pool.shutdown()
+
+        assert json.loads(complete.call_args.kwargs["args"][3]) == 49
+
+
+class TestAutoscaling:
+    def test_adds_workers_while_tasks_wait(self):
+        autoscaler = WorkerAutoscaler(min_workers=2, max_workers=4, target_queue_wait=5)
+        autoscaler.observe_wait(12.0)
+
+        assert autoscaler.update(queue_depth=10, busy=1) == 3
+        assert autoscaler.update(queue_depth=10, busy=3) == 4
+        assert autoscaler.update(queue_depth=10, busy=4) == 4  # Capped
+
+    def test_cuts_workers_when_latency_climbs(self):
+        autoscaler = WorkerAutoscaler(min_workers=1, max_workers=20)
+        autoscaler.limit = 16
+        for _ in range(20):
+            autoscaler.observe_latency("brief", 1.0)
+        autoscaler.update(queue_depth=0, busy=16)
+        for _ in range(5):
+            autoscaler.observe_latency("brief", 10.0)
+
+        assert autoscaler.update(queue_depth=50, busy=16) == 12
+
+    def test_sheds_idle_workers(self):
+        autoscaler = WorkerAutoscaler(min_workers=2, max_workers=10)
+        autoscaler.limit = 6
+
+        assert autoscaler.update(queue_depth=0, busy=1) == 5
+        autoscaler.limit = 2
+        assert autoscaler.update(queue_depth=0, busy=0) == 2
+
+    def test_desired_replicas_covers_backlog(self):
+        autoscaler = WorkerAutoscaler(min_workers=1, max_workers=10, target_queue_wait=5)
+        autoscaler.observe_latency("brief", 2.0)
+
+        assert autoscaler.desired_replicas(queue_depth=0, busy=3) == 1
+        # 100 tasks * 2s within 5s needs 40 workers, plus 10 busy
+        assert autoscaler.desired_replicas(queue_depth=100, busy=10) == 5
+
+    @pytest.mark.asyncio
+    async def test_scale_down_retires_between_tasks(self):
+        worker = BackgroundWorker(max_workers=4)
+        worker.queue = AsyncMock()
+
+        async def pop(*args):
+            await asyncio.sleep(0)
+
+        worker.queue.pop.side_effect = pop
+        worker.running = True
+
+        worker._scale_workers(3)
+        assert [w.get_name() for w in worker.workers] == [
+            "worker-0",
+            "worker-1",
+            "worker-2",
+        ]
+
+        worker._scale_workers(1)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert len([w for w in worker.workers if not w.done()]) == 1
+
+        worker._scale_workers(2)
+        assert len([w for w in worker.workers if not w.done()]) == 2
+        assert worker.worker_ids == ["worker-0", "worker-1", "worker-2"]
+
+        worker.running = False
+        for w in worker.workers:
+            w.cancel()
+        await asyncio.gather(*worker.workers, return_exceptions=True)
+
+
+    @pytest.mark.asyncio
+    async def test_scale_down_releases_buffered_stream_entries(self):
+        worker = BackgroundWorker(max_workers=2)
+        worker.redis = AsyncMock()
+        worker.redis.xreadgroup.return_value = [
+            ["task_stream:4", [("2-0", {"task_id": "urgent"})]],
+            ["task_stream:2", [("1-0", {"task_id": "normal"})]],
+        ]
+        worker.queue = StreamQueue(visibility_timeout=60)
+        worker.queue._next_reclaim = float("inf")
+        worker.queue._release_script = AsyncMock(return_value=1)
+        worker.queue.ack = AsyncMock()
+        worker.running = True
+
+        async def process(worker_id, task_id):
+            # Scaled down while the first task runs
+            worker._scale_workers(0)
+
+        with patch.object(worker, "_process_task", side_effect=process) as run:
+            worker._scale_workers(1)
+            await asyncio.wait_for(asyncio.gather(*worker.workers), timeout=1)
+
+        run.assert_awaited_once_with("worker-0", "urgent")
+        worker.queue._release_script.assert_awaited_once_with(
+            keys=["task_stream:2"],
+            args=[CONSUMER_GROUP, worker._consumer_name("worker-0"), "1-0", "normal"],
+        )
+        worker.running = False
+
+
+class TestAdmissionControl:
+    @pytest.fixture
+    def worker(self):
+        worker = BackgroundWorker(defer_queue_depth=10, max_queue_depth=20)
+        worker.redis = AsyncMock()
+        worker.queue = AsyncMock()
+        worker.queue.delayed_size.return_value = 0
+        worker.register_task("brief", AsyncMock())
+        return worker
+
+    @pytest.mark.asyncio
+    async def test_accepts_below_thresholds(self, worker):
+        worker.queue.size.return_value = 3
+
+        admission = await worker.admit(TaskPriority.LOW)
+
+        assert admission.decision == AdmissionDecision.ACCEPT
+        assert admission.queue_depth == 3
+
+    @pytest.mark.asyncio
+    async def test_defers_low_priority_work(self, worker):
+        worker.queue.size.return_value = 12
+
+        await worker.enqueue_task("brief", priority=TaskPriority.NORMAL)
+
+        run_at = worker.queue.push.call_args.kwargs["run_at"]
+        assert run_at is not None and run_at > time.time()
+        assert (await worker.admit(TaskPriority.HIGH)).decision == AdmissionDecision.ACCEPT
+
+    @pytest.mark.asyncio
+    async def test_sheds_all_but_urgent_past_max_depth(self, worker):
+        worker.queue.size.return_value = 15
+        worker.queue.delayed_size.return_value = 5
+
+        with pytest.raises(TaskRejectedError) as excinfo:
+            await worker.enqueue_task("brief", priority=TaskPriority.HIGH)
+
+        assert excinfo.value.admission.queue_depth == 20
+        worker.queue.push.assert_not_awaited()
+        await worker.enqueue_task("brief", priority=TaskPriority.URGENT)
+        worker.queue.push.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_only_delayed_tasks_due_before_drain_count(self, worker):
+        worker.queue.size.return_value = 8
+        worker.autoscaler.limit = 2
+        worker.autoscaler.observe_latency("brief", 1.5)
+
+        async def delayed_size(redis_client, due_within=None):
+            return 500 if due_within is None else 4
+
+        worker.queue.delayed_size.side_effect = delayed_size
+        with patch("services.background_workers.get_prometheus_service") as prometheus:
+            admission = await worker.admit(TaskPriority.LOW)
+
+        assert admission.queue_depth == 12
+        assert admission.decision == AdmissionDecision.DEFER
+        # 8 tasks at 1.5s each across 2 workers drain in 6s
+        assert worker.queue.delayed_size.await_args.kwargs["due_within"] == 6.0
+        assert worker.metrics["delayed_queue_size"] == 500
+        prometheus.return_value.set_queue_size.assert_any_call("delayed", 500)
+        prometheus.return_value.set_queue_size.assert_any_call("ready", 8)
+
+    @pytest.mark.asyncio
+    async def test_depth_is_read_once_per_refresh_interval(self, worker):
+        worker.queue.size.return_value = 0
+
+        for _ in range(5):
+            await worker.admit()
+
+        assert worker.queue.size.await_count == 1
+        assert worker.metrics["admissions"]["accept"] == 5
+
+    @pytest.mark.asyncio
+    async def test_admits_when_depth_unavailable(self, worker):
+        worker.queue.size.side_effect = ConnectionError("down")
+
+        admission = await worker.admit(TaskPriority.LOW)
+
+        assert admission.decision == AdmissionDecision.ACCEPT
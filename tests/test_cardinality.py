@@ -0,0 +1,126 @@
+from unittest.mock import patch
+
+from prometheus_client import CollectorRegistry, Counter
+
+from services.cardinality import (
+    ANONYMOUS_LABEL,
+    OTHER_LABEL,
+    SeriesBudget,
+    SpaceSaving,
+    UserLabelGuard,
+)
+from services.prometheus_integration import get_prometheus_service
+
+
+def make_counter(name="requests_total", labelnames=("endpoint", "user_id")):
+    return Counter(name, "test", list(labelnames), registry=CollectorRegistry())
+
+
+def user_labels(counter):
+    return {
+        sample.labels["user_id"]
+        for metric in counter.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_total")
+    }
+
+
+class TestSpaceSaving:
+    def test_heavy_hitters_survive_a_long_tail(self):
+        tracker = SpaceSaving(capacity=10)
+        for i in range(1000):
+            tracker.add("whale", 5)
+            tracker.add(f"tail-{i}")
+
+        top = tracker.top(1)[0]
+        assert top[0] == "whale"
+        assert top[1] >= 5000
+        assert len(tracker.counters) == 10
+
+    def test_weights_are_summed(self):
+        tracker = SpaceSaving(capacity=4)
+        tracker.add("a", 0.25)
+        tracker.add("a", 0.5)
+
+        assert tracker.top(1) == [("a", 0.75, 0.0)]
+
+
+class TestSeriesBudget:
+    def test_overflow_is_counted_per_metric(self):
+        budget = SeriesBudget(max_series=1)
+
+        assert budget.reserve("a")
+        assert not budget.reserve("b")
+        budget.release()
+        assert budget.reserve("b")
+        assert budget.overflows == {"b": 1}
+
+
+class TestUserLabelGuard:
+    def test_only_top_k_users_get_their_own_label(self):
+        counter = make_counter()
+        guard = UserLabelGuard(
+            counter, ["endpoint", "user_id"], SeriesBudget(100), k=2, refresh_every=10
+        )
+
+        for i in range(200):
+            guard.labels(f"user-{i}", endpoint="/ai").inc()
+
+        assert user_labels(counter) <= {"user-0", "user-1", OTHER_LABEL}
+        assert OTHER_LABEL in user_labels(counter)
+
+    def test_demoted_users_series_are_removed(self):
+        counter = make_counter()
+        budget = SeriesBudget(100)
+        guard = UserLabelGuard(
+            counter, ["endpoint", "user_id"], budget, k=1, refresh_every=20
+        )
+
+        guard.labels("early", endpoint="/ai").inc()
+        for i in range(40):
+            guard.labels("whale", 10, endpoint="/ai").inc()
+            guard.labels(f"tail-{i}", 2, endpoint="/ai").inc()
+
+        assert "early" not in user_labels(counter)
+        assert "whale" in user_labels(counter)
+        assert guard.exported == {"whale"}
+        assert budget.series == 2  # whale and other
+
+    def test_anonymous_requests_are_not_ranked(self):
+        counter = make_counter()
+        guard = UserLabelGuard(counter, ["endpoint", "user_id"], SeriesBudget(10))
+
+        guard.labels(None, endpoint="/health").inc()
+
+        assert user_labels(counter) == {ANONYMOUS_LABEL}
+        assert guard.top_users() == []
+
+    def test_budget_exhaustion_drops_new_series(self):
+        counter = make_counter()
+        overflowed = []
+        guard = UserLabelGuard(
+            counter,
+            ["endpoint", "user_id"],
+            SeriesBudget(2),
+            on_overflow=overflowed.append,
+        )
+
+        assert guard.labels("a", endpoint="/x") is not None
+        assert guard.labels("a", endpoint="/y") is not None
+        assert guard.labels("a", endpoint="/z") is None
+        # Existing series keep working once the budget is spent
+        assert guard.labels("a", endpoint="/x") is not None
+        assert overflowed == ["requests"]
+
+
+class TestPrometheusServiceUserLabels:
+    def test_ai_cost_ranked_by_dollars(self):
+        prometheus = get_prometheus_service()
+
+        with patch.object(prometheus, "initialized", True):
+            prometheus.record_ai_cost("openai", "chat", 0.01, user_id="cardinality-small")
+            prometheus.record_ai_cost("openai", "chat", 50.0, user_id="cardinality-big")
+
+        top = prometheus.get_top_users("ai_cost", limit=1)
+        assert top[0]["user_id"] == "cardinality-big"
+        assert top[0]["value"] >= 50.0
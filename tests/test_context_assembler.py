@@ -0,0 +1,146 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.ai.context_assembler import (
+    ContextAssembler,
+    ContextSource,
+    build_user_context,
+)
+from services.ai.context_manager import AdvancedContextManager, ContextType
+
+
+def _delayed(value, delay):
+    async def fetch(*_):
+        await asyncio.sleep(delay)
+        return value
+
+    return fetch
+
+
+class TestContextAssembler:
+    @pytest.mark.asyncio
+    async def test_sources_run_concurrently(self):
+        assembler = ContextAssembler(default_timeout=1)
+        sources = [
+            ContextSource(f"s{i}", _delayed(i, 0.05), default=None) for i in range(5)
+        ]
+
+        start = time.perf_counter()
+        result = await assembler.assemble(sources)
+        elapsed = time.perf_counter() - start
+
+        assert result.data == {f"s{i}": i for i in range(5)}
+        assert not result.partial
+        # Latency is the max of the sources, not their sum (5 * 0.05)
+        assert elapsed < 0.2
+
+    @pytest.mark.asyncio
+    async def test_timed_out_source_returns_partial_context(self):
+        assembler = ContextAssembler(default_timeout=1)
+        sources = [
+            ContextSource("fast", _delayed("ok", 0), default=None),
+            ContextSource("slow", _delayed("late", 1), default=[], timeout=0.05),
+        ]
+
+        result = await assembler.assemble(sources)
+
+        assert result.data == {"fast": "ok", "slow": []}
+        assert result.partial
+        assert result.timed_out == ["slow"]
+        assert result.missing_sources == ["slow"]
+
+    @pytest.mark.asyncio
+    async def test_failed_source_uses_default(self):
+        async def broken():
+            raise RuntimeError("db down")
+
+        result = await ContextAssembler().assemble(
+            [ContextSource("goals", broken, default=[])]
+        )
+
+        assert result.data["goals"] == []
+        assert result.failed == ["goals"]
+
+    @pytest.mark.asyncio
+    async def test_build_user_context_flags_partial(self):
+        async def execute():
+            await asyncio.sleep(1)
+
+        with patch(
+            "services.ai.context_assembler.context_assembler",
+            ContextAssembler(default_timeout=0.05),
+        ), patch(
+            "services.ai.context_assembler.get_async_supabase_client"
+        ) as mock_client:
+            mock_client.return_value.table.return_value.select.return_value.eq.return_value.limit.return_value.execute = (
+                execute
+            )
+            context = await build_user_context("user-123")
+
+        assert context["user_id"] == "user-123"
+        assert context["partial"] is True
+        assert set(context["missing_sources"]) == {"tasks", "goals", "schedule_blocks"}
+        assert context["tasks"] == []
+
+
+class TestContextManagerFanOut:
+    @pytest.mark.asyncio
+    async def test_build_comprehensive_context_is_concurrent(self):
+        manager = AdvancedContextManager(source_timeout=1)
+        for name in [
+            "_get_current_goals",
+            "_get_recent_tasks",
+            "_get_mood_trends",
+        ]:
+            setattr(manager, name, AsyncMock(side_effect=_delayed([{"id": 1}], 0.05)))
+        for name in [
+            "_analyze_productivity_patterns",
+            "_get_schedule_preferences",
+            "_get_learning_progress",
+        ]:
+            setattr(manager, name, AsyncMock(side_effect=_delayed({"k": 1}, 0.05)))
+
+        start = time.perf_counter()
+        context = await manager.build_comprehensive_context(
+            "user-fanout", [t for t in ContextType if t != ContextType.HABIT_PATTERNS]
+        )
+        elapsed = time.perf_counter() - start
+
+        assert context.current_goals == [{"id": 1}]
+        assert context.learning_progress == {"k": 1}
+        assert context.partial is False
+        assert elapsed < 0.2
+
+    @pytest.mark.asyncio
+    async def test_build_comprehensive_context_partial_on_timeout(self):
+        manager = AdvancedContextManager(source_timeout=0.05)
+        manager._get_mood_trends = AsyncMock(side_effect=_delayed([], 1))
+
+        context = await manager.build_comprehensive_context(
+            "user-partial", [ContextType.MOOD_TRENDS]
+        )
+
+        assert context.partial is True
+        assert context.missing_sources == ["mood_trends"]
+        assert context.mood_trends == []
+
+    @pytest.mark.asyncio
+    async def test_failing_builder_is_reported_and_not_cached(self):
+        manager = AdvancedContextManager(source_timeout=1)
+        manager.supabase = MagicMock()
+        manager.supabase.table.side_effect = RuntimeError("db down")
+
+        with patch("services.ai.context_manager.cache_service") as cache:
+            cache.get = AsyncMock(return_value=None)
+            cache.set = AsyncMock()
+            context = await manager.build_comprehensive_context(
+                "user-failed", [ContextType.GOAL_PROGRESS, ContextType.INTERACTION_HISTORY]
+            )
+
+        assert context.partial is True
+        assert context.missing_sources == ["current_goals"]
+        assert context.current_goals == []
+        cache.set.assert_not_awaited()
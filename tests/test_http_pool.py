@@ -0,0 +1,84 @@
+"""
+Tests for the shared outbound HTTP connection pool
+"""
+
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from services.ai.providers.llama_client import LlamaClient
+from services.http_pool import HTTPClientPool
+
+
+class TestHTTPClientPool:
+    def test_reuses_client_per_origin(self):
+        pool = HTTPClientPool()
+
+        first = pool.get_client("https://api.openai.com/v1/chat/completions")
+        second = pool.get_client("https://api.openai.com/v1/models")
+
+        assert first is second
+
+    def test_separate_clients_per_host_and_port(self):
+        pool = HTTPClientPool()
+
+        openai = pool.get_client("https://api.openai.com/v1")
+        claude = pool.get_client("https://api.anthropic.com/v1")
+        llama = pool.get_client("http://localhost:8000")
+        other_port = pool.get_client("http://localhost:8001")
+
+        assert len({id(openai), id(claude), id(llama), id(other_port)}) == 4
+        assert pool.get_stats()["origins"] == [
+            "https://api.openai.com",
+            "https://api.anthropic.com",
+            "http://localhost:8000",
+            "http://localhost:8001",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_close_and_reopen(self):
+        pool = HTTPClientPool()
+        client = pool.get_client("http://localhost:8000")
+
+        await pool.close()
+
+        assert client.is_closed
+        assert pool.get_stats()["origins"] == []
+        assert pool.get_client("http://localhost:8000") is not client
+
+
+class TestProviderUsesPool:
+    @pytest.mark.asyncio
+    async def test_llama_generate_reuses_pooled_client(self):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(
+                200,
+                json={
+                    "choices": [
+                        {"message": {"content": "Pooled answer"}, "finish_reason": "stop"}
+                    ],
+                    "usage": {"total_tokens": 12},
+                },
+            )
+
+        pool = HTTPClientPool()
+        pool._clients["http://localhost:8000"] = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler)
+        )
+
+        with patch(
+            "services.ai.providers.base_client.get_http_pool", return_value=pool
+        ), patch.dict("os.environ", {"LLAMA_API_URL": "http://localhost:8000"}):
+            client = LlamaClient()
+            first = await client.generate("Hello")
+            second = await client.generate("Hello again")
+
+        assert first.content == "Pooled answer"
+        assert second.tokens_used == 12
+        assert len(requests) == 2
+        assert pool.get_stats()["origins"] == ["http://localhost:8000"]
+        await pool.close()
@@ -3,6 +3,7 @@ Test Hybrid AI Service
 Tests the hybrid AI routing and provider management functionality.
 """
 
+import asyncio
 from unittest.mock import AsyncMock, patch
 
 import pytest
@@ -13,6 +14,7 @@ from services.ai.hybrid_ai_service import (
     TaskType,
     get_hybrid_ai_service,
 )
+from services.ai.latency_tracker import ProviderLatencyTracker
 from services.ai.providers.base_client import AIResponse
 
 
@@ -271,5 +273,227 @@ class TestModelProvider:
         assert ModelProvider.OPENAI_API == "openai_api"
 
 
+class TestHedgedRouting:
+    """Test latency-aware hedging between providers"""
+
+    @pytest.fixture
+    def hybrid_service(self):
+        service = HybridAIService()
+        for config in service.model_configs.values():
+            config.latency_ms = 20  # Hedge after 20 ms until real samples exist
+        return service
+
+    def _client(self, content, delay=0.0, fail=False):
+        async def generate(prompt, **kwargs):
+            await asyncio.sleep(delay)
+            if fail:
+                raise Exception("provider down")
+            return AIResponse(
+                content=content,
+                model_used=content,
+                provider=content,
+                tokens_used=10,
+                cost_usd=0.0001,
+                quality_score=0.95,
+                response_time_ms=int(delay * 1000),
+            )
+
+        client = AsyncMock()
+        client.is_available.return_value = True
+        client.generate.side_effect = generate
+        return client
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged(self, hybrid_service):
+        primary = self._client("llama", delay=5)
+        secondary = self._client("mistral")
+        hybrid_service.clients[ModelProvider.LLAMA_SELF_HOSTED] = primary
+        hybrid_service.clients[ModelProvider.MISTRAL_SELF_HOSTED] = secondary
+
+        response = await asyncio.wait_for(
+            hybrid_service.generate_response(
+                TaskType.FLASHCARD, "Test prompt", "test_user", use_cache=False
+            ),
+            timeout=1,
+        )
+
+        assert response.content == "mistral"
+        secondary.generate.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_cost_cap_prevents_hedge(self, hybrid_service):
+        hybrid_service.hedge_cost_cap_usd = 0
+        primary = self._client("llama", delay=0.1)
+        secondary = self._client("mistral")
+        hybrid_service.clients[ModelProvider.LLAMA_SELF_HOSTED] = primary
+        hybrid_service.clients[ModelProvider.MISTRAL_SELF_HOSTED] = secondary
+
+        response = await hybrid_service.generate_response(
+            TaskType.FLASHCARD, "Test prompt", "test_user", use_cache=False
+        )
+
+        assert response.content == "llama"
+        secondary.generate.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failure_fails_over_immediately(self, hybrid_service):
+        hybrid_service.clients[ModelProvider.LLAMA_SELF_HOSTED] = self._client(
+            "llama", fail=True
+        )
+        hybrid_service.clients[ModelProvider.MISTRAL_SELF_HOSTED] = self._client(
+            "mistral"
+        )
+
+        response = await hybrid_service.generate_response(
+            TaskType.FLASHCARD, "Test prompt", "test_user", use_cache=False
+        )
+
+        assert response.content == "mistral"
+
+    @pytest.mark.asyncio
+    async def test_sequential_mode_waits_for_primary(self, hybrid_service):
+        primary = self._client("llama", delay=0.1)
+        secondary = self._client("mistral")
+        hybrid_service.clients[ModelProvider.LLAMA_SELF_HOSTED] = primary
+        hybrid_service.clients[ModelProvider.MISTRAL_SELF_HOSTED] = secondary
+
+        response = await hybrid_service.generate_response(
+            TaskType.FLASHCARD, "Test prompt", "test_user", use_cache=False, hedge=False
+        )
+
+        assert response.content == "llama"
+        secondary.generate.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_successful_latency_is_tracked(self, hybrid_service):
+        hybrid_service.clients[ModelProvider.LLAMA_SELF_HOSTED] = self._client("llama")
+
+        await hybrid_service.generate_response(
+            TaskType.FLASHCARD, "Test prompt", "test_user", use_cache=False
+        )
+
+        stats = hybrid_service.latency_tracker.get_stats()
+        assert stats["llama_self_hosted"]["samples"] == 1
+
+
+class TestProviderLatencyTracker:
+    """Test rolling provider latency percentiles"""
+
+    def test_default_until_min_samples(self):
+        tracker = ProviderLatencyTracker(min_samples=5)
+        for _ in range(4):
+            tracker.record("llama", 0.1)
+
+        assert tracker.p95("llama", default=2.0) == 2.0
+
+    def test_p95_over_window(self):
+        tracker = ProviderLatencyTracker(window=100, min_samples=10)
+        for i in range(1, 101):
+            tracker.record("llama", i / 100)
+
+        assert tracker.p95("llama", default=2.0) == pytest.approx(0.95)
+
+    def test_window_is_bounded(self):
+        tracker = ProviderLatencyTracker(window=10, min_samples=1)
+        for _ in range(50):
+            tracker.record("llama", 5.0)
+        for _ in range(10):
+            tracker.record("llama", 0.1)
+
+        assert tracker.p95("llama", default=2.0) == pytest.approx(0.1)
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
+
+
+class TestStreaming:
+    """Test streaming responses with mid-stream failover"""
+
+    @pytest.fixture
+    def hybrid_service(self):
+        return HybridAIService()
+
+    def _client(self, chunks, fail_after=None):
+        prompts = []
+
+        async def generate_stream(prompt, **kwargs):
+            prompts.append(prompt)
+            for index, chunk in enumerate(chunks):
+                if index == fail_after:
+                    raise Exception("provider down")
+                yield chunk
+            if fail_after is not None and fail_after >= len(chunks):
+                raise Exception("provider down")
+
+        client = AsyncMock()
+        client.is_available.return_value = True
+        client.generate_stream = generate_stream
+        client.prompts = prompts
+        return client
+
+    async def _collect(self, hybrid_service, **kwargs):
+        return [
+            text
+            async for text in hybrid_service.generate_stream(
+                TaskType.CONVERSATION, "Test prompt", "test_user", **kwargs
+            )
+        ]
+
+    @pytest.mark.asyncio
+    async def test_streams_chunks_in_order(self, hybrid_service):
+        hybrid_service.clients[ModelProvider.LLAMA_SELF_HOSTED] = self._client(
+            ["Hello", " there"]
+        )
+
+        chunks = await self._collect(hybrid_service, use_cache=False)
+
+        assert chunks == ["Hello", " there"]
+
+    @pytest.mark.asyncio
+    async def test_failure_before_first_token_uses_next_provider(self, hybrid_service):
+        primary = self._client(["unused"], fail_after=0)
+        secondary = self._client(["Fallback answer"])
+        hybrid_service.clients[ModelProvider.LLAMA_SELF_HOSTED] = primary
+        hybrid_service.clients[ModelProvider.DEEPSEEK_API] = secondary
+
+        chunks = await self._collect(hybrid_service, use_cache=False)
+
+        assert chunks == ["Fallback answer"]
+        assert secondary.prompts == ["Test prompt"]
+
+    @pytest.mark.asyncio
+    async def test_mid_stream_failover_continues_answer(self, hybrid_service):
+        primary = self._client(["The answer ", "is"], fail_after=2)
+        secondary = self._client([" forty-two."])
+        hybrid_service.clients[ModelProvider.LLAMA_SELF_HOSTED] = primary
+        hybrid_service.clients[ModelProvider.DEEPSEEK_API] = secondary
+
+        chunks = await self._collect(hybrid_service, use_cache=False)
+
+        assert "".join(chunks) == "The answer is forty-two."
+        assert "PARTIAL ANSWER:\nThe answer is" in secondary.prompts[0]
+
+    @pytest.mark.asyncio
+    async def test_all_providers_failing_raises(self, hybrid_service):
+        for model in ModelProvider:
+            hybrid_service.clients[model] = self._client([], fail_after=0)
+
+        with pytest.raises(Exception, match="All AI providers failed"):
+            await self._collect(hybrid_service, use_cache=False)
+
+    @pytest.mark.asyncio
+    async def test_streamed_response_is_cached(self, hybrid_service):
+        primary = self._client(["Cached ", "reply"])
+        hybrid_service.clients[ModelProvider.LLAMA_SELF_HOSTED] = primary
+
+        with patch("services.ai.hybrid_ai_service.enhanced_cache") as cache:
+            cache.get = AsyncMock(return_value=None)
+            cache.set = AsyncMock()
+
+            first = await self._collect(hybrid_service)
+            second = await self._collect(hybrid_service)
+
+        assert first == ["Cached ", "reply"]
+        assert second == ["Cached reply"]
+        assert len(primary.prompts) == 1
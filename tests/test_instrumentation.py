@@ -0,0 +1,157 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from middleware.instrumentation import (
+    UNMATCHED_ROUTE,
+    InstrumentationMiddleware,
+    access_log_hook,
+    endpoint_latency_hook,
+    performance_monitor_hook,
+    prometheus_hook,
+)
+from middleware.rate_limit import RateLimiter, setup_rate_limiting
+
+
+@pytest.fixture
+def samples():
+    return []
+
+
+@pytest.fixture
+def app(samples):
+    app = FastAPI()
+    router = APIRouter(prefix="/api")
+
+    @router.get("/tasks/{task_id}")
+    async def get_task(task_id: str):
+        return {"id": task_id}
+
+    @router.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.include_router(router)
+    app.add_middleware(InstrumentationMiddleware, hooks=[samples.append])
+    return app
+
+
+class TestInstrumentationMiddleware:
+    def test_one_sample_labelled_by_route_template(self, app, samples):
+        response = TestClient(app).get("/api/tasks/123")
+
+        assert response.status_code == 200
+        assert len(samples) == 1
+        sample = samples[0]
+        assert (sample.method, sample.route, sample.path) == (
+            "GET",
+            "/api/tasks/{task_id}",
+            "/api/tasks/123",
+        )
+        assert sample.status_code == 200
+        assert sample.duration > 0
+        assert response.headers["X-Request-ID"] == sample.request_id
+        assert float(response.headers["X-Response-Time"]) <= sample.duration
+
+    def test_unmatched_paths_share_a_label(self, app, samples):
+        client = TestClient(app)
+        client.get("/wp-admin")
+        client.get("/.env")
+
+        assert {sample.route for sample in samples} == {UNMATCHED_ROUTE}
+        assert {sample.status_code for sample in samples} == {404}
+
+    def test_exceptions_recorded_as_500(self, app, samples):
+        client = TestClient(app, raise_server_exceptions=False)
+
+        assert client.get("/api/boom").status_code == 500
+        assert samples[0].status_code == 500
+        assert isinstance(samples[0].error, RuntimeError)
+
+    def test_failing_hook_does_not_affect_response(self, samples):
+        app = FastAPI()
+
+        @app.get("/ping")
+        async def ping():
+            return {"ok": True}
+
+        def broken(sample):
+            raise ValueError("hook bug")
+
+        app.add_middleware(InstrumentationMiddleware, hooks=[broken, samples.append])
+
+        assert TestClient(app).get("/ping").status_code == 200
+        assert len(samples) == 1
+
+
+class TestHooks:
+    @pytest.fixture
+    def sample(self, app, samples):
+        TestClient(app).get("/api/tasks/7")
+        return samples[0]
+
+    def test_prometheus_hook_uses_route_template(self, sample):
+        prometheus = MagicMock()
+        with patch(
+            "middleware.instrumentation.get_prometheus_service",
+            return_value=prometheus,
+        ):
+            prometheus_hook(sample)
+
+        kwargs = prometheus.record_http_request.call_args.kwargs
+        assert kwargs["endpoint"] == "/api/tasks/{task_id}"
+        prometheus.record_error.assert_not_called()
+
+    def test_monitor_hooks(self, sample):
+        with patch("middleware.instrumentation.endpoint_monitor") as endpoint_monitor:
+            endpoint_latency_hook(sample)
+        endpoint_monitor.record_request.assert_called_once_with(
+            "/api/tasks/{task_id}", "GET", sample.duration, 200
+        )
+
+        monitor = MagicMock()
+        with patch(
+            "middleware.instrumentation.get_performance_monitor", return_value=monitor
+        ):
+            performance_monitor_hook(sample)
+        monitor.observe_request.assert_called_once()
+
+    def test_access_log(self, sample, caplog):
+        with caplog.at_level("INFO", logger="middleware.instrumentation"):
+            access_log_hook(sample)
+
+        record = caplog.records[-1]
+        assert record.request_data["route"] == "/api/tasks/{task_id}"
+        assert record.request_data["request_id"] == sample.request_id
+
+
+class TestPureASGIRateLimit:
+    def test_refuses_without_reaching_app(self):
+        app = FastAPI()
+        calls = []
+
+        @app.get("/ping")
+        async def ping():
+            calls.append(1)
+            return {"ok": True}
+
+        setup_rate_limiting(app)
+        limiter = RateLimiter(burst_limit=1)
+        limiter.acquire = AsyncMock(
+            side_effect=[MagicMock(allowed=True), MagicMock(allowed=False, retry_after=2)]
+        )
+        monitor = MagicMock(record_metric=AsyncMock())
+        with (
+            patch("middleware.rate_limit.rate_limiter", limiter),
+            patch("middleware.rate_limit.get_performance_monitor", return_value=monitor),
+        ):
+            client = TestClient(app)
+            responses = [client.get("/ping"), client.get("/ping")]
+
+        assert [response.status_code for response in responses] == [200, 429]
+        assert responses[1].headers["Retry-After"] == "2"
+        assert calls == [1]
+        # Allowed requests record nothing
+        monitor.record_metric.assert_awaited_once()
@@ -0,0 +1,210 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.metric_store import HOUR, MINUTE, RAW, MetricStore, bucket_key, to_epoch
+from services.performance_monitor import PerformanceMetric, PerformanceMonitor
+
+
+class FakePipeline:
+    """Just enough of a Redis pipeline for the metric store"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+
+        return queue
+
+    async def execute(self):
+        self.redis.executed.append([name for name, _, _ in self.commands])
+        return [
+            getattr(self.redis, f"_{name}")(*args, **kwargs)
+            for name, args, kwargs in self.commands
+        ]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def hgetall(self, key):
+        return self._hgetall(key)
+
+    async def keys(self, pattern):
+        raise AssertionError("metric store must not scan keys")
+
+    def _hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def _zadd(self, key, mapping, lt=False, gt=False):
+        zset = self.data.setdefault(key, {})
+        for member, score in mapping.items():
+            current = zset.get(member)
+            if (
+                current is None
+                or not (lt or gt)
+                or (lt and score < current)
+                or (gt and score > current)
+            ):
+                zset[member] = score
+
+    def _zrangebyscore(self, key, low, high):
+        ranked = sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+        return [member for member, score in ranked if low <= score <= high]
+
+    def _zrange(self, key, start, stop, withscores=False):
+        return sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+
+    def _expireat(self, key, when):
+        self.expiry[key] = when
+
+    def _hincrby(self, key, field, amount):
+        fields = self.data.setdefault(key, {})
+        fields[field] = str(int(fields.get(field, 0)) + amount)
+
+    def _hincrbyfloat(self, key, field, amount):
+        fields = self.data.setdefault(key, {})
+        fields[field] = str(float(fields.get(field, 0)) + amount)
+
+    def _hset(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+
+def metric(name, value, when):
+    return PerformanceMetric(when, name, value, "seconds", {"path": "/x"}, {})
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+BASE = datetime(2026, 1, 1, 12, 0, 0)
+
+
+class TestMetricStore:
+    @pytest.mark.asyncio
+    async def test_batch_written_in_one_pipeline(self, redis):
+        store = MetricStore()
+
+        written = await store.write(
+            redis, [metric("latency", i / 10, BASE + timedelta(seconds=i)) for i in range(50)]
+        )
+
+        assert written == 50
+        assert len(redis.executed) == 1
+
+    @pytest.mark.asyncio
+    async def test_rollups_keep_count_sum_min_max(self, redis):
+        store = MetricStore()
+        await store.write(redis, [metric("latency", 1.0, BASE), metric("latency", 3.0, BASE)])
+        await store.write(redis, [metric("latency", 0.5, BASE + timedelta(seconds=30))])
+
+        start = to_epoch(BASE)
+        (minute,) = await store.query_rollups(redis, "latency", start, start + 59, MINUTE)
+        (hour,) = await store.query_rollups(redis, "latency", start, start, HOUR)
+
+        for rollup in (minute, hour):
+            assert (rollup.count, rollup.min, rollup.max) == (3, 0.5, 3.0)
+            assert rollup.avg == pytest.approx(1.5)
+
+    @pytest.mark.asyncio
+    async def test_range_reads_only_overlapping_buckets(self, redis):
+        store = MetricStore()
+        await store.write(
+            redis,
+            [
+                metric("latency", 1.0, BASE),
+                metric("latency", 2.0, BASE + timedelta(hours=3)),
+            ],
+        )
+        redis.executed.clear()
+
+        start = to_epoch(BASE + timedelta(hours=3))
+        points = await store.query_raw(redis, "latency", start, start + 60)
+
+        assert [value for _, value, _ in points] == [2.0]
+        assert redis.executed == [["zrangebyscore"]]
+
+    @pytest.mark.asyncio
+    async def test_every_bucket_expires_after_its_retention(self, redis):
+        store = MetricStore(rollup_retention_days=2)
+        await store.write(redis, [metric("latency", 1.0, BASE)])
+
+        hour_start = int(to_epoch(BASE))
+        day_start = hour_start - 12 * 3600
+        assert redis.expiry[bucket_key("latency", RAW, hour_start)] == (
+            hour_start + 3600 + RAW.retention
+        )
+        assert redis.expiry[bucket_key("latency", MINUTE, hour_start) + ":min"] == (
+            hour_start + 3600 + MINUTE.retention
+        )
+        assert redis.expiry[bucket_key("latency", HOUR, day_start)] == (
+            day_start + 86400 + 2 * 86400
+        )
+
+    @pytest.mark.asyncio
+    async def test_equal_points_are_kept(self, redis):
+        store = MetricStore()
+        await store.write(redis, [metric("latency", 1.0, BASE)] * 3)
+
+        start = to_epoch(BASE)
+        assert len(await store.query_raw(redis, "latency", start, start)) == 3
+
+
+class TestPerformanceMonitorStorage:
+    @pytest.mark.asyncio
+    async def test_flush_and_query_without_key_scans(self, redis):
+        monitor = PerformanceMonitor()
+        monitor.redis = redis
+        now = datetime.utcnow()
+        monitor.metrics_buffer.extend(
+            [metric("latency", 0.2, now - timedelta(seconds=5)), metric("cpu_usage", 50, now)]
+        )
+
+        await monitor._flush_metrics()
+        latest = await monitor.get_metrics(limit=1)
+        latency = await monitor.get_metrics("latency")
+
+        assert len(monitor.metrics_buffer) == 0
+        assert [m.metric_type for m in latest] == ["cpu_usage"]
+        assert latency[0].value == 0.2 and latency[0].tags == {"path": "/x"}
+
+    @pytest.mark.asyncio
+    async def test_old_ranges_served_from_rollups(self, redis):
+        monitor = PerformanceMonitor()
+        monitor.redis = redis
+        then = datetime.utcnow() - timedelta(days=2)
+        monitor.metrics_buffer.extend(
+            [metric("latency", 1.0, then), metric("latency", 2.0, then)]
+        )
+        await monitor._flush_metrics()
+
+        (point,) = await monitor.get_metrics(
+            "latency", then - timedelta(minutes=1), then + timedelta(minutes=1)
+        )
+
+        assert point.tags == {"resolution": "1m"}
+        assert point.value == pytest.approx(1.5)
+        assert point.metadata["count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_write_drops_the_batch(self):
+        monitor = PerformanceMonitor()
+        monitor.redis = MagicMock()
+        monitor.redis.pipeline.side_effect = ConnectionError("down")
+        monitor.metrics_buffer.append(metric("latency", 1.0, BASE))
+
+        await monitor._flush_metrics()
+
+        assert len(monitor.metrics_buffer) == 0
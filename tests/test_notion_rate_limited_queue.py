@@ -0,0 +1,129 @@
+"""
+Tests for the per-integration token-bucket NotionRateLimitedQueue
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from services.notion.rate_limited_queue import NotionRateLimitedQueue
+
+
+def _status_error(status_code, headers=None):
+    request = httpx.Request("GET", "https://api.notion.com/v1/pages/1")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def _recording_queue(**kwargs):
+    queue = NotionRateLimitedQueue(**kwargs)
+    sent = []
+
+    async def send(request):
+        sent.append((request.api_key, request.endpoint, time.monotonic()))
+        return {"object": "page"}
+
+    queue._send = send
+    return queue, sent
+
+
+class TestNotionRateLimitedQueue:
+    @pytest.mark.asyncio
+    async def test_runs_at_the_permitted_rate(self):
+        queue, sent = _recording_queue(max_requests_per_second=20, burst=1)
+
+        start = time.monotonic()
+        futures = [
+            await queue.enqueue_request("GET", f"pages/{i}", "key") for i in range(6)
+        ]
+        await asyncio.gather(*futures)
+        elapsed = time.monotonic() - start
+        await queue.stop()
+
+        # One token up front, then one every 50ms; no idle pause between batches
+        assert 0.2 <= elapsed < 0.45
+
+    @pytest.mark.asyncio
+    async def test_workspaces_run_in_parallel(self):
+        queue, sent = _recording_queue(max_requests_per_second=10, burst=1)
+
+        start = time.monotonic()
+        futures = [
+            await queue.enqueue_request("POST", "databases/db/query", key)
+            for _ in range(4)
+            for key in ("key-a", "key-b")
+        ]
+        await asyncio.gather(*futures)
+        elapsed = time.monotonic() - start
+        await queue.stop()
+
+        assert len(sent) == 8
+        assert elapsed < 0.5  # One shared bucket would need 0.7s
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self):
+        queue, sent = _recording_queue(max_requests_per_second=100, burst=1)
+
+        futures = [
+            await queue.enqueue_request("GET", endpoint, "key", priority=priority)
+            for endpoint, priority in (("low", 3), ("high", 1), ("medium", 2))
+        ]
+        await asyncio.gather(*futures)
+        await queue.stop()
+
+        assert [endpoint for _, endpoint, _ in sent] == ["high", "medium", "low"]
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_only_that_workspace(self):
+        queue = NotionRateLimitedQueue(max_requests_per_second=100)
+        finished = {}
+        throttled = []
+
+        async def send(request):
+            if request.api_key == "key-a" and not throttled:
+                throttled.append(request)
+                raise _status_error(429, {"Retry-After": "0.3"})
+            finished[request.api_key] = time.monotonic()
+            return {"object": "page"}
+
+        queue._send = send
+        start = time.monotonic()
+        a = await queue.enqueue_request("GET", "pages/1", "key-a")
+        b = await queue.enqueue_request("GET", "pages/2", "key-b")
+        await asyncio.gather(a, b)
+        await queue.stop()
+
+        assert finished["key-a"] - start >= 0.3
+        assert finished["key-b"] - start < 0.1
+        stats = await queue.get_queue_stats()
+        assert stats["queue_size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        queue = NotionRateLimitedQueue()
+        calls = []
+
+        async def send(request):
+            calls.append(request)
+            raise _status_error(404)
+
+        queue._send = send
+        future = await queue.enqueue_request("GET", "pages/missing", "key")
+        with pytest.raises(httpx.HTTPStatusError):
+            await future
+        await queue.stop()
+
+        assert len(calls) == 1
+        assert queue.consecutive_errors == 1
+
+    @pytest.mark.asyncio
+    async def test_idle_workspaces_are_dropped(self):
+        queue, _ = _recording_queue(idle_timeout=0.05)
+
+        await (await queue.enqueue_request("GET", "users", "key"))
+        assert len(queue.workspaces) == 1
+        await asyncio.sleep(0.1)
+
+        assert queue.workspaces == {}
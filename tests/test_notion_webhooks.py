@@ -574,3 +574,62 @@ class TestNotionPages:
 
         assert response.status_code == 400
         assert "Notion API key not configured" in response.json()["detail"]
+
+
+class TestNotionRateLimitedCalls:
+    """Notion calls go through NotionClient and the per-token queue."""
+
+    def test_get_notion_pages_searches_through_client(self):
+        from routes.notion import get_notion_client
+
+        notion_client = MagicMock()
+
+        async def search(query="", filter_params=None):
+            if filter_params["value"] == "database":
+                return [{"id": "db1"}]
+            return [
+                {
+                    "id": "page1",
+                    "url": "https://notion.so/page1",
+                    "last_edited_time": "2024-01-01T12:00:00.000Z",
+                    "properties": {
+                        "title": {"type": "title", "title": [{"plain_text": "Test Page"}]}
+                    },
+                    "parent": {"type": "workspace"},
+                }
+            ]
+
+        notion_client.search = AsyncMock(side_effect=search)
+        app.dependency_overrides[get_notion_client] = lambda: notion_client
+        try:
+            response = client.get("/api/notion/notion/pages")
+        finally:
+            app.dependency_overrides.pop(get_notion_client)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["pages"][0]["title"] == "Test Page"
+        assert data["total_databases"] == 1
+        assert notion_client.search.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_queue_notion_sync_enqueues_background_task(self, mock_supabase):
+        from models.subscription import PlanType
+        from routes.notion import queue_notion_sync
+
+        mock_supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+            {"notion_api_key": "secret_key"}
+        ]
+
+        with (
+            patch("routes.notion.background_worker") as worker,
+            patch("routes.notion.stripe_service") as stripe_service,
+        ):
+            worker.enqueue_task = AsyncMock(return_value="task-1")
+            stripe_service.get_user_plan = AsyncMock(return_value=PlanType.PRO)
+            await queue_notion_sync("user-1", "page-1", None, "2024-01-01T12:00:00Z")
+
+        args = worker.enqueue_task.call_args
+        assert args.args[:2] == ("notion_sync", "user-1")
+        assert args.args[2]["page_id"] == "page-1"
+        assert (args.kwargs["tenant"], args.kwargs["plan"]) == ("user-1", "pro")
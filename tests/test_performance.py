@@ -0,0 +1,162 @@
+import json
+import random
+import statistics
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from services.latency_sketch import LatencySketch, WindowedSketch
+from services.performance import SKETCH_KEY_PREFIX, PerformanceMonitor
+
+
+def _exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class TestLatencySketch:
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-3, 1) for _ in range(20000)]
+        sketch = LatencySketch()
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = _exact_quantile(values, q)
+            assert abs(sketch.quantile(q) - exact) <= exact * 0.02
+        assert sketch.mean == pytest.approx(statistics.mean(values))
+        assert len(sketch.buckets) < 1000
+
+    def test_merge_equals_single_sketch(self):
+        rng = random.Random(3)
+        values = [rng.expovariate(10) for _ in range(5000)]
+        whole, left, right = LatencySketch(), LatencySketch(), LatencySketch()
+        for i, value in enumerate(values):
+            whole.add(value)
+            (left if i % 2 else right).add(value)
+
+        left.merge(right)
+
+        assert left.buckets == whole.buckets
+        assert left.count == whole.count
+        assert left.quantile(0.99) == whole.quantile(0.99)
+
+    def test_memory_is_bounded(self):
+        sketch = LatencySketch(max_buckets=64)
+        for exponent in range(-9, 6):
+            for step in range(50):
+                sketch.add(10**exponent * (1 + step / 50))
+
+        assert len(sketch.buckets) <= 64
+        assert sketch.quantile(1) == sketch.max
+
+    def test_round_trips_through_dict(self):
+        sketch = LatencySketch()
+        for value in (0.0, 0.01, 0.2, 3.0):
+            sketch.add(value)
+
+        restored = LatencySketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+        assert restored.buckets == sketch.buckets
+        assert restored.quantile(0.5) == sketch.quantile(0.5)
+        assert (restored.min, restored.max) == (0.0, 3.0)
+
+
+class TestWindowedSketch:
+    def test_windows_forget_old_slices(self):
+        windowed = WindowedSketch()
+        windowed.add(1.0, now=1000)
+        windowed.add(2.0, error=True, now=1200)
+
+        one_minute, errors = windowed.window("1m", now=1200)
+        assert (one_minute.count, errors) == (1, 1)
+        assert windowed.window("5m", now=1200)[0].count == 2
+        assert windowed.window("1h", now=5000)[0].count == 0
+        assert windowed.total.count == 2
+
+
+class TestPerformanceMonitor:
+    def test_endpoint_stats(self):
+        monitor = PerformanceMonitor()
+        for i in range(1, 101):
+            monitor.record_request("/tasks", "GET", i / 100, 500 if i > 98 else 200)
+
+        stats = monitor.get_endpoint_stats("/tasks")
+
+        assert stats["request_count"] == 100
+        assert stats["error_count"] == 2
+        assert stats["p95_response_time"] == pytest.approx(0.95, rel=0.02)
+        assert stats["max_response_time"] == 1.0
+        assert monitor.get_endpoint_stats("/tasks", window="1m")["request_count"] == 100
+
+    def test_empty_endpoint(self):
+        stats = PerformanceMonitor().get_endpoint_stats("/missing")
+
+        assert stats["request_count"] == 0
+        assert stats["p99_response_time"] == 0
+
+    def test_slowest_and_overall(self):
+        monitor = PerformanceMonitor()
+        monitor.record_request("/fast", "GET", 0.01)
+        monitor.record_request("/slow", "POST", 2.0, 500)
+
+        slowest = monitor.get_slowest_endpoints(limit=1)
+        overall = monitor.get_overall_stats()
+
+        assert [stats["endpoint"] for stats in slowest] == ["POST /slow"]
+        assert overall["total_requests"] == 2
+        assert overall["total_errors"] == 1
+        assert len(monitor.get_recent_slow_queries()) == 1
+
+    @pytest.mark.asyncio
+    async def test_sync_merges_workers_through_redis(self):
+        store: dict[str, dict[str, str]] = {}
+        instances: dict[str, float] = {}
+
+        def make_pipeline():
+            ops = []
+            pipe = MagicMock()
+            pipe.delete.side_effect = lambda key: ops.append(lambda: store.pop(key, 0))
+            pipe.hset.side_effect = lambda key, mapping: ops.append(
+                lambda: store.setdefault(key, {}).update(mapping)
+            )
+            pipe.expire.side_effect = lambda key, ttl: ops.append(lambda: True)
+            pipe.zadd.side_effect = lambda key, mapping: ops.append(
+                lambda: instances.update(mapping)
+            )
+            pipe.zremrangebyscore.side_effect = lambda key, lo, hi: ops.append(
+                lambda: 0
+            )
+            pipe.zrange.side_effect = lambda key, start, end: ops.append(
+                lambda: sorted(instances)
+            )
+            pipe.hgetall.side_effect = lambda key: ops.append(
+                lambda: dict(store.get(key, {}))
+            )
+            pipe.execute = AsyncMock(side_effect=lambda: [op() for op in ops])
+            return pipe
+
+        redis_client = MagicMock()
+        redis_client.pipeline.side_effect = make_pipeline
+
+        first, second = PerformanceMonitor("a"), PerformanceMonitor("b")
+        for i in range(50):
+            first.record_request("/brief", "GET", 0.1)
+            second.record_request("/brief", "GET", 1.0, 500 if i < 5 else 200)
+
+        await first.sync(redis_client)
+        await second.sync(redis_client)
+
+        assert set(store) == {f"{SKETCH_KEY_PREFIX}a", f"{SKETCH_KEY_PREFIX}b"}
+        stats = second.get_endpoint_stats("/brief", window="5m", cluster=True)
+        assert stats["request_count"] == 100
+        assert stats["error_count"] == 5
+        assert stats["p99_response_time"] == pytest.approx(1.0, rel=0.02)
+        assert second.get_slowest_endpoints(window="1h", cluster=True)[0][
+            "request_count"
+        ] == 100
+
+    def test_cluster_stats_need_a_window(self):
+        with pytest.raises(ValueError):
+            PerformanceMonitor().get_endpoint_stats("/x", cluster=True)
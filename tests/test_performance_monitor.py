@@ -0,0 +1,115 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.performance_monitor import PerformanceMonitor, SystemSampler
+
+
+class TestSystemSampler:
+    def test_sample_does_not_block_on_cpu_interval(self):
+        sampler = SystemSampler()
+
+        started = time.perf_counter()
+        snapshot = sampler.sample()
+
+        assert time.perf_counter() - started < 0.5
+        assert snapshot.process_rss > 0
+        assert snapshot.process_threads >= 1
+        assert snapshot.process_open_fds >= 0
+
+    def test_network_rates_are_deltas(self):
+        sampler = SystemSampler()
+
+        first = sampler.sample()
+        second = sampler.sample()
+
+        assert first.network_send_rate == 0.0
+        assert second.network_send_rate >= 0.0
+
+    def test_thread_publishes_snapshots(self):
+        sampler = SystemSampler(interval=0.01)
+        sampler.start()
+        try:
+            deadline = time.monotonic() + 2
+            while sampler.snapshot is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            sampler.stop()
+
+        assert sampler.snapshot is not None
+        assert sampler._thread is None
+
+
+class TestCollectMetrics:
+    @pytest.mark.asyncio
+    async def test_collection_never_calls_blocking_cpu_percent(self):
+        monitor = PerformanceMonitor(collection_interval=0)
+        monitor.sampler.snapshot = monitor.sampler.sample()
+        monitor.running = True
+        monitor.record_metrics = AsyncMock()
+
+        with patch("services.performance_monitor.psutil.cpu_percent") as cpu_percent:
+            task = asyncio.create_task(monitor._collect_metrics())
+            await asyncio.sleep(0.01)
+            monitor.running = False
+            await task
+
+        cpu_percent.assert_not_called()
+        recorded = monitor.record_metrics.await_args_list[0].args[0]
+        types = {metric.metric_type for metric in recorded}
+        assert {"cpu_usage", "process_rss", "process_open_fds", "process_threads"} <= types
+
+    @pytest.mark.asyncio
+    async def test_each_snapshot_is_recorded_once(self):
+        monitor = PerformanceMonitor()
+        monitor.sampler.snapshot = monitor.sampler.sample()
+
+        first = monitor._snapshot_metrics()
+        second = monitor._snapshot_metrics()
+
+        assert any(m.metric_type == "cpu_usage" for m in first)
+        assert not any(m.metric_type == "cpu_usage" for m in second)
+        assert len(monitor.cpu_usage) == 1
+
+    @pytest.mark.asyncio
+    async def test_alerts_checked_only_for_thresholded_metrics(self):
+        monitor = PerformanceMonitor(alert_thresholds={"error_rate": {"warning": 5}})
+        monitor.request_count, monitor.error_count = 10, 5
+        monitor._trigger_alert = AsyncMock()
+
+        with patch.object(
+            monitor, "_check_alerts", wraps=monitor._check_alerts
+        ) as check_alerts:
+            await monitor.record_metrics(monitor._snapshot_metrics())
+
+        assert [call.args[0].metric_type for call in check_alerts.call_args_list] == [
+            "error_rate"
+        ]
+        monitor._trigger_alert.assert_awaited_once()
+
+    def test_summary_includes_process_metrics(self):
+        monitor = PerformanceMonitor()
+        monitor.sampler.snapshot = monitor.sampler.sample()
+
+        summary = monitor.get_performance_summary()
+
+        assert summary["process"]["rss_bytes"] > 0
+
+
+class TestObserveRequest:
+    @pytest.mark.asyncio
+    async def test_full_buffer_flushes_once_in_background(self):
+        monitor = PerformanceMonitor()
+        monitor.running = True
+        pipe = MagicMock(execute=AsyncMock())
+        monitor.redis = MagicMock(pipeline=MagicMock(return_value=pipe))
+
+        for _ in range(150):
+            monitor.observe_request("GET", "/tasks/{task_id}", 200, 0.01)
+        await asyncio.sleep(0)
+
+        assert monitor.request_count == 150
+        pipe.execute.assert_awaited_once()
+        assert len(monitor.metrics_buffer) == 0
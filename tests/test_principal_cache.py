@@ -0,0 +1,150 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.principal_cache import PrincipalCache
+from services.redis_cache import EnhancedRedisCache
+
+
+@pytest.fixture
+def mock_redis_tier():
+    with patch("services.principal_cache.enhanced_cache") as mock_cache:
+        mock_cache.get = AsyncMock(return_value=None)
+        mock_cache.set = AsyncMock(return_value=True)
+        mock_cache.delete = AsyncMock(return_value=True)
+        mock_cache.key.side_effect = lambda *parts: ":".join(parts)
+        yield mock_cache
+
+
+def _redis_cache():
+    cache = EnhancedRedisCache()
+    cache.client = MagicMock()
+    cache.client.get = AsyncMock(return_value=None)
+    cache.client.setex = AsyncMock()
+    cache.client.delete = AsyncMock(return_value=1)
+    cache.client.publish = AsyncMock()
+    return cache
+
+
+class TestPrincipalCache:
+    @pytest.mark.asyncio
+    async def test_local_hit_skips_redis(self, mock_redis_tier):
+        cache = PrincipalCache()
+        principal = {"id": "u1", "email": "a@example.com", "role": "user"}
+
+        await cache.set("a@example.com", principal)
+        assert await cache.get("a@example.com") == principal
+
+        mock_redis_tier.get.assert_not_called()
+        assert cache.get_metrics()["local_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_hit_populates_local_tier(self, mock_redis_tier):
+        cache = PrincipalCache()
+        principal = {"id": "u1", "email": "a@example.com", "role": "user"}
+        mock_redis_tier.get.return_value = principal
+
+        assert await cache.get("a@example.com") == principal
+        assert await cache.get("a@example.com") == principal
+
+        assert mock_redis_tier.get.await_count == 1
+        metrics = cache.get_metrics()
+        assert metrics["redis_hits"] == 1
+        assert metrics["local_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_miss_is_counted(self, mock_redis_tier):
+        cache = PrincipalCache()
+
+        assert await cache.get("missing@example.com") is None
+        assert cache.get_metrics()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_local_entries_expire(self, mock_redis_tier):
+        cache = PrincipalCache(local_ttl=0)
+        await cache.set("a@example.com", {"id": "u1", "email": "a@example.com"})
+
+        assert await cache.get("a@example.com") is None
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, mock_redis_tier):
+        cache = PrincipalCache(max_size=2)
+        for i in range(3):
+            await cache.set(f"u{i}@example.com", {"id": f"u{i}"})
+
+        assert cache.get_metrics()["local_size"] == 2
+        assert cache._subjects.get("principal_subject:u0") is None
+
+    @pytest.mark.asyncio
+    async def test_invalidate_user_by_id(self, mock_redis_tier):
+        cache = PrincipalCache()
+        await cache.set("a@example.com", {"id": "u1", "email": "a@example.com"})
+
+        await cache.invalidate_user("u1")
+
+        assert cache._get_local("a@example.com") is None
+        mock_redis_tier.delete.assert_any_await("principal", "a@example.com")
+        mock_redis_tier.delete.assert_any_await("principal_subject", "u1")
+
+    @pytest.mark.asyncio
+    async def test_invalidate_user_uses_redis_index(self, mock_redis_tier):
+        cache = PrincipalCache()
+        mock_redis_tier.get.return_value = "b@example.com"
+
+        await cache.invalidate_user("u2")
+
+        mock_redis_tier.get.assert_awaited_with("principal_subject", "u2")
+        mock_redis_tier.delete.assert_any_await("principal", "b@example.com")
+
+    @pytest.mark.asyncio
+    async def test_invalidation_reaches_other_workers(self):
+        # Two workers, each with its own Redis cache client and principal cache
+        first, second = _redis_cache(), _redis_cache()
+        first_principals = PrincipalCache(cache=first)
+        second_principals = PrincipalCache(cache=second)
+        principal = {"id": "u1", "email": "a@example.com"}
+        await first_principals.set("a@example.com", principal)
+        await second_principals.set("a@example.com", principal)
+        first.client.get.return_value = json.dumps("a@example.com")
+        first.client.publish.reset_mock()
+
+        await first_principals.invalidate_user("u1")
+        for call in first.client.publish.await_args_list:
+            second._apply_invalidation(call.args[1])
+
+        assert second_principals._get_local("a@example.com") is None
+        assert await second_principals.get("a@example.com") is None
+        second.client.get.assert_awaited_with("principal:a@example.com")
+
+
+class TestAuthServiceInvalidation:
+    @pytest.mark.asyncio
+    async def test_update_user_invalidates_principal(self):
+        from models.auth import UserUpdate
+        from services.auth_service import AuthService
+
+        service = AuthService.__new__(AuthService)
+        service.supabase = AsyncMock()
+        service.supabase.table = lambda *_: _Chain([{"id": "u1"}])
+
+        with patch(
+            "services.auth_service.principal_cache.invalidate_user",
+            new_callable=AsyncMock,
+        ) as mock_invalidate:
+            await service.update_user("u1", UserUpdate(first_name="New"))
+
+        mock_invalidate.assert_awaited_once_with("u1")
+
+
+class _Chain:
+    """Minimal stand-in for the Supabase query builder"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return self
@@ -0,0 +1,161 @@
+"""
+Test Prompt Cache
+Tests prompt normalization and namespaced exact-match lookups.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from services.ai.hybrid_ai_service import HybridAIService, ModelProvider, TaskType
+from services.ai.providers.base_client import AIResponse
+from services.ai.prompt_cache import PromptCache, normalize_prompt
+
+
+class TestNormalization:
+    def test_normalize_prompt(self):
+        assert normalize_prompt("  Make   FLASHCARDS about Photosynthesis! ") == (
+            "make flashcards about photosynthesis"
+        )
+
+    @pytest.mark.parametrize(
+        "first, second",
+        [
+            ("Make flashcards about C++", "Make flashcards about C#"),
+            ("What is 5-3?", "What is 5+3?"),
+        ],
+    )
+    def test_normalize_prompt_keeps_symbols(self, first, second):
+        assert normalize_prompt(first) != normalize_prompt(second)
+
+
+class TestPromptCache:
+    @pytest.fixture
+    def cache(self):
+        return PromptCache(ttl=60, max_entries=3)
+
+    def test_hit_after_normalization(self, cache):
+        cache.store("flashcard:shared", "Make flashcards: photosynthesis", "cards", 0.01)
+
+        entry = cache.lookup("flashcard:shared", "make flashcards:  photosynthesis.")
+
+        assert entry is not None
+        assert entry.response == "cards"
+
+    def test_different_prompts_miss(self, cache):
+        cache.store("flashcard:shared", "photosynthesis in plants", "plants")
+
+        assert cache.lookup("flashcard:shared", "photosynthesis in algae") is None
+        assert cache.lookup("flashcard:shared", "photosynthesis in plants?") is not None
+
+    def test_namespaces_are_isolated(self, cache):
+        cache.store("flashcard:user:1", "my revision plan", "plan")
+
+        assert cache.lookup("flashcard:user:2", "my revision plan") is None
+
+    def test_expired_entries_do_not_hit(self, cache):
+        cache.store("flashcard:shared", "photosynthesis", "cards", ttl=-1)
+
+        assert cache.lookup("flashcard:shared", "photosynthesis") is None
+
+    def test_capacity_drops_oldest(self, cache):
+        for i in range(4):
+            cache.store("ns", f"prompt number {i}", i)
+
+        assert cache.lookup("ns", "prompt number 0") is None
+        assert cache.lookup("ns", "prompt number 3").response == 3
+        assert cache.get_stats()["entries"] == 3
+
+    def test_user_scoped_namespaces_hold_fewer_entries(self):
+        cache = PromptCache(max_entries=3, max_user_entries=1)
+        cache.store("ns:user:1", "first", 1, user_scoped=True)
+        cache.store("ns:user:1", "second", 2, user_scoped=True)
+
+        assert cache.lookup("ns:user:1", "first") is None
+        assert cache.lookup("ns:user:1", "second").response == 2
+
+    def test_stats_track_hit_rate_and_savings(self, cache):
+        cache.store("ns", "photosynthesis", "cards", 0.02)
+        cache.lookup("ns", "photosynthesis")
+        cache.lookup("ns", "mitochondria")
+
+        stats = cache.get_stats()
+        assert stats["lookups"] == 2
+        assert stats["hits"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["saved_usd"] == pytest.approx(0.02)
+
+
+class TestHybridPromptCache:
+    @pytest.fixture
+    def hybrid_service(self):
+        return HybridAIService()
+
+    @pytest.fixture
+    def ai_response(self):
+        return AIResponse(
+            content="Photosynthesis flashcards",
+            model_used="llama-3-8b",
+            provider="llama_self_hosted",
+            tokens_used=100,
+            cost_usd=0.002,
+            quality_score=0.9,
+            response_time_ms=500,
+        )
+
+    @pytest.mark.asyncio
+    async def test_repeated_prompt_served_from_cache(self, hybrid_service, ai_response):
+        client = AsyncMock()
+        client.is_available.return_value = True
+        client.generate.return_value = ai_response
+        hybrid_service.clients[ModelProvider.LLAMA_SELF_HOSTED] = client
+
+        with patch(
+            "services.ai.hybrid_ai_service.enhanced_cache.get", return_value=None
+        ), patch("services.ai.hybrid_ai_service.enhanced_cache.set"), patch.object(
+            hybrid_service.cost_tracker, "track_cache_hit"
+        ) as track_cache_hit:
+            first = await hybrid_service.generate_response(
+                TaskType.FLASHCARD, "Make flashcards about photosynthesis", "user-1"
+            )
+            second = await hybrid_service.generate_response(
+                TaskType.FLASHCARD, "make flashcards about photosynthesis!!", "user-2"
+            )
+
+        assert first.content == second.content
+        assert second.cost_usd == 0.0
+        assert second.metadata["cache"] == "local"
+        client.generate.assert_called_once()
+        track_cache_hit.assert_called_once_with(
+            "user-2", "/ai/flashcard", pytest.approx(0.002)
+        )
+
+    @pytest.mark.asyncio
+    async def test_personal_tasks_are_cached_per_user(self, hybrid_service):
+        namespace = hybrid_service._cache_namespace(
+            TaskType.REVISION_PLANNING, "user-1", 1000, None
+        )
+
+        assert namespace == "revision_planning:user:user-1:1000:t0.7"
+        assert (
+            hybrid_service._cache_namespace(TaskType.REVISION_PLANNING, None, 1000, None)
+            is None
+        )
+
+    @pytest.mark.parametrize("task_type", [TaskType.SUMMARIZATION, TaskType.GENERAL_QA])
+    def test_user_content_tasks_are_not_shared(self, hybrid_service, task_type):
+        namespace = hybrid_service._cache_namespace(task_type, "user-1", 1000, None)
+
+        assert ":user:user-1:" in namespace
+        assert hybrid_service._cache_namespace(task_type, None, 1000, None) is None
+
+    def test_generation_parameters_split_namespaces(self, hybrid_service):
+        def namespace(**overrides):
+            args = {"temperature": 0.7, "options": {}} | overrides
+            return hybrid_service._cache_namespace(
+                TaskType.FLASHCARD, "user-1", 1000, None, **args
+            )
+
+        assert namespace() != namespace(temperature=0.0)
+        assert namespace() != namespace(options={"top_p": 0.5})
+        assert namespace(options={"a": 1, "b": 2}) == namespace(options={"b": 2, "a": 1})
@@ -0,0 +1,147 @@
+"""
+Tests for AI provider circuit breakers and health ranking
+"""
+
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from services.ai.hybrid_ai_service import HybridAIService, ModelProvider, TaskType
+from services.ai.latency_tracker import ProviderLatencyTracker
+from services.ai.provider_health import ProviderCircuitBreaker, ProviderHealthTracker
+from services.ai.providers.base_client import AIResponse
+
+
+@pytest.fixture
+def mock_cache():
+    cache = AsyncMock()
+    cache.mget.return_value = []
+    with patch("services.ai.provider_health.enhanced_cache", cache):
+        yield cache
+
+
+class TestProviderCircuitBreaker:
+    def test_opens_after_threshold(self):
+        breaker = ProviderCircuitBreaker(failure_threshold=2, recovery_timeout=30)
+
+        assert breaker.record_failure() is False
+        assert breaker.record_failure() is True
+        assert breaker.state == "OPEN"
+        assert not breaker.can_execute()
+
+    def test_half_open_admits_single_probe(self):
+        breaker = ProviderCircuitBreaker(failure_threshold=1, recovery_timeout=30)
+        breaker.open(time.time() - 1)
+
+        assert breaker.can_execute()
+        assert breaker.state == "HALF_OPEN"
+        breaker.probe_in_flight = True
+        assert not breaker.can_execute()
+
+        assert breaker.record_success() is True
+        assert breaker.state == "CLOSED"
+
+    def test_failed_probe_reopens(self):
+        breaker = ProviderCircuitBreaker(failure_threshold=5, recovery_timeout=30)
+        breaker.open(time.time() - 1)
+        breaker.can_execute()
+
+        assert breaker.record_failure() is True
+        assert breaker.state == "OPEN"
+
+
+class TestProviderHealthTracker:
+    @pytest.fixture
+    def tracker(self):
+        return ProviderHealthTracker(
+            ProviderLatencyTracker(min_samples=1), failure_threshold=2
+        )
+
+    def test_rank_keeps_order_when_healthy(self, tracker):
+        assert tracker.rank(["a", "b", "c"], {}) == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_rank_skips_open_and_demotes_degraded(self, tracker, mock_cache):
+        await tracker.record_failure("a")
+        await tracker.record_failure("a")
+        await tracker.record_failure("b")
+        await tracker.record_success("c")
+
+        assert tracker.rank(["a", "b", "c"], {}) == ["c", "b"]
+        mock_cache.set.assert_awaited_once()
+        assert mock_cache.set.call_args.args[1]["state"] == "OPEN"
+
+    def test_rank_demotes_slow_provider(self, tracker):
+        tracker.latency_tracker.record("a", 5.0)
+
+        assert tracker.rank(["a", "b"], {"a": 1.0, "b": 1.0}) == ["b", "a"]
+
+    @pytest.mark.asyncio
+    async def test_recovery_clears_shared_state(self, tracker, mock_cache):
+        tracker.breaker("a").open(time.time() - 1)
+        tracker.rank(["a"], {})
+        tracker.begin("a")
+        assert tracker.rank(["a"], {}) == []  # Probe already in flight
+
+        await tracker.record_success("a")
+
+        assert tracker.breaker("a").state == "CLOSED"
+        mock_cache.delete.assert_awaited_once_with("ai_provider_circuit", "a")
+
+    @pytest.mark.asyncio
+    async def test_sync_adopts_circuits_opened_elsewhere(self, tracker, mock_cache):
+        mock_cache.mget.return_value = [
+            {"state": "OPEN", "until": time.time() + 30},
+            None,
+        ]
+
+        await tracker.sync(["a", "b"])
+
+        assert tracker.rank(["a", "b"], {}) == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_availability_check_skipped_after_success(self, tracker, mock_cache):
+        assert tracker.needs_availability_check("a")
+
+        await tracker.record_success("a")
+
+        assert not tracker.needs_availability_check("a")
+
+
+class TestHybridServiceCircuitBreaking:
+    @pytest.mark.asyncio
+    async def test_dead_provider_skipped_after_outage(self, mock_cache):
+        service = HybridAIService()
+        service.hedging_enabled = False
+        service.provider_health.failure_threshold = 1
+
+        dead = AsyncMock()
+        dead.is_available.return_value = True
+        dead.generate.side_effect = Exception("provider down")
+        healthy = AsyncMock()
+        healthy.is_available.return_value = True
+        healthy.generate.return_value = AIResponse(
+            content="ok",
+            model_used="mistral",
+            provider="mistral",
+            tokens_used=10,
+            cost_usd=0.0001,
+            quality_score=0.95,
+            response_time_ms=5,
+        )
+        service.clients[ModelProvider.LLAMA_SELF_HOSTED] = dead
+        service.clients[ModelProvider.MISTRAL_SELF_HOSTED] = healthy
+
+        for _ in range(3):
+            response = await service.generate_response(
+                TaskType.FLASHCARD, "Test prompt", "test_user", use_cache=False
+            )
+            assert response.content == "ok"
+
+        dead.generate.assert_awaited_once()
+        assert ModelProvider.LLAMA_SELF_HOSTED not in service._get_optimal_models(
+            TaskType.FLASHCARD
+        )
+        # Healthy provider answered recently, so its health endpoint is not polled
+        healthy.is_available.assert_awaited_once()
@@ -0,0 +1,171 @@
+"""
+Tests for GCRA rate limiting in the HTTP middleware and RedisClient
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from middleware.rate_limit import RateLimiter, rate_limit_middleware
+from services.gcra import GCRA_LUA, GCRARateLimiter, LocalGCRA, RateLimit
+from services.redis_client import RedisClient
+
+
+def _acquire(limiter, key, now):
+    retry_after = limiter.check(key, now)
+    if retry_after == 0:
+        limiter.record(key, now)
+    return retry_after
+
+
+def _redis(script):
+    client = MagicMock()
+    client.register_script.return_value = script
+    return client
+
+
+class TestLocalGCRA:
+    def test_burst_then_sustained_rate(self):
+        limiter = LocalGCRA([RateLimit("minute", 60, 60, burst=3)])
+
+        assert [_acquire(limiter, "a", 100.0) for _ in range(3)] == [0, 0, 0]
+        assert _acquire(limiter, "a", 100.0) == pytest.approx(1.0)
+        assert _acquire(limiter, "a", 101.0) == 0
+        assert _acquire(limiter, "b", 101.0) == 0  # Keys are independent
+
+    def test_refused_requests_are_not_counted(self):
+        limiter = LocalGCRA([RateLimit("minute", 60, 60, burst=1)])
+
+        assert _acquire(limiter, "a", 0.0) == 0
+        for _ in range(5):
+            assert _acquire(limiter, "a", 0.5) == pytest.approx(0.5)
+        assert _acquire(limiter, "a", 1.0) == 0
+
+    def test_tightest_limit_wins(self):
+        limiter = LocalGCRA([RateLimit("minute", 60, 60, 10), RateLimit("hour", 2, 3600)])
+
+        assert _acquire(limiter, "a", 0.0) == 0
+        assert _acquire(limiter, "a", 0.0) == 0
+        assert _acquire(limiter, "a", 0.0) == pytest.approx(1800.0)
+
+    def test_keeps_most_recent_keys(self):
+        limiter = LocalGCRA([RateLimit("minute", 1, 60)], max_keys=2)
+        for key in ("a", "b", "c"):
+            limiter.record(key, 0.0)
+
+        assert limiter.check("a", 0.0) == 0  # Evicted
+        assert limiter.check("c", 0.0) > 0
+
+
+class TestGCRARateLimiter:
+    @pytest.mark.asyncio
+    async def test_one_script_call_for_all_limits(self):
+        script = AsyncMock(return_value=[1, "0"])
+        client = _redis(script)
+        limiter = GCRARateLimiter(
+            "rate_limit", [RateLimit("minute", 60, 60, 10), RateLimit("hour", 1000, 3600)]
+        )
+
+        decision = await limiter.acquire("ip:1.2.3.4", client)
+
+        assert decision.allowed
+        assert client.register_script.call_args.args[0] == GCRA_LUA
+        script.assert_awaited_once_with(
+            keys=["rate_limit:ip:1.2.3.4:minute", "rate_limit:ip:1.2.3.4:hour"],
+            args=[1, 1.0, 10.0, 3.6, 3600.0],
+        )
+
+    @pytest.mark.asyncio
+    async def test_refusal_carries_retry_after(self):
+        limiter = GCRARateLimiter("rate_limit", [RateLimit("minute", 60, 60)])
+
+        decision = await limiter.acquire("a", _redis(AsyncMock(return_value=[0, "2.5"])))
+
+        assert not decision.allowed
+        assert decision.retry_after == 2.5
+
+    @pytest.mark.asyncio
+    async def test_prefilter_skips_redis(self):
+        script = AsyncMock(return_value=[1, "0"])
+        client = _redis(script)
+        limiter = GCRARateLimiter("rate_limit", [RateLimit("minute", 60, 60, burst=2)])
+
+        decisions = [await limiter.acquire("a", client) for _ in range(5)]
+
+        assert [decision.allowed for decision in decisions] == [True, True] + [False] * 3
+        assert script.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_allows_without_redis(self):
+        client = _redis(AsyncMock(side_effect=ConnectionError("down")))
+        limiter = GCRARateLimiter("rate_limit", [RateLimit("minute", 60, 60, burst=1)])
+
+        assert all([(await limiter.acquire("a", client)).allowed for _ in range(3)])
+        assert (await limiter.acquire("a", None)).allowed
+
+
+class TestMiddleware:
+    @pytest.fixture
+    def app(self):
+        app = FastAPI()
+        app.middleware("http")(rate_limit_middleware)
+
+        @app.get("/ping")
+        async def ping():
+            return {"ok": True}
+
+        return app
+
+    def test_refused_with_retry_after(self, app):
+        monitor = MagicMock(record_metric=AsyncMock())
+        with (
+            patch("middleware.rate_limit.enhanced_cache") as cache,
+            patch("middleware.rate_limit.get_performance_monitor", return_value=monitor),
+            patch("middleware.rate_limit.rate_limiter", RateLimiter(burst_limit=2)),
+        ):
+            cache.client = _redis(AsyncMock(return_value=[1, "0"]))
+            client = TestClient(app)
+            responses = [client.get("/ping") for _ in range(3)]
+
+        assert [response.status_code for response in responses] == [200, 200, 429]
+        assert responses[2].headers["Retry-After"] == "1"
+        assert responses[2].json()["retry_after"] == 1
+
+
+class TestRedisClient:
+    @pytest.mark.asyncio
+    async def test_check_rate_limit_is_one_script_call(self):
+        script = AsyncMock(return_value=[0, "0.2"])
+        client = RedisClient.__new__(RedisClient)
+        client.client = MagicMock()
+        client.async_client = _redis(script)
+        client._rate_limiters = {}
+
+        assert await client.check_rate_limit("safe_call:openai", 3, 1) is False
+        script.assert_awaited_once()
+        assert script.call_args.kwargs["keys"] == ["rate_limit:safe_call:openai:gcra"]
+        client.client.zadd.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_check_rate_limit_is_local_without_redis(self):
+        client = RedisClient.__new__(RedisClient)
+        client.client = None
+        client.async_client = None
+        client._rate_limiters = {}
+
+        allowed = [await client.check_rate_limit("safe_call:openai", 2, 60) for _ in range(3)]
+
+        assert allowed == [True, True, False]
+
+    @pytest.mark.asyncio
+    async def test_check_rate_limit_is_local_while_redis_errors(self):
+        script = AsyncMock(side_effect=ConnectionError("down"))
+        client = RedisClient.__new__(RedisClient)
+        client.async_client = _redis(script)
+        client._rate_limiters = {}
+
+        allowed = [await client.check_rate_limit("safe_call:openai", 1, 60) for _ in range(2)]
+
+        assert allowed == [True, False]
@@ -0,0 +1,240 @@
+"""
+Tests for the concurrent, token-bucket RateLimitedQueue dispatcher
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services.rate_limited_queue import (
+    TOKEN_BUCKET_LUA,
+    LocalTokenBucket,
+    QueueStoppedError,
+    RateLimitedQueue,
+    parse_retry_after,
+)
+
+
+@pytest.fixture
+def no_redis():
+    with patch("services.rate_limited_queue.enhanced_cache") as cache:
+        cache.client = None
+        yield cache
+
+
+def _response(status_code=200, headers=None):
+    return {"data": {}, "status_code": status_code, "headers": headers or {}}
+
+
+class TestLocalTokenBucket:
+    def test_burst_then_refill(self):
+        bucket = LocalTokenBucket()
+        buckets = [(2, 2, 1)]
+
+        assert bucket.acquire(100.0, buckets) == 0
+        assert bucket.acquire(100.0, buckets) == 0
+        assert bucket.acquire(100.0, buckets) == pytest.approx(0.5)
+        assert bucket.acquire(100.5, buckets) == 0
+
+    def test_all_buckets_must_admit(self):
+        bucket = LocalTokenBucket()
+        buckets = [(10, 10, 1), (600, 10, 500)]
+
+        assert bucket.acquire(0.0, buckets) == 0
+        # Request bucket has room, token bucket needs 40s to refill 400 tokens
+        assert bucket.acquire(0.0, buckets) == pytest.approx(40.0)
+        assert bucket.levels[0][0] == 9  # Nothing drawn by a refused request
+
+
+class TestRetryAfter:
+    def test_seconds_and_dates(self):
+        assert parse_retry_after("2") == 2.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+class TestDispatcher:
+    @pytest.mark.asyncio
+    async def test_requests_run_concurrently(self, no_redis):
+        queue = RateLimitedQueue("openai", rate_limit=100, max_in_flight=8)
+
+        async def slow_request(*args, **kwargs):
+            await asyncio.sleep(0.1)
+            return _response()
+
+        queue._make_api_request = slow_request
+        start = time.monotonic()
+        futures = [await queue.enqueue_request("GET", "models", "key") for _ in range(8)]
+        results = await asyncio.gather(*futures)
+        elapsed = time.monotonic() - start
+        await queue.stop()
+
+        assert [result["status_code"] for result in results] == [200] * 8
+        assert elapsed < 0.4  # One at a time would take 0.8s
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_enforced(self, no_redis):
+        queue = RateLimitedQueue("openai", rate_limit=10, max_in_flight=20)
+        queue._make_api_request = AsyncMock(return_value=_response())
+
+        start = time.monotonic()
+        futures = [await queue.enqueue_request("GET", "models", "key") for _ in range(15)]
+        await asyncio.gather(*futures)
+        elapsed = time.monotonic() - start
+        await queue.stop()
+
+        # Burst of 10, then 5 more at 10/s
+        assert elapsed >= 0.4
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honoured(self, no_redis):
+        queue = RateLimitedQueue("openai", rate_limit=100)
+        queue._make_api_request = AsyncMock(
+            side_effect=[_response(429, {"retry-after": "0.2"}), _response()]
+        )
+
+        start = time.monotonic()
+        result = await (await queue.enqueue_request("POST", "chat/completions", "key"))
+        elapsed = time.monotonic() - start
+        await queue.stop()
+
+        assert result["status_code"] == 200
+        assert elapsed >= 0.2
+        assert queue._make_api_request.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self, no_redis):
+        queue = RateLimitedQueue("openai", rate_limit=100, max_retries=1)
+        queue._make_api_request = AsyncMock(
+            return_value=_response(429, {"retry-after": "0"})
+        )
+
+        result = await (await queue.enqueue_request("GET", "models", "key"))
+        await queue.stop()
+
+        assert result["status_code"] == 429
+        assert queue._make_api_request.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_interactive_lane_goes_first(self, no_redis):
+        queue = RateLimitedQueue("notion", rate_limit=100, max_in_flight=1)
+        release = asyncio.Event()
+        order = []
+
+        async def request(method, endpoint, api_key, **kwargs):
+            order.append(endpoint)
+            if endpoint == "first":
+                await release.wait()
+            return _response()
+
+        queue._make_api_request = request
+        first = await queue.enqueue_request("GET", "first", "key")
+        await asyncio.sleep(0.01)
+        background = await queue.enqueue_request("GET", "sync", "key", lane="background")
+        interactive = await queue.enqueue_request("GET", "page", "key")
+        release.set()
+        await asyncio.gather(first, background, interactive)
+        await queue.stop()
+
+        assert order == ["first", "page", "sync"]
+
+    @pytest.mark.asyncio
+    async def test_shared_bucket_in_redis(self):
+        script = AsyncMock(return_value="0")
+        with patch("services.rate_limited_queue.enhanced_cache") as cache:
+            cache.client = MagicMock()
+            cache.client.register_script.return_value = script
+            cache.circuit_breaker.can_execute.return_value = True
+            queue = RateLimitedQueue("openai", rate_limit=3, tokens_per_minute=6000)
+            queue._make_api_request = AsyncMock(return_value=_response())
+
+            await (
+                await queue.enqueue_request(
+                    "POST",
+                    "chat/completions",
+                    "key",
+                    json={"messages": [{"content": "x" * 400}], "max_tokens": 100},
+                )
+            )
+            await queue.stop()
+
+        assert cache.client.register_script.call_args.args[0] == TOKEN_BUCKET_LUA
+        kwargs = script.call_args.kwargs
+        assert kwargs["keys"] == ["rate_limit:openai:bucket", "rate_limit:openai:retry_after"]
+        # No client timestamp: the script reads the Redis server clock
+        assert "redis.call('TIME')" in TOKEN_BUCKET_LUA
+        requests, tokens = kwargs["args"][:3], kwargs["args"][3:]
+        assert requests == [3, 3, 1]
+        assert tokens[:2] == [6000, 100]
+        assert 200 < tokens[2] < 250  # ~4 characters per token plus max_tokens
+
+    @pytest.mark.asyncio
+    async def test_pause_is_a_key_ttl(self):
+        with patch("services.rate_limited_queue.enhanced_cache") as cache:
+            cache.client = AsyncMock()
+            cache.circuit_breaker.can_execute.return_value = True
+            queue = RateLimitedQueue("openai")
+
+            await queue._pause(2.5)
+
+        cache.client.set.assert_awaited_once_with(
+            "rate_limit:openai:retry_after", 1, px=2500
+        )
+
+
+class TestDispatcherLifecycle:
+    @pytest.mark.asyncio
+    async def test_dispatch_error_fails_only_that_request(self, no_redis):
+        queue = RateLimitedQueue("openai", rate_limit=100)
+        queue._make_api_request = AsyncMock(return_value=_response())
+        queue._acquire_capacity = AsyncMock(side_effect=[ValueError("bad bucket"), None])
+
+        failed = await queue.enqueue_request("GET", "models", "key")
+        ok = await queue.enqueue_request("GET", "models", "key")
+
+        with pytest.raises(ValueError):
+            await failed
+        assert (await ok)["status_code"] == 200
+        assert queue._running
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_dead_dispatcher_is_restarted(self, no_redis):
+        queue = RateLimitedQueue("openai", rate_limit=100)
+        queue._make_api_request = AsyncMock(return_value=_response())
+        await queue.start()
+        queue._pending.release()  # Permit without a request: dispatcher exits
+        await asyncio.sleep(0.01)
+
+        assert not queue._running
+        future = await queue.enqueue_request("GET", "models", "key")
+        assert (await future)["status_code"] == 200
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_fails_queued_requests(self, no_redis):
+        queue = RateLimitedQueue("openai", rate_limit=100, max_in_flight=1)
+        release = asyncio.Event()
+
+        async def request(*args, **kwargs):
+            await release.wait()
+            return _response()
+
+        queue._make_api_request = request
+        running = await queue.enqueue_request("GET", "first", "key")
+        queued = [await queue.enqueue_request("GET", "next", "key") for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        stopping = asyncio.create_task(queue.stop())
+        await asyncio.sleep(0.01)
+        release.set()
+        await stopping
+
+        assert (await running)["status_code"] == 200
+        for future in queued:
+            with pytest.raises(QueueStoppedError):
+                await future
+        assert queue.get_stats()["queued"] == {"interactive": 0, "background": 0}
@@ -0,0 +1,312 @@
+"""
+Tests for EnhancedRedisCache tag-based invalidation, L1 tier and single-flight
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from services.redis_cache import EnhancedRedisCache, LocalCache
+
+
+def _pipeline(results):
+    """Mock pipeline usable as ``async with client.pipeline() as pipe``"""
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=results)
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=pipe)
+    context.__aexit__ = AsyncMock(return_value=False)
+    return context, pipe
+
+
+@pytest.fixture
+def cache():
+    cache = EnhancedRedisCache(delete_batch_size=2)
+    cache.client = MagicMock()
+    return cache
+
+
+class TestTaggedSet:
+    @pytest.mark.asyncio
+    async def test_set_with_tags_registers_key(self, cache):
+        context, pipe = _pipeline([True, 1, True, 1, 0, True, True])
+        cache.client.pipeline.return_value = context
+
+        before = time.time()
+        assert await cache.set("mood", {"a": 1}, 900, "entries", tags=["user:1"])
+
+        cache.client.pipeline.assert_called_once_with(transaction=True)
+        pipe.setex.assert_called_once_with("mood:entries", 900, '{"a": 1}')
+        pipe.sadd.assert_called_once_with("keytags:mood:entries", "tags:user:1")
+        pipe.expire.assert_any_call("keytags:mood:entries", 900)
+        tag_key, members = pipe.zadd.call_args.args
+        assert tag_key == "tags:user:1"
+        assert members["mood:entries"] >= before + 900
+        pipe.zremrangebyscore.assert_called_once()
+        pipe.expire.assert_any_call("tags:user:1", 900, nx=True)
+        pipe.expire.assert_any_call("tags:user:1", 900, gt=True)
+
+    @pytest.mark.asyncio
+    async def test_set_without_tags_uses_setex(self, cache):
+        cache.client.setex = AsyncMock()
+
+        assert await cache.set("mood", [1], 60, "entries")
+
+        cache.client.setex.assert_awaited_once_with("mood:entries", 60, "[1]")
+        cache.client.pipeline.assert_not_called()
+
+
+class TestInvalidateTags:
+    @pytest.mark.asyncio
+    async def test_deletes_tag_members_in_batches(self, cache):
+        snapshot, snapshot_pipe = _pipeline([["k1", "k2"], ["k2", "k3"], 2])
+        untag = [_pipeline([[]] * 2), _pipeline([0]), _pipeline([[]]), _pipeline([0])]
+        first, first_pipe = _pipeline([2])
+        second, second_pipe = _pipeline([1])
+        cache.client.pipeline.side_effect = [
+            snapshot,
+            *(context for context, _ in untag),
+            first,
+            second,
+        ]
+
+        deleted = await cache.invalidate_tags("user:1", "user:1:op:insights")
+
+        assert deleted == 3
+        snapshot_pipe.zrange.assert_any_call("tags:user:1", 0, -1)
+        snapshot_pipe.zrange.assert_any_call("tags:user:1:op:insights", 0, -1)
+        snapshot_pipe.delete.assert_called_once_with(
+            "tags:user:1", "tags:user:1:op:insights"
+        )
+        unlinked = set(first_pipe.unlink.call_args.args) | set(
+            second_pipe.unlink.call_args.args
+        )
+        assert unlinked == {"k1", "k2", "k3"}
+
+    @pytest.mark.asyncio
+    async def test_deleted_keys_leave_their_other_tags(self, cache):
+        snapshot, _ = _pipeline([["k1"], 1])
+        lookup, lookup_pipe = _pipeline([{"tags:user:1:op:a", "tags:user:1"}])
+        untag, untag_pipe = _pipeline([1, 1])
+        delete, _ = _pipeline([1])
+        cache.client.pipeline.side_effect = [snapshot, lookup, untag, delete]
+
+        assert await cache.invalidate_tags("user:1:op:a") == 1
+
+        lookup_pipe.smembers.assert_called_once_with("keytags:k1")
+        untag_pipe.zrem.assert_called_once_with("tags:user:1", "k1")
+        untag_pipe.unlink.assert_called_once_with("keytags:k1")
+
+    @pytest.mark.asyncio
+    async def test_legacy_patterns_scanned_within_window(self, cache):
+        snapshot, _ = _pipeline([[], 0])
+        cache.client.pipeline.return_value = snapshot
+        cache.clear_pattern = AsyncMock(return_value=4)
+
+        deleted = await cache.invalidate_tags(
+            "user:1", legacy_patterns=["mood:*:1:*"]
+        )
+
+        assert deleted == 4
+        cache.clear_pattern.assert_awaited_once_with("mood:*:1:*")
+
+    @pytest.mark.asyncio
+    async def test_legacy_patterns_skipped_after_window(self, cache):
+        snapshot, _ = _pipeline([[], 0])
+        cache.client.pipeline.return_value = snapshot
+        cache.clear_pattern = AsyncMock(return_value=4)
+        cache.legacy_scan_until = time.time() - 1
+
+        deleted = await cache.invalidate_tags(
+            "user:1", legacy_patterns=["mood:*:1:*"]
+        )
+
+        assert deleted == 0
+        cache.clear_pattern.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_returns_zero_without_client(self):
+        cache = EnhancedRedisCache()
+        assert await cache.invalidate_tags("user:1") == 0
+
+    @pytest.mark.asyncio
+    async def test_count_tag(self, cache):
+        cache.client.zcount = AsyncMock(return_value=7)
+
+        before = time.time()
+        assert await cache.count_tag("user:1") == 7
+
+        tag_key, low, high = cache.client.zcount.await_args.args
+        # Only members that have not expired yet are counted
+        assert (tag_key, high) == ("tags:user:1", "+inf")
+        assert low >= before
+
+
+class TestClearPattern:
+    @pytest.mark.asyncio
+    async def test_uses_scan_not_keys(self, cache):
+        async def scan_iter(match, count):
+            for key in ["a", "b", "c"]:
+                yield key
+
+        cache.client.scan_iter = scan_iter
+        cache.client.keys = AsyncMock()
+        first, _ = _pipeline([2])
+        second, _ = _pipeline([1])
+        cache.client.pipeline.side_effect = [first, second]
+
+        assert await cache.clear_pattern("mood:*") == 3
+        cache.client.keys.assert_not_called()
+
+
+@pytest.fixture
+def l1_cache():
+    cache = EnhancedRedisCache(l1_max_size=2, l1_ttl=5.0)
+    cache.client = MagicMock()
+    cache.client.get = AsyncMock(return_value=None)
+    cache.client.setex = AsyncMock()
+    cache.client.publish = AsyncMock()
+    return cache
+
+
+class TestLocalCache:
+    def test_evicts_least_recently_used(self):
+        local = LocalCache(max_size=2, ttl=5.0)
+        local.set("a", 1)
+        local.set("b", 2)
+        local.get("a")
+        local.set("c", 3)
+
+        assert local.get("a") == 1
+        assert local.get("b") is None
+        assert local.get("c") == 3
+
+    def test_entries_expire(self):
+        local = LocalCache(max_size=2, ttl=5.0)
+        local.set("a", 1, ttl=0)
+
+        assert local.get("a") is None
+        assert len(local) == 0
+
+    def test_delete_pattern(self):
+        local = LocalCache(max_size=10)
+        local.set("mood:entries:1", 1)
+        local.set("mood:summary:1", 2)
+        local.set("mood:entries:2", 3)
+
+        local.delete_pattern("mood:*:1")
+
+        assert len(local) == 1
+        assert local.get("mood:entries:2") == 3
+
+
+class TestL1Tier:
+    @pytest.mark.asyncio
+    async def test_redis_hit_is_served_from_l1_afterwards(self, l1_cache):
+        l1_cache.client.get.return_value = '{"score": 8}'
+
+        assert await l1_cache.get("mood", "summary") == {"score": 8}
+        assert await l1_cache.get("mood", "summary") == {"score": 8}
+
+        l1_cache.client.get.assert_awaited_once()
+        assert l1_cache.get_metrics()["l1_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_set_populates_l1_and_publishes(self, l1_cache):
+        await l1_cache.set("mood", {"score": 8}, 60, "summary")
+
+        assert await l1_cache.get("mood", "summary") == {"score": 8}
+        l1_cache.client.get.assert_not_awaited()
+        channel, payload = l1_cache.client.publish.call_args.args
+        assert channel == "cache:invalidate"
+        assert json.loads(payload)["keys"] == ["mood:summary"]
+
+    @pytest.mark.asyncio
+    async def test_delete_evicts_l1(self, l1_cache):
+        l1_cache.client.delete = AsyncMock(return_value=1)
+        await l1_cache.set("mood", {"score": 8}, 60, "summary")
+
+        await l1_cache.delete("mood", "summary")
+
+        assert l1_cache.l1.get("mood:summary") is None
+
+    def test_remote_invalidation_evicts(self, l1_cache):
+        l1_cache.l1.set("mood:summary:1", 1)
+        l1_cache.l1.set("mood:entries:1", 2)
+
+        l1_cache._apply_invalidation(
+            json.dumps({"origin": "other", "keys": ["mood:summary:1"]})
+        )
+        assert l1_cache.l1.get("mood:summary:1") is None
+
+        l1_cache._apply_invalidation(
+            json.dumps({"origin": "other", "patterns": ["mood:*"]})
+        )
+        assert len(l1_cache.l1) == 0
+
+    def test_own_invalidation_ignored(self, l1_cache):
+        l1_cache.l1.set("mood:summary:1", 1)
+
+        l1_cache._apply_invalidation(
+            json.dumps({"origin": l1_cache.instance_id, "keys": ["mood:summary:1"]})
+        )
+
+        assert l1_cache.l1.get("mood:summary:1") == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, cache):
+        cache.client.get = AsyncMock(return_value='{"a": 1}')
+
+        await cache.get("mood", "summary")
+        await cache.get("mood", "summary")
+
+        assert cache.l1 is None
+        assert cache.client.get.await_count == 2
+
+
+class TestGetOrSetSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_call_producer_once(self, l1_cache):
+        calls = 0
+
+        async def produce():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"plan": calls}
+
+        results = await asyncio.gather(
+            *(l1_cache.get_or_set("plan", produce, 60, "user-1") for _ in range(10))
+        )
+
+        assert calls == 1
+        assert results == [{"plan": 1}] * 10
+        assert l1_cache.get_metrics()["coalesced"] == 9
+        l1_cache.client.setex.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_producer(self, l1_cache):
+        async def produce():
+            await asyncio.sleep(0.01)
+            return "value"
+
+        first = asyncio.create_task(l1_cache.get_or_set("plan", produce, 60, "u"))
+        second = asyncio.create_task(l1_cache.get_or_set("plan", produce, 60, "u"))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "value"
+
+    @pytest.mark.asyncio
+    async def test_lambda_returning_coroutine_is_awaited(self, cache):
+        cache.client.get = AsyncMock(return_value=None)
+        cache.client.setex = AsyncMock()
+
+        async def produce():
+            return {"a": 1}
+
+        assert await cache.get_or_set("p", lambda: produce(), 60) == {"a": 1}
+        cache.client.setex.assert_awaited_once_with("p", 60, '{"a": 1}')
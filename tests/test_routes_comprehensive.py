@@ -681,7 +681,7 @@ class TestNotionRoutes:
         with patch(
             "routes.notion.get_current_user", return_value=mock_auth_dependency()
         ):
-            with patch("services.rate_limited_queue.get_notion_queue") as mock_queue:
+            with patch("routes.notion.get_notion_queue") as mock_queue:
                 mock_queue_instance = Mock()
                 mock_queue.return_value = mock_queue_instance
                 mock_queue_instance.enqueue_request.return_value = AsyncMock()
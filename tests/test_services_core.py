@@ -165,6 +165,31 @@ class TestAICacheService:
             await cache_service.invalidate_user_cache("user-123", "test_operation")
             mock_cache.clear_pattern.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_responses_are_tagged_by_operation(
+        self, cache_service: AICacheService
+    ) -> None:
+        with patch("services.ai_cache.enhanced_cache") as mock_cache:
+            mock_cache.set = AsyncMock(return_value=True)
+
+            await cache_service.set_cached_ai_response("insights", "user-123", {})
+
+            assert mock_cache.set.call_args.kwargs["tags"] == [
+                "ai_cache:user:user-123",
+                "ai_cache:op:insights",
+                "ai_cache:user:user-123:op:insights",
+            ]
+
+    @pytest.mark.asyncio
+    async def test_operation_invalidation_uses_tag_index(
+        self, cache_service: AICacheService
+    ) -> None:
+        with patch("services.ai_cache.enhanced_cache") as mock_cache:
+            mock_cache.invalidate_tags = AsyncMock(return_value=4)
+
+            assert await cache_service.invalidate_operation_cache("insights") == 4
+            mock_cache.invalidate_tags.assert_awaited_once_with("ai_cache:op:insights")
+
     @pytest.mark.asyncio
     async def test_cache_decorator(self) -> None:
         with patch("services.redis_cache.enhanced_cache") as mock_cache:
@@ -429,3 +429,33 @@ class TestStripeErrorHandling:
 
         assert response.status_code == 500
         assert "Failed to create checkout session" in response.json()["detail"]
+
+
+class TestUserPlan:
+    """Test plan lookup used to weight a user's background tasks."""
+
+    @pytest.mark.parametrize(
+        ("status", "plan"),
+        [("active", "pro"), ("trialing", "pro"), ("canceled", "basic"), (None, "basic")],
+    )
+    @pytest.mark.asyncio
+    async def test_plan_follows_subscription_status(self, status, plan):
+        from services.stripe_service import stripe_service
+
+        supabase = Mock()
+        supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+            {"subscription_status": status}
+        ]
+
+        with patch.object(stripe_service, "supabase", supabase):
+            assert (await stripe_service.get_user_plan("test_user_123")).value == plan
+
+    @pytest.mark.asyncio
+    async def test_failed_lookup_falls_back_to_basic(self):
+        from services.stripe_service import stripe_service
+
+        supabase = Mock()
+        supabase.table.side_effect = Exception("database unavailable")
+
+        with patch.object(stripe_service, "supabase", supabase):
+            assert (await stripe_service.get_user_plan("test_user_123")).value == "basic"
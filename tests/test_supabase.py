@@ -1,5 +1,8 @@
+import asyncio
+import functools
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 from supabase import Client
 
@@ -7,6 +10,10 @@ from services.supabase import (
     SUPABASE_ANON_KEY,
     SUPABASE_SERVICE_ROLE_KEY,
     SUPABASE_URL,
+    AsyncSupabaseClient,
+    PooledAsyncClient,
+    call_timeout,
+    get_async_supabase_client,
     get_supabase_client,
     get_supabase_service_client,
     supabase_client,
@@ -246,3 +253,92 @@ class TestSupabaseErrorHandling:
 
                 # Reset for next iteration
                 mock_print.reset_mock()
+
+
+class TestAsyncSupabaseClient:
+    """Test the pooled async data-access layer"""
+
+    def test_get_async_supabase_client_returns_same_instance(self):
+        """Test that the async client is shared"""
+        assert get_async_supabase_client() is get_async_supabase_client()
+
+    @pytest.mark.asyncio
+    async def test_table_uses_rest_endpoint_and_auth_headers(self):
+        """Test that queries target PostgREST with the API key"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json=[{"id": "t1"}])
+
+        pooled = functools.partial(
+            PooledAsyncClient, transport=httpx.MockTransport(handler)
+        )
+        client = AsyncSupabaseClient("https://test.supabase.co/", "anon-key")
+        with patch("services.supabase.PooledAsyncClient", pooled):
+            result = await client.table("tasks").select("*").eq("user_id", "u1").execute()
+        # Requests go through the bounded pool, whatever the postgrest version
+        assert isinstance(client.postgrest.session, PooledAsyncClient)
+        await client.close()
+
+        (request,) = requests
+        assert request.method == "GET"
+        assert request.url.scheme == "https"
+        assert request.url.host == "test.supabase.co"
+        assert request.url.path == "/rest/v1/tasks"
+        assert request.url.params["user_id"] == "eq.u1"
+        assert request.headers["apikey"] == "anon-key"
+        assert request.headers["authorization"] == "Bearer anon-key"
+        assert result.data == [{"id": "t1"}]
+
+    @pytest.mark.asyncio
+    async def test_close_releases_pool(self):
+        """Test that close drops the pooled client"""
+        client = AsyncSupabaseClient("https://test.supabase.co", "anon-key")
+        _ = client.postgrest
+
+        await client.close()
+
+        assert client._postgrest is None
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """Test that in-flight requests are bounded"""
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json=[])
+
+        async with PooledAsyncClient(
+            max_concurrency=2,
+            default_timeout=5,
+            base_url="http://stub",
+            transport=httpx.MockTransport(handler),
+        ) as client:
+            await asyncio.gather(*(client.get("/tasks") for _ in range(6)))
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_call_timeout_override(self):
+        """Test that a per-call deadline cancels slow requests"""
+
+        async def handler(request):
+            await asyncio.sleep(1)
+            return httpx.Response(200, json=[])
+
+        async with PooledAsyncClient(
+            max_concurrency=1,
+            default_timeout=5,
+            base_url="http://stub",
+            transport=httpx.MockTransport(handler),
+        ) as client:
+            with call_timeout(0.01):
+                with pytest.raises(TimeoutError):
+                    await client.get("/tasks")
@@ -0,0 +1,544 @@
+"""
+Tests for BackgroundWorker task queue backends and delayed tasks
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
+
+from config.monitoring import monitoring_config
+from services.background_workers import BackgroundWorker, Task, TaskPriority, TaskStatus
+from services.prometheus_integration import get_prometheus_service
+from services.task_queue import (
+    CONSUMER_GROUP,
+    DELAYED_KEY,
+    FAIR_POP_LUA,
+    FAIR_PROMOTE_DUE_LUA,
+    FAIR_PUSH_LUA,
+    PRIORITY_SCORE_SPAN,
+    PROMOTE_DUE_LUA,
+    FairQueue,
+    QueueEntry,
+    SortedSetQueue,
+    StreamQueue,
+    create_task_queue,
+)
+
+
+def _redis_with_pipeline(results):
+    client = AsyncMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=results)
+    client.pipeline = MagicMock(return_value=pipe)
+    return client, pipe
+
+
+class TestSortedSetQueue:
+    @pytest.mark.asyncio
+    async def test_pop_blocks_instead_of_polling(self):
+        client = AsyncMock()
+        client.bzpopmin.return_value = ("task_queue", "task-1", 2000.0)
+
+        entry = await SortedSetQueue().pop(client, "consumer", timeout=1.0)
+
+        assert entry == QueueEntry(task_id="task-1")
+        # Highest priority first; the pre-priority queue is drained last
+        client.bzpopmin.assert_awaited_once_with(
+            ["task_queue:4", "task_queue:3", "task_queue:2", "task_queue:1", "task_queue"],
+            timeout=1.0,
+        )
+
+    @pytest.mark.asyncio
+    async def test_pop_timeout_returns_none(self):
+        client = AsyncMock()
+        client.bzpopmin.return_value = None
+
+        assert await SortedSetQueue().pop(client, "consumer", timeout=1.0) is None
+
+
+class TestDelayedTasks:
+    @pytest.mark.asyncio
+    async def test_future_task_goes_to_delayed_index(self):
+        client = AsyncMock()
+
+        await SortedSetQueue().push(client, "task-1", 2, run_at=time.time() + 60)
+
+        client.zadd.assert_awaited_once()
+        key, members = client.zadd.call_args.args
+        assert key == DELAYED_KEY
+        assert list(members) == ["2:task-1"]
+
+    @pytest.mark.asyncio
+    async def test_due_task_goes_straight_to_ready_queue(self):
+        client = AsyncMock()
+
+        await StreamQueue().push(client, "task-1", 3, run_at=time.time() - 1)
+
+        client.xadd.assert_awaited_once_with("task_stream:3", {"task_id": "task-1"})
+
+    @pytest.mark.asyncio
+    async def test_promote_due_runs_script(self):
+        client = MagicMock()
+        script = AsyncMock(return_value=[2, "1700000000.5"])
+        client.register_script.return_value = script
+        queue = SortedSetQueue()
+        await queue.setup(client)
+
+        moved, next_due = await queue.promote_due(client, limit=50)
+
+        assert (moved, next_due) == (2, 1700000000.5)
+        assert client.register_script.call_args.args[0] == PROMOTE_DUE_LUA
+        kwargs = script.call_args.kwargs
+        # Every key the script touches is declared, ready queues by priority
+        assert kwargs["keys"] == [
+            DELAYED_KEY,
+            "task_queue:1",
+            "task_queue:2",
+            "task_queue:3",
+            "task_queue:4",
+        ]
+        assert kwargs["args"][1:] == [50, "sorted_set"]
+
+    @pytest.mark.asyncio
+    async def test_promote_due_with_empty_index(self):
+        client = MagicMock()
+        client.register_script.return_value = AsyncMock(return_value=[0, None])
+        queue = StreamQueue()
+        client.xgroup_create = AsyncMock()
+        await queue.setup(client)
+
+        assert await queue.promote_due(client) == (0, None)
+
+    @pytest.mark.asyncio
+    async def test_retry_is_delayed_by_backoff(self):
+        worker = BackgroundWorker()
+        worker.queue = AsyncMock()
+        worker.redis = AsyncMock()
+        worker.redis.hgetall.return_value = Task(
+            id="tid",
+            name="flaky",
+            func_name="flaky",
+            args=(),
+            kwargs={},
+            priority=TaskPriority.HIGH,
+            status=TaskStatus.RUNNING,
+            created_at=datetime.utcnow(),
+            retry_delay=30,
+        ).to_redis()
+
+        before = time.time()
+        await worker._handle_task_failure(
+            "tid", "boom", "worker-0", Exception("boom"), 0.1
+        )
+
+        args = worker.queue.push.call_args
+        assert args.args[1:] == ("tid", TaskPriority.HIGH.value)
+        assert args.kwargs["run_at"] >= before + 29
+
+    @pytest.mark.asyncio
+    async def test_enqueue_with_delay(self):
+        worker = BackgroundWorker()
+        worker.register_task("later", AsyncMock())
+        worker.queue = AsyncMock()
+        worker.redis = AsyncMock()
+
+        before = time.time()
+        await worker.enqueue_task("later", delay=120)
+
+        assert worker.queue.push.call_args.kwargs["run_at"] >= before + 119
+        with pytest.raises(ValueError):
+            await worker.enqueue_task("later", delay=1, run_at=datetime.utcnow())
+
+    @pytest.mark.asyncio
+    async def test_promoter_sleeps_until_next_due(self):
+        worker = BackgroundWorker(promote_interval=5.0)
+        worker.queue = AsyncMock()
+        worker.queue.promote_due.return_value = (1, time.time() + 0.2)
+        worker.running = True
+        sleeps = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+            worker.running = False
+
+        with patch("services.background_workers.asyncio.sleep", fake_sleep):
+            await worker._promote_delayed_tasks()
+
+        assert 0 < sleeps[0] <= 0.2
+
+
+class TestStreamQueue:
+    @pytest.fixture
+    def queue(self):
+        queue = StreamQueue(visibility_timeout=60)
+        queue._next_reclaim = float("inf")  # Reclaim tested separately
+        return queue
+
+    @pytest.mark.asyncio
+    async def test_setup_tolerates_existing_group(self, queue):
+        client = AsyncMock()
+        client.xgroup_create.side_effect = redis.ResponseError(
+            "BUSYGROUP Consumer Group name already exists"
+        )
+
+        await queue.setup(client)
+
+        assert client.xgroup_create.await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_push_uses_priority_stream(self, queue):
+        client = AsyncMock()
+
+        await queue.push(client, "task-1", 3)
+
+        client.xadd.assert_awaited_once_with("task_stream:3", {"task_id": "task-1"})
+
+    @pytest.mark.asyncio
+    async def test_pop_prefers_highest_priority_and_buffers_rest(self, queue):
+        client = AsyncMock()
+        client.xreadgroup.return_value = [
+            ["task_stream:2", [("1-0", {"task_id": "normal"})]],
+            ["task_stream:4", [("2-0", {"task_id": "urgent"})]],
+        ]
+        queue._renew_script = AsyncMock(return_value=1)
+
+        first = await queue.pop(client, "c1", timeout=1.0)
+        second = await queue.pop(client, "c1", timeout=1.0)
+
+        assert first == QueueEntry("urgent", "task_stream:4", "2-0")
+        assert second == QueueEntry("normal", "task_stream:2", "1-0")
+        client.xreadgroup.assert_awaited_once()
+        assert client.xreadgroup.call_args.kwargs["block"] == 1000
+        # The buffered entry's idle time is reset before it runs
+        queue._renew_script.assert_awaited_once_with(
+            keys=["task_stream:2"], args=[CONSUMER_GROUP, "c1", "1-0"]
+        )
+
+    @pytest.mark.asyncio
+    async def test_buffered_entry_claimed_elsewhere_is_not_run(self, queue):
+        client = AsyncMock()
+        client.xreadgroup.side_effect = [
+            [
+                ["task_stream:4", [("2-0", {"task_id": "urgent"})]],
+                ["task_stream:2", [("1-0", {"task_id": "stale"})]],
+            ],
+            [["task_stream:3", [("3-0", {"task_id": "fresh"})]]],
+        ]
+        queue._renew_script = AsyncMock(return_value=0)
+
+        await queue.pop(client, "c1", timeout=1.0)
+        entry = await queue.pop(client, "c1", timeout=1.0)
+
+        assert entry.task_id == "fresh"
+        assert client.xreadgroup.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_reclaims_stalled_entries(self):
+        queue = StreamQueue(visibility_timeout=60)
+        client = AsyncMock()
+        client.xautoclaim.side_effect = [
+            ["0-0", [("5-0", {"task_id": "stalled"})], []],
+        ]
+
+        entry = await queue.pop(client, "c1", timeout=1.0)
+
+        assert entry == QueueEntry("stalled", "task_stream:4", "5-0")
+        assert client.xautoclaim.call_args.kwargs["min_idle_time"] == 60000
+        assert client.xautoclaim.call_args.kwargs["count"] == 1
+        client.xreadgroup.assert_not_awaited()
+        # Found one, so the next pop reclaims again before reading new entries
+        assert queue._next_reclaim == 0.0
+
+    @pytest.mark.asyncio
+    async def test_reclaim_checks_streams_in_priority_order(self):
+        queue = StreamQueue(visibility_timeout=60)
+        client = AsyncMock()
+        client.xautoclaim.side_effect = [
+            ["0-0", [], []],
+            ["0-0", [("6-0", None)], ["6-0"]],  # Deleted entry
+            ["0-0", [("7-0", {"task_id": "normal"})], []],
+        ]
+
+        entry = await queue.pop(client, "c1", timeout=1.0)
+
+        assert entry == QueueEntry("normal", "task_stream:2", "7-0")
+        assert [call.args[0] for call in client.xautoclaim.call_args_list] == [
+            "task_stream:4",
+            "task_stream:3",
+            "task_stream:2",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_ack_acknowledges_and_deletes(self, queue):
+        client, pipe = _redis_with_pipeline([1, 1])
+
+        await queue.ack(client, QueueEntry("task-1", "task_stream:2", "1-0"))
+
+        pipe.xack.assert_called_once_with("task_stream:2", CONSUMER_GROUP, "1-0")
+        pipe.xdel.assert_called_once_with("task_stream:2", "1-0")
+
+    @pytest.mark.asyncio
+    async def test_release_requeues_buffered_entries(self, queue):
+        client = AsyncMock()
+        client.xreadgroup.return_value = [
+            ["task_stream:4", [("2-0", {"task_id": "urgent"})]],
+            ["task_stream:2", [("1-0", {"task_id": "normal"})]],
+        ]
+        queue._release_script = AsyncMock(return_value=1)
+
+        await queue.pop(client, "c1", timeout=1.0)
+        await queue.release(client, "c1")
+
+        queue._release_script.assert_awaited_once_with(
+            keys=["task_stream:2"], args=[CONSUMER_GROUP, "c1", "1-0", "normal"]
+        )
+        assert "c1" not in queue._buffer
+        # Nothing left to release a second time
+        await queue.release(client, "c1")
+        queue._release_script.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_size_sums_streams(self, queue):
+        client, _ = _redis_with_pipeline([1, 0, 2, 3])
+
+        assert await queue.size(client) == 6
+
+
+class TestFairQueue:
+    @pytest.fixture
+    def scripts(self):
+        return {}
+
+    @pytest_asyncio.fixture
+    async def queue(self, scripts):
+        client = MagicMock()
+
+        def register_script(source):
+            scripts[source] = AsyncMock()
+            return scripts[source]
+
+        client.register_script.side_effect = register_script
+        queue = FairQueue(lease_timeout=60)
+        await queue.setup(client)
+        return queue
+
+    @pytest.mark.asyncio
+    async def test_push_weights_tenant_by_plan(self, queue, scripts):
+        before = time.time()
+
+        await queue.push(AsyncMock(), "task-1", 3, tenant="user-1", plan="pro")
+
+        kwargs = scripts[FAIR_PUSH_LUA].call_args.kwargs
+        assert kwargs["keys"][:4] == [
+            "task_queue:fair:tenant:user-1",
+            "task_queue:fair:active",
+            "task_queue:fair:ring",
+            "task_queue:fair:signal",
+        ]
+        args = kwargs["args"]
+        assert args[:2] == ["user-1", "task-1"]
+        # Priority 3 sorts ahead of priority 2, then by enqueue time
+        assert 2 * PRIORITY_SCORE_SPAN + before <= args[2] < 3 * PRIORITY_SCORE_SPAN
+        assert args[3:] == [2, 4, "pro"]
+
+    @pytest.mark.asyncio
+    async def test_tasks_without_tenant_are_uncapped(self, queue, scripts):
+        await queue.push(AsyncMock(), "job-1", 2)
+
+        args = scripts[FAIR_PUSH_LUA].call_args.kwargs["args"]
+        assert args[0] == "system"
+        assert args[4] == 0
+
+    @pytest.mark.asyncio
+    async def test_delayed_member_keeps_tenant(self, queue):
+        client, pipe = _redis_with_pipeline([1, 1, 1, 1])
+
+        await queue.push(client, "task-1", 2, run_at=time.time() + 60, tenant="user-1")
+
+        key, members = pipe.zadd.call_args.args
+        assert key == DELAYED_KEY
+        assert list(members) == ["2:user-1:task-1"]
+
+    @pytest.mark.asyncio
+    async def test_pop_returns_tenant_and_enqueue_time(self, queue, scripts):
+        enqueued = time.time() - 5
+        scripts[FAIR_POP_LUA].return_value = [
+            "task-1",
+            "user-1",
+            str(2 * PRIORITY_SCORE_SPAN + enqueued),
+            "enterprise",
+        ]
+
+        client, _ = _redis_with_pipeline([["user-1"], 1])
+
+        entry = await queue.pop(client, "c1", timeout=1.0)
+
+        assert (entry.task_id, entry.tenant, entry.plan) == ("task-1", "user-1", "enterprise")
+        assert entry.enqueued_at == pytest.approx(enqueued, abs=0.01)
+        kwargs = scripts[FAIR_POP_LUA].call_args.kwargs
+        assert kwargs["args"][1] >= enqueued + 60
+        assert kwargs["args"][2:] == ["user-1"]
+        assert kwargs["keys"][7:] == [
+            "task_queue:fair:tenant:user-1",
+            "task_queue:fair:running:user-1",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_pop_rereads_ring_when_it_moved(self, queue, scripts):
+        scripts[FAIR_POP_LUA].side_effect = [1, ["task-1", "user-2", "5.0", ""]]
+        client, pipe = _redis_with_pipeline(None)
+        pipe.execute.side_effect = [[["user-1"], 2], [["user-2"], 2]]
+
+        entry = await queue.pop(client, "c1", timeout=1.0)
+
+        assert entry.tenant == "user-2"
+        assert scripts[FAIR_POP_LUA].call_args.kwargs["args"][2:] == ["user-2"]
+
+    @pytest.mark.asyncio
+    async def test_pop_stops_after_a_full_pass_of_the_ring(self, queue, scripts):
+        queue.pop_window = 1
+        scripts[FAIR_POP_LUA].return_value = 1
+        client, pipe = _redis_with_pipeline([["user-1"], 3])
+        client.blpop = AsyncMock(return_value=None)
+
+        assert await queue.pop(client, "c1", timeout=1.0) is None
+        # 3 tenants one at a time, plus one more round in case the ring moved
+        assert scripts[FAIR_POP_LUA].await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_promote_due_declares_tenant_queues(self, queue, scripts):
+        client = AsyncMock()
+        client.zrangebyscore.return_value = ["2:user-1:task-1", "3:task-2"]
+        scripts[FAIR_PROMOTE_DUE_LUA].return_value = [2, None]
+
+        assert await queue.promote_due(client) == (2, None)
+
+        kwargs = scripts[FAIR_PROMOTE_DUE_LUA].call_args.kwargs
+        assert kwargs["keys"][4:] == [
+            "task_queue:fair:tenant:user-1",
+            "task_queue:fair:tenant:system",
+        ]
+        args = kwargs["args"]
+        assert args[:3] == ["2:user-1:task-1", "user-1", "task-1"]
+        assert args[4:7] == ["3:task-2", "system", "task-2"]
+        assert args[7] < args[3]  # Priority 3 ahead of priority 2
+
+    @pytest.mark.asyncio
+    async def test_pop_waits_for_signal_when_nothing_may_run(self, queue, scripts):
+        scripts[FAIR_POP_LUA].side_effect = [0, ["task-1", "user-1", "5.0", ""]]
+        client, _ = _redis_with_pipeline([["user-1"], 1])
+        client.blpop.return_value = ("task_queue:fair:signal", "1")
+
+        entry = await queue.pop(client, "c1", timeout=1.0)
+
+        client.blpop.assert_awaited_once_with(["task_queue:fair:signal"], timeout=1.0)
+        assert entry.task_id == "task-1"
+        assert entry.plan is None
+
+    @pytest.mark.asyncio
+    async def test_ack_releases_slot_and_wakes_worker(self, queue):
+        client, pipe = _redis_with_pipeline([1, 1, True])
+
+        await queue.ack(client, QueueEntry("task-1", tenant="user-1"))
+
+        pipe.zrem.assert_called_once_with("task_queue:fair:running:user-1", "task-1")
+        pipe.rpush.assert_called_once_with("task_queue:fair:signal", 1)
+
+    @pytest.mark.asyncio
+    async def test_tenant_stats(self, queue):
+        now = time.time()
+        client, pipe = _redis_with_pipeline(
+            [
+                3,
+                [],
+                [("task-1", 2 * PRIORITY_SCORE_SPAN + now - 30)],
+                [],
+                [("task-2", 4 * PRIORITY_SCORE_SPAN + now - 90)],
+                2,
+                "basic",
+            ]
+        )
+        client.smembers.return_value = {"user-1"}
+
+        stats = await queue.tenant_stats(client)
+
+        assert stats["user-1"]["queued"] == 3
+        assert stats["user-1"]["running"] == 2
+        assert stats["user-1"]["head_wait"] == pytest.approx(30, abs=1)
+        # The oldest task is a low priority one behind the head
+        assert stats["user-1"]["age"] == pytest.approx(90, abs=1)
+
+
+class TestTenantAgeMetric:
+    def test_only_oldest_tenants_get_their_own_series(self):
+        prometheus = get_prometheus_service()
+        ages = {f"tenant-{i}": float(i) for i in range(5)}
+
+        with patch.object(prometheus, "initialized", True), patch.object(
+            monitoring_config, "PROMETHEUS_TOP_USERS", 2
+        ):
+            prometheus.set_task_queue_tenant_ages(ages)
+            exported = _tenant_ages(prometheus)
+            assert exported == {"tenant-4": 4.0, "tenant-3": 3.0, "other": 2.0}
+
+            # Tenants that drained or fell out of the top are removed
+            prometheus.set_task_queue_tenant_ages({"tenant-9": 9.0})
+            assert _tenant_ages(prometheus) == {"tenant-9": 9.0}
+
+
+def _tenant_ages(prometheus):
+    return {
+        sample.labels["tenant"]: sample.value
+        for metric in prometheus.task_queue_tenant_age_seconds.collect()
+        for sample in metric.samples
+    }
+
+
+class TestWorkerQueueSelection:
+    def test_backend_selector(self):
+        assert isinstance(create_task_queue("sorted_set"), SortedSetQueue)
+        assert isinstance(create_task_queue("stream", 90), StreamQueue)
+        assert create_task_queue("fair", 90).lease_timeout == 90
+        with pytest.raises(ValueError):
+            create_task_queue("kafka")
+
+    def test_visibility_timeout_exceeds_task_timeout(self):
+        worker = BackgroundWorker(queue_backend="stream", task_timeout=300)
+
+        assert worker.queue.visibility_timeout == 360
+
+    @pytest.mark.asyncio
+    async def test_worker_acks_after_processing(self):
+        worker = BackgroundWorker(queue_backend="stream")
+        entry = QueueEntry("task-1", "task_stream:2", "1-0")
+        worker.queue = AsyncMock()
+        worker.queue.pop.side_effect = [entry, asyncio.CancelledError()]
+        worker.running = True
+
+        async def process(worker_id, task_id):
+            worker.queue.ack.assert_not_awaited()
+
+        worker._process_task = AsyncMock(side_effect=process)
+
+        await worker._worker("worker-0")
+
+        worker._process_task.assert_awaited_once_with("worker-0", "task-1")
+        worker.queue.ack.assert_awaited_once_with(worker.redis, entry)
+
+    @pytest.mark.asyncio
+    async def test_enqueue_passes_tenant_to_queue(self):
+        worker = BackgroundWorker(queue_backend="fair")
+        worker.register_task("batch", AsyncMock())
+        worker.queue = AsyncMock()
+        worker.redis = AsyncMock()
+
+        await worker.enqueue_task("batch", priority="low", tenant="user-1", plan="pro")
+
+        kwargs = worker.queue.push.call_args.kwargs
+        assert (kwargs["tenant"], kwargs["plan"]) == ("user-1", "pro")
+        assert worker.queue.push.call_args.args[2] == TaskPriority.LOW.value